@@ -0,0 +1,99 @@
+"""Measures the Python-side cost of Sound property access and of each Sound instance.
+
+Times the common getters and setters on a loaded sound and the listener cone getter on its
+engine, then the two patterns they avoid: allocating a fresh out-parameter on every call, and
+checking for the loaded flag with hasattr() before reading it. Finally compares the memory of
+unloaded Sound instances with objects holding the same attributes in a __dict__.
+
+	python benchmarks/sound_overhead.py sound.wav --calls 200000 --instances 20000
+"""
+import argparse
+import time
+import tracemalloc
+
+import soundobj
+
+
+def per_call(func, calls: int) -> float:
+	"""Best of three runs, in nanoseconds per call."""
+	best = float("inf")
+	for _ in range(3):
+		start = time.perf_counter_ns()
+		for _ in range(calls):
+			func()
+		best = min(best, (time.perf_counter_ns() - start) / calls)
+	return best
+
+
+def per_instance(factory, instances: int) -> float:
+	"""Bytes allocated per object while creating and holding `instances` of them."""
+	tracemalloc.start()
+	before = tracemalloc.get_traced_memory()[0]
+	objects = [factory() for _ in range(instances)]
+	used = tracemalloc.get_traced_memory()[0] - before
+	tracemalloc.stop()
+	del objects
+	return used / instances
+
+
+class DictLayout:
+	"""Sound's attributes in an ordinary __dict__, for comparison."""
+	def __init__(self):
+		for name in soundobj.Sound.__slots__:
+			if name != '__weakref__':
+				setattr(self, name, None)
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument("path")
+	parser.add_argument("--calls", type=int, default=200000)
+	parser.add_argument("--instances", type=int, default=20000)
+	args = parser.parse_args()
+	engine = soundobj.Engine(soundobj.EngineConfig(noDevice=True, sampleRate=48000, channels=2))
+	sound = soundobj.Sound(engine)
+	sound.load(args.path, stream=False)
+
+	def set_volume():
+		sound.volume = 0.5
+
+	def set_position():
+		sound.position = (1.0, 0.0, 1.0)
+
+	cases = {
+		"volume (get)": lambda: sound.volume,
+		"volume (set)": set_volume,
+		"position (get)": lambda: sound.position,
+		"position (set)": set_position,
+		"position_in_seconds": lambda: sound.position_in_seconds,
+		"length_in_seconds": lambda: sound.length_in_seconds,
+		"cone": lambda: sound.cone,
+		"data_format": lambda: sound.data_format,
+		"get_listener_cone": lambda: engine.get_listener_cone(0),
+	}
+	print("per call:")
+	for name, func in cases.items():
+		print(f"  {name:>22}: {per_call(func, args.calls):7.1f} ns")
+
+	ffi = soundobj.ffi
+	scratch = soundobj._scratch
+	fresh = per_call(lambda: ffi.new("float*"), args.calls)
+	reused = per_call(lambda: scratch.floats, args.calls)
+	print("out-parameter:")
+	print(f"  {'ffi.new per call':>22}: {fresh:7.1f} ns")
+	print(f"  {'per-thread scratch':>22}: {reused:7.1f} ns  (saves {fresh - reused:.1f} ns per pointer)")
+	guarded = per_call(lambda: hasattr(sound, '_loaded') and sound._loaded, args.calls)
+	direct = per_call(lambda: sound._loaded, args.calls)
+	print("loaded check:")
+	print(f"  {'hasattr + attribute':>22}: {guarded:7.1f} ns")
+	print(f"  {'attribute':>22}: {direct:7.1f} ns  (saves {guarded - direct:.1f} ns per call)")
+
+	slotted = per_instance(lambda: soundobj.Sound(engine), args.instances)
+	dicted = per_instance(DictLayout, args.instances)
+	print("per instance:")
+	print(f"  {'Sound (__slots__)':>22}: {slotted:7.0f} bytes")
+	print(f"  {'same in a __dict__':>22}: {dicted:7.0f} bytes  ({(1 - slotted / dicted) * 100:.0f}% smaller)")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,91 @@
+"""Measures how load and control throughput scale with the number of threads driving one engine.
+
+Each run splits a fixed amount of work across N threads on an offline engine: loading (and dropping)
+sounds from a file, then setting volume, pan, pitch and position on already loaded sounds and reading
+positions back. Speedup is relative to one thread. On a GIL build control calls mostly serialize; run it
+under a free-threaded interpreter (python3.14t) to see them scale.
+
+	python benchmarks/threads.py sound.wav --threads 1,2,4,8 --sounds 64 --seconds 2
+"""
+import argparse
+import sys
+import threading
+import time
+
+import soundobj
+
+
+def run_threads(count: int, target, *args) -> float:
+	barrier = threading.Barrier(count + 1)
+	threads = [threading.Thread(target=target, args=(barrier, index, count) + args) for index in range(count)]
+	for thread in threads:
+		thread.start()
+	barrier.wait()
+	start = time.perf_counter()
+	for thread in threads:
+		thread.join()
+	return time.perf_counter() - start
+
+
+def load_worker(barrier: threading.Barrier, index: int, count: int, engine: soundobj.Engine, path: str, loads: int, stream: bool):
+	barrier.wait()
+	for _ in range(index, loads, count):
+		sound = soundobj.Sound(engine)
+		sound.load(path, stream=stream)
+		del sound
+
+
+def control_worker(barrier: threading.Barrier, index: int, count: int, sounds: list, deadline: list, ops: list):
+	mine = sounds[index::count] or sounds[:1]
+	done = 0
+	barrier.wait()
+	end = time.perf_counter() + deadline[0]
+	while time.perf_counter() < end:
+		for step, sound in enumerate(mine):
+			sound.volume = 0.5 + (step & 1) * 0.25
+			sound.pan = -0.5 + (step & 3) * 0.25
+			sound.pitch = 1.0 + (step & 1) * 0.01
+			sound.position = (float(step), 0.0, 1.0)
+			sound.position
+		done += len(mine) * 5
+	ops[index] = done
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+	parser.add_argument("path")
+	parser.add_argument("--threads", default="1,2,4,8", help="comma separated thread counts")
+	parser.add_argument("--sounds", type=int, default=64, help="sounds loaded per load run, and driven per control run")
+	parser.add_argument("--seconds", type=float, default=2.0, help="length of each control run")
+	parser.add_argument("--decode", action="store_true", help="fully decode on load instead of streaming")
+	args = parser.parse_args()
+	counts = [int(value) for value in args.threads.split(",")]
+	gil = sys._is_gil_enabled() if hasattr(sys, "_is_gil_enabled") else True
+	print(f"python {sys.version.split()[0]}, GIL {'enabled' if gil else 'disabled'}")
+	engine = soundobj.Engine(soundobj.EngineConfig(noDevice=True, sampleRate=48000, channels=2))
+
+	print("load:")
+	base = None
+	for count in counts:
+		elapsed = run_threads(count, load_worker, engine, args.path, args.sounds, not args.decode)
+		rate = args.sounds / elapsed
+		base = base or rate
+		print(f"  {count:3d} threads: {rate:10.1f} loads/s, {rate / base:5.2f}x")
+
+	sounds = []
+	for _ in range(args.sounds):
+		sound = soundobj.Sound(engine)
+		sound.load(args.path, stream=not args.decode)
+		sounds.append(sound)
+	print("control:")
+	base = None
+	for count in counts:
+		ops = [0] * count
+		elapsed = run_threads(count, control_worker, sounds, [args.seconds], ops)
+		rate = sum(ops) / elapsed
+		base = base or rate
+		print(f"  {count:3d} threads: {rate:10.0f} ops/s, {rate / base:5.2f}x")
+
+
+if __name__ == "__main__":
+	main()
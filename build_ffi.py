@@ -1,5 +1,6 @@
 import os
 import sys
+import sysconfig
 from pathlib import Path
 from cffi import FFI
 
@@ -21,6 +22,8 @@ ffibuilder.cdef(cdefs)
 
 include_dirs = [str(root_dir), str(lib_dir), str(vcpkg.install_path / "include")]
 library_dirs = [str(vcpkg.install_path / "lib")]
+# Free-threaded builds have no stable ABI, so the module is built against the full API there.
+extra_args = {"py_limited_api": False} if sysconfig.get_config_var("Py_GIL_DISABLED") else {}
 
 ffibuilder.set_source("_c_miniaudio", """
 	#include <stdint.h>
@@ -41,10 +44,29 @@ ffibuilder.set_source("_c_miniaudio", """
 		if (count) *count = sizeof(custom_decoders) / sizeof(custom_decoders[0]);
 		return custom_decoders;
 	}
+
+	#include "lib/soundobj_decode.c"
+	#include "lib/soundobj_reader.c"
+	#include "lib/soundobj_analyze.c"
+	#include "lib/soundobj_probe.c"
+	#include "lib/soundobj_convert.c"
+	#include "lib/soundobj_command.c"
+	#include "lib/soundobj_trace.c"
+	#include "lib/soundobj_stream.c"
+	#include "lib/soundobj_meter.c"
+	#include "lib/soundobj_convolver.c"
+	#include "lib/soundobj_occlusion.c"
+	#include "lib/soundobj_ambisonic.c"
+	#include "lib/soundobj_lod.c"
+	#include "lib/soundobj_automation.c"
+	#include "lib/soundobj_record.c"
+	#include "lib/soundobj_engine.c"
+	#include "lib/soundobj_playlist.c"
 """,
 	include_dirs=include_dirs,
 	library_dirs=library_dirs,
-	libraries=["opus", "opusfile", "ogg", "vorbis", "vorbisfile"]
+	libraries=["opus", "opusfile", "ogg", "vorbis", "vorbisfile"],
+	**extra_args
 )
 
 if __name__ == "__main__":
@@ -337,6 +337,147 @@ typedef struct
 
 typedef ma_uint8 ma_channel_position;
 
+typedef enum
+{
+	ma_channel_mix_mode_rectangular = 0,   /* Simple averaging based on the plane(s) the channel is sitting on. */
+	ma_channel_mix_mode_simple,            /* Drop excess channels; zeroed out extra channels. */
+	ma_channel_mix_mode_custom_weights,    /* Use custom weights specified in ma_channel_converter_config. */
+	ma_channel_mix_mode_default = ma_channel_mix_mode_rectangular
+} ma_channel_mix_mode;
+
+typedef struct ma_resampler ma_resampler;
+
+typedef struct
+{
+	ma_uint32 callbacks;
+	ma_uint32 deadlineMisses;
+	float peakLoad;
+	ma_uint32 periodSizeInFrames;
+} soundobj_period_stats;
+
+typedef struct
+{
+	ma_uint64 frameCount;
+	ma_uint32 channels;
+	ma_uint32 sampleRate;
+	ma_uint32 peakBlock;
+	ma_uint32 peakLevels;
+	ma_uint64 peakSize;
+	ma_int8* pPeaks;
+	double loudness;
+	double truePeak;
+} soundobj_analysis;
+
+typedef enum
+{
+	SOUNDOBJ_CODEC_UNKNOWN,
+	SOUNDOBJ_CODEC_WAV,
+	SOUNDOBJ_CODEC_FLAC,
+	SOUNDOBJ_CODEC_MP3,
+	SOUNDOBJ_CODEC_VORBIS,
+	SOUNDOBJ_CODEC_OPUS
+} soundobj_codec;
+
+typedef struct
+{
+	soundobj_codec codec;
+	ma_format format;
+	ma_uint32 channels;
+	ma_uint32 sampleRate;
+	ma_uint64 frameCount;
+	ma_bool32 exact;
+} soundobj_probe_info;
+
+typedef struct
+{
+	ma_uint32 starvations;
+	ma_uint64 starvedFrames;
+	ma_uint32 pagesDecoded;
+	ma_uint64 bufferedFrames;
+	ma_uint32 streamCount;
+} soundobj_stream_stats;
+
+typedef struct
+{
+	ma_uint32 full;
+	ma_uint32 reduced;
+	ma_uint32 minimal;
+} soundobj_lod_counts;
+
+typedef enum
+{
+	SOUNDOBJ_AUTOMATION_VOLUME,
+	SOUNDOBJ_AUTOMATION_PITCH,
+	SOUNDOBJ_AUTOMATION_PAN,
+	SOUNDOBJ_AUTOMATION_POSITION,
+	SOUNDOBJ_AUTOMATION_PARAMETER_COUNT
+} soundobj_automation_parameter;
+
+typedef enum
+{
+	SOUNDOBJ_CURVE_LINEAR,
+	SOUNDOBJ_CURVE_EXPONENTIAL,
+	SOUNDOBJ_CURVE_BEZIER
+} soundobj_curve_shape;
+
+typedef struct
+{
+	ma_uint64 frame;
+	float value[3];
+	ma_uint32 shape;
+	float control[2];
+} soundobj_automation_point;
+
+typedef enum
+{
+	SOUNDOBJ_TRACE_AUDIO_CALLBACK,
+	SOUNDOBJ_TRACE_MIX,
+	SOUNDOBJ_TRACE_DEADLINE_MISS,
+	SOUNDOBJ_TRACE_JOB,
+	SOUNDOBJ_TRACE_STREAM_PAGE,
+	SOUNDOBJ_TRACE_STREAM_STARVATION,
+	SOUNDOBJ_TRACE_NAME_COUNT
+} soundobj_trace_name;
+
+typedef struct
+{
+	double timestamp;
+	double duration;
+	ma_uint64 threadId;
+	ma_uint64 arg;
+	ma_uint32 name;
+} soundobj_trace_event;
+
+typedef struct soundobj_engine_state soundobj_engine_state;
+typedef struct soundobj_playlist soundobj_playlist;
+typedef struct soundobj_command_buffer soundobj_command_buffer;
+typedef struct soundobj_meter soundobj_meter;
+typedef struct soundobj_convolver soundobj_convolver;
+typedef struct soundobj_occlusion soundobj_occlusion;
+typedef struct soundobj_ambisonic soundobj_ambisonic;
+typedef struct soundobj_lod soundobj_lod;
+typedef struct soundobj_automation soundobj_automation;
+typedef struct soundobj_recorder soundobj_recorder;
+typedef struct soundobj_stream soundobj_stream;
+typedef struct soundobj_stream_scheduler soundobj_stream_scheduler;
+typedef struct soundobj_reader soundobj_reader;
+typedef struct soundobj_tracer soundobj_tracer;
+typedef struct soundobj_job_threads soundobj_job_threads;
+typedef enum
+{
+	SOUNDOBJ_COMMAND_START,
+	SOUNDOBJ_COMMAND_STOP,
+	SOUNDOBJ_COMMAND_SEEK,
+	SOUNDOBJ_COMMAND_SET_VOLUME,
+	SOUNDOBJ_COMMAND_SET_PITCH,
+	SOUNDOBJ_COMMAND_SET_PAN,
+	SOUNDOBJ_COMMAND_SET_LOOPING,
+	SOUNDOBJ_COMMAND_SET_POSITION,
+	SOUNDOBJ_COMMAND_SET_DIRECTION,
+	SOUNDOBJ_COMMAND_SET_VELOCITY,
+	SOUNDOBJ_COMMAND_SET_FADE
+} soundobj_command_type;
+
 typedef struct
 {
 	...;
@@ -347,6 +488,10 @@ typedef struct
 	...;
 } ma_sound_group_config;
 
+ma_uint32 ma_node_get_output_channels(const ma_node* pNode, ma_uint32 outputBusIndex);
+ma_result ma_node_attach_output_bus(ma_node* pNode, ma_uint32 outputBusIndex, ma_node* pOtherNode, ma_uint32 otherNodeInputBusIndex);
+ma_result ma_node_detach_output_bus(ma_node* pNode, ma_uint32 outputBusIndex);
+
 ma_engine_config ma_engine_config_init(void);
 ma_result ma_engine_init(const ma_engine_config* pConfig, ma_engine* pEngine);
 void ma_engine_uninit(ma_engine* pEngine);
@@ -390,6 +535,8 @@ ma_result ma_engine_play_sound(ma_engine* pEngine, const char* pFilePath, ma_sou
 ma_resource_manager_config ma_resource_manager_config_init(void);
 ma_result ma_resource_manager_init(const ma_resource_manager_config* pConfig, ma_resource_manager* pResourceManager);
 void ma_resource_manager_uninit(ma_resource_manager* pResourceManager);
+ma_result ma_resource_manager_register_decoded_data(ma_resource_manager* pResourceManager, const char* pName, const void* pData, ma_uint64 frameCount, ma_format format, ma_uint32 channels, ma_uint32 sampleRate);
+ma_result ma_resource_manager_unregister_data(ma_resource_manager* pResourceManager, const char* pName);
 
 ma_sound_config ma_sound_config_init(void);
 ma_sound_config ma_sound_config_init_2(ma_engine* pEngine);
@@ -535,3 +682,110 @@ ma_result ma_engine_node_init_preallocated(const ma_engine_node_config* pConfig,
 ma_result ma_engine_node_init(const ma_engine_node_config* pConfig, const ma_allocation_callbacks* pAllocationCallbacks, ma_engine_node* pEngineNode);
 void ma_engine_node_uninit(ma_engine_node* pEngineNode, const ma_allocation_callbacks* pAllocationCallbacks);
 ma_decoding_backend_vtable** soundobj_get_custom_decoders(ma_uint32* count);
+
+ma_result soundobj_decode_file(const char* pFilePath, ma_format format, ma_uint32 channels, ma_uint32 sampleRate, void** ppFrames, ma_uint64* pFrameCount, ma_format* pFormatOut, ma_uint32* pChannelsOut, ma_uint32* pSampleRateOut);
+ma_result soundobj_decode_vfs(ma_vfs* pVFS, const char* pFilePath, ma_format format, ma_uint32 channels, ma_uint32 sampleRate, void** ppFrames, ma_uint64* pFrameCount, ma_format* pFormatOut, ma_uint32* pChannelsOut, ma_uint32* pSampleRateOut);
+void soundobj_free(void* p);
+ma_result soundobj_reader_create(void* pHandle, ma_int64 size, size_t chunkSize, soundobj_reader** ppReader);
+void soundobj_reader_destroy(soundobj_reader* pReader);
+ma_vfs* soundobj_reader_get_vfs(soundobj_reader* pReader);
+extern "Python" ma_int64 soundobj_reader_fill(void* pHandle, ma_uint64 offset, void* pBuffer, ma_uint64 bytes);
+ma_result soundobj_analyze_file(const char* pFilePath, ma_uint32 peakBlock, soundobj_analysis* pAnalysis);
+ma_result soundobj_probe_file(const char* pFilePath, ma_bool32 scan, soundobj_probe_info* pInfo);
+
+ma_resampler* soundobj_resampler_create(ma_format format, ma_uint32 channels, ma_uint32 sampleRateIn, ma_uint32 sampleRateOut, ma_uint32 lpfOrder);
+void soundobj_resampler_destroy(ma_resampler* pResampler);
+ma_uint64 soundobj_resampler_get_expected_output_frame_count(ma_resampler* pResampler, ma_uint64 frameCountIn);
+ma_result soundobj_resampler_process(ma_resampler* pResampler, const void* pFramesIn, ma_uint64* pFrameCountIn, void* pFramesOut, ma_uint64* pFrameCountOut);
+ma_result soundobj_resample(ma_format format, ma_uint32 channels, ma_uint32 sampleRateIn, ma_uint32 sampleRateOut, ma_uint32 lpfOrder, const void* pFramesIn, ma_uint64 frameCountIn, void* pFramesOut, ma_uint64* pFrameCountOut);
+ma_result soundobj_convert_channels(ma_format format, ma_uint32 channelsIn, ma_uint32 channelsOut, ma_channel_mix_mode mixingMode, const void* pFramesIn, void* pFramesOut, ma_uint64 frameCount);
+
+soundobj_engine_state* soundobj_engine_state_create(void);
+void soundobj_engine_state_destroy(soundobj_engine_state* pState);
+void soundobj_engine_config_attach(ma_engine_config* pConfig, soundobj_engine_state* pState);
+void soundobj_engine_get_period_stats(soundobj_engine_state* pState, soundobj_period_stats* pStats, ma_bool32 reset);
+ma_uint32 soundobj_engine_get_period_size(ma_engine* pEngine);
+ma_result soundobj_engine_set_period_size(ma_engine* pEngine, soundobj_engine_state* pState, ma_uint32 periodSizeInFrames);
+ma_result soundobj_engine_init_matched(ma_engine_config* pEngineConfig, ma_resource_manager_config* pResourceManagerConfig, ma_resource_manager* pResourceManager, ma_engine* pEngine);
+void soundobj_engine_release_inlined_sounds(ma_engine* pEngine);
+void soundobj_engine_state_set_command_buffer(soundobj_engine_state* pState, soundobj_command_buffer* pCommands);
+soundobj_playlist* soundobj_playlist_create(ma_resource_manager* pResourceManager, ma_uint32 channels, ma_uint32 sampleRate);
+void soundobj_playlist_destroy(soundobj_playlist* pPlaylist);
+ma_result soundobj_playlist_append(soundobj_playlist* pPlaylist, const char* pFilePath);
+ma_uint32 soundobj_playlist_clear(soundobj_playlist* pPlaylist);
+void soundobj_playlist_skip(soundobj_playlist* pPlaylist);
+void soundobj_playlist_set_crossfade(soundobj_playlist* pPlaylist, ma_uint32 frames);
+ma_uint32 soundobj_playlist_get_index(soundobj_playlist* pPlaylist);
+ma_uint32 soundobj_playlist_get_pending_count(soundobj_playlist* pPlaylist);
+soundobj_command_buffer* soundobj_command_buffer_create(ma_uint32 capacity);
+void soundobj_command_buffer_destroy(soundobj_command_buffer* pBuffer);
+ma_result soundobj_command_buffer_post(soundobj_command_buffer* pBuffer, ma_uint32 type, ma_sound* pSound, float x, float y, float z);
+ma_uint32 soundobj_command_buffer_apply(soundobj_command_buffer* pBuffer, ma_bool32 wait);
+ma_uint32 soundobj_command_buffer_cancel(soundobj_command_buffer* pBuffer, ma_sound* pSound);
+soundobj_meter* soundobj_meter_create(ma_uint32 channels, ma_uint32 sampleRate, ma_uint32 windowFrames, ma_uint32 bandCount);
+void soundobj_meter_destroy(soundobj_meter* pMeter);
+ma_result soundobj_meter_attach(soundobj_meter* pMeter, ma_node_graph* pNodeGraph, ma_node* pSource);
+void soundobj_meter_detach(soundobj_meter* pMeter);
+ma_uint32 soundobj_meter_get_snapshot_size(soundobj_meter* pMeter);
+ma_uint32 soundobj_meter_read(soundobj_meter* pMeter, float* pOut, ma_bool32 resetHold);
+void soundobj_engine_state_set_meter(soundobj_engine_state* pState, soundobj_meter* pMeter);
+ma_result soundobj_convolver_create(ma_node_graph* pNodeGraph, const float* pImpulse, ma_uint64 impulseFrames, ma_uint32 channels, ma_uint32 blockFrames, ma_bool32 normalize, soundobj_convolver** ppConvolver);
+ma_result soundobj_convolver_insert(soundobj_convolver* pConvolver, ma_node* pSource);
+void soundobj_convolver_destroy(soundobj_convolver* pConvolver);
+void soundobj_convolver_set_mix(soundobj_convolver* pConvolver, float wet, float dry);
+ma_uint32 soundobj_convolver_get_partition_count(soundobj_convolver* pConvolver);
+soundobj_occlusion* soundobj_occlusion_create(ma_engine* pEngine, float minCutoff, float moveThreshold);
+void soundobj_occlusion_destroy(soundobj_occlusion* pOcclusion);
+ma_result soundobj_occlusion_add_mesh(soundobj_occlusion* pOcclusion, const float* pVertices, ma_uint32 vertexCount, const ma_uint32* pIndices, ma_uint32 triangleCount, float transmission, ma_uint32* pId);
+ma_result soundobj_occlusion_remove_mesh(soundobj_occlusion* pOcclusion, ma_uint32 id);
+ma_result soundobj_occlusion_add(soundobj_occlusion* pOcclusion, ma_sound* pSound);
+void soundobj_occlusion_remove(soundobj_occlusion* pOcclusion, ma_sound* pSound);
+ma_uint32 soundobj_occlusion_update(soundobj_occlusion* pOcclusion);
+void soundobj_occlusion_query(soundobj_occlusion* pOcclusion, const float* pOrigins, const float* pTargets, ma_uint32 count, float* pTransmission);
+float soundobj_occlusion_get_transmission(soundobj_occlusion* pOcclusion, ma_sound* pSound);
+ma_uint32 soundobj_occlusion_get_triangle_count(soundobj_occlusion* pOcclusion);
+ma_result soundobj_ambisonic_create(ma_engine* pEngine, ma_uint32 order, float minChannelGain, soundobj_ambisonic** ppBus);
+void soundobj_ambisonic_destroy(soundobj_ambisonic* pBus);
+ma_result soundobj_ambisonic_add(soundobj_ambisonic* pBus, ma_sound* pSound);
+void soundobj_ambisonic_remove(soundobj_ambisonic* pBus, ma_sound* pSound);
+ma_uint32 soundobj_ambisonic_get_emitter_count(soundobj_ambisonic* pBus);
+ma_result soundobj_engine_read_pcm_frames(ma_engine* pEngine, void* pFramesOut, ma_uint64 frameCount, ma_uint64* pFramesRead);
+soundobj_lod* soundobj_lod_create(float reducedDistance, float minimalDistance, float interval);
+void soundobj_lod_destroy(soundobj_lod* pLod);
+ma_result soundobj_lod_add(soundobj_lod* pLod, ma_sound* pSound, float priority);
+void soundobj_lod_remove(soundobj_lod* pLod, ma_sound* pSound);
+void soundobj_lod_set_priority(soundobj_lod* pLod, ma_sound* pSound, float priority);
+ma_int32 soundobj_lod_get_tier(soundobj_lod* pLod, ma_sound* pSound);
+void soundobj_lod_get_counts(soundobj_lod* pLod, soundobj_lod_counts* pCounts);
+void soundobj_engine_state_set_lod(soundobj_engine_state* pState, soundobj_lod* pLod);
+soundobj_automation* soundobj_automation_create(void);
+void soundobj_automation_destroy(soundobj_automation* pAutomation);
+ma_result soundobj_automation_set(soundobj_automation* pAutomation, ma_sound* pSound, ma_uint32 parameter, const soundobj_automation_point* pPoints, ma_uint32 pointCount);
+void soundobj_automation_clear(soundobj_automation* pAutomation, ma_sound* pSound, ma_uint32 parameter);
+ma_bool32 soundobj_automation_is_active(soundobj_automation* pAutomation, ma_sound* pSound, ma_uint32 parameter);
+void soundobj_engine_state_set_automation(soundobj_engine_state* pState, soundobj_automation* pAutomation);
+double soundobj_trace_now(void);
+soundobj_tracer* soundobj_tracer_create(ma_uint32 capacity);
+void soundobj_tracer_destroy(soundobj_tracer* pTracer);
+void soundobj_tracer_install(soundobj_tracer* pTracer);
+double soundobj_trace_begin(void);
+void soundobj_trace_end(ma_uint32 name, double start, ma_uint64 arg);
+void soundobj_trace_instant(ma_uint32 name, ma_uint64 arg);
+ma_uint32 soundobj_tracer_read(soundobj_tracer* pTracer, soundobj_trace_event* pEvents, ma_uint32 maxEvents, ma_uint64* pDropped);
+soundobj_job_threads* soundobj_job_threads_start(ma_resource_manager* pResourceManager, ma_uint32 count);
+void soundobj_job_threads_stop(soundobj_job_threads* pThreads);
+ma_result soundobj_recorder_create(const char* pFilePath, ma_format format, ma_uint32 channels, ma_uint32 sampleRate, ma_uint32 bufferFrames, ma_bool32 flac, soundobj_recorder** ppRecorder);
+ma_result soundobj_recorder_flush(soundobj_recorder* pRecorder);
+ma_result soundobj_recorder_destroy(soundobj_recorder* pRecorder);
+ma_uint64 soundobj_recorder_get_frames_written(soundobj_recorder* pRecorder);
+ma_uint64 soundobj_recorder_get_dropped_frames(soundobj_recorder* pRecorder);
+void soundobj_engine_state_set_recorder(soundobj_engine_state* pState, soundobj_recorder* pRecorder);
+soundobj_stream_scheduler* soundobj_stream_scheduler_create(ma_resource_manager* pResourceManager);
+void soundobj_stream_scheduler_destroy(soundobj_stream_scheduler* pScheduler);
+void soundobj_stream_scheduler_get_stats(soundobj_stream_scheduler* pScheduler, soundobj_stream_stats* pStats);
+ma_result soundobj_stream_create(soundobj_stream_scheduler* pScheduler, const char* pFilePath, ma_uint32 pageFrames, ma_uint32 pageCount, ma_int32 priority, soundobj_stream** ppStream);
+ma_result soundobj_stream_create_vfs(soundobj_stream_scheduler* pScheduler, ma_vfs* pVFS, const char* pFilePath, ma_uint32 pageFrames, ma_uint32 pageCount, ma_int32 priority, soundobj_stream** ppStream);
+void soundobj_stream_destroy(soundobj_stream* pStream);
+void soundobj_stream_set_priority(soundobj_stream* pStream, ma_int32 priority);
+ma_int32 soundobj_stream_get_priority(soundobj_stream* pStream);
+void soundobj_stream_get_stats(soundobj_stream* pStream, soundobj_stream_stats* pStats);
@@ -104,7 +104,169 @@ static opus_int64 ma_libopus_of_callback__tell(void* pUserData)
 }
 #endif
 
-static ma_result ma_libopus_init_internal(const ma_decoding_backend_config* pConfig, ma_libopus* pOpus)
+/*
+Seek table. libopusfile seeks by bisecting the Ogg stream, which on long streams is a burst of small reads and seeks for
+every scrub. Instead, a (PCM frame, byte offset) pair is recorded roughly every MA_LIBOPUS_SEEK_POINT_INTERVAL_IN_SECONDS as the stream
+is decoded. A seek then jumps straight to the nearest recorded page before the target and decodes forward the remaining distance, which is
+a single seek followed by a short sequential read. Targets past the indexed region fall back to bisection, and decoding from there fills in
+the table as usual.
+
+Jumping to a page resets the decoder, which only converges on the encoder's state after 80 ms of audio. Like libopusfile's own seeks, an
+indexed seek therefore starts at least MA_LIBOPUS_SEEK_PREROLL frames before the target and decodes through the pre-roll, so what is
+returned from the target on matches a straight decode.
+*/
+#ifndef MA_LIBOPUS_SEEK_POINT_INTERVAL_IN_SECONDS
+#define MA_LIBOPUS_SEEK_POINT_INTERVAL_IN_SECONDS 1
+#endif
+
+#define MA_LIBOPUS_SEEK_PREROLL 3840    /* 80 ms at 48 kHz. */
+
+static const ma_allocation_callbacks* ma_libopus_get_allocation_callbacks(const ma_libopus* pOpus)
+{
+    /* A zeroed copy means NULL was passed to init, in which case miniaudio's defaults should be used. */
+    if (pOpus->allocationCallbacks.onMalloc == NULL) {
+        return NULL;
+    }
+
+    return &pOpus->allocationCallbacks;
+}
+
+/* Returns the number of seek points at or before frameIndex. */
+static ma_uint32 ma_libopus_find_seek_point(const ma_libopus* pOpus, ma_uint64 frameIndex)
+{
+    ma_uint32 lo = 0;
+    ma_uint32 hi = pOpus->seekPointCount;
+
+    while (lo < hi) {
+        ma_uint32 mid = lo + (hi - lo) / 2;
+        if (pOpus->pSeekPoints[mid].pcmFrame <= frameIndex) {
+            lo = mid + 1;
+        } else {
+            hi = mid;
+        }
+    }
+
+    return lo;
+}
+
+#if !defined(MA_NO_LIBOPUS)
+static void ma_libopus_add_seek_point(ma_libopus* pOpus)
+{
+    OggOpusFile* of = (OggOpusFile*)pOpus->of;
+    ogg_int64_t pcmFrame;
+    ogg_int64_t byteOffset;
+    ma_uint32 index;
+
+    pcmFrame = op_pcm_tell(of);
+    if (pcmFrame < 0 || (ma_uint64)pcmFrame < pOpus->nextSeekPoint) {
+        return;
+    }
+
+    if (pOpus->seekPointInterval == 0) {
+        pOpus->seekPointInterval = (ma_uint64)48000 * MA_LIBOPUS_SEEK_POINT_INTERVAL_IN_SECONDS;
+        if (pOpus->seekPointInterval == 0) {
+            return;
+        }
+    }
+
+    /* Skip the point if a neighbour already covers this part of the stream. */
+    index = ma_libopus_find_seek_point(pOpus, (ma_uint64)pcmFrame);
+    if (index > 0 && (ma_uint64)pcmFrame - pOpus->pSeekPoints[index - 1].pcmFrame < pOpus->seekPointInterval) {
+        pOpus->nextSeekPoint = pOpus->pSeekPoints[index - 1].pcmFrame + pOpus->seekPointInterval;
+        return;
+    }
+    if (index < pOpus->seekPointCount && pOpus->pSeekPoints[index].pcmFrame - (ma_uint64)pcmFrame < pOpus->seekPointInterval) {
+        pOpus->nextSeekPoint = pOpus->pSeekPoints[index].pcmFrame + pOpus->seekPointInterval;
+        return;
+    }
+
+    byteOffset = op_raw_tell(of);
+    if (byteOffset < 0) {
+        return;
+    }
+
+    if (pOpus->seekPointCount == pOpus->seekPointCapacity) {
+        ma_uint32 newCapacity = (pOpus->seekPointCapacity == 0) ? 64 : pOpus->seekPointCapacity * 2;
+        ma_libopus_seek_point* pNewSeekPoints = (ma_libopus_seek_point*)ma_realloc(pOpus->pSeekPoints, sizeof(*pNewSeekPoints) * newCapacity, ma_libopus_get_allocation_callbacks(pOpus));
+        if (pNewSeekPoints == NULL) {
+            return; /* Not fatal. Seeks into this region will just bisect. */
+        }
+
+        pOpus->pSeekPoints = pNewSeekPoints;
+        pOpus->seekPointCapacity = newCapacity;
+    }
+
+    memmove(&pOpus->pSeekPoints[index + 1], &pOpus->pSeekPoints[index], sizeof(*pOpus->pSeekPoints) * (pOpus->seekPointCount - index));
+    pOpus->pSeekPoints[index].pcmFrame = (ma_uint64)pcmFrame;
+    pOpus->pSeekPoints[index].byteOffset = (ma_uint64)byteOffset;
+    pOpus->seekPointCount += 1;
+    pOpus->nextSeekPoint = (ma_uint64)pcmFrame + pOpus->seekPointInterval;
+}
+
+static ma_result ma_libopus_skip_pcm_frames(ma_libopus* pOpus, ma_uint64 frameCount)
+{
+    OggOpusFile* of = (OggOpusFile*)pOpus->of;
+    float discard[4096];
+    int channels = op_channel_count(of, -1);
+
+    if (channels <= 0) {
+        return MA_ERROR;
+    }
+
+    while (frameCount > 0) {
+        int framesRead = op_read_float(of, discard, (int)ma_min(frameCount * channels, sizeof(discard) / sizeof(discard[0]) / channels * channels), NULL);
+        if (framesRead < 0) {
+            return MA_ERROR;
+        }
+        if (framesRead == 0) {
+            return MA_AT_END;
+        }
+
+        frameCount -= (ma_uint64)framesRead;
+    }
+
+    return MA_SUCCESS;
+}
+
+/* Returns MA_DOES_NOT_EXIST when the table has nothing close enough, in which case the caller should bisect. */
+static ma_result ma_libopus_seek_to_pcm_frame_indexed(ma_libopus* pOpus, ma_uint64 frameIndex)
+{
+    OggOpusFile* of = (OggOpusFile*)pOpus->of;
+    /* The decoder needs the pre-roll before the target, except from the very start of the stream where it begins in a known state. */
+    ma_uint64 latestStart = (frameIndex > MA_LIBOPUS_SEEK_PREROLL) ? frameIndex - MA_LIBOPUS_SEEK_PREROLL : 0;
+    ma_uint32 index = ma_libopus_find_seek_point(pOpus, latestStart);
+    ma_uint32 attempts;
+
+    /*
+    Seeking to a recorded offset can land a little past the recorded frame because decoding resumes at the next page boundary. If that
+    leaves less than the pre-roll before the target, the point before it is tried instead.
+    */
+    for (attempts = 0; index > 0 && attempts < 2; attempts += 1, index -= 1) {
+        const ma_libopus_seek_point* pSeekPoint = &pOpus->pSeekPoints[index - 1];
+        ogg_int64_t landed;
+
+        if (frameIndex - pSeekPoint->pcmFrame > pOpus->seekPointInterval * 2 + MA_LIBOPUS_SEEK_PREROLL) {
+            break;  /* Decoding that far forward would cost more than bisecting. */
+        }
+
+        if (op_raw_seek(of, (ogg_int64_t)pSeekPoint->byteOffset) != 0) {
+            break;
+        }
+
+        landed = op_pcm_tell(of);
+        if (landed < 0 || (ma_uint64)landed > latestStart) {
+            continue;
+        }
+
+        pOpus->nextSeekPoint = 0;
+        return ma_libopus_skip_pcm_frames(pOpus, frameIndex - (ma_uint64)landed);
+    }
+
+    return MA_DOES_NOT_EXIST;
+}
+#endif
+
+static ma_result ma_libopus_init_internal(const ma_decoding_backend_config* pConfig, const ma_allocation_callbacks* pAllocationCallbacks, ma_libopus* pOpus)
 {
     ma_result result;
     ma_data_source_config dataSourceConfig;
@@ -116,6 +278,10 @@ static ma_result ma_libopus_init_internal(const ma_decoding_backend_config* pCon
     memset(pOpus, 0, sizeof(*pOpus));
     pOpus->format = ma_format_f32;    /* f32 by default. */
 
+    if (pAllocationCallbacks != NULL) {
+        pOpus->allocationCallbacks = *pAllocationCallbacks;
+    }
+
     if (pConfig != NULL && (pConfig->preferredFormat == ma_format_f32 || pConfig->preferredFormat == ma_format_s16)) {
         pOpus->format = pConfig->preferredFormat;
     } else {
@@ -139,7 +305,7 @@ MA_API ma_result ma_libopus_init(ma_read_proc onRead, ma_seek_proc onSeek, ma_te
 
     (void)pAllocationCallbacks; /* Can't seem to find a way to configure memory allocations in libopus. */
     
-    result = ma_libopus_init_internal(pConfig, pOpus);
+    result = ma_libopus_init_internal(pConfig, pAllocationCallbacks, pOpus);
     if (result != MA_SUCCESS) {
         return result;
     }
@@ -185,7 +351,7 @@ MA_API ma_result ma_libopus_init_file(const char* pFilePath, const ma_decoding_b
 
     (void)pAllocationCallbacks; /* Can't seem to find a way to configure memory allocations in libopus. */
 
-    result = ma_libopus_init_internal(pConfig, pOpus);
+    result = ma_libopus_init_internal(pConfig, pAllocationCallbacks, pOpus);
     if (result != MA_SUCCESS) {
         return result;
     }
@@ -230,6 +396,7 @@ MA_API void ma_libopus_uninit(ma_libopus* pOpus, const ma_allocation_callbacks*
     #endif
 
     ma_data_source_uninit(&pOpus->ds);
+    ma_free(pOpus->pSeekPoints, ma_libopus_get_allocation_callbacks(pOpus));
 }
 
 MA_API ma_result ma_libopus_read_pcm_frames(ma_libopus* pOpus, void* pFramesOut, ma_uint64 frameCount, ma_uint64* pFramesRead)
@@ -279,6 +446,7 @@ MA_API ma_result ma_libopus_read_pcm_frames(ma_libopus* pOpus, void* pFramesOut,
                 break;
             } else {
                 totalFramesRead += libopusResult;
+                ma_libopus_add_seek_point(pOpus);
 
                 if (libopusResult == 0) {
                     result = MA_AT_END;
@@ -319,7 +487,14 @@ MA_API ma_result ma_libopus_seek_to_pcm_frame(ma_libopus* pOpus, ma_uint64 frame
 
     #if !defined(MA_NO_LIBOPUS)
     {
-        int libopusResult = op_pcm_seek((OggOpusFile*)pOpus->of, (ogg_int64_t)frameIndex);
+        int libopusResult;
+
+        if (ma_libopus_seek_to_pcm_frame_indexed(pOpus, frameIndex) == MA_SUCCESS) {
+            return MA_SUCCESS;
+        }
+
+        pOpus->nextSeekPoint = 0;
+        libopusResult = op_pcm_seek((OggOpusFile*)pOpus->of, (ogg_int64_t)frameIndex);
         if (libopusResult != 0) {
             if (libopusResult == OP_ENOSEEK) {
                 return MA_INVALID_OPERATION;    /* Not seekable. */
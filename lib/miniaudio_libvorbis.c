@@ -110,6 +110,158 @@ static long ma_libvorbis_vf_callback__tell(void* pUserData)
 }
 #endif
 
+/*
+Seek table. libvorbisfile seeks by bisecting the Ogg stream, which on long streams is a burst of small reads and seeks for
+every scrub. Instead, a (PCM frame, byte offset) pair is recorded roughly every MA_LIBVORBIS_SEEK_POINT_INTERVAL_IN_SECONDS as the stream
+is decoded. A seek then jumps straight to the nearest recorded page before the target and decodes forward the remaining distance, which is
+a single seek followed by a short sequential read. Targets past the indexed region fall back to bisection, and decoding from there fills in
+the table as usual.
+*/
+#ifndef MA_LIBVORBIS_SEEK_POINT_INTERVAL_IN_SECONDS
+#define MA_LIBVORBIS_SEEK_POINT_INTERVAL_IN_SECONDS 1
+#endif
+
+static const ma_allocation_callbacks* ma_libvorbis_get_allocation_callbacks(const ma_libvorbis* pVorbis)
+{
+    /* A zeroed copy means NULL was passed to init, in which case miniaudio's defaults should be used. */
+    if (pVorbis->allocationCallbacks.onMalloc == NULL) {
+        return NULL;
+    }
+
+    return &pVorbis->allocationCallbacks;
+}
+
+/* Returns the number of seek points at or before frameIndex. */
+static ma_uint32 ma_libvorbis_find_seek_point(const ma_libvorbis* pVorbis, ma_uint64 frameIndex)
+{
+    ma_uint32 lo = 0;
+    ma_uint32 hi = pVorbis->seekPointCount;
+
+    while (lo < hi) {
+        ma_uint32 mid = lo + (hi - lo) / 2;
+        if (pVorbis->pSeekPoints[mid].pcmFrame <= frameIndex) {
+            lo = mid + 1;
+        } else {
+            hi = mid;
+        }
+    }
+
+    return lo;
+}
+
+#if !defined(MA_NO_LIBVORBIS)
+static void ma_libvorbis_add_seek_point(ma_libvorbis* pVorbis)
+{
+    OggVorbis_File* vf = (OggVorbis_File*)pVorbis->vf;
+    ogg_int64_t pcmFrame;
+    ogg_int64_t byteOffset;
+    ma_uint32 index;
+
+    pcmFrame = ov_pcm_tell(vf);
+    if (pcmFrame < 0 || (ma_uint64)pcmFrame < pVorbis->nextSeekPoint) {
+        return;
+    }
+
+    if (pVorbis->seekPointInterval == 0) {
+        vorbis_info* pInfo = ov_info(vf, -1);
+        if (pInfo == NULL || pInfo->rate <= 0) {
+            return;
+        }
+
+        pVorbis->seekPointInterval = (ma_uint64)pInfo->rate * MA_LIBVORBIS_SEEK_POINT_INTERVAL_IN_SECONDS;
+    }
+
+    /* Skip the point if a neighbour already covers this part of the stream. */
+    index = ma_libvorbis_find_seek_point(pVorbis, (ma_uint64)pcmFrame);
+    if (index > 0 && (ma_uint64)pcmFrame - pVorbis->pSeekPoints[index - 1].pcmFrame < pVorbis->seekPointInterval) {
+        pVorbis->nextSeekPoint = pVorbis->pSeekPoints[index - 1].pcmFrame + pVorbis->seekPointInterval;
+        return;
+    }
+    if (index < pVorbis->seekPointCount && pVorbis->pSeekPoints[index].pcmFrame - (ma_uint64)pcmFrame < pVorbis->seekPointInterval) {
+        pVorbis->nextSeekPoint = pVorbis->pSeekPoints[index].pcmFrame + pVorbis->seekPointInterval;
+        return;
+    }
+
+    byteOffset = ov_raw_tell(vf);
+    if (byteOffset < 0) {
+        return;
+    }
+
+    if (pVorbis->seekPointCount == pVorbis->seekPointCapacity) {
+        ma_uint32 newCapacity = (pVorbis->seekPointCapacity == 0) ? 64 : pVorbis->seekPointCapacity * 2;
+        ma_libvorbis_seek_point* pNewSeekPoints = (ma_libvorbis_seek_point*)ma_realloc(pVorbis->pSeekPoints, sizeof(*pNewSeekPoints) * newCapacity, ma_libvorbis_get_allocation_callbacks(pVorbis));
+        if (pNewSeekPoints == NULL) {
+            return; /* Not fatal. Seeks into this region will just bisect. */
+        }
+
+        pVorbis->pSeekPoints = pNewSeekPoints;
+        pVorbis->seekPointCapacity = newCapacity;
+    }
+
+    memmove(&pVorbis->pSeekPoints[index + 1], &pVorbis->pSeekPoints[index], sizeof(*pVorbis->pSeekPoints) * (pVorbis->seekPointCount - index));
+    pVorbis->pSeekPoints[index].pcmFrame = (ma_uint64)pcmFrame;
+    pVorbis->pSeekPoints[index].byteOffset = (ma_uint64)byteOffset;
+    pVorbis->seekPointCount += 1;
+    pVorbis->nextSeekPoint = (ma_uint64)pcmFrame + pVorbis->seekPointInterval;
+}
+
+static ma_result ma_libvorbis_skip_pcm_frames(ma_libvorbis* pVorbis, ma_uint64 frameCount)
+{
+    OggVorbis_File* vf = (OggVorbis_File*)pVorbis->vf;
+
+    /* Decoding to float and discarding avoids the interleave/convert step regardless of the output format. */
+    while (frameCount > 0) {
+        float** ppFramesF32;
+        long framesRead = ov_read_float(vf, &ppFramesF32, (int)ma_min(frameCount, 4096), NULL);
+        if (framesRead < 0) {
+            return MA_ERROR;
+        }
+        if (framesRead == 0) {
+            return MA_AT_END;
+        }
+
+        frameCount -= (ma_uint64)framesRead;
+    }
+
+    return MA_SUCCESS;
+}
+
+/* Returns MA_DOES_NOT_EXIST when the table has nothing close enough, in which case the caller should bisect. */
+static ma_result ma_libvorbis_seek_to_pcm_frame_indexed(ma_libvorbis* pVorbis, ma_uint64 frameIndex)
+{
+    OggVorbis_File* vf = (OggVorbis_File*)pVorbis->vf;
+    ma_uint32 index = ma_libvorbis_find_seek_point(pVorbis, frameIndex);
+    ma_uint32 attempts;
+
+    /*
+    Seeking to a recorded offset can land a little past the recorded frame because decoding resumes at the next page boundary. If that
+    overshoots the target, the point before it is tried instead.
+    */
+    for (attempts = 0; index > 0 && attempts < 2; attempts += 1, index -= 1) {
+        const ma_libvorbis_seek_point* pSeekPoint = &pVorbis->pSeekPoints[index - 1];
+        ogg_int64_t landed;
+
+        if (frameIndex - pSeekPoint->pcmFrame > pVorbis->seekPointInterval * 2) {
+            break;  /* Decoding that far forward would cost more than bisecting. */
+        }
+
+        if (ov_raw_seek(vf, (ogg_int64_t)pSeekPoint->byteOffset) != 0) {
+            break;
+        }
+
+        landed = ov_pcm_tell(vf);
+        if (landed < 0 || (ma_uint64)landed > frameIndex) {
+            continue;
+        }
+
+        pVorbis->nextSeekPoint = 0;
+        return ma_libvorbis_skip_pcm_frames(pVorbis, frameIndex - (ma_uint64)landed);
+    }
+
+    return MA_DOES_NOT_EXIST;
+}
+#endif
+
 static ma_result ma_libvorbis_init_internal(const ma_decoding_backend_config* pConfig, const ma_allocation_callbacks* pAllocationCallbacks, ma_libvorbis* pVorbis)
 {
     ma_result result;
@@ -122,6 +274,10 @@ static ma_result ma_libvorbis_init_internal(const ma_decoding_backend_config* pC
     memset(pVorbis, 0, sizeof(*pVorbis));
     pVorbis->format = ma_format_f32;    /* f32 by default. */
 
+    if (pAllocationCallbacks != NULL) {
+        pVorbis->allocationCallbacks = *pAllocationCallbacks;
+    }
+
     if (pConfig != NULL && (pConfig->preferredFormat == ma_format_f32 || pConfig->preferredFormat == ma_format_s16)) {
         pVorbis->format = pConfig->preferredFormat;
     } else {
@@ -257,6 +413,7 @@ MA_API void ma_libvorbis_uninit(ma_libvorbis* pVorbis, const ma_allocation_callb
 
     ma_data_source_uninit(&pVorbis->ds);
     ma_free(pVorbis->vf, pAllocationCallbacks);
+    ma_free(pVorbis->pSeekPoints, ma_libvorbis_get_allocation_callbacks(pVorbis));
 }
 
 MA_API ma_result ma_libvorbis_read_pcm_frames(ma_libvorbis* pVorbis, void* pFramesOut, ma_uint64 frameCount, ma_uint64* pFramesRead)
@@ -306,6 +463,7 @@ MA_API ma_result ma_libvorbis_read_pcm_frames(ma_libvorbis* pVorbis, void* pFram
                     /* Frames need to be interleaved. */
                     ma_interleave_pcm_frames(format, channels, libvorbisResult, (const void**)ppFramesF32, ma_offset_pcm_frames_ptr(pFramesOut, totalFramesRead, format, channels));
                     totalFramesRead += libvorbisResult;
+                    ma_libvorbis_add_seek_point(pVorbis);
 
                     if (libvorbisResult == 0) {
                         result = MA_AT_END;
@@ -320,6 +478,7 @@ MA_API ma_result ma_libvorbis_read_pcm_frames(ma_libvorbis* pVorbis, void* pFram
                 } else {
                     /* Conveniently, there's no need to interleaving when using ov_read(). I'm not sure why ov_read_float() is different in that regard... */
                     totalFramesRead += libvorbisResult / ma_get_bytes_per_frame(format, channels);
+                    ma_libvorbis_add_seek_point(pVorbis);
 
                     if (libvorbisResult == 0) {
                         result = MA_AT_END;
@@ -361,7 +520,14 @@ MA_API ma_result ma_libvorbis_seek_to_pcm_frame(ma_libvorbis* pVorbis, ma_uint64
 
     #if !defined(MA_NO_LIBVORBIS)
     {
-        int libvorbisResult = ov_pcm_seek((OggVorbis_File*)pVorbis->vf, (ogg_int64_t)frameIndex);
+        int libvorbisResult;
+
+        if (ma_libvorbis_seek_to_pcm_frame_indexed(pVorbis, frameIndex) == MA_SUCCESS) {
+            return MA_SUCCESS;
+        }
+
+        pVorbis->nextSeekPoint = 0;
+        libvorbisResult = ov_pcm_seek((OggVorbis_File*)pVorbis->vf, (ogg_int64_t)frameIndex);
         if (libvorbisResult != 0) {
             if (libvorbisResult == OV_ENOSEEK) {
                 return MA_INVALID_OPERATION;    /* Not seekable. */
@@ -13,6 +13,13 @@ extern "C" {
 
 #include <miniaudio.h>
 
+/* A known PCM frame / byte offset pair in the Ogg stream. Seeking to byteOffset lands at or slightly after pcmFrame. */
+typedef struct
+{
+    ma_uint64 pcmFrame;
+    ma_uint64 byteOffset;
+} ma_libvorbis_seek_point;
+
 typedef struct
 {
     ma_data_source_base ds;     /* The libvorbis decoder can be used independently as a data source. */
@@ -22,6 +29,12 @@ typedef struct
     void* pReadSeekTellUserData;
     ma_format format;           /* Will be either f32 or s16. */
     /*OggVorbis_File**/ void* vf;   /* Typed as void* so we can avoid a dependency on opusfile in the header section. */
+    ma_allocation_callbacks allocationCallbacks;    /* Copy of the callbacks passed to init, used for growing the seek table while decoding. */
+    ma_libvorbis_seek_point* pSeekPoints;   /* Sorted by pcmFrame. Built lazily as the stream is decoded so later seeks can jump straight to a nearby page. */
+    ma_uint32 seekPointCount;
+    ma_uint32 seekPointCapacity;
+    ma_uint64 seekPointInterval;    /* Minimum spacing between seek points in PCM frames. */
+    ma_uint64 nextSeekPoint;        /* The read cursor at which the next seek point should be considered. */
 } ma_libvorbis;
 
 MA_API ma_result ma_libvorbis_init(ma_read_proc onRead, ma_seek_proc onSeek, ma_tell_proc onTell, void* pReadSeekTellUserData, const ma_decoding_backend_config* pConfig, const ma_allocation_callbacks* pAllocationCallbacks, ma_libvorbis* pVorbis);
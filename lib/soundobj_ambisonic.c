@@ -0,0 +1,635 @@
+/*
+* SoundObj ambisonic bus
+*
+* An alternative to per-sound spatialization for scenes with very many emitters. Sounds routed through the bus are taken off the engine's
+* mix and read by the bus itself, which downmixes each to mono and pans it straight into an accumulator holding the spherical harmonic
+* components (ACN order, SN3D normalization) of its listener's sound field: 4 components at first order, 9 at second, 16 at third. Each
+* listener's field is then decoded once per period to the engine's channel layout. An emitter costs a multiply-add per component per frame
+* with no mixing of its own in the graph, and the decode is paid once per listener however many emitters there are.
+*
+* Encoding is done in world axes with the direction from the emitter's listener, and the listener's orientation is applied in the decoder
+* by pointing one virtual microphone at each speaker. The microphones use in-phase weighting, which has no rear lobes and so suits sparse
+* layouts such as stereo, raised by a floor like the spatializer's minimum channel gain so that no speaker goes fully silent, and the decode
+* is scaled to unit energy averaged over the sphere. Distance attenuation follows each sound's own
+* attenuation model, rolloff, distances and gain limits. Doppler, cones and the sound's pan are not applied. Encoder gains and decode
+* matrices are updated once per period and ramped across it, so moving emitters and turning listeners don't step.
+*
+* The end of each registered sound's chain, after any meter, occlusion or convolver spliced in after it, is attached to a sink node the
+* emitter owns and the graph never reads. The bus reads whatever is attached to each sink the way the graph reads an input bus, so nodes
+* can still be spliced in and out while the sound is on the bus. The emitter list is changed from other threads under a busy flag that
+* the audio thread holds for the duration of a period.
+*/
+
+#define SOUNDOBJ_AMBISONIC_MAX_ORDER 3
+#define SOUNDOBJ_AMBISONIC_MAX_COMPONENTS ((SOUNDOBJ_AMBISONIC_MAX_ORDER + 1) * (SOUNDOBJ_AMBISONIC_MAX_ORDER + 1))
+#define SOUNDOBJ_AMBISONIC_CHUNK 256	/* Frames encoded and decoded at a time. */
+
+typedef struct soundobj_ambisonic soundobj_ambisonic;
+
+typedef struct
+{
+	ma_node_base sink;	/* Must be first. Never read by the graph, only by the bus. */
+	soundobj_ambisonic* pBus;
+	ma_sound* pSound;
+	ma_uint32 channels;	/* The sound's output channels. */
+	ma_node* pTarget;	/* Where the end of the sound's chain was attached before, restored on removal. */
+	ma_uint32 targetBusIndex;
+	ma_bool32 wasSpatialized;
+	/* Audio thread only. */
+	ma_uint32 listenerIndex;
+	float gains[SOUNDOBJ_AMBISONIC_MAX_COMPONENTS];	/* Current component gains. */
+	float targets[SOUNDOBJ_AMBISONIC_MAX_COMPONENTS];	/* Gains to reach by the end of the current period, exactly. */
+	float steps[SOUNDOBJ_AMBISONIC_MAX_COMPONENTS];	/* Per-frame change across the current period. */
+} soundobj_ambisonic_emitter;
+
+struct soundobj_ambisonic
+{
+	ma_node_base baseNode;	/* Must be first. */
+	ma_engine* pEngine;
+	MA_ATOMIC(4, ma_uint32) isBusy;
+	ma_uint32 order;
+	ma_uint32 components;
+	ma_uint32 listenerCount;
+	ma_uint32 channelsOut;
+	float weights[SOUNDOBJ_AMBISONIC_MAX_COMPONENTS];	/* Decoder weight of each component, normalization included. */
+	soundobj_ambisonic_emitter** ppEmitters;
+	ma_uint32 emitterCount;
+	ma_uint32 emitterCapacity;
+	/* Audio thread only, apart from pScratch being grown while busy. */
+	float* pMatrices;	/* Per listener, the current decode matrix, channelsOut * components. */
+	float* pSteps;	/* Per listener, the per-frame change of the matrix across the current period. */
+	float* pField;	/* SOUNDOBJ_AMBISONIC_CHUNK frames of every listener's components. */
+	float* pScratch;	/* SOUNDOBJ_AMBISONIC_CHUNK frames of the widest emitter. */
+	ma_uint32 scratchChannels;
+	ma_uint64 periodTime;	/* Endpoint time when the current period started, and how far into it the bus has got. */
+	ma_uint32 periodOffset;
+};
+
+/* Real spherical harmonics up to order for the unit vector (x, y, z), ACN order, SN3D normalization. */
+static void soundobj_ambisonic_harmonics(ma_uint32 order, float x, float y, float z, float* pOut)
+{
+	pOut[0] = 1;
+	if (order < 1) {
+		return;
+	}
+	pOut[1] = y;
+	pOut[2] = z;
+	pOut[3] = x;
+	if (order < 2) {
+		return;
+	}
+	pOut[4] = 1.7320508f * x * y;
+	pOut[5] = 1.7320508f * y * z;
+	pOut[6] = 0.5f * (3 * z * z - 1);
+	pOut[7] = 1.7320508f * x * z;
+	pOut[8] = 0.8660254f * (x * x - y * y);
+	if (order < 3) {
+		return;
+	}
+	pOut[9] = 0.7905694f * y * (3 * x * x - y * y);
+	pOut[10] = 3.8729833f * x * y * z;
+	pOut[11] = 0.6123724f * y * (5 * z * z - 1);
+	pOut[12] = 0.5f * z * (5 * z * z - 3);
+	pOut[13] = 0.6123724f * x * (5 * z * z - 1);
+	pOut[14] = 1.9364917f * z * (x * x - y * y);
+	pOut[15] = 0.7905694f * x * (x * x - 3 * y * y);
+}
+
+/*
+Component gains for one emitter: its distance gain times the harmonics of its direction from listenerIndex, or just the omnidirectional
+component when it is on top of the listener. Returns MA_FALSE if the listener is disabled and the emitter should be silent.
+*/
+static ma_bool32 soundobj_ambisonic_encode(soundobj_ambisonic_emitter* pEmitter, ma_engine* pEngine, ma_uint32 listenerIndex, float* pGains)
+{
+	ma_sound* pSound = pEmitter->pSound;
+	ma_uint32 components = pEmitter->pBus->components;
+	ma_vec3f relative = ma_sound_get_position(pSound);
+	float minDistance = ma_sound_get_min_distance(pSound);
+	float maxDistance = ma_sound_get_max_distance(pSound);
+	float rolloff = ma_sound_get_rolloff(pSound);
+	float gain = 1;
+	float distance;
+	ma_uint32 k;
+	if (!ma_engine_listener_is_enabled(pEngine, listenerIndex)) {
+		return MA_FALSE;
+	}
+	if (ma_sound_get_positioning(pSound) == ma_positioning_absolute) {
+		relative = ma_vec3f_sub(relative, ma_engine_listener_get_position(pEngine, listenerIndex));
+	} else {
+		/* In the listener's space, with -z forward. Encoding is in world axes, so turn it back. */
+		ma_vec3f forward = ma_vec3f_normalize(ma_engine_listener_get_direction(pEngine, listenerIndex));
+		ma_vec3f right = ma_vec3f_normalize(ma_vec3f_cross(forward, ma_engine_listener_get_world_up(pEngine, listenerIndex)));
+		ma_vec3f up = ma_vec3f_cross(right, forward);
+		relative = ma_vec3f_init_3f(
+			relative.x * right.x + relative.y * up.x - relative.z * forward.x,
+			relative.x * right.y + relative.y * up.y - relative.z * forward.y,
+			relative.x * right.z + relative.y * up.z - relative.z * forward.z
+		);
+	}
+	distance = ma_vec3f_len(relative);
+	switch (ma_sound_get_attenuation_model(pSound)) {
+		case ma_attenuation_model_inverse: gain = ma_attenuation_inverse(distance, minDistance, maxDistance, rolloff); break;
+		case ma_attenuation_model_linear: gain = ma_attenuation_linear(distance, minDistance, maxDistance, rolloff); break;
+		case ma_attenuation_model_exponential: gain = ma_attenuation_exponential(distance, minDistance, maxDistance, rolloff); break;
+		default: break;
+	}
+	gain = ma_clamp(gain, ma_sound_get_min_gain(pSound), ma_sound_get_max_gain(pSound));
+	if (distance > 0) {
+		soundobj_ambisonic_harmonics(pEmitter->pBus->order, relative.x / distance, relative.y / distance, relative.z / distance, pGains);
+	} else {
+		MA_ZERO_MEMORY(pGains, sizeof(float) * components);
+		pGains[0] = 1;
+	}
+	for (k = 0; k < components; k += 1) {
+		pGains[k] *= gain;
+	}
+	return MA_TRUE;
+}
+
+/* Decode matrix for one listener: a virtual microphone aimed at each speaker, in world axes for the listener's current orientation. */
+static void soundobj_ambisonic_decoder(soundobj_ambisonic* pBus, ma_uint32 listenerIndex, float* pMatrix)
+{
+	const ma_uint32 components = pBus->components;
+	ma_spatializer_listener* pListener = &pBus->pEngine->listeners[listenerIndex];
+	ma_vec3f forward = ma_vec3f_normalize(ma_engine_listener_get_direction(pBus->pEngine, listenerIndex));
+	ma_vec3f right = ma_vec3f_normalize(ma_vec3f_cross(forward, ma_engine_listener_get_world_up(pBus->pEngine, listenerIndex)));
+	ma_vec3f up = ma_vec3f_cross(right, forward);
+	ma_uint32 c, k;
+	MA_ZERO_MEMORY(pMatrix, sizeof(float) * pBus->channelsOut * components);
+	for (c = 0; c < pBus->channelsOut; c += 1) {
+		ma_channel channel = ma_channel_map_get_channel(pListener->config.pChannelMapOut, pBus->channelsOut, c);
+		float* pRow = &pMatrix[c * components];
+		if (ma_is_spatial_channel_position(channel)) {
+			ma_vec3f d = ma_get_channel_direction(channel);
+			soundobj_ambisonic_harmonics(pBus->order,
+				d.x * right.x + d.y * up.x - d.z * forward.x,
+				d.x * right.y + d.y * up.y - d.z * forward.y,
+				d.x * right.z + d.y * up.z - d.z * forward.z,
+				pRow
+			);
+			for (k = 0; k < components; k += 1) {
+				pRow[k] *= pBus->weights[k];
+			}
+		} else if (channel != MA_CHANNEL_LFE && channel != MA_CHANNEL_NONE) {
+			/* Mono and the like hear everything. */
+			pRow[0] = 1;
+		}
+	}
+}
+
+static void soundobj_ambisonic_sink_process_pcm_frames(ma_node* pNode, const float** ppFramesIn, ma_uint32* pFrameCountIn, float** ppFramesOut, ma_uint32* pFrameCountOut)
+{
+	/* Sinks are never part of a path to the endpoint, so this is never called. */
+	(void)pNode;
+	(void)ppFramesIn;
+	(void)pFrameCountIn;
+	(void)ppFramesOut;
+	*pFrameCountOut = 0;
+}
+
+static ma_node_vtable g_soundobj_ambisonic_sink_node_vtable =
+{
+	soundobj_ambisonic_sink_process_pcm_frames,
+	NULL,	/* onGetRequiredInputFrameCount */
+	1,
+	1,
+	0
+};
+
+static void soundobj_ambisonic_lock(soundobj_ambisonic* pBus)
+{
+	while (ma_atomic_exchange_32(&pBus->isBusy, 1) != 0) {
+		ma_yield();
+	}
+}
+
+static void soundobj_ambisonic_unlock(soundobj_ambisonic* pBus)
+{
+	ma_atomic_store_32(&pBus->isBusy, 0);
+}
+
+/* Sets the emitter's gains ramping towards their values for this period over frameCount frames. */
+static void soundobj_ambisonic_emitter_update(soundobj_ambisonic_emitter* pEmitter, ma_uint32 frameCount)
+{
+	soundobj_ambisonic* pBus = pEmitter->pBus;
+	const ma_uint32 components = pBus->components;
+	ma_uint32 listenerIndex = ma_sound_get_listener_index(pEmitter->pSound);
+	float* target = pEmitter->targets;
+	ma_uint32 k;
+	if (listenerIndex >= pBus->listenerCount || !soundobj_ambisonic_encode(pEmitter, pBus->pEngine, listenerIndex, target)) {
+		listenerIndex = ma_min(listenerIndex, pBus->listenerCount - 1);
+		MA_ZERO_MEMORY(target, sizeof(float) * components);
+	}
+	/* Moving to another listener's field, there is nothing to ramp from. */
+	if (listenerIndex != pEmitter->listenerIndex) {
+		MA_COPY_MEMORY(pEmitter->gains, target, sizeof(float) * components);
+		pEmitter->listenerIndex = listenerIndex;
+	}
+	for (k = 0; k < components; k += 1) {
+		pEmitter->steps[k] = (target[k] - pEmitter->gains[k]) / frameCount;
+	}
+}
+
+/*
+Adds frameCount frames of pMono into a listener's field with the given gains, ramping them by pSteps per frame when isRamping. Inlined with
+the component count known, so the inner loops can be unrolled and vectorized.
+*/
+static MA_INLINE void soundobj_ambisonic_accumulate(float* MA_RESTRICT pField, ma_uint32 stride, const float* MA_RESTRICT pMono, ma_uint32 frameCount, float* MA_RESTRICT pGains, const float* MA_RESTRICT pSteps, ma_bool32 isRamping, const ma_uint32 components)
+{
+	float gains[SOUNDOBJ_AMBISONIC_MAX_COMPONENTS];
+	ma_uint32 i, k;
+	for (k = 0; k < components; k += 1) {
+		gains[k] = pGains[k];
+	}
+	if (isRamping) {
+		for (i = 0; i < frameCount; i += 1) {
+			const float sample = pMono[i];
+			for (k = 0; k < components; k += 1) {
+				gains[k] += pSteps[k];
+				pField[i * stride + k] += sample * gains[k];
+			}
+		}
+	} else {
+		for (i = 0; i < frameCount; i += 1) {
+			const float sample = pMono[i];
+			for (k = 0; k < components; k += 1) {
+				pField[i * stride + k] += sample * gains[k];
+			}
+		}
+	}
+	for (k = 0; k < components; k += 1) {
+		pGains[k] = gains[k];
+	}
+}
+
+/*
+Reads frameCount frames from whatever is attached to the emitter's sink, the end of its sound's chain, and adds them encoded into the
+field. A sound that ends or is stopped part way through reads short, and the gains still advance over the whole chunk.
+*/
+static void soundobj_ambisonic_emitter_read(soundobj_ambisonic_emitter* pEmitter, ma_uint32 frameCount, ma_uint64 globalTime)
+{
+	soundobj_ambisonic* pBus = pEmitter->pBus;
+	ma_node_input_bus* pInputBus = &pEmitter->sink.pInputBuses[0];
+	ma_node_output_bus* pFirst = ma_node_input_bus_first(pInputBus);
+	ma_node_output_bus* pOutputBus;
+	const ma_uint32 channels = pEmitter->channels;
+	const ma_uint32 components = pBus->components;
+	const ma_uint32 stride = components * pBus->listenerCount;
+	float* pScratch = pBus->pScratch;
+	float* pField = pBus->pField + pEmitter->listenerIndex * components;
+	ma_bool32 isRamping = MA_FALSE;
+	ma_uint32 framesRead = 0;
+	ma_uint32 i, c, k;
+	/* There is at most one attachment, but it has to be reached this way for detaching from other threads to be safe. */
+	for (pOutputBus = pFirst; pOutputBus != NULL; pOutputBus = ma_node_input_bus_next(pInputBus, pOutputBus)) {
+		while (framesRead < frameCount) {
+			ma_uint32 framesJustRead = 0;
+			ma_result result = ma_node_read_pcm_frames(pOutputBus->pNode, pOutputBus->outputBusIndex, pScratch + framesRead * channels, frameCount - framesRead, &framesJustRead, globalTime + framesRead);
+			framesRead += framesJustRead;
+			if (result != MA_SUCCESS || framesJustRead == 0) {
+				break;
+			}
+		}
+	}
+	for (k = 0; k < components; k += 1) {
+		isRamping |= pEmitter->steps[k] != 0;
+	}
+	if (framesRead > 0) {
+		/* Downmixed in place, so the mono samples are the first framesRead of the scratch. */
+		if (channels > 1) {
+			const float downmix = 1.0f / channels;
+			for (i = 0; i < framesRead; i += 1) {
+				float sample = 0;
+				for (c = 0; c < channels; c += 1) {
+					sample += pScratch[i * channels + c];
+				}
+				pScratch[i] = sample * downmix;
+			}
+		}
+		switch (components) {
+			case 4: soundobj_ambisonic_accumulate(pField, stride, pScratch, framesRead, pEmitter->gains, pEmitter->steps, isRamping, 4); break;
+			case 9: soundobj_ambisonic_accumulate(pField, stride, pScratch, framesRead, pEmitter->gains, pEmitter->steps, isRamping, 9); break;
+			default: soundobj_ambisonic_accumulate(pField, stride, pScratch, framesRead, pEmitter->gains, pEmitter->steps, isRamping, 16); break;
+		}
+	}
+	if (isRamping) {
+		for (k = 0; k < components; k += 1) {
+			pEmitter->gains[k] += pEmitter->steps[k] * (frameCount - framesRead);
+		}
+	}
+}
+
+static void soundobj_ambisonic_process_pcm_frames(ma_node* pNode, const float** ppFramesIn, ma_uint32* pFrameCountIn, float** ppFramesOut, ma_uint32* pFrameCountOut)
+{
+	soundobj_ambisonic* pBus = (soundobj_ambisonic*)pNode;
+	float* pOut = ppFramesOut[0];
+	const ma_uint32 frameCount = *pFrameCountOut;
+	const ma_uint32 channelsOut = pBus->channelsOut;
+	const ma_uint32 components = pBus->components;
+	const ma_uint32 stride = components * pBus->listenerCount;
+	const ma_uint32 size = channelsOut * components;
+	ma_uint64 endpointTime = ma_node_get_time(ma_engine_get_endpoint(pBus->pEngine));
+	ma_uint64 globalTime;
+	ma_uint32 l, e, i, c, k, offset;
+	(void)ppFramesIn;
+	(void)pFrameCountIn;
+	if (frameCount == 0) {
+		return;
+	}
+	/*
+	The graph gives source nodes no clock, but the endpoint's only moves on once a whole period has been read, and the graph may read the
+	bus in several pieces within it.
+	*/
+	if (endpointTime != pBus->periodTime) {
+		pBus->periodTime = endpointTime;
+		pBus->periodOffset = 0;
+	}
+	globalTime = endpointTime + pBus->periodOffset;
+	pBus->periodOffset += frameCount;
+	soundobj_ambisonic_lock(pBus);
+	for (l = 0; l < pBus->listenerCount; l += 1) {
+		float* pMatrix = &pBus->pMatrices[l * size];
+		float* pStep = &pBus->pSteps[l * size];
+		soundobj_ambisonic_decoder(pBus, l, pStep);
+		for (k = 0; k < size; k += 1) {
+			pStep[k] = (pStep[k] - pMatrix[k]) / frameCount;
+		}
+	}
+	for (e = 0; e < pBus->emitterCount; e += 1) {
+		soundobj_ambisonic_emitter_update(pBus->ppEmitters[e], frameCount);
+	}
+	for (offset = 0; offset < frameCount; offset += SOUNDOBJ_AMBISONIC_CHUNK) {
+		const ma_uint32 chunk = ma_min(frameCount - offset, SOUNDOBJ_AMBISONIC_CHUNK);
+		MA_ZERO_MEMORY(pBus->pField, sizeof(float) * chunk * stride);
+		for (e = 0; e < pBus->emitterCount; e += 1) {
+			soundobj_ambisonic_emitter_read(pBus->ppEmitters[e], chunk, globalTime + offset);
+		}
+		for (i = 0; i < chunk; i += 1) {
+			float* pFrameOut = pOut + (offset + i) * channelsOut;
+			MA_ZERO_MEMORY(pFrameOut, sizeof(float) * channelsOut);
+			for (l = 0; l < pBus->listenerCount; l += 1) {
+				float* pMatrix = &pBus->pMatrices[l * size];
+				const float* pStep = &pBus->pSteps[l * size];
+				const float* pFrame = pBus->pField + i * stride + l * components;
+				for (c = 0; c < channelsOut; c += 1) {
+					float* pRow = &pMatrix[c * components];
+					const float* pRowStep = &pStep[c * components];
+					float sum = 0;
+					for (k = 0; k < components; k += 1) {
+						pRow[k] += pRowStep[k];
+						sum += pRow[k] * pFrame[k];
+					}
+					pFrameOut[c] += sum;
+				}
+			}
+		}
+	}
+	/* Land exactly on the targets, so that emitters which haven't moved take the fixed gain path next period. */
+	for (e = 0; e < pBus->emitterCount; e += 1) {
+		soundobj_ambisonic_emitter* pEmitter = pBus->ppEmitters[e];
+		MA_COPY_MEMORY(pEmitter->gains, pEmitter->targets, sizeof(float) * components);
+	}
+	soundobj_ambisonic_unlock(pBus);
+}
+
+static ma_node_vtable g_soundobj_ambisonic_node_vtable =
+{
+	soundobj_ambisonic_process_pcm_frames,
+	NULL,	/* onGetRequiredInputFrameCount */
+	0,
+	1,
+	0
+};
+
+static void soundobj_ambisonic_free(soundobj_ambisonic* pBus)
+{
+	ma_free(pBus->ppEmitters, NULL);
+	ma_free(pBus->pMatrices, NULL);
+	ma_free(pBus->pSteps, NULL);
+	ma_free(pBus->pField, NULL);
+	ma_free(pBus->pScratch, NULL);
+	ma_free(pBus, NULL);
+}
+
+/*
+Creates a bus of the given order (1 to 3) for pEngine and attaches it to the engine's endpoint. minChannelGain, 0 to 1, is the least any
+speaker gets of a sound, as a fraction of what the speaker facing it gets. Sounds are routed through it with soundobj_ambisonic_add().
+*/
+ma_result soundobj_ambisonic_create(ma_engine* pEngine, ma_uint32 order, float minChannelGain, soundobj_ambisonic** ppBus)
+{
+	ma_result result;
+	ma_node_config config;
+	soundobj_ambisonic* pBus;
+	double inPhase[SOUNDOBJ_AMBISONIC_MAX_ORDER + 1];
+	double total = 0, energy = 0;
+	ma_uint32 n, k, spatialChannels = 0;
+	*ppBus = NULL;
+	if (pEngine == NULL || order < 1 || order > SOUNDOBJ_AMBISONIC_MAX_ORDER || minChannelGain < 0 || minChannelGain > 1) {
+		return MA_INVALID_ARGS;
+	}
+	pBus = (soundobj_ambisonic*)ma_calloc(sizeof(*pBus), NULL);
+	if (pBus == NULL) {
+		return MA_OUT_OF_MEMORY;
+	}
+	pBus->pEngine = pEngine;
+	pBus->order = order;
+	pBus->components = (order + 1) * (order + 1);
+	pBus->listenerCount = ma_engine_get_listener_count(pEngine);
+	pBus->channelsOut = ma_engine_get_channels(pEngine);
+	/*
+	In-phase weights g_n = N!(N+1)! / ((N+n+1)!(N-n)!). By the addition theorem each microphone's response to a source at angle t from it
+	is sum_n a_n P_n(cos t) with a_n = (2n+1) g_n / sum (2m+1) g_m, which is 1 straight on and 0 straight behind. The floor mixes in
+	the omnidirectional response, P_0 = 1. The mean square over the sphere is then sum_n a_n^2 / (2n+1), and the decode is scaled so
+	that summed over the speakers that comes to 1.
+	*/
+	for (n = 0; n <= order; n += 1) {
+		double g = 1;
+		for (k = 1; k <= n; k += 1) {
+			g *= (double)(order - n + k) / (order + 1 + k);
+		}
+		inPhase[n] = (2 * n + 1) * g;
+		total += inPhase[n];
+	}
+	for (n = 0; n <= order; n += 1) {
+		inPhase[n] = inPhase[n] / total * (1 - minChannelGain) + (n == 0 ? minChannelGain : 0);
+		energy += inPhase[n] * inPhase[n] / (2 * n + 1);
+	}
+	for (k = 0; k < pBus->channelsOut; k += 1) {
+		if (ma_is_spatial_channel_position(ma_channel_map_get_channel(pEngine->listeners[0].config.pChannelMapOut, pBus->channelsOut, k))) {
+			spatialChannels += 1;
+		}
+	}
+	for (n = 0; n <= order; n += 1) {
+		double scale = spatialChannels > 0 ? 1 / ma_sqrtd(spatialChannels * energy) : 1;
+		for (k = n * n; k < (n + 1) * (n + 1); k += 1) {
+			pBus->weights[k] = (float)(inPhase[n] * scale);
+		}
+	}
+	pBus->pMatrices = (float*)ma_calloc(sizeof(float) * pBus->channelsOut * pBus->components * pBus->listenerCount, NULL);
+	pBus->pSteps = (float*)ma_malloc(sizeof(float) * pBus->channelsOut * pBus->components * pBus->listenerCount, NULL);
+	pBus->pField = (float*)ma_malloc(sizeof(float) * SOUNDOBJ_AMBISONIC_CHUNK * pBus->components * pBus->listenerCount, NULL);
+	if (pBus->pMatrices == NULL || pBus->pSteps == NULL || pBus->pField == NULL) {
+		soundobj_ambisonic_free(pBus);
+		return MA_OUT_OF_MEMORY;
+	}
+	for (n = 0; n < pBus->listenerCount; n += 1) {
+		soundobj_ambisonic_decoder(pBus, n, &pBus->pMatrices[n * pBus->channelsOut * pBus->components]);
+	}
+	config = ma_node_config_init();
+	config.vtable = &g_soundobj_ambisonic_node_vtable;
+	config.pOutputChannels = &pBus->channelsOut;
+	result = ma_node_init(ma_engine_get_node_graph(pEngine), &config, NULL, &pBus->baseNode);
+	if (result != MA_SUCCESS) {
+		soundobj_ambisonic_free(pBus);
+		return result;
+	}
+	ma_node_attach_output_bus(&pBus->baseNode, 0, ma_engine_get_endpoint(pEngine), 0);
+	*ppBus = pBus;
+	return MA_SUCCESS;
+}
+
+/* Whether pNode is one of the nodes the other features splice in after a sound, which stay ahead of the sink. */
+static ma_bool32 soundobj_ambisonic_is_insert(ma_node* pNode)
+{
+	const ma_node_vtable* pVTable = ((ma_node_base*)pNode)->vtable;
+	return pVTable == &g_soundobj_meter_node_vtable || pVTable == &g_soundobj_occlusion_node_vtable || pVTable == &g_soundobj_convolver_node_vtable;
+}
+
+/* Reattaches whatever feeds the emitter's sink to where the sound's chain went before, and frees the emitter. Must not be on the list. */
+static void soundobj_ambisonic_emitter_free(soundobj_ambisonic_emitter* pEmitter)
+{
+	ma_node* pFeeder = (ma_node*)pEmitter->pSound;
+	ma_uint32 hops;
+	for (hops = 0; pFeeder != NULL && hops < 64; hops += 1) {
+		ma_node* pNext = (ma_node*)ma_atomic_load_ptr(&((ma_node_base*)pFeeder)->pOutputBuses[0].pInputNode);
+		if (pNext == (ma_node*)pEmitter) {
+			if (pEmitter->pTarget != NULL) {
+				ma_node_attach_output_bus(pFeeder, 0, pEmitter->pTarget, pEmitter->targetBusIndex);
+			} else {
+				ma_node_detach_output_bus(pFeeder, 0);
+			}
+			break;
+		}
+		pFeeder = pNext;
+	}
+	ma_node_uninit(&pEmitter->sink, NULL);
+	ma_sound_set_spatialization_enabled(pEmitter->pSound, pEmitter->wasSpatialized);
+	ma_free(pEmitter, NULL);
+}
+
+/* Takes every sound off the bus, reconnecting them, and frees it. Must run before any registered sound is uninitialized. */
+void soundobj_ambisonic_destroy(soundobj_ambisonic* pBus)
+{
+	ma_uint32 i;
+	if (pBus == NULL) {
+		return;
+	}
+	/* Once the bus is out of the graph nothing reads the emitters. */
+	ma_node_uninit(&pBus->baseNode, NULL);
+	for (i = 0; i < pBus->emitterCount; i += 1) {
+		soundobj_ambisonic_emitter_free(pBus->ppEmitters[i]);
+	}
+	soundobj_ambisonic_free(pBus);
+}
+
+/*
+Routes pSound through the bus instead of its own spatializer, which is switched off until it is removed. The end of the sound's chain,
+after any meter, occlusion or convolver spliced in after it, is moved from wherever it went onto the emitter's sink.
+*/
+ma_result soundobj_ambisonic_add(soundobj_ambisonic* pBus, ma_sound* pSound)
+{
+	ma_result result;
+	ma_node_config config;
+	soundobj_ambisonic_emitter* pEmitter;
+	ma_node* pLast = (ma_node*)pSound;
+	ma_node* pNext;
+	ma_uint32 i, hops, channels = ma_node_get_output_channels(pSound, 0);
+	soundobj_ambisonic_lock(pBus);
+	for (i = 0; i < pBus->emitterCount; i += 1) {
+		if (pBus->ppEmitters[i]->pSound == pSound) {
+			soundobj_ambisonic_unlock(pBus);
+			return MA_ALREADY_EXISTS;
+		}
+	}
+	if (pBus->emitterCount == pBus->emitterCapacity) {
+		ma_uint32 capacity = ma_max(pBus->emitterCapacity * 2, 16);
+		soundobj_ambisonic_emitter** ppEmitters = (soundobj_ambisonic_emitter**)ma_realloc(pBus->ppEmitters, sizeof(*ppEmitters) * capacity, NULL);
+		if (ppEmitters == NULL) {
+			soundobj_ambisonic_unlock(pBus);
+			return MA_OUT_OF_MEMORY;
+		}
+		pBus->ppEmitters = ppEmitters;
+		pBus->emitterCapacity = capacity;
+	}
+	if (channels > pBus->scratchChannels) {
+		float* pScratch = (float*)ma_realloc(pBus->pScratch, sizeof(float) * SOUNDOBJ_AMBISONIC_CHUNK * channels, NULL);
+		if (pScratch == NULL) {
+			soundobj_ambisonic_unlock(pBus);
+			return MA_OUT_OF_MEMORY;
+		}
+		pBus->pScratch = pScratch;
+		pBus->scratchChannels = channels;
+	}
+	soundobj_ambisonic_unlock(pBus);
+	pEmitter = (soundobj_ambisonic_emitter*)ma_calloc(sizeof(*pEmitter), NULL);
+	if (pEmitter == NULL) {
+		return MA_OUT_OF_MEMORY;
+	}
+	pEmitter->pBus = pBus;
+	pEmitter->pSound = pSound;
+	pEmitter->channels = channels;
+	pEmitter->listenerIndex = pBus->listenerCount;	/* None yet, so the first period starts at its gains rather than ramping. */
+	config = ma_node_config_init();
+	config.vtable = &g_soundobj_ambisonic_sink_node_vtable;
+	config.pInputChannels = &pEmitter->channels;
+	config.pOutputChannels = &pEmitter->channels;
+	result = ma_node_init(ma_engine_get_node_graph(pBus->pEngine), &config, NULL, &pEmitter->sink);
+	if (result != MA_SUCCESS) {
+		ma_free(pEmitter, NULL);
+		return result;
+	}
+	for (hops = 0; hops < 64; hops += 1) {
+		pNext = (ma_node*)ma_atomic_load_ptr(&((ma_node_base*)pLast)->pOutputBuses[0].pInputNode);
+		if (pNext == NULL || !soundobj_ambisonic_is_insert(pNext)) {
+			break;
+		}
+		pLast = pNext;
+	}
+	pEmitter->pTarget = (ma_node*)ma_atomic_load_ptr(&((ma_node_base*)pLast)->pOutputBuses[0].pInputNode);
+	pEmitter->targetBusIndex = ((ma_node_base*)pLast)->pOutputBuses[0].inputNodeInputBusIndex;
+	pEmitter->wasSpatialized = ma_sound_is_spatialization_enabled(pSound);
+	ma_sound_set_spatialization_enabled(pSound, MA_FALSE);
+	ma_node_attach_output_bus(pLast, 0, &pEmitter->sink, 0);
+	soundobj_ambisonic_lock(pBus);
+	pBus->ppEmitters[pBus->emitterCount++] = pEmitter;
+	soundobj_ambisonic_unlock(pBus);
+	return MA_SUCCESS;
+}
+
+/* Takes pSound off the bus, restoring its spatializer and where its chain went. Must run before the sound is uninitialized. */
+void soundobj_ambisonic_remove(soundobj_ambisonic* pBus, ma_sound* pSound)
+{
+	soundobj_ambisonic_emitter* pEmitter = NULL;
+	ma_uint32 i;
+	soundobj_ambisonic_lock(pBus);
+	for (i = 0; i < pBus->emitterCount; i += 1) {
+		if (pBus->ppEmitters[i]->pSound == pSound) {
+			pEmitter = pBus->ppEmitters[i];
+			pBus->ppEmitters[i] = pBus->ppEmitters[--pBus->emitterCount];
+			break;
+		}
+	}
+	soundobj_ambisonic_unlock(pBus);
+	if (pEmitter != NULL) {
+		soundobj_ambisonic_emitter_free(pEmitter);
+	}
+}
+
+ma_uint32 soundobj_ambisonic_get_emitter_count(soundobj_ambisonic* pBus)
+{
+	ma_uint32 count;
+	soundobj_ambisonic_lock(pBus);
+	count = pBus->emitterCount;
+	soundobj_ambisonic_unlock(pBus);
+	return count;
+}
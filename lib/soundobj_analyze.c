@@ -0,0 +1,377 @@
+/*
+* SoundObj file analysis
+*
+* Streams a file through the standard decoders (the same ones soundobj_decode_file uses) in fixed-size chunks and measures, in one pass:
+* a min/max peak pyramid for drawing waveforms, integrated loudness per ITU-R BS.1770-4, and true peak by 4x oversampling.
+* Memory use is independent of the file's length apart from the outputs themselves.
+*
+* Loudness: each channel goes through the K-weighting pre-filter (a high shelf and a high-pass, both biquads), mean squares are gathered
+* over 100 ms segments, and 400 ms blocks overlapping by 75% are the sums of four consecutive segments. Blocks are gated at -70 LUFS and
+* then at 10 LU below the mean of the blocks that passed.
+*
+* True peak: a 49-tap windowed-sinc interpolator evaluates three points between every pair of samples. Because the interpolator's gain is
+* bounded, a chunk whose samples are too quiet to possibly exceed the loudest peak found so far is skipped without interpolating.
+*/
+
+#define SOUNDOBJ_ANALYZE_CHUNK_FRAMES 4096
+#define SOUNDOBJ_TRUE_PEAK_FACTOR 4
+#define SOUNDOBJ_TRUE_PEAK_HALF_TAPS 6	/* Input samples either side of an interpolated point. */
+#define SOUNDOBJ_TRUE_PEAK_HISTORY (SOUNDOBJ_TRUE_PEAK_HALF_TAPS * 2)
+
+typedef struct
+{
+	ma_uint64 frameCount;
+	ma_uint32 channels;
+	ma_uint32 sampleRate;
+	ma_uint32 peakBlock;	/* Frames covered by each min/max pair at level 0. Each level above doubles it. */
+	ma_uint32 peakLevels;
+	ma_uint64 peakSize;	/* Bytes in pPeaks: every level back to back, finest first, as (min, max) pairs scaled to +-127. */
+	ma_int8* pPeaks;
+	double loudness;	/* Integrated loudness in LUFS, or -HUGE_VAL when no block passes the gates. */
+	double truePeak;	/* Linear. */
+} soundobj_analysis;
+
+typedef struct
+{
+	double b0, b1, b2, a1, a2;
+} soundobj_biquad_coefficients;
+
+typedef struct
+{
+	double z1, z2;
+} soundobj_biquad_state;
+
+/* Appends to a heap array, doubling its capacity as needed. */
+static ma_result soundobj_analyze_reserve(void** ppData, ma_uint64* pCapacity, ma_uint64 count, size_t elementSize)
+{
+	void* pNew;
+	ma_uint64 capacity = *pCapacity;
+	if (count <= capacity) {
+		return MA_SUCCESS;
+	}
+	capacity = ma_max(capacity * 2, ma_max(count, 256));
+	pNew = ma_realloc(*ppData, (size_t)(capacity * elementSize), NULL);
+	if (pNew == NULL) {
+		return MA_OUT_OF_MEMORY;
+	}
+	*ppData = pNew;
+	*pCapacity = capacity;
+	return MA_SUCCESS;
+}
+
+/* BS.1770 specifies coefficients at 48 kHz only. These are the analog prototypes they came from, re-derived for any rate. */
+static void soundobj_k_weighting_init(ma_uint32 sampleRate, soundobj_biquad_coefficients* pShelf, soundobj_biquad_coefficients* pHighPass)
+{
+	double f0 = 1681.974450955533;
+	double gain = 3.999843853973347;
+	double q = 0.7071752369554196;
+	double k = tan(MA_PI_D * f0 / sampleRate);
+	double vh = ma_powd(10, gain / 20);
+	double vb = ma_powd(vh, 0.4996667741545416);
+	double a0 = 1 + k / q + k * k;
+	pShelf->b0 = (vh + vb * k / q + k * k) / a0;
+	pShelf->b1 = 2 * (k * k - vh) / a0;
+	pShelf->b2 = (vh - vb * k / q + k * k) / a0;
+	pShelf->a1 = 2 * (k * k - 1) / a0;
+	pShelf->a2 = (1 - k / q + k * k) / a0;
+	f0 = 38.13547087602444;
+	q = 0.5003270373238773;
+	k = tan(MA_PI_D * f0 / sampleRate);
+	a0 = 1 + k / q + k * k;
+	pHighPass->b0 = 1;
+	pHighPass->b1 = -2;
+	pHighPass->b2 = 1;
+	pHighPass->a1 = 2 * (k * k - 1) / a0;
+	pHighPass->a2 = (1 - k / q + k * k) / a0;
+}
+
+static MA_INLINE double soundobj_biquad_process(const soundobj_biquad_coefficients* pCoefficients, soundobj_biquad_state* pState, double x)
+{
+	double y = pCoefficients->b0 * x + pState->z1;
+	pState->z1 = pCoefficients->b1 * x - pCoefficients->a1 * y + pState->z2;
+	pState->z2 = pCoefficients->b2 * x - pCoefficients->a2 * y;
+	return y;
+}
+
+/* Surround channels count 1.41 times (+1.5 dB) and the LFE not at all, per BS.1770. */
+static double soundobj_loudness_channel_weight(ma_channel channel)
+{
+	switch (channel) {
+		case MA_CHANNEL_LFE: return 0;
+		case MA_CHANNEL_SIDE_LEFT:
+		case MA_CHANNEL_SIDE_RIGHT:
+		case MA_CHANNEL_BACK_LEFT:
+		case MA_CHANNEL_BACK_RIGHT: return 1.41;
+		default: return 1;
+	}
+}
+
+/*
+Builds the interpolator for phases 1 to 3. Phase 0 lands on the input samples themselves, which the sample peak already covers. Returns
+the largest sum of absolute tap values over the phases, which bounds how far an interpolated point can exceed its neighbouring samples.
+*/
+static float soundobj_true_peak_init(float pTaps[SOUNDOBJ_TRUE_PEAK_FACTOR][SOUNDOBJ_TRUE_PEAK_HISTORY + 1])
+{
+	float bound = 1;
+	ma_uint32 phase, k;
+	for (phase = 1; phase < SOUNDOBJ_TRUE_PEAK_FACTOR; phase += 1) {
+		double sum = 0, absoluteSum = 0;
+		for (k = 0; k <= SOUNDOBJ_TRUE_PEAK_HISTORY; k += 1) {
+			double x = (double)(phase + k * SOUNDOBJ_TRUE_PEAK_FACTOR) / SOUNDOBJ_TRUE_PEAK_FACTOR - SOUNDOBJ_TRUE_PEAK_HALF_TAPS;
+			double window = 0.5 + 0.5 * ma_cosd(MA_PI_D * x / (SOUNDOBJ_TRUE_PEAK_HALF_TAPS + 1));
+			pTaps[phase][k] = (float)(ma_sind(MA_PI_D * x) / (MA_PI_D * x) * window);
+			sum += pTaps[phase][k];
+		}
+		/* Unity gain at DC for every phase. */
+		for (k = 0; k <= SOUNDOBJ_TRUE_PEAK_HISTORY; k += 1) {
+			pTaps[phase][k] = (float)(pTaps[phase][k] / sum);
+			absoluteSum += ma_abs(pTaps[phase][k]);
+		}
+		bound = ma_max(bound, (float)absoluteSum);
+	}
+	return bound;
+}
+
+static ma_int8 soundobj_peak_quantize(float value, ma_bool32 roundUp)
+{
+	float scaled = value * 127;
+	ma_int32 quantized = (ma_int32)scaled;
+	if (roundUp && (float)quantized < scaled) {
+		quantized += 1;
+	} else if (!roundUp && (float)quantized > scaled) {
+		quantized -= 1;
+	}
+	return (ma_int8)ma_clamp(quantized, -127, 127);
+}
+
+static ma_result soundobj_peak_push(soundobj_analysis* pAnalysis, ma_uint64* pCapacity, ma_uint64* pPairs, float blockMin, float blockMax)
+{
+	if (soundobj_analyze_reserve((void**)&pAnalysis->pPeaks, pCapacity, (*pPairs + 1) * 2, 1) != MA_SUCCESS) {
+		return MA_OUT_OF_MEMORY;
+	}
+	pAnalysis->pPeaks[*pPairs * 2] = soundobj_peak_quantize(blockMin, MA_FALSE);
+	pAnalysis->pPeaks[*pPairs * 2 + 1] = soundobj_peak_quantize(blockMax, MA_TRUE);
+	*pPairs += 1;
+	return MA_SUCCESS;
+}
+
+/* Appends the coarser levels to level 0, each pair covering two of the level below, until a level has a single pair. */
+static ma_result soundobj_peak_pyramid(soundobj_analysis* pAnalysis, ma_uint64 pairs, ma_uint64* pCapacity)
+{
+	ma_uint64 levelStart = 0;
+	ma_uint64 levelPairs = pairs;
+	pAnalysis->peakLevels = pairs > 0 ? 1 : 0;
+	pAnalysis->peakSize = pairs * 2;
+	while (levelPairs > 1) {
+		ma_uint64 i, nextPairs = (levelPairs + 1) / 2;
+		ma_int8* pLevel;
+		ma_int8* pNext;
+		if (soundobj_analyze_reserve((void**)&pAnalysis->pPeaks, pCapacity, pAnalysis->peakSize + nextPairs * 2, 1) != MA_SUCCESS) {
+			return MA_OUT_OF_MEMORY;
+		}
+		pLevel = pAnalysis->pPeaks + levelStart;
+		pNext = pAnalysis->pPeaks + pAnalysis->peakSize;
+		for (i = 0; i < nextPairs; i += 1) {
+			ma_uint64 a = i * 2, b = ma_min(i * 2 + 1, levelPairs - 1);
+			pNext[i * 2] = ma_min(pLevel[a * 2], pLevel[b * 2]);
+			pNext[i * 2 + 1] = ma_max(pLevel[a * 2 + 1], pLevel[b * 2 + 1]);
+		}
+		levelStart = pAnalysis->peakSize;
+		pAnalysis->peakSize += nextPairs * 2;
+		pAnalysis->peakLevels += 1;
+		levelPairs = nextPairs;
+	}
+	return MA_SUCCESS;
+}
+
+static double soundobj_gated_loudness(const double* pSegments, ma_uint64 segmentCount)
+{
+	const double absoluteGate = ma_powd(10, (-70 + 0.691) / 10);
+	double sum = 0, relativeGate;
+	ma_uint64 i, count = 0;
+	if (segmentCount < 4) {
+		return -HUGE_VAL;
+	}
+	for (i = 0; i + 4 <= segmentCount; i += 1) {
+		double block = (pSegments[i] + pSegments[i + 1] + pSegments[i + 2] + pSegments[i + 3]) / 4;
+		if (block > absoluteGate) {
+			sum += block;
+			count += 1;
+		}
+	}
+	if (count == 0) {
+		return -HUGE_VAL;
+	}
+	relativeGate = sum / count / 10;	/* -10 LU. */
+	sum = 0;
+	count = 0;
+	for (i = 0; i + 4 <= segmentCount; i += 1) {
+		double block = (pSegments[i] + pSegments[i + 1] + pSegments[i + 2] + pSegments[i + 3]) / 4;
+		if (block > absoluteGate && block > relativeGate) {
+			sum += block;
+			count += 1;
+		}
+	}
+	return -0.691 + 10 * ma_log10d(sum / count);
+}
+
+/*
+Analyzes a whole file. peakBlock is the number of frames each min/max pair covers at the finest level of the pyramid. On success free
+pAnalysis->pPeaks with soundobj_free().
+*/
+ma_result soundobj_analyze_file(const char* pFilePath, ma_uint32 peakBlock, soundobj_analysis* pAnalysis)
+{
+	ma_result result;
+	ma_decoder decoder;
+	ma_decoder_config config;
+	ma_channel channelMap[MA_MAX_CHANNELS];
+	soundobj_biquad_coefficients shelf, highPass;
+	soundobj_biquad_state* pFilters = NULL;
+	double* pWeights = NULL;
+	double* pSegments = NULL;
+	float* pChunk = NULL;
+	float* pHistory = NULL;
+	float taps[SOUNDOBJ_TRUE_PEAK_FACTOR][SOUNDOBJ_TRUE_PEAK_HISTORY + 1];
+	float tapBound;
+	ma_uint64 segmentCapacity = 0, segmentCount = 0, peakCapacity = 0, peakPairs = 0;
+	ma_uint32 channels, segmentFrames, segmentCursor = 0, blockCursor = 0, historyStride, c;
+	double segmentSum = 0;
+	float blockMin = 0, blockMax = 0, samplePeak = 0, truePeak = 0;
+	if (pFilePath == NULL || pAnalysis == NULL || peakBlock == 0) {
+		return MA_INVALID_ARGS;
+	}
+	MA_ZERO_OBJECT(pAnalysis);
+	config = soundobj_decoder_config_init(ma_format_f32, 0, 0);
+	result = ma_decoder_init_file(pFilePath, &config, &decoder);
+	if (result != MA_SUCCESS) {
+		return result;
+	}
+	result = ma_decoder_get_data_format(&decoder, NULL, &channels, &pAnalysis->sampleRate, channelMap, MA_MAX_CHANNELS);
+	if (result == MA_SUCCESS && (channels == 0 || pAnalysis->sampleRate == 0)) {
+		result = MA_INVALID_DATA;
+	}
+	if (result != MA_SUCCESS) {
+		ma_decoder_uninit(&decoder);
+		return result;
+	}
+	pAnalysis->channels = channels;
+	pAnalysis->peakBlock = peakBlock;
+	segmentFrames = ma_max(1, (pAnalysis->sampleRate + 5) / 10);
+	historyStride = SOUNDOBJ_TRUE_PEAK_HISTORY + SOUNDOBJ_ANALYZE_CHUNK_FRAMES + SOUNDOBJ_TRUE_PEAK_HALF_TAPS;
+	pFilters = (soundobj_biquad_state*)ma_calloc(sizeof(*pFilters) * channels * 2, NULL);
+	pWeights = (double*)ma_malloc(sizeof(*pWeights) * channels, NULL);
+	pChunk = (float*)ma_malloc(sizeof(float) * SOUNDOBJ_ANALYZE_CHUNK_FRAMES * channels, NULL);
+	pHistory = (float*)ma_calloc(sizeof(float) * historyStride * channels, NULL);
+	if (pFilters == NULL || pWeights == NULL || pChunk == NULL || pHistory == NULL) {
+		result = MA_OUT_OF_MEMORY;
+		goto done;
+	}
+	for (c = 0; c < channels; c += 1) {
+		pWeights[c] = soundobj_loudness_channel_weight(channelMap[c]);
+	}
+	soundobj_k_weighting_init(pAnalysis->sampleRate, &shelf, &highPass);
+	tapBound = soundobj_true_peak_init(taps);
+	for (;;) {
+		ma_uint64 framesRead = 0;
+		ma_uint32 frames, i;
+		float chunkPeak = 0;
+		ma_bool32 atEnd;
+		result = ma_decoder_read_pcm_frames(&decoder, pChunk, SOUNDOBJ_ANALYZE_CHUNK_FRAMES, &framesRead);
+		if (result != MA_SUCCESS && result != MA_AT_END) {
+			goto done;
+		}
+		atEnd = result == MA_AT_END || framesRead < SOUNDOBJ_ANALYZE_CHUNK_FRAMES;
+		result = MA_SUCCESS;
+		frames = (ma_uint32)framesRead;
+		if (atEnd) {
+			/* Flush the interpolator with silence so the last samples get their in-between points too. */
+			MA_ZERO_MEMORY(pChunk + frames * channels, sizeof(float) * ma_min(SOUNDOBJ_TRUE_PEAK_HALF_TAPS, SOUNDOBJ_ANALYZE_CHUNK_FRAMES - frames) * channels);
+		}
+		pAnalysis->frameCount += frames;
+		for (i = 0; i < frames; i += 1) {
+			const float* pFrame = pChunk + i * channels;
+			for (c = 0; c < channels; c += 1) {
+				float sample = pFrame[c];
+				double weighted = soundobj_biquad_process(&highPass, &pFilters[c * 2 + 1], soundobj_biquad_process(&shelf, &pFilters[c * 2], sample));
+				segmentSum += pWeights[c] * weighted * weighted;
+				if (blockCursor == 0 && c == 0) {
+					blockMin = sample;
+					blockMax = sample;
+				} else if (sample < blockMin) {
+					blockMin = sample;
+				} else if (sample > blockMax) {
+					blockMax = sample;
+				}
+				chunkPeak = ma_max(chunkPeak, ma_abs(sample));
+			}
+			if (++segmentCursor == segmentFrames) {
+				if (soundobj_analyze_reserve((void**)&pSegments, &segmentCapacity, segmentCount + 1, sizeof(double)) != MA_SUCCESS) {
+					result = MA_OUT_OF_MEMORY;
+					goto done;
+				}
+				pSegments[segmentCount++] = segmentSum / segmentFrames;
+				segmentSum = 0;
+				segmentCursor = 0;
+			}
+			if (++blockCursor == peakBlock) {
+				result = soundobj_peak_push(pAnalysis, &peakCapacity, &peakPairs, blockMin, blockMax);
+				if (result != MA_SUCCESS) {
+					goto done;
+				}
+				blockCursor = 0;
+			}
+		}
+		samplePeak = ma_max(samplePeak, chunkPeak);
+		if (atEnd) {
+			frames += SOUNDOBJ_TRUE_PEAK_HALF_TAPS;	/* The silent flush written above. */
+		}
+		for (c = 0; c < channels; c += 1) {
+			float* pX = pHistory + c * historyStride;
+			float neighbourhood = chunkPeak;
+			for (i = 0; i < SOUNDOBJ_TRUE_PEAK_HISTORY; i += 1) {
+				neighbourhood = ma_max(neighbourhood, ma_abs(pX[i]));
+			}
+			for (i = 0; i < frames; i += 1) {
+				pX[SOUNDOBJ_TRUE_PEAK_HISTORY + i] = i < SOUNDOBJ_ANALYZE_CHUNK_FRAMES ? pChunk[i * channels + c] : 0;
+			}
+			if (neighbourhood * tapBound > truePeak) {
+				for (i = 0; i < frames; i += 1) {
+					const float* pNewest = pX + SOUNDOBJ_TRUE_PEAK_HISTORY + i;
+					ma_uint32 phase, k;
+					for (phase = 1; phase < SOUNDOBJ_TRUE_PEAK_FACTOR; phase += 1) {
+						float point = 0;
+						for (k = 0; k <= SOUNDOBJ_TRUE_PEAK_HISTORY; k += 1) {
+							point += pNewest[-(ma_int32)k] * taps[phase][k];
+						}
+						truePeak = ma_max(truePeak, ma_abs(point));
+					}
+				}
+			}
+			MA_MOVE_MEMORY(pX, pX + frames, sizeof(float) * SOUNDOBJ_TRUE_PEAK_HISTORY);
+		}
+		if (atEnd) {
+			break;
+		}
+	}
+	if (blockCursor > 0) {
+		result = soundobj_peak_push(pAnalysis, &peakCapacity, &peakPairs, blockMin, blockMax);
+		if (result != MA_SUCCESS) {
+			goto done;
+		}
+	}
+	pAnalysis->truePeak = ma_max(samplePeak, truePeak);
+	pAnalysis->loudness = soundobj_gated_loudness(pSegments, segmentCount);
+	result = soundobj_peak_pyramid(pAnalysis, peakPairs, &peakCapacity);
+done:
+	if (result != MA_SUCCESS) {
+		ma_free(pAnalysis->pPeaks, NULL);
+		pAnalysis->pPeaks = NULL;
+	}
+	ma_free(pFilters, NULL);
+	ma_free(pWeights, NULL);
+	ma_free(pSegments, NULL);
+	ma_free(pChunk, NULL);
+	ma_free(pHistory, NULL);
+	ma_decoder_uninit(&decoder);
+	return result;
+}
@@ -0,0 +1,273 @@
+/*
+* SoundObj parameter automation
+*
+* Breakpoint envelopes for a sound's volume, pitch, pan and position, evaluated on the audio thread at the start of every period against the
+* engine's clock in PCM frames. Each breakpoint carries the shape of the segment that follows it: linear, exponential (a constant ratio per
+* frame, for perceptually even volume and pitch sweeps) or a cubic bezier easing whose two control values are given as fractions of the
+* segment's rise. Before its first breakpoint a curve leaves the parameter alone; after its last it holds the final value and is retired.
+*
+* Volume goes through the sound's fader, set to ramp from the value at the start of the period to the value at its end, so volume moves are
+* interpolated per sample. Pitch, pan and position are set once per period. Curves are added and removed from other threads under a busy
+* flag that the audio thread only tries, skipping a period's update if the flag is held.
+*/
+
+typedef enum
+{
+	SOUNDOBJ_AUTOMATION_VOLUME,
+	SOUNDOBJ_AUTOMATION_PITCH,
+	SOUNDOBJ_AUTOMATION_PAN,
+	SOUNDOBJ_AUTOMATION_POSITION,
+	SOUNDOBJ_AUTOMATION_PARAMETER_COUNT
+} soundobj_automation_parameter;
+
+typedef enum
+{
+	SOUNDOBJ_CURVE_LINEAR,
+	SOUNDOBJ_CURVE_EXPONENTIAL,
+	SOUNDOBJ_CURVE_BEZIER
+} soundobj_curve_shape;
+
+typedef struct
+{
+	ma_uint64 frame;	/* Engine time in PCM frames. */
+	float value[3];	/* Only the first is used, except for position. */
+	ma_uint32 shape;	/* Of the segment from this breakpoint to the next. */
+	float control[2];	/* Bezier control values as fractions of the segment's rise. */
+} soundobj_automation_point;
+
+typedef struct
+{
+	ma_sound* pSound;
+	ma_uint32 parameter;
+	ma_uint32 pointCount;
+	ma_uint32 segment;	/* Audio thread only. Segment the last evaluation fell in, where the next search starts. */
+	MA_ATOMIC(4, ma_uint32) isFinished;
+	soundobj_automation_point* pPoints;
+} soundobj_automation_curve;
+
+typedef struct soundobj_automation
+{
+	soundobj_automation_curve** ppCurves;
+	ma_uint32 count;
+	ma_uint32 capacity;
+	MA_ATOMIC(4, ma_uint32) isBusy;
+} soundobj_automation;
+
+soundobj_automation* soundobj_automation_create(void)
+{
+	return (soundobj_automation*)ma_calloc(sizeof(soundobj_automation), NULL);
+}
+
+static void soundobj_automation_curve_free(soundobj_automation_curve* pCurve)
+{
+	ma_free(pCurve->pPoints, NULL);
+	ma_free(pCurve, NULL);
+}
+
+/* The engine must no longer be running. */
+void soundobj_automation_destroy(soundobj_automation* pAutomation)
+{
+	ma_uint32 i;
+	if (pAutomation == NULL) {
+		return;
+	}
+	for (i = 0; i < pAutomation->count; i += 1) {
+		soundobj_automation_curve_free(pAutomation->ppCurves[i]);
+	}
+	ma_free(pAutomation->ppCurves, NULL);
+	ma_free(pAutomation, NULL);
+}
+
+static void soundobj_automation_lock(soundobj_automation* pAutomation)
+{
+	while (ma_atomic_exchange_32(&pAutomation->isBusy, 1) != 0) {
+		ma_yield();
+	}
+}
+
+static void soundobj_automation_unlock(soundobj_automation* pAutomation)
+{
+	ma_atomic_exchange_32(&pAutomation->isBusy, 0);
+}
+
+/* Drops the curves matching pSound and parameter (all of the sound's with SOUNDOBJ_AUTOMATION_PARAMETER_COUNT), and finished ones. Called locked. */
+static void soundobj_automation_prune(soundobj_automation* pAutomation, ma_sound* pSound, ma_uint32 parameter)
+{
+	ma_uint32 i = 0;
+	while (i < pAutomation->count) {
+		soundobj_automation_curve* pCurve = pAutomation->ppCurves[i];
+		ma_bool32 matches = pCurve->pSound == pSound && (parameter == SOUNDOBJ_AUTOMATION_PARAMETER_COUNT || pCurve->parameter == parameter);
+		if (matches || ma_atomic_load_32(&pCurve->isFinished)) {
+			soundobj_automation_curve_free(pCurve);
+			pAutomation->ppCurves[i] = pAutomation->ppCurves[--pAutomation->count];
+		} else {
+			i += 1;
+		}
+	}
+}
+
+/*
+Schedules a curve for one of pSound's parameters, replacing any curve already on it. Breakpoint frames must not decrease. The points are
+copied.
+*/
+ma_result soundobj_automation_set(soundobj_automation* pAutomation, ma_sound* pSound, ma_uint32 parameter, const soundobj_automation_point* pPoints, ma_uint32 pointCount)
+{
+	soundobj_automation_curve* pCurve;
+	ma_uint32 i;
+	if (pSound == NULL || parameter >= SOUNDOBJ_AUTOMATION_PARAMETER_COUNT || pPoints == NULL || pointCount == 0) {
+		return MA_INVALID_ARGS;
+	}
+	for (i = 0; i < pointCount; i += 1) {
+		if ((i > 0 && pPoints[i].frame < pPoints[i - 1].frame) || pPoints[i].shape > SOUNDOBJ_CURVE_BEZIER) {
+			return MA_INVALID_ARGS;
+		}
+	}
+	pCurve = (soundobj_automation_curve*)ma_calloc(sizeof(*pCurve), NULL);
+	if (pCurve == NULL) {
+		return MA_OUT_OF_MEMORY;
+	}
+	pCurve->pPoints = (soundobj_automation_point*)ma_malloc(sizeof(*pPoints) * pointCount, NULL);
+	if (pCurve->pPoints == NULL) {
+		ma_free(pCurve, NULL);
+		return MA_OUT_OF_MEMORY;
+	}
+	MA_COPY_MEMORY(pCurve->pPoints, pPoints, sizeof(*pPoints) * pointCount);
+	pCurve->pSound = pSound;
+	pCurve->parameter = parameter;
+	pCurve->pointCount = pointCount;
+	soundobj_automation_lock(pAutomation);
+	soundobj_automation_prune(pAutomation, pSound, parameter);
+	if (pAutomation->count == pAutomation->capacity) {
+		ma_uint32 capacity = ma_max(pAutomation->capacity * 2, 16);
+		soundobj_automation_curve** ppCurves = (soundobj_automation_curve**)ma_realloc(pAutomation->ppCurves, sizeof(*ppCurves) * capacity, NULL);
+		if (ppCurves == NULL) {
+			soundobj_automation_unlock(pAutomation);
+			soundobj_automation_curve_free(pCurve);
+			return MA_OUT_OF_MEMORY;
+		}
+		pAutomation->ppCurves = ppCurves;
+		pAutomation->capacity = capacity;
+	}
+	pAutomation->ppCurves[pAutomation->count++] = pCurve;
+	soundobj_automation_unlock(pAutomation);
+	return MA_SUCCESS;
+}
+
+/*
+Removes the curve on one of pSound's parameters, or all of its curves with SOUNDOBJ_AUTOMATION_PARAMETER_COUNT, leaving the parameters at
+whatever value they last had. Must run before the sound is uninitialized.
+*/
+void soundobj_automation_clear(soundobj_automation* pAutomation, ma_sound* pSound, ma_uint32 parameter)
+{
+	soundobj_automation_lock(pAutomation);
+	soundobj_automation_prune(pAutomation, pSound, parameter);
+	soundobj_automation_unlock(pAutomation);
+}
+
+/* Whether pSound's parameter has a curve that hasn't reached its last breakpoint yet. */
+ma_bool32 soundobj_automation_is_active(soundobj_automation* pAutomation, ma_sound* pSound, ma_uint32 parameter)
+{
+	ma_bool32 isActive = MA_FALSE;
+	ma_uint32 i;
+	soundobj_automation_lock(pAutomation);
+	for (i = 0; i < pAutomation->count; i += 1) {
+		soundobj_automation_curve* pCurve = pAutomation->ppCurves[i];
+		if (pCurve->pSound == pSound && pCurve->parameter == parameter && !ma_atomic_load_32(&pCurve->isFinished)) {
+			isActive = MA_TRUE;
+			break;
+		}
+	}
+	soundobj_automation_unlock(pAutomation);
+	return isActive;
+}
+
+static float soundobj_automation_interpolate(const soundobj_automation_point* pFrom, float from, float to, float u)
+{
+	if (pFrom->shape == SOUNDOBJ_CURVE_EXPONENTIAL && ((from > 0 && to > 0) || (from < 0 && to < 0))) {
+		return from * (float)ma_powd(to / from, u);
+	}
+	if (pFrom->shape == SOUNDOBJ_CURVE_BEZIER) {
+		float v = 1 - u;
+		u = 3 * v * v * u * pFrom->control[0] + 3 * v * u * u * pFrom->control[1] + u * u * u;
+	}
+	/* Also exponential segments that start, end or cross zero, which have no constant ratio. */
+	return from + (to - from) * u;
+}
+
+/* Value of the curve at frame, which must not be before its first breakpoint. */
+static void soundobj_automation_evaluate(soundobj_automation_curve* pCurve, ma_uint64 frame, float* pValue)
+{
+	const soundobj_automation_point* pPoints = pCurve->pPoints;
+	const soundobj_automation_point* pFrom;
+	const soundobj_automation_point* pTo;
+	ma_uint32 segment = pCurve->segment, k;
+	float u;
+	if (frame >= pPoints[pCurve->pointCount - 1].frame) {
+		MA_COPY_MEMORY(pValue, pPoints[pCurve->pointCount - 1].value, sizeof(float) * 3);
+		return;
+	}
+	/* Time only moves forward, so the search picks up from the last segment rather than starting over. */
+	if (pPoints[segment].frame > frame) {
+		segment = 0;
+	}
+	while (pPoints[segment + 1].frame <= frame) {
+		segment += 1;
+	}
+	pCurve->segment = segment;
+	pFrom = &pPoints[segment];
+	pTo = &pPoints[segment + 1];
+	u = (float)((double)(frame - pFrom->frame) / (double)(pTo->frame - pFrom->frame));
+	for (k = 0; k < 3; k += 1) {
+		pValue[k] = soundobj_automation_interpolate(pFrom, pFrom->value[k], pTo->value[k], u);
+	}
+}
+
+/* Audio thread, at the start of a period of frameCount frames. */
+static void soundobj_automation_process(soundobj_automation* pAutomation, ma_engine* pEngine, ma_uint32 frameCount)
+{
+	ma_uint64 start, end;
+	ma_uint32 i;
+	if (pAutomation->count == 0 || ma_atomic_exchange_32(&pAutomation->isBusy, 1) != 0) {
+		return;
+	}
+	start = ma_engine_get_time_in_pcm_frames(pEngine);
+	end = start + frameCount;
+	for (i = 0; i < pAutomation->count; i += 1) {
+		soundobj_automation_curve* pCurve = pAutomation->ppCurves[i];
+		ma_uint64 first = pCurve->pPoints[0].frame;
+		ma_uint64 last = pCurve->pPoints[pCurve->pointCount - 1].frame;
+		ma_uint64 from;
+		float value[3];
+		if (ma_atomic_load_32(&pCurve->isFinished) || end <= first) {
+			continue;
+		}
+		from = ma_max(start, first);
+		soundobj_automation_evaluate(pCurve, from, value);
+		switch (pCurve->parameter) {
+			case SOUNDOBJ_AUTOMATION_VOLUME:
+			{
+				float target[3];
+				soundobj_automation_evaluate(pCurve, end, target);
+				/* The fader takes a negative start volume to mean "wherever it is now". */
+				ma_sound_set_fade_in_pcm_frames(pCurve->pSound, ma_max(value[0], 0), ma_max(target[0], 0), end - from);
+			} break;
+			case SOUNDOBJ_AUTOMATION_PITCH:
+			{
+				ma_sound_set_pitch(pCurve->pSound, value[0]);
+			} break;
+			case SOUNDOBJ_AUTOMATION_PAN:
+			{
+				ma_sound_set_pan(pCurve->pSound, value[0]);
+			} break;
+			case SOUNDOBJ_AUTOMATION_POSITION:
+			{
+				ma_sound_set_position(pCurve->pSound, value[0], value[1], value[2]);
+			} break;
+			default: break;
+		}
+		if (from >= last || (pCurve->parameter == SOUNDOBJ_AUTOMATION_VOLUME && end >= last)) {
+			ma_atomic_exchange_32(&pCurve->isFinished, 1);
+		}
+	}
+	ma_atomic_exchange_32(&pAutomation->isBusy, 0);
+}
@@ -0,0 +1,187 @@
+/*
+* SoundObj command buffer
+*
+* A bounded lock-free multi-producer queue of sound commands (property sets, start/stop), applied in order in batches by a single consumer.
+* Producers are any threads changing sounds; the consumer is either the audio thread at the start of each period or whichever thread calls
+* soundobj_command_buffer_apply() on its own tick. The queue is Dmitry Vyukov's bounded MPMC design with a single consumer: every cell carries a
+* sequence number that tells producers whether it is free and the consumer whether it has been published, so neither side ever takes a lock.
+* A consumer flag keeps two threads from draining at once. The audio thread only tries it and skips a period's batch if another thread is
+* draining; other threads spin on it, which is what lets a producer that finds the queue full drain it itself rather than block.
+* A sound being destroyed cancels its own commands by clearing their sound pointer in place, which the consumer then skips, so the rest of
+* the queue stays queued in order.
+*/
+
+typedef enum
+{
+	SOUNDOBJ_COMMAND_START,
+	SOUNDOBJ_COMMAND_STOP,
+	SOUNDOBJ_COMMAND_SEEK,
+	SOUNDOBJ_COMMAND_SET_VOLUME,
+	SOUNDOBJ_COMMAND_SET_PITCH,
+	SOUNDOBJ_COMMAND_SET_PAN,
+	SOUNDOBJ_COMMAND_SET_LOOPING,
+	SOUNDOBJ_COMMAND_SET_POSITION,
+	SOUNDOBJ_COMMAND_SET_DIRECTION,
+	SOUNDOBJ_COMMAND_SET_VELOCITY,
+	SOUNDOBJ_COMMAND_SET_FADE
+} soundobj_command_type;
+
+typedef struct
+{
+	MA_ATOMIC(4, ma_uint32) sequence;
+	ma_uint32 type;
+	ma_sound* pSound;	/* NULL once cancelled. */
+	float x;
+	float y;
+	float z;
+} soundobj_command;
+
+typedef struct soundobj_command_buffer
+{
+	soundobj_command* pCommands;
+	ma_uint32 mask;	/* Capacity - 1. Capacity is a power of two. */
+	MA_ATOMIC(4, ma_uint32) head;	/* Next cell a producer claims. */
+	ma_uint32 tail;	/* Next cell the consumer reads. Only touched while holding isApplying. */
+	MA_ATOMIC(4, ma_uint32) isApplying;
+} soundobj_command_buffer;
+
+soundobj_command_buffer* soundobj_command_buffer_create(ma_uint32 capacity)
+{
+	soundobj_command_buffer* pBuffer;
+	ma_uint32 i;
+	capacity = ma_next_power_of_2(ma_max(capacity, 2));
+	pBuffer = (soundobj_command_buffer*)ma_calloc(sizeof(*pBuffer), NULL);
+	if (pBuffer == NULL) {
+		return NULL;
+	}
+	pBuffer->pCommands = (soundobj_command*)ma_calloc(sizeof(*pBuffer->pCommands) * capacity, NULL);
+	if (pBuffer->pCommands == NULL) {
+		ma_free(pBuffer, NULL);
+		return NULL;
+	}
+	for (i = 0; i < capacity; i += 1) {
+		pBuffer->pCommands[i].sequence = i;
+	}
+	pBuffer->mask = capacity - 1;
+	return pBuffer;
+}
+
+void soundobj_command_buffer_destroy(soundobj_command_buffer* pBuffer)
+{
+	if (pBuffer == NULL) {
+		return;
+	}
+	ma_free(pBuffer->pCommands, NULL);
+	ma_free(pBuffer, NULL);
+}
+
+/* Returns MA_OUT_OF_MEMORY when the queue is full. The caller should apply the queue and try again so that order is preserved. */
+ma_result soundobj_command_buffer_post(soundobj_command_buffer* pBuffer, ma_uint32 type, ma_sound* pSound, float x, float y, float z)
+{
+	soundobj_command* pCommand;
+	ma_uint32 position = ma_atomic_load_32(&pBuffer->head);
+	for (;;) {
+		ma_int32 diff;
+		pCommand = &pBuffer->pCommands[position & pBuffer->mask];
+		diff = (ma_int32)(ma_atomic_load_32(&pCommand->sequence) - position);
+		if (diff == 0) {
+			ma_uint32 claimed = ma_atomic_compare_and_swap_32(&pBuffer->head, position, position + 1);
+			if (claimed == position) {
+				break;
+			}
+			position = claimed;
+		} else if (diff < 0) {
+			return MA_OUT_OF_MEMORY;
+		} else {
+			position = ma_atomic_load_32(&pBuffer->head);
+		}
+	}
+	pCommand->type = type;
+	pCommand->pSound = pSound;
+	pCommand->x = x;
+	pCommand->y = y;
+	pCommand->z = z;
+	ma_atomic_store_32(&pCommand->sequence, position + 1);
+	return MA_SUCCESS;
+}
+
+static void soundobj_command_execute(const soundobj_command* pCommand)
+{
+	ma_sound* pSound = pCommand->pSound;
+	switch (pCommand->type) {
+		case SOUNDOBJ_COMMAND_START: ma_sound_start(pSound); break;
+		case SOUNDOBJ_COMMAND_STOP: ma_sound_stop(pSound); break;
+		case SOUNDOBJ_COMMAND_SEEK: ma_sound_seek_to_second(pSound, pCommand->x); break;
+		case SOUNDOBJ_COMMAND_SET_VOLUME: ma_sound_set_volume(pSound, pCommand->x); break;
+		case SOUNDOBJ_COMMAND_SET_PITCH: ma_sound_set_pitch(pSound, pCommand->x); break;
+		case SOUNDOBJ_COMMAND_SET_PAN: ma_sound_set_pan(pSound, pCommand->x); break;
+		case SOUNDOBJ_COMMAND_SET_LOOPING: ma_sound_set_looping(pSound, pCommand->x != 0); break;
+		case SOUNDOBJ_COMMAND_SET_POSITION: ma_sound_set_position(pSound, pCommand->x, pCommand->y, pCommand->z); break;
+		case SOUNDOBJ_COMMAND_SET_DIRECTION: ma_sound_set_direction(pSound, pCommand->x, pCommand->y, pCommand->z); break;
+		case SOUNDOBJ_COMMAND_SET_VELOCITY: ma_sound_set_velocity(pSound, pCommand->x, pCommand->y, pCommand->z); break;
+		case SOUNDOBJ_COMMAND_SET_FADE: ma_sound_set_fade_in_milliseconds(pSound, pCommand->x, pCommand->y, (ma_uint64)pCommand->z); break;
+		default: break;
+	}
+}
+
+static ma_bool32 soundobj_command_buffer_lock(soundobj_command_buffer* pBuffer, ma_bool32 wait)
+{
+	while (ma_atomic_exchange_32(&pBuffer->isApplying, 1) != 0) {
+		if (!wait) {
+			return MA_FALSE;
+		}
+		ma_yield();
+	}
+	return MA_TRUE;
+}
+
+/*
+Applies every command published so far, in the order they were posted. With wait false this gives up immediately if another thread is
+already applying, which is what the audio thread uses. Returns the number of commands applied.
+*/
+ma_uint32 soundobj_command_buffer_apply(soundobj_command_buffer* pBuffer, ma_bool32 wait)
+{
+	ma_uint32 applied = 0;
+	ma_uint32 capacity = pBuffer->mask + 1;
+	if (!soundobj_command_buffer_lock(pBuffer, wait)) {
+		return 0;
+	}
+	for (;;) {
+		soundobj_command* pCommand = &pBuffer->pCommands[pBuffer->tail & pBuffer->mask];
+		if ((ma_int32)(ma_atomic_load_32(&pCommand->sequence) - (pBuffer->tail + 1)) < 0) {
+			break;	/* Not published yet. */
+		}
+		if (pCommand->pSound != NULL) {
+			soundobj_command_execute(pCommand);
+			applied += 1;
+		}
+		ma_atomic_store_32(&pCommand->sequence, pBuffer->tail + capacity);
+		pBuffer->tail += 1;
+	}
+	ma_atomic_store_32(&pBuffer->isApplying, 0);
+	return applied;
+}
+
+/*
+Cancels every queued command for pSound without applying anything else, and waits out a batch that may be applying one. On return none
+of its commands will run, so the sound can be uninitialized. Commands the caller hasn't finished posting aren't seen, but the thread
+destroying a sound is the only one that may still post for it. Returns the number of commands cancelled.
+*/
+ma_uint32 soundobj_command_buffer_cancel(soundobj_command_buffer* pBuffer, ma_sound* pSound)
+{
+	ma_uint32 cancelled = 0;
+	ma_uint32 position;
+	soundobj_command_buffer_lock(pBuffer, MA_TRUE);
+	for (position = pBuffer->tail;; position += 1) {
+		soundobj_command* pCommand = &pBuffer->pCommands[position & pBuffer->mask];
+		if ((ma_int32)(ma_atomic_load_32(&pCommand->sequence) - (position + 1)) < 0) {
+			break;	/* Not published yet. */
+		}
+		if (pCommand->pSound == pSound) {
+			pCommand->pSound = NULL;
+			cancelled += 1;
+		}
+	}
+	ma_atomic_store_32(&pBuffer->isApplying, 0);
+	return cancelled;
+}
@@ -0,0 +1,104 @@
+/*
+* SoundObj buffer conversion
+*
+* Whole-buffer wrappers around miniaudio's resampler and channel converter so that a conversion is a single FFI call.
+* soundobj_resampler_* exposes a heap allocated ma_resampler for chunked input where filter state must carry over between calls.
+*/
+
+static ma_resampler_config soundobj_resampler_config_init(ma_format format, ma_uint32 channels, ma_uint32 sampleRateIn, ma_uint32 sampleRateOut, ma_uint32 lpfOrder)
+{
+	ma_resampler_config config = ma_resampler_config_init(format, channels, sampleRateIn, sampleRateOut, ma_resample_algorithm_linear);
+	config.linear.lpfOrder = ma_min(lpfOrder, MA_MAX_FILTER_ORDER);
+	return config;
+}
+
+ma_resampler* soundobj_resampler_create(ma_format format, ma_uint32 channels, ma_uint32 sampleRateIn, ma_uint32 sampleRateOut, ma_uint32 lpfOrder)
+{
+	ma_resampler_config config = soundobj_resampler_config_init(format, channels, sampleRateIn, sampleRateOut, lpfOrder);
+	ma_resampler* pResampler = (ma_resampler*)ma_malloc(sizeof(*pResampler), NULL);
+	if (pResampler == NULL) {
+		return NULL;
+	}
+	if (ma_resampler_init(&config, NULL, pResampler) != MA_SUCCESS) {
+		ma_free(pResampler, NULL);
+		return NULL;
+	}
+	return pResampler;
+}
+
+void soundobj_resampler_destroy(ma_resampler* pResampler)
+{
+	if (pResampler == NULL) {
+		return;
+	}
+	ma_resampler_uninit(pResampler, NULL);
+	ma_free(pResampler, NULL);
+}
+
+ma_uint64 soundobj_resampler_get_expected_output_frame_count(ma_resampler* pResampler, ma_uint64 frameCountIn)
+{
+	ma_uint64 frameCountOut = 0;
+	if (ma_resampler_get_expected_output_frame_count(pResampler, frameCountIn, &frameCountOut) != MA_SUCCESS) {
+		return 0;
+	}
+	return frameCountOut;
+}
+
+ma_result soundobj_resampler_process(ma_resampler* pResampler, const void* pFramesIn, ma_uint64* pFrameCountIn, void* pFramesOut, ma_uint64* pFrameCountOut)
+{
+	return ma_resampler_process_pcm_frames(pResampler, pFramesIn, pFrameCountIn, pFramesOut, pFrameCountOut);
+}
+
+ma_result soundobj_resample(ma_format format, ma_uint32 channels, ma_uint32 sampleRateIn, ma_uint32 sampleRateOut, ma_uint32 lpfOrder, const void* pFramesIn, ma_uint64 frameCountIn, void* pFramesOut, ma_uint64* pFrameCountOut)
+{
+	ma_result result;
+	ma_resampler resampler;
+	ma_resampler_config config;
+	ma_uint64 inputUsed = frameCountIn;
+	ma_uint64 outputCap;
+	ma_uint64 outputDone;
+	ma_uint32 bpf = ma_get_bytes_per_frame(format, channels);
+	if (pFramesOut == NULL || pFrameCountOut == NULL || bpf == 0) {
+		return MA_INVALID_ARGS;
+	}
+	outputCap = *pFrameCountOut;
+	config = soundobj_resampler_config_init(format, channels, sampleRateIn, sampleRateOut, lpfOrder);
+	result = ma_resampler_init(&config, NULL, &resampler);
+	if (result != MA_SUCCESS) {
+		return result;
+	}
+	outputDone = outputCap;
+	result = ma_resampler_process_pcm_frames(&resampler, pFramesIn, &inputUsed, pFramesOut, &outputDone);
+	/* Flush the filter's latency with silence so the tail of the input makes it to the output. */
+	while (result == MA_SUCCESS && outputDone < outputCap) {
+		ma_uint8 silence[4096];
+		ma_uint64 silenceFrames = sizeof(silence) / bpf;
+		ma_uint64 outputFrames = outputCap - outputDone;
+		if (silenceFrames == 0) {
+			break;
+		}
+		MA_ZERO_MEMORY(silence, sizeof(silence));
+		result = ma_resampler_process_pcm_frames(&resampler, silence, &silenceFrames, ma_offset_ptr(pFramesOut, outputDone * bpf), &outputFrames);
+		if (outputFrames == 0) {
+			break;
+		}
+		outputDone += outputFrames;
+	}
+	ma_resampler_uninit(&resampler, NULL);
+	*pFrameCountOut = outputDone;
+	return result;
+}
+
+ma_result soundobj_convert_channels(ma_format format, ma_uint32 channelsIn, ma_uint32 channelsOut, ma_channel_mix_mode mixingMode, const void* pFramesIn, void* pFramesOut, ma_uint64 frameCount)
+{
+	ma_result result;
+	ma_channel_converter converter;
+	ma_channel_converter_config config = ma_channel_converter_config_init(format, channelsIn, NULL, channelsOut, NULL, mixingMode);
+	result = ma_channel_converter_init(&config, NULL, &converter);
+	if (result != MA_SUCCESS) {
+		return result;
+	}
+	result = ma_channel_converter_process_pcm_frames(&converter, pFramesOut, pFramesIn, frameCount);
+	ma_channel_converter_uninit(&converter, NULL);
+	return result;
+}
@@ -0,0 +1,417 @@
+/*
+* SoundObj convolution
+*
+* A node that convolves its input with an impulse response using uniformly partitioned overlap-save convolution in the frequency domain.
+* The impulse response is cut into partitions of blockFrames frames, each transformed once up front. Every time blockFrames frames of input
+* have been collected, the last two blocks are transformed and pushed onto a frequency domain delay line, the delay line is multiplied
+* against the partitions and summed, and one inverse transform yields the next block of output. The work per block is two real FFTs of
+* 2 * blockFrames points per channel plus a complex multiply-add per bin per partition, which is what keeps long responses affordable;
+* larger blocks need fewer, bigger transforms at the cost of blockFrames frames of latency on the wet signal. The dry signal is not delayed.
+*
+* Real transforms are done as half-size complex FFTs on even/odd packed samples. Spectra are kept as separate real and imaginary arrays so the
+* multiply-add over the bins vectorizes. Once the input has been silent for longer than the impulse response, the delay line holds nothing
+* but zeros and blocks are skipped outright, so an idle convolver costs little more than a copy.
+*/
+
+#define SOUNDOBJ_CONVOLVER_MIN_BLOCK_FRAMES 32
+#define SOUNDOBJ_CONVOLVER_MAX_BLOCK_FRAMES 16384
+
+typedef struct soundobj_convolver
+{
+	ma_node_base baseNode;	/* Must be first. */
+	ma_node* pSource;	/* Node the convolver is spliced in after, or NULL. */
+	ma_uint32 channels;
+	ma_uint32 blockFrames;	/* Partition size. Also the size of the complex FFT. */
+	ma_uint32 binCount;	/* blockFrames + 1 bins per real spectrum of 2 * blockFrames points. */
+	ma_uint32 partitionCount;
+	ma_atomic_float wet;
+	ma_atomic_float dry;
+	/* Audio thread only. */
+	ma_uint32 blockCursor;	/* Frames of the current block collected so far. */
+	ma_uint32 delayLineCursor;	/* Slot of the delay line holding the newest spectrum. */
+	ma_uint32 silentBlocks;	/* Consecutive blocks of silent input. */
+	ma_bool32 blockHasSignal;
+	float* pInput;	/* 2 * blockFrames per channel: the previous block, then the one being collected. */
+	float* pOutput;	/* blockFrames of wet output per channel, played out while the next block is collected. */
+	float* pDelayLineReal;	/* partitionCount spectra of binCount bins per channel. */
+	float* pDelayLineImag;
+	float* pResponseReal;	/* Spectrum of each partition of the impulse response, per channel, scaled for the unnormalized inverse. */
+	float* pResponseImag;
+	float* pSumReal;	/* binCount bins. */
+	float* pSumImag;
+	float* pReal;	/* blockFrames points of FFT workspace. */
+	float* pImag;
+	float* pCos;	/* Twiddles for the complex FFT, blockFrames / 2 of each. */
+	float* pSin;
+	float* pSplitCos;	/* Twiddles for splitting packed spectra, binCount of each. */
+	float* pSplitSin;
+	ma_uint32* pBitReverse;
+} soundobj_convolver;
+
+void soundobj_convolver_destroy(soundobj_convolver* pConvolver);
+
+/* In-place forward transform of blockFrames points that were stored in bit-reversed order. */
+static void soundobj_convolver_fft(soundobj_convolver* pConvolver)
+{
+	const ma_uint32 size = pConvolver->blockFrames;
+	float* pReal = pConvolver->pReal;
+	float* pImag = pConvolver->pImag;
+	ma_uint32 i, k, span;
+	for (span = 2; span <= size; span <<= 1) {
+		ma_uint32 half = span >> 1;
+		ma_uint32 stride = size / span;
+		for (i = 0; i < size; i += span) {
+			for (k = 0; k < half; k += 1) {
+				float wr = pConvolver->pCos[k * stride];
+				float wi = -pConvolver->pSin[k * stride];
+				ma_uint32 a = i + k;
+				ma_uint32 b = a + half;
+				float tr = pReal[b] * wr - pImag[b] * wi;
+				float ti = pReal[b] * wi + pImag[b] * wr;
+				pReal[b] = pReal[a] - tr;
+				pImag[b] = pImag[a] - ti;
+				pReal[a] += tr;
+				pImag[a] += ti;
+			}
+		}
+	}
+}
+
+/* Spectrum of 2 * blockFrames real samples into binCount bins. */
+static void soundobj_convolver_forward(soundobj_convolver* pConvolver, const float* pSamples, float* pOutReal, float* pOutImag)
+{
+	const ma_uint32 size = pConvolver->blockFrames;
+	const float* pReal = pConvolver->pReal;
+	const float* pImag = pConvolver->pImag;
+	ma_uint32 i, k;
+	for (i = 0; i < size; i += 1) {
+		ma_uint32 j = pConvolver->pBitReverse[i];
+		pConvolver->pReal[j] = pSamples[i * 2];
+		pConvolver->pImag[j] = pSamples[i * 2 + 1];
+	}
+	soundobj_convolver_fft(pConvolver);
+	/* Even samples went in as the real part and odd ones as the imaginary part; separate the two spectra and combine them. */
+	for (k = 0; k <= size; k += 1) {
+		ma_uint32 a = k & (size - 1);
+		ma_uint32 b = (size - k) & (size - 1);
+		float evenReal = (pReal[a] + pReal[b]) * 0.5f;
+		float evenImag = (pImag[a] - pImag[b]) * 0.5f;
+		float oddReal = (pImag[a] + pImag[b]) * 0.5f;
+		float oddImag = (pReal[b] - pReal[a]) * 0.5f;
+		float wr = pConvolver->pSplitCos[k];
+		float wi = -pConvolver->pSplitSin[k];
+		pOutReal[k] = evenReal + oddReal * wr - oddImag * wi;
+		pOutImag[k] = evenImag + oddReal * wi + oddImag * wr;
+	}
+}
+
+/*
+Inverse of soundobj_convolver_forward(), writing only the second half of the 2 * blockFrames samples, which is all overlap-save keeps. The
+result is 2 * blockFrames times too large; the response spectra are scaled to cancel that out.
+*/
+static void soundobj_convolver_inverse(soundobj_convolver* pConvolver, const float* pInReal, const float* pInImag, float* pSamples)
+{
+	const ma_uint32 size = pConvolver->blockFrames;
+	ma_uint32 i, k;
+	for (k = 0; k < size; k += 1) {
+		float evenReal = pInReal[k] + pInReal[size - k];
+		float evenImag = pInImag[k] - pInImag[size - k];
+		float diffReal = pInReal[k] - pInReal[size - k];
+		float diffImag = pInImag[k] + pInImag[size - k];
+		float wr = pConvolver->pSplitCos[k];
+		float wi = pConvolver->pSplitSin[k];
+		float oddReal = diffReal * wr - diffImag * wi;
+		float oddImag = diffReal * wi + diffImag * wr;
+		/* Packed back together and conjugated, so the forward transform computes the inverse. */
+		ma_uint32 j = pConvolver->pBitReverse[k];
+		pConvolver->pReal[j] = evenReal - oddImag;
+		pConvolver->pImag[j] = -(evenImag + oddReal);
+	}
+	soundobj_convolver_fft(pConvolver);
+	for (i = size / 2; i < size; i += 1) {
+		pSamples[(i - size / 2) * 2] = pConvolver->pReal[i];
+		pSamples[(i - size / 2) * 2 + 1] = -pConvolver->pImag[i];
+	}
+}
+
+/* Transforms the two most recent input blocks of every channel and fills pOutput with the next block of wet signal. */
+static void soundobj_convolver_process_block(soundobj_convolver* pConvolver)
+{
+	const ma_uint32 size = pConvolver->blockFrames;
+	const ma_uint32 bins = pConvolver->binCount;
+	const ma_uint32 partitions = pConvolver->partitionCount;
+	const ma_uint32 newest = pConvolver->delayLineCursor;
+	ma_uint32 c, p, k;
+	pConvolver->silentBlocks = pConvolver->blockHasSignal ? 0 : pConvolver->silentBlocks + 1;
+	pConvolver->blockHasSignal = MA_FALSE;
+	/*
+	The delay line is all zeros once every spectrum in it came from silent blocks, which takes partitions + 1 silent blocks as each spectrum
+	covers two. Skipping leaves the slot that would have been overwritten untouched, so wait one more block until that slot is zero too.
+	*/
+	if (pConvolver->silentBlocks > partitions + 1) {
+		MA_ZERO_MEMORY(pConvolver->pOutput, sizeof(float) * size * pConvolver->channels);
+		return;
+	}
+	for (c = 0; c < pConvolver->channels; c += 1) {
+		float* pInput = pConvolver->pInput + (size_t)c * size * 2;
+		float* pDelayLineReal = pConvolver->pDelayLineReal + (size_t)c * partitions * bins;
+		float* pDelayLineImag = pConvolver->pDelayLineImag + (size_t)c * partitions * bins;
+		const float* pResponseReal = pConvolver->pResponseReal + (size_t)c * partitions * bins;
+		const float* pResponseImag = pConvolver->pResponseImag + (size_t)c * partitions * bins;
+		float* pSumReal = pConvolver->pSumReal;
+		float* pSumImag = pConvolver->pSumImag;
+		soundobj_convolver_forward(pConvolver, pInput, pDelayLineReal + (size_t)newest * bins, pDelayLineImag + (size_t)newest * bins);
+		MA_ZERO_MEMORY(pSumReal, sizeof(float) * bins);
+		MA_ZERO_MEMORY(pSumImag, sizeof(float) * bins);
+		/* Partition p of the response pairs with the spectrum from p blocks ago. */
+		for (p = 0; p < partitions; p += 1) {
+			ma_uint32 slot = newest >= p ? newest - p : newest + partitions - p;
+			const float* pXr = pDelayLineReal + (size_t)slot * bins;
+			const float* pXi = pDelayLineImag + (size_t)slot * bins;
+			const float* pHr = pResponseReal + (size_t)p * bins;
+			const float* pHi = pResponseImag + (size_t)p * bins;
+			for (k = 0; k < bins; k += 1) {
+				pSumReal[k] += pXr[k] * pHr[k] - pXi[k] * pHi[k];
+				pSumImag[k] += pXr[k] * pHi[k] + pXi[k] * pHr[k];
+			}
+		}
+		soundobj_convolver_inverse(pConvolver, pSumReal, pSumImag, pConvolver->pOutput + (size_t)c * size);
+		MA_COPY_MEMORY(pInput, pInput + size, sizeof(float) * size);
+	}
+	pConvolver->delayLineCursor = newest + 1 < partitions ? newest + 1 : 0;
+}
+
+static void soundobj_convolver_process(soundobj_convolver* pConvolver, const float* pFramesIn, float* pFramesOut, ma_uint32 frameCount)
+{
+	const ma_uint32 size = pConvolver->blockFrames;
+	const ma_uint32 channels = pConvolver->channels;
+	const float wet = ma_atomic_float_get(&pConvolver->wet);
+	const float dry = ma_atomic_float_get(&pConvolver->dry);
+	while (frameCount > 0) {
+		ma_uint32 frames = ma_min(frameCount, size - pConvolver->blockCursor);
+		ma_uint32 c, i;
+		for (c = 0; c < channels; c += 1) {
+			float* pInput = pConvolver->pInput + (size_t)c * size * 2 + size + pConvolver->blockCursor;
+			const float* pWet = pConvolver->pOutput + (size_t)c * size + pConvolver->blockCursor;
+			for (i = 0; i < frames; i += 1) {
+				float sample = pFramesIn[i * channels + c];
+				pInput[i] = sample;
+				pConvolver->blockHasSignal |= sample != 0;
+				pFramesOut[i * channels + c] = sample * dry + pWet[i] * wet;
+			}
+		}
+		pConvolver->blockCursor += frames;
+		if (pConvolver->blockCursor == size) {
+			soundobj_convolver_process_block(pConvolver);
+			pConvolver->blockCursor = 0;
+		}
+		pFramesIn += frames * channels;
+		pFramesOut += frames * channels;
+		frameCount -= frames;
+	}
+}
+
+static void soundobj_convolver_node_process_pcm_frames(ma_node* pNode, const float** ppFramesIn, ma_uint32* pFrameCountIn, float** ppFramesOut, ma_uint32* pFrameCountOut)
+{
+	(void)pFrameCountIn;
+	soundobj_convolver_process((soundobj_convolver*)pNode, ppFramesIn[0], ppFramesOut[0], *pFrameCountOut);
+}
+
+static ma_node_vtable g_soundobj_convolver_node_vtable =
+{
+	soundobj_convolver_node_process_pcm_frames,
+	NULL,	/* onGetRequiredInputFrameCount */
+	1,
+	1,
+	MA_NODE_FLAG_CONTINUOUS_PROCESSING	/* Keeps the tail going after the input stops. */
+};
+
+static void soundobj_convolver_init_tables(soundobj_convolver* pConvolver)
+{
+	const ma_uint32 size = pConvolver->blockFrames;
+	ma_uint32 i, bits = 0;
+	while ((1u << bits) < size) {
+		bits += 1;
+	}
+	for (i = 0; i < size; i += 1) {
+		ma_uint32 b, reversed = 0;
+		for (b = 0; b < bits; b += 1) {
+			reversed |= ((i >> b) & 1) << (bits - 1 - b);
+		}
+		pConvolver->pBitReverse[i] = reversed;
+	}
+	for (i = 0; i < size / 2; i += 1) {
+		pConvolver->pCos[i] = (float)ma_cosd(2 * MA_PI_D * i / size);
+		pConvolver->pSin[i] = (float)ma_sind(2 * MA_PI_D * i / size);
+	}
+	for (i = 0; i <= size; i += 1) {
+		pConvolver->pSplitCos[i] = (float)ma_cosd(MA_PI_D * i / size);
+		pConvolver->pSplitSin[i] = (float)ma_sind(MA_PI_D * i / size);
+	}
+}
+
+/* Transforms every partition of the interleaved impulse response. With normalize, the loudest channel is scaled to unit energy. */
+static void soundobj_convolver_init_response(soundobj_convolver* pConvolver, const float* pImpulse, ma_uint64 impulseFrames, ma_bool32 normalize)
+{
+	const ma_uint32 size = pConvolver->blockFrames;
+	const ma_uint32 bins = pConvolver->binCount;
+	const ma_uint32 channels = pConvolver->channels;
+	/* pInput is still unused, so it serves as the zero padded buffer for each partition. */
+	float* pPadded = pConvolver->pInput;
+	double scale = 1.0 / (2.0 * size);
+	ma_uint32 c, p, k;
+	ma_uint64 i;
+	if (normalize) {
+		double loudest = 0;
+		for (c = 0; c < channels; c += 1) {
+			double energy = 0;
+			for (i = 0; i < impulseFrames; i += 1) {
+				energy += (double)pImpulse[i * channels + c] * pImpulse[i * channels + c];
+			}
+			loudest = ma_max(loudest, energy);
+		}
+		if (loudest > 0) {
+			scale /= ma_sqrtd(loudest);
+		}
+	}
+	for (c = 0; c < channels; c += 1) {
+		for (p = 0; p < pConvolver->partitionCount; p += 1) {
+			size_t offset = ((size_t)c * pConvolver->partitionCount + p) * bins;
+			ma_uint64 first = (ma_uint64)p * size;
+			MA_ZERO_MEMORY(pPadded, sizeof(float) * size * 2);
+			for (i = first; i < impulseFrames && i < first + size; i += 1) {
+				pPadded[i - first] = pImpulse[i * channels + c];
+			}
+			soundobj_convolver_forward(pConvolver, pPadded, pConvolver->pResponseReal + offset, pConvolver->pResponseImag + offset);
+			for (k = 0; k < bins; k += 1) {
+				pConvolver->pResponseReal[offset + k] *= (float)scale;
+				pConvolver->pResponseImag[offset + k] *= (float)scale;
+			}
+		}
+	}
+	MA_ZERO_MEMORY(pPadded, sizeof(float) * size * 2 * channels);
+}
+
+/*
+Creates a convolver node in pNodeGraph for interleaved f32 impulse response frames with the given channel count, which is also the node's
+channel count. blockFrames is the partition size and must be a power of two; it is the wet signal's latency. The node starts out unattached:
+splice it in after a node with soundobj_convolver_insert() or attach nodes to its input bus directly.
+*/
+ma_result soundobj_convolver_create(ma_node_graph* pNodeGraph, const float* pImpulse, ma_uint64 impulseFrames, ma_uint32 channels, ma_uint32 blockFrames, ma_bool32 normalize, soundobj_convolver** ppConvolver)
+{
+	ma_result result;
+	ma_node_config config;
+	soundobj_convolver* pConvolver;
+	size_t spectrumSize;
+	*ppConvolver = NULL;
+	if (pImpulse == NULL || impulseFrames == 0 || channels == 0 || blockFrames < SOUNDOBJ_CONVOLVER_MIN_BLOCK_FRAMES || blockFrames > SOUNDOBJ_CONVOLVER_MAX_BLOCK_FRAMES || (blockFrames & (blockFrames - 1)) != 0) {
+		return MA_INVALID_ARGS;
+	}
+	if ((impulseFrames + blockFrames - 1) / blockFrames > 0xFFFFFFFF) {
+		return MA_TOO_BIG;
+	}
+	pConvolver = (soundobj_convolver*)ma_calloc(sizeof(*pConvolver), NULL);
+	if (pConvolver == NULL) {
+		return MA_OUT_OF_MEMORY;
+	}
+	pConvolver->channels = channels;
+	pConvolver->blockFrames = blockFrames;
+	pConvolver->binCount = blockFrames + 1;
+	pConvolver->partitionCount = (ma_uint32)((impulseFrames + blockFrames - 1) / blockFrames);
+	ma_atomic_float_set(&pConvolver->wet, 1);
+	ma_atomic_float_set(&pConvolver->dry, 0);
+	spectrumSize = sizeof(float) * channels * pConvolver->partitionCount * pConvolver->binCount;
+	pConvolver->pInput = (float*)ma_calloc(sizeof(float) * blockFrames * 2 * channels, NULL);
+	pConvolver->pOutput = (float*)ma_calloc(sizeof(float) * blockFrames * channels, NULL);
+	pConvolver->pDelayLineReal = (float*)ma_calloc(spectrumSize, NULL);
+	pConvolver->pDelayLineImag = (float*)ma_calloc(spectrumSize, NULL);
+	pConvolver->pResponseReal = (float*)ma_malloc(spectrumSize, NULL);
+	pConvolver->pResponseImag = (float*)ma_malloc(spectrumSize, NULL);
+	pConvolver->pSumReal = (float*)ma_malloc(sizeof(float) * pConvolver->binCount, NULL);
+	pConvolver->pSumImag = (float*)ma_malloc(sizeof(float) * pConvolver->binCount, NULL);
+	pConvolver->pReal = (float*)ma_malloc(sizeof(float) * blockFrames, NULL);
+	pConvolver->pImag = (float*)ma_malloc(sizeof(float) * blockFrames, NULL);
+	pConvolver->pCos = (float*)ma_malloc(sizeof(float) * blockFrames / 2, NULL);
+	pConvolver->pSin = (float*)ma_malloc(sizeof(float) * blockFrames / 2, NULL);
+	pConvolver->pSplitCos = (float*)ma_malloc(sizeof(float) * pConvolver->binCount, NULL);
+	pConvolver->pSplitSin = (float*)ma_malloc(sizeof(float) * pConvolver->binCount, NULL);
+	pConvolver->pBitReverse = (ma_uint32*)ma_malloc(sizeof(ma_uint32) * blockFrames, NULL);
+	if (pConvolver->pInput == NULL || pConvolver->pOutput == NULL || pConvolver->pDelayLineReal == NULL || pConvolver->pDelayLineImag == NULL || pConvolver->pResponseReal == NULL || pConvolver->pResponseImag == NULL || pConvolver->pSumReal == NULL || pConvolver->pSumImag == NULL || pConvolver->pReal == NULL || pConvolver->pImag == NULL || pConvolver->pCos == NULL || pConvolver->pSin == NULL || pConvolver->pSplitCos == NULL || pConvolver->pSplitSin == NULL || pConvolver->pBitReverse == NULL) {
+		soundobj_convolver_destroy(pConvolver);
+		return MA_OUT_OF_MEMORY;
+	}
+	soundobj_convolver_init_tables(pConvolver);
+	soundobj_convolver_init_response(pConvolver, pImpulse, impulseFrames, normalize);
+	config = ma_node_config_init();
+	config.vtable = &g_soundobj_convolver_node_vtable;
+	config.pInputChannels = &pConvolver->channels;
+	config.pOutputChannels = &pConvolver->channels;
+	result = ma_node_init(pNodeGraph, &config, NULL, &pConvolver->baseNode);
+	if (result != MA_SUCCESS) {
+		soundobj_convolver_destroy(pConvolver);
+		return result;
+	}
+	*ppConvolver = pConvolver;
+	return MA_SUCCESS;
+}
+
+/*
+Splices the convolver in after pSource's first output bus, attaching the convolver to whatever pSource was attached to. The channel counts
+must match. A convolver can only be spliced in once.
+*/
+ma_result soundobj_convolver_insert(soundobj_convolver* pConvolver, ma_node* pSource)
+{
+	ma_node_base* pSourceBase = (ma_node_base*)pSource;
+	ma_node* pTarget;
+	if (pConvolver->pSource != NULL || ma_node_get_output_bus_count(pSource) == 0 || ma_node_get_output_channels(pSource, 0) != pConvolver->channels) {
+		return MA_INVALID_ARGS;
+	}
+	pTarget = (ma_node*)ma_atomic_load_ptr(&pSourceBase->pOutputBuses[0].pInputNode);
+	if (pTarget != NULL) {
+		ma_node_attach_output_bus(&pConvolver->baseNode, 0, pTarget, pSourceBase->pOutputBuses[0].inputNodeInputBusIndex);
+	}
+	ma_node_attach_output_bus(pSource, 0, &pConvolver->baseNode, 0);
+	pConvolver->pSource = pSource;
+	return MA_SUCCESS;
+}
+
+/* Removes the convolver from the graph, reconnecting the node it was spliced in after. Must run before that node is uninitialized. */
+void soundobj_convolver_destroy(soundobj_convolver* pConvolver)
+{
+	if (pConvolver == NULL) {
+		return;
+	}
+	if (pConvolver->baseNode.vtable != NULL) {
+		if (pConvolver->pSource != NULL) {
+			soundobj_node_unsplice(pConvolver->pSource, &pConvolver->baseNode);
+		}
+		ma_node_uninit(&pConvolver->baseNode, NULL);
+	}
+	ma_free(pConvolver->pInput, NULL);
+	ma_free(pConvolver->pOutput, NULL);
+	ma_free(pConvolver->pDelayLineReal, NULL);
+	ma_free(pConvolver->pDelayLineImag, NULL);
+	ma_free(pConvolver->pResponseReal, NULL);
+	ma_free(pConvolver->pResponseImag, NULL);
+	ma_free(pConvolver->pSumReal, NULL);
+	ma_free(pConvolver->pSumImag, NULL);
+	ma_free(pConvolver->pReal, NULL);
+	ma_free(pConvolver->pImag, NULL);
+	ma_free(pConvolver->pCos, NULL);
+	ma_free(pConvolver->pSin, NULL);
+	ma_free(pConvolver->pSplitCos, NULL);
+	ma_free(pConvolver->pSplitSin, NULL);
+	ma_free(pConvolver->pBitReverse, NULL);
+	ma_free(pConvolver, NULL);
+}
+
+void soundobj_convolver_set_mix(soundobj_convolver* pConvolver, float wet, float dry)
+{
+	ma_atomic_float_set(&pConvolver->wet, wet);
+	ma_atomic_float_set(&pConvolver->dry, dry);
+}
+
+ma_uint32 soundobj_convolver_get_partition_count(soundobj_convolver* pConvolver)
+{
+	return pConvolver->partitionCount;
+}
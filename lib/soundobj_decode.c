@@ -0,0 +1,119 @@
+/*
+* SoundObj standalone decoding
+*
+* Decodes a whole file into a single heap allocated block of PCM frames without going through the engine or resource manager.
+* The same custom decoding backends that the resource manager uses (Vorbis and Opus) are registered on the decoder.
+* The output block is sized from the decoder's reported length up front so that frames are decoded straight into it; it is only grown when the length is unknown or inaccurate.
+* Free the returned block with soundobj_free().
+*/
+
+static ma_decoder_config soundobj_decoder_config_init(ma_format format, ma_uint32 channels, ma_uint32 sampleRate)
+{
+	ma_decoder_config config = ma_decoder_config_init(format, channels, sampleRate);
+	config.ppCustomBackendVTables = soundobj_get_custom_decoders(&config.customBackendCount);
+	return config;
+}
+
+static ma_result soundobj_decoder_read_all(ma_decoder* pDecoder, void** ppFrames, ma_uint64* pFrameCount)
+{
+	ma_result result;
+	ma_format format;
+	ma_uint32 channels;
+	ma_uint32 sampleRate;
+	ma_uint32 bpf;
+	ma_uint64 capacity = 0;
+	ma_uint64 total = 0;
+	void* pFrames = NULL;
+	result = ma_decoder_get_data_format(pDecoder, &format, &channels, &sampleRate, NULL, 0);
+	if (result != MA_SUCCESS) {
+		return result;
+	}
+	bpf = ma_get_bytes_per_frame(format, channels);
+	if (bpf == 0) {
+		return MA_INVALID_DATA;
+	}
+	if (ma_decoder_get_length_in_pcm_frames(pDecoder, &capacity) != MA_SUCCESS || capacity == 0) {
+		capacity = (sampleRate > 0 ? sampleRate : 48000) * 4;
+	}
+	/* One spare frame so that an accurate length is confirmed by a short read instead of a needless grow. */
+	capacity += 1;
+	pFrames = ma_malloc((size_t)(capacity * bpf), NULL);
+	if (pFrames == NULL) {
+		return MA_OUT_OF_MEMORY;
+	}
+	for (;;) {
+		void* pNew;
+		ma_uint64 framesRead = 0;
+		result = ma_decoder_read_pcm_frames(pDecoder, ma_offset_ptr(pFrames, total * bpf), capacity - total, &framesRead);
+		total += framesRead;
+		if (result != MA_SUCCESS && result != MA_AT_END) {
+			ma_free(pFrames, NULL);
+			return result;
+		}
+		if (total < capacity) {
+			break;
+		}
+		capacity *= 2;
+		pNew = ma_realloc(pFrames, (size_t)(capacity * bpf), NULL);
+		if (pNew == NULL) {
+			ma_free(pFrames, NULL);
+			return MA_OUT_OF_MEMORY;
+		}
+		pFrames = pNew;
+	}
+	*ppFrames = pFrames;
+	*pFrameCount = total;
+	return MA_SUCCESS;
+}
+
+static ma_result soundobj_decoder_decode(ma_decoder* pDecoder, void** ppFrames, ma_uint64* pFrameCount, ma_format* pFormatOut, ma_uint32* pChannelsOut, ma_uint32* pSampleRateOut)
+{
+	ma_result result = ma_decoder_get_data_format(pDecoder, pFormatOut, pChannelsOut, pSampleRateOut, NULL, 0);
+	if (result == MA_SUCCESS) {
+		result = soundobj_decoder_read_all(pDecoder, ppFrames, pFrameCount);
+	}
+	ma_decoder_uninit(pDecoder);
+	return result;
+}
+
+ma_result soundobj_decode_file(const char* pFilePath, ma_format format, ma_uint32 channels, ma_uint32 sampleRate, void** ppFrames, ma_uint64* pFrameCount, ma_format* pFormatOut, ma_uint32* pChannelsOut, ma_uint32* pSampleRateOut)
+{
+	ma_result result;
+	ma_decoder decoder;
+	ma_decoder_config config;
+	if (pFilePath == NULL || ppFrames == NULL || pFrameCount == NULL) {
+		return MA_INVALID_ARGS;
+	}
+	*ppFrames = NULL;
+	*pFrameCount = 0;
+	config = soundobj_decoder_config_init(format, channels, sampleRate);
+	result = ma_decoder_init_file(pFilePath, &config, &decoder);
+	if (result != MA_SUCCESS) {
+		return result;
+	}
+	return soundobj_decoder_decode(&decoder, ppFrames, pFrameCount, pFormatOut, pChannelsOut, pSampleRateOut);
+}
+
+/* As soundobj_decode_file(), opening the file through pVFS. */
+ma_result soundobj_decode_vfs(ma_vfs* pVFS, const char* pFilePath, ma_format format, ma_uint32 channels, ma_uint32 sampleRate, void** ppFrames, ma_uint64* pFrameCount, ma_format* pFormatOut, ma_uint32* pChannelsOut, ma_uint32* pSampleRateOut)
+{
+	ma_result result;
+	ma_decoder decoder;
+	ma_decoder_config config;
+	if (pVFS == NULL || pFilePath == NULL || ppFrames == NULL || pFrameCount == NULL) {
+		return MA_INVALID_ARGS;
+	}
+	*ppFrames = NULL;
+	*pFrameCount = 0;
+	config = soundobj_decoder_config_init(format, channels, sampleRate);
+	result = ma_decoder_init_vfs(pVFS, pFilePath, &config, &decoder);
+	if (result != MA_SUCCESS) {
+		return result;
+	}
+	return soundobj_decoder_decode(&decoder, ppFrames, pFrameCount, pFormatOut, pChannelsOut, pSampleRateOut);
+}
+
+void soundobj_free(void* p)
+{
+	ma_free(p, NULL);
+}
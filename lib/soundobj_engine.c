@@ -0,0 +1,325 @@
+/*
+* SoundObj engine state
+*
+* Per-engine state that lives next to an ma_engine and is reachable from the audio thread through the engine's pProcessUserData.
+* soundobj_engine_config_attach() swaps in our own device data callback so that every period can be timed against its deadline.
+* All counters are written by the audio thread only and read (and optionally reset) from Python with atomics, so the audio thread never waits on anything.
+*/
+
+typedef struct
+{
+	ma_uint32 callbacks;
+	ma_uint32 deadlineMisses;
+	float peakLoad;
+	ma_uint32 periodSizeInFrames;
+} soundobj_period_stats;
+
+typedef struct soundobj_engine_state
+{
+	ma_timer timer;
+	double lastCallbackStart;
+	MA_ATOMIC(4, ma_uint32) callbacks;
+	MA_ATOMIC(4, ma_uint32) deadlineMisses;
+	MA_ATOMIC(4, float) peakLoad;
+	MA_ATOMIC(4, ma_uint32) periodSizeInFrames;
+	soundobj_command_buffer* pCommands;	/* Applied at the start of every period when set. */
+	MA_ATOMIC(MA_SIZEOF_PTR, soundobj_meter*) pMeter;	/* Fed the final output of every period when set. */
+	MA_ATOMIC(MA_SIZEOF_PTR, soundobj_recorder*) pRecorder;	/* Fed the final output of every period when set. */
+	MA_ATOMIC(4, ma_uint32) tapUsers;	/* Threads currently feeding pMeter or pRecorder. */
+	soundobj_lod* pLod;	/* Updated at the start of every period when set. */
+	soundobj_automation* pAutomation;	/* Evaluated at the start of every period when set. */
+	ma_device_config deviceConfig;	/* What the engine's device was opened with, reused when the period size changes. */
+	ma_device_id deviceID;	/* Copied from the engine config, which needn't outlive ma_engine_init(). */
+} soundobj_engine_state;
+
+soundobj_engine_state* soundobj_engine_state_create(void)
+{
+	soundobj_engine_state* pState = (soundobj_engine_state*)ma_calloc(sizeof(*pState), NULL);
+	if (pState == NULL) {
+		return NULL;
+	}
+	ma_timer_init(&pState->timer);
+	pState->lastCallbackStart = -1;
+	return pState;
+}
+
+void soundobj_engine_state_destroy(soundobj_engine_state* pState)
+{
+	ma_free(pState, NULL);
+}
+
+/*
+A period counts as a deadline miss when mixing it took longer than the audio it produced, or when it started more than two periods after the previous one.
+The first case is the mixer itself overrunning, the second is the callback being scheduled too late; either way the device ran dry.
+*/
+static void soundobj_engine_record_period(soundobj_engine_state* pState, double start, double end, ma_uint32 frameCount, ma_uint32 sampleRate)
+{
+	double duration;
+	float load;
+	if (sampleRate == 0 || frameCount == 0) {
+		return;
+	}
+	duration = (double)frameCount / sampleRate;
+	load = (float)((end - start) / duration);
+	ma_atomic_fetch_add_32(&pState->callbacks, 1);
+	if (load > 1 || (pState->lastCallbackStart >= 0 && start - pState->lastCallbackStart > duration * 2)) {
+		ma_atomic_fetch_add_32(&pState->deadlineMisses, 1);
+		soundobj_trace_instant(SOUNDOBJ_TRACE_DEADLINE_MISS, frameCount);
+	}
+	if (load > ma_atomic_load_f32(&pState->peakLoad)) {
+		ma_atomic_store_f32(&pState->peakLoad, load);
+	}
+	ma_atomic_store_32(&pState->periodSizeInFrames, frameCount);
+	pState->lastCallbackStart = start;
+}
+
+static void soundobj_engine_tap_output(soundobj_engine_state* pState, const float* pFrames, ma_uint32 frameCount)
+{
+	soundobj_meter* pMeter;
+	soundobj_recorder* pRecorder;
+	ma_atomic_fetch_add_32(&pState->tapUsers, 1);
+	pMeter = (soundobj_meter*)ma_atomic_load_ptr(&pState->pMeter);
+	if (pMeter != NULL) {
+		soundobj_meter_process(pMeter, pFrames, frameCount);
+	}
+	pRecorder = (soundobj_recorder*)ma_atomic_load_ptr(&pState->pRecorder);
+	if (pRecorder != NULL) {
+		soundobj_recorder_push(pRecorder, pFrames, frameCount);
+	}
+	ma_atomic_fetch_sub_32(&pState->tapUsers, 1);
+}
+
+/* Waits out any thread still feeding a meter or recorder that was just swapped out. */
+static void soundobj_engine_wait_for_taps(soundobj_engine_state* pState)
+{
+	while (ma_atomic_load_32(&pState->tapUsers) != 0) {
+		ma_yield();
+	}
+}
+
+/* ma_engine_read_pcm_frames(), plus evaluating automation, updating voice LOD and feeding the engine's meter and recorder. Used by the device callback and by offline rendering. */
+ma_result soundobj_engine_read_pcm_frames(ma_engine* pEngine, void* pFramesOut, ma_uint64 frameCount, ma_uint64* pFramesRead)
+{
+	soundobj_engine_state* pState = (soundobj_engine_state*)pEngine->pProcessUserData;
+	ma_uint64 framesRead = 0;
+	ma_result result;
+	double traceStart;
+	if (pState != NULL && pState->pAutomation != NULL) {
+		soundobj_automation_process(pState->pAutomation, pEngine, (ma_uint32)frameCount);
+	}
+	if (pState != NULL && pState->pLod != NULL) {
+		soundobj_lod_process(pState->pLod, pEngine, (ma_uint32)frameCount);
+	}
+	traceStart = soundobj_trace_begin();
+	result = ma_engine_read_pcm_frames(pEngine, pFramesOut, frameCount, &framesRead);
+	soundobj_trace_end(SOUNDOBJ_TRACE_MIX, traceStart, framesRead);
+	if (pState != NULL && framesRead > 0) {
+		soundobj_engine_tap_output(pState, (const float*)pFramesOut, (ma_uint32)framesRead);
+	}
+	if (pFramesRead != NULL) {
+		*pFramesRead = framesRead;
+	}
+	return result;
+}
+
+static void soundobj_engine_data_callback(ma_device* pDevice, void* pFramesOut, const void* pFramesIn, ma_uint32 frameCount)
+{
+	ma_engine* pEngine = (ma_engine*)pDevice->pUserData;
+	soundobj_engine_state* pState = (soundobj_engine_state*)pEngine->pProcessUserData;
+	double start = ma_timer_get_time_in_seconds(&pState->timer);
+	double traceStart = soundobj_trace_begin();
+	(void)pFramesIn;
+	if (pState->pCommands != NULL) {
+		soundobj_command_buffer_apply(pState->pCommands, MA_FALSE);
+	}
+	soundobj_engine_read_pcm_frames(pEngine, pFramesOut, frameCount, NULL);
+	soundobj_trace_end(SOUNDOBJ_TRACE_AUDIO_CALLBACK, traceStart, frameCount);
+	soundobj_engine_record_period(pState, start, ma_timer_get_time_in_seconds(&pState->timer), frameCount, pDevice->sampleRate);
+}
+
+/* Must be called after the rest of pConfig is filled in. */
+void soundobj_engine_config_attach(ma_engine_config* pConfig, soundobj_engine_state* pState)
+{
+	pConfig->dataCallback = soundobj_engine_data_callback;
+	pConfig->pProcessUserData = pState;
+	/* The device config ma_engine_init() builds from pConfig. Channels, sample rate and period size are filled in when it's reused. */
+	pState->deviceConfig = ma_device_config_init(ma_device_type_playback);
+	if (pConfig->pPlaybackDeviceID != NULL) {
+		pState->deviceID = *pConfig->pPlaybackDeviceID;
+		pState->deviceConfig.playback.pDeviceID = &pState->deviceID;
+	}
+	pState->deviceConfig.playback.format = ma_format_f32;
+	pState->deviceConfig.dataCallback = soundobj_engine_data_callback;
+	pState->deviceConfig.notificationCallback = pConfig->notificationCallback;
+	pState->deviceConfig.noPreSilencedOutputBuffer = MA_TRUE;
+	pState->deviceConfig.noClip = MA_TRUE;
+}
+
+/* Must be called before the engine is initialized. The buffer must outlive the engine. */
+void soundobj_engine_state_set_command_buffer(soundobj_engine_state* pState, soundobj_command_buffer* pCommands)
+{
+	pState->pCommands = pCommands;
+}
+
+/* Must be called before the engine is initialized. The LOD controller must outlive the engine. */
+void soundobj_engine_state_set_lod(soundobj_engine_state* pState, soundobj_lod* pLod)
+{
+	pState->pLod = pLod;
+}
+
+/* Must be called before the engine is initialized. The automation must outlive the engine. */
+void soundobj_engine_state_set_automation(soundobj_engine_state* pState, soundobj_automation* pAutomation)
+{
+	pState->pAutomation = pAutomation;
+}
+
+/*
+Sets the meter fed the engine's output, or clears it with NULL. The meter's channel count must match the engine's. On return the previous
+meter is no longer in use by the audio thread and may be destroyed.
+*/
+void soundobj_engine_state_set_meter(soundobj_engine_state* pState, soundobj_meter* pMeter)
+{
+	ma_atomic_exchange_ptr(&pState->pMeter, pMeter);
+	soundobj_engine_wait_for_taps(pState);
+}
+
+/*
+Sets the recorder fed the engine's output, or clears it with NULL. The recorder's channel count must match the engine's. On return the
+previous recorder is no longer in use by the audio thread and may be destroyed.
+*/
+void soundobj_engine_state_set_recorder(soundobj_engine_state* pState, soundobj_recorder* pRecorder)
+{
+	ma_atomic_exchange_ptr(&pState->pRecorder, pRecorder);
+	soundobj_engine_wait_for_taps(pState);
+}
+
+void soundobj_engine_get_period_stats(soundobj_engine_state* pState, soundobj_period_stats* pStats, ma_bool32 reset)
+{
+	if (reset) {
+		pStats->callbacks = ma_atomic_exchange_32(&pState->callbacks, 0);
+		pStats->deadlineMisses = ma_atomic_exchange_32(&pState->deadlineMisses, 0);
+		pStats->peakLoad = ma_atomic_exchange_f32(&pState->peakLoad, 0);
+	} else {
+		pStats->callbacks = ma_atomic_load_32(&pState->callbacks);
+		pStats->deadlineMisses = ma_atomic_load_32(&pState->deadlineMisses);
+		pStats->peakLoad = ma_atomic_load_f32(&pState->peakLoad);
+	}
+	pStats->periodSizeInFrames = ma_atomic_load_32(&pState->periodSizeInFrames);
+}
+
+ma_uint32 soundobj_engine_get_period_size(ma_engine* pEngine)
+{
+	if (pEngine->pDevice == NULL) {
+		return 0;
+	}
+	return pEngine->pDevice->playback.internalPeriodSizeInFrames;
+}
+
+/*
+Reinitializes the engine's device with a new period size. Sounds live in the engine's node graph rather than on the device, so they survive this untouched.
+The device is reopened with the config the engine opened it with, on the same context, so the backend, device and log are kept.
+If the new device cannot be opened, the previous period size is restored. If even that fails the device is left zeroed, which ma_engine_uninit() treats as uninitialized.
+*/
+ma_result soundobj_engine_set_period_size(ma_engine* pEngine, soundobj_engine_state* pState, ma_uint32 periodSizeInFrames)
+{
+	ma_result result;
+	ma_device_config config;
+	ma_device* pDevice = pEngine->pDevice;
+	ma_context* pContext;
+	ma_bool32 ownsContext;
+	ma_bool32 wasStarted;
+	ma_uint32 previousPeriodSizeInFrames;
+	if (pDevice == NULL || !pEngine->ownsDevice) {
+		return MA_INVALID_OPERATION;
+	}
+	wasStarted = ma_device_get_state(pDevice) == ma_device_state_started;
+	previousPeriodSizeInFrames = pDevice->playback.internalPeriodSizeInFrames;
+	config = pState->deviceConfig;
+	/* The node graph was built for the channels and rate the device ended up with, which the engine config may have left to the device. */
+	config.playback.channels = ma_engine_get_channels(pEngine);
+	config.sampleRate = ma_engine_get_sample_rate(pEngine);
+	config.pUserData = pEngine;
+	config.periodSizeInFrames = periodSizeInFrames;
+	config.periodSizeInMilliseconds = 0;
+	/* A device that created its own context would tear it down with itself; keep it for the new device instead. */
+	pContext = pDevice->pContext;
+	ownsContext = pDevice->isOwnerOfContext;
+	pDevice->isOwnerOfContext = MA_FALSE;
+	ma_device_uninit(pDevice);
+	/* The audio thread is gone at this point, and the gap until the new device's first callback is not a miss. */
+	pState->lastCallbackStart = -1;
+	result = ma_device_init(pContext, &config, pDevice);
+	if (result != MA_SUCCESS) {
+		config.periodSizeInFrames = previousPeriodSizeInFrames;
+		if (ma_device_init(pContext, &config, pDevice) != MA_SUCCESS) {
+			if (ownsContext) {
+				ma_allocation_callbacks allocationCallbacks = pContext->allocationCallbacks;
+				ma_context_uninit(pContext);
+				ma_free(pContext, &allocationCallbacks);
+			}
+			MA_ZERO_OBJECT(pDevice);
+			return result;
+		}
+	}
+	pDevice->isOwnerOfContext = ownsContext;
+	if (wasStarted) {
+		ma_device_start(pDevice);
+	}
+	return result;
+}
+
+/*
+Initializes pEngine and then, once its sample rate is known, pResourceManager for it, the way ma_engine_init() sets up a resource manager
+of its own. A decoded format and sample rate left unset in pResourceManagerConfig are filled in with the engine's mixing format (always f32)
+and rate before the resource manager is initialized. Decoders then convert once when a file is opened, with the custom backends decoding
+straight to f32, instead of every voice converting on the audio thread for every period. The decoded channel count is deliberately left
+alone: mono sources must stay mono to be spatialized. The engine is only started, unless its config says not to, once both are ready.
+*/
+ma_result soundobj_engine_init_matched(ma_engine_config* pEngineConfig, ma_resource_manager_config* pResourceManagerConfig, ma_resource_manager* pResourceManager, ma_engine* pEngine)
+{
+	ma_result result;
+	ma_bool32 noAutoStart = pEngineConfig->noAutoStart;
+	/* ma_engine_init() only stores the resource manager and asks it for a log, which is NULL until it is initialized. */
+	MA_ZERO_OBJECT(pResourceManager);
+	pEngineConfig->pResourceManager = pResourceManager;
+	pEngineConfig->noAutoStart = MA_TRUE;
+	result = ma_engine_init(pEngineConfig, pEngine);
+	pEngineConfig->noAutoStart = noAutoStart;
+	if (result != MA_SUCCESS) {
+		return result;
+	}
+	if (pResourceManagerConfig->decodedFormat == ma_format_unknown) {
+		pResourceManagerConfig->decodedFormat = ma_format_f32;
+	}
+	if (pResourceManagerConfig->decodedSampleRate == 0) {
+		pResourceManagerConfig->decodedSampleRate = ma_engine_get_sample_rate(pEngine);
+	}
+	result = ma_resource_manager_init(pResourceManagerConfig, pResourceManager);
+	if (result == MA_SUCCESS && !noAutoStart && ma_engine_get_device(pEngine) != NULL) {
+		result = ma_engine_start(pEngine);
+		if (result != MA_SUCCESS) {
+			ma_resource_manager_uninit(pResourceManager);
+		}
+	}
+	if (result != MA_SUCCESS) {
+		ma_engine_uninit(pEngine);
+	}
+	return result;
+}
+
+/*
+Uninitializes the sounds ma_engine_play_sound() started, as ma_engine_uninit() would. The device must already be stopped. Lets the resource
+manager's job threads be stopped before the engine is uninitialized, since uninitializing a sound that is still loading posts a job and
+waits for it.
+*/
+void soundobj_engine_release_inlined_sounds(ma_engine* pEngine)
+{
+	ma_spinlock_lock(&pEngine->inlinedSoundLock);
+	while (pEngine->pInlinedSoundHead != NULL) {
+		ma_sound_inlined* pSound = pEngine->pInlinedSoundHead;
+		pEngine->pInlinedSoundHead = pSound->pNext;
+		ma_sound_uninit(&pSound->sound);
+		ma_free(pSound, &pEngine->allocationCallbacks);
+	}
+	ma_spinlock_unlock(&pEngine->inlinedSoundLock);
+}
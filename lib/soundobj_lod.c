@@ -0,0 +1,298 @@
+/*
+* SoundObj spatial level of detail
+*
+* Moves spatialized sounds between three processing tiers depending on how far they are from their listener, so that dense scenes only
+* pay for full 3D processing on the voices that can be told apart:
+*
+*   FULL     Everything as configured.
+*   REDUCED  Doppler off, which keeps the resampler's ratio fixed instead of recomputing it every period.
+*   MINIMAL  Spatializer bypassed. Distance attenuation (by the sound's own model) and left/right position are approximated with the
+*            output bus volume and the panner, once per update rather than per frame. The resampler is bypassed as well when the sound
+*            is not pitched and already at the engine's rate.
+*
+* Distances are divided by each voice's priority, so a priority of 2 keeps a voice at full detail twice as far out, and a voice only moves
+* back up a tier once it is comfortably inside the threshold, so voices hovering at a boundary don't flip every update. Anything the tiers
+* change (Doppler factor, pan, spatialization, pitching) is saved on the way down and restored on the way up.
+*
+* Updates run on the audio thread at the start of a period, at most once per interval. Registration from other threads takes a busy flag
+* that the audio thread only tries, skipping that update if the flag is held.
+*/
+
+#define SOUNDOBJ_LOD_HYSTERESIS 0.1f
+
+typedef enum
+{
+	SOUNDOBJ_LOD_FULL,
+	SOUNDOBJ_LOD_REDUCED,
+	SOUNDOBJ_LOD_MINIMAL
+} soundobj_lod_tier;
+
+typedef struct
+{
+	ma_sound* pSound;
+	float priority;
+	ma_uint32 tier;
+	float dopplerFactor;	/* Saved when leaving FULL. */
+	float pan;	/* Saved when entering MINIMAL. */
+	ma_bool32 wasPitchDisabled;
+} soundobj_lod_voice;
+
+typedef struct
+{
+	ma_uint32 full;
+	ma_uint32 reduced;
+	ma_uint32 minimal;
+} soundobj_lod_counts;
+
+typedef struct soundobj_lod
+{
+	soundobj_lod_voice* pVoices;
+	ma_uint32 count;
+	ma_uint32 capacity;
+	float reducedDistance;
+	float minimalDistance;
+	float interval;	/* Seconds between updates. */
+	ma_uint32 framesUntilUpdate;	/* Audio thread only. */
+	MA_ATOMIC(4, ma_uint32) isBusy;
+	MA_ATOMIC(4, ma_uint32) tierCounts[3];
+} soundobj_lod;
+
+soundobj_lod* soundobj_lod_create(float reducedDistance, float minimalDistance, float interval)
+{
+	soundobj_lod* pLod = (soundobj_lod*)ma_calloc(sizeof(*pLod), NULL);
+	if (pLod == NULL) {
+		return NULL;
+	}
+	pLod->reducedDistance = reducedDistance;
+	pLod->minimalDistance = ma_max(minimalDistance, reducedDistance);
+	pLod->interval = interval;
+	return pLod;
+}
+
+void soundobj_lod_destroy(soundobj_lod* pLod)
+{
+	if (pLod == NULL) {
+		return;
+	}
+	ma_free(pLod->pVoices, NULL);
+	ma_free(pLod, NULL);
+}
+
+static void soundobj_lod_lock(soundobj_lod* pLod)
+{
+	while (ma_atomic_exchange_32(&pLod->isBusy, 1) != 0) {
+		ma_yield();
+	}
+}
+
+static void soundobj_lod_unlock(soundobj_lod* pLod)
+{
+	ma_atomic_store_32(&pLod->isBusy, 0);
+}
+
+static soundobj_lod_voice* soundobj_lod_find(soundobj_lod* pLod, ma_sound* pSound)
+{
+	ma_uint32 i;
+	for (i = 0; i < pLod->count; i += 1) {
+		if (pLod->pVoices[i].pSound == pSound) {
+			return &pLod->pVoices[i];
+		}
+	}
+	return NULL;
+}
+
+static void soundobj_lod_set_tier(soundobj_lod* pLod, soundobj_lod_voice* pVoice, ma_uint32 tier)
+{
+	ma_sound* pSound = pVoice->pSound;
+	if (tier == pVoice->tier) {
+		return;
+	}
+	if (pVoice->tier == SOUNDOBJ_LOD_FULL) {
+		pVoice->dopplerFactor = ma_sound_get_doppler_factor(pSound);
+		ma_sound_set_doppler_factor(pSound, 0);
+	}
+	if (tier == SOUNDOBJ_LOD_MINIMAL) {
+		pVoice->pan = ma_sound_get_pan(pSound);
+		pVoice->wasPitchDisabled = ma_atomic_load_32(&pSound->engineNode.isPitchDisabled);
+		ma_sound_set_spatialization_enabled(pSound, MA_FALSE);
+	} else if (pVoice->tier == SOUNDOBJ_LOD_MINIMAL) {
+		ma_atomic_store_32(&pSound->engineNode.isPitchDisabled, pVoice->wasPitchDisabled);
+		ma_sound_set_pan(pSound, pVoice->pan);
+		ma_node_set_output_bus_volume(pSound, 0, 1);
+		ma_sound_set_spatialization_enabled(pSound, MA_TRUE);
+	}
+	if (tier == SOUNDOBJ_LOD_FULL) {
+		ma_sound_set_doppler_factor(pSound, pVoice->dopplerFactor);
+	}
+	ma_atomic_fetch_sub_32(&pLod->tierCounts[pVoice->tier], 1);
+	ma_atomic_fetch_add_32(&pLod->tierCounts[tier], 1);
+	pVoice->tier = tier;
+}
+
+/* What the spatializer would have done, to the nearest gain and pan, for a voice at the MINIMAL tier. */
+static void soundobj_lod_approximate(soundobj_lod_voice* pVoice, const ma_engine* pEngine, ma_uint32 listenerIndex, ma_vec3f relative, float distance)
+{
+	ma_sound* pSound = pVoice->pSound;
+	float minDistance = ma_sound_get_min_distance(pSound);
+	float maxDistance = ma_sound_get_max_distance(pSound);
+	float rolloff = ma_sound_get_rolloff(pSound);
+	float gain = 1;
+	float pan = 0;
+	float near, far;
+	ma_vec3f right;
+	switch (ma_sound_get_attenuation_model(pSound)) {
+		case ma_attenuation_model_inverse: gain = ma_attenuation_inverse(distance, minDistance, maxDistance, rolloff); break;
+		case ma_attenuation_model_linear: gain = ma_attenuation_linear(distance, minDistance, maxDistance, rolloff); break;
+		case ma_attenuation_model_exponential: gain = ma_attenuation_exponential(distance, minDistance, maxDistance, rolloff); break;
+		default: break;
+	}
+	gain = ma_clamp(gain, ma_sound_get_min_gain(pSound), ma_sound_get_max_gain(pSound));
+	if (distance > 0) {
+		/* Same per-side gains as the spatializer's stereo panning: (1 + side) / 2, floored at its minimum channel gain. */
+		float minChannelGain = pSound->engineNode.spatializer.minSpatializationChannelGain;
+		float side;
+		if (ma_sound_get_positioning(pSound) == ma_positioning_relative) {
+			right = ma_vec3f_init_3f(1, 0, 0);
+		} else {
+			ma_vec3f forward = ma_engine_listener_get_direction(pEngine, listenerIndex);
+			ma_vec3f up = ma_engine_listener_get_world_up(pEngine, listenerIndex);
+			right = ma_vec3f_normalize(ma_vec3f_cross(forward, up));
+		}
+		side = ma_clamp(ma_vec3f_dot(relative, right) / distance, -1, 1);
+		near = ma_max((1 + ma_abs(side)) * 0.5f, minChannelGain);
+		far = ma_max((1 - ma_abs(side)) * 0.5f, minChannelGain);
+		gain *= near;
+		pan = side < 0 ? far / near - 1 : 1 - far / near;
+	}
+	ma_node_set_output_bus_volume(pSound, 0, gain);
+	ma_sound_set_pan(pSound, ma_clamp(pVoice->pan + pan, -1, 1));
+	/* The resampler only does real work here if the sound is pitched or at a different rate to the engine. */
+	if (!pVoice->wasPitchDisabled) {
+		ma_bool32 canBypass = ma_sound_get_pitch(pSound) == 1 && pSound->engineNode.sampleRate == ma_engine_get_sample_rate(pEngine);
+		ma_atomic_store_32(&pSound->engineNode.isPitchDisabled, canBypass);
+	}
+}
+
+static void soundobj_lod_update_voice(soundobj_lod* pLod, soundobj_lod_voice* pVoice, ma_engine* pEngine)
+{
+	ma_sound* pSound = pVoice->pSound;
+	ma_vec3f position = ma_sound_get_position(pSound);
+	ma_vec3f relative = position;
+	ma_uint32 listenerIndex = ma_sound_get_pinned_listener_index(pSound);
+	ma_uint32 down, up, tier;
+	float distance, effective;
+	if (listenerIndex >= ma_engine_get_listener_count(pEngine)) {
+		listenerIndex = ma_engine_find_closest_listener(pEngine, position.x, position.y, position.z);
+	}
+	if (ma_sound_get_positioning(pSound) == ma_positioning_absolute) {
+		relative = ma_vec3f_sub(position, ma_engine_listener_get_position(pEngine, listenerIndex));
+	}
+	distance = ma_vec3f_len(relative);
+	effective = pVoice->priority > 0 ? distance / pVoice->priority : pLod->minimalDistance;
+	down = effective >= pLod->minimalDistance ? SOUNDOBJ_LOD_MINIMAL : (effective >= pLod->reducedDistance ? SOUNDOBJ_LOD_REDUCED : SOUNDOBJ_LOD_FULL);
+	effective /= 1 - SOUNDOBJ_LOD_HYSTERESIS;
+	up = effective >= pLod->minimalDistance ? SOUNDOBJ_LOD_MINIMAL : (effective >= pLod->reducedDistance ? SOUNDOBJ_LOD_REDUCED : SOUNDOBJ_LOD_FULL);
+	tier = pVoice->tier;
+	if (down > tier) {
+		tier = down;
+	} else if (up < tier) {
+		tier = up;
+	}
+	soundobj_lod_set_tier(pLod, pVoice, tier);
+	if (tier == SOUNDOBJ_LOD_MINIMAL) {
+		soundobj_lod_approximate(pVoice, pEngine, listenerIndex, relative, distance);
+	}
+}
+
+/* Audio thread. Called at the start of every period with the period's length. */
+static void soundobj_lod_process(soundobj_lod* pLod, ma_engine* pEngine, ma_uint32 frameCount)
+{
+	ma_uint32 i;
+	if (pLod->framesUntilUpdate > frameCount) {
+		pLod->framesUntilUpdate -= frameCount;
+		return;
+	}
+	if (ma_atomic_exchange_32(&pLod->isBusy, 1) != 0) {
+		return;	/* Another thread is registering a voice. Try again next period. */
+	}
+	for (i = 0; i < pLod->count; i += 1) {
+		soundobj_lod_update_voice(pLod, &pLod->pVoices[i], pEngine);
+	}
+	soundobj_lod_unlock(pLod);
+	pLod->framesUntilUpdate = (ma_uint32)(pLod->interval * ma_engine_get_sample_rate(pEngine));
+}
+
+/* Puts a sound under LOD control at the FULL tier. */
+ma_result soundobj_lod_add(soundobj_lod* pLod, ma_sound* pSound, float priority)
+{
+	soundobj_lod_voice* pVoice;
+	soundobj_lod_lock(pLod);
+	if (soundobj_lod_find(pLod, pSound) != NULL) {
+		soundobj_lod_unlock(pLod);
+		return MA_ALREADY_EXISTS;
+	}
+	if (pLod->count == pLod->capacity) {
+		ma_uint32 capacity = ma_max(pLod->capacity * 2, 64);
+		soundobj_lod_voice* pNew = (soundobj_lod_voice*)ma_realloc(pLod->pVoices, sizeof(*pNew) * capacity, NULL);
+		if (pNew == NULL) {
+			soundobj_lod_unlock(pLod);
+			return MA_OUT_OF_MEMORY;
+		}
+		pLod->pVoices = pNew;
+		pLod->capacity = capacity;
+	}
+	pVoice = &pLod->pVoices[pLod->count++];
+	MA_ZERO_OBJECT(pVoice);
+	pVoice->pSound = pSound;
+	pVoice->priority = priority;
+	pVoice->tier = SOUNDOBJ_LOD_FULL;
+	ma_atomic_fetch_add_32(&pLod->tierCounts[SOUNDOBJ_LOD_FULL], 1);
+	soundobj_lod_unlock(pLod);
+	return MA_SUCCESS;
+}
+
+/* Restores everything the tiers changed and releases the sound. Must be called before the sound is uninitialized. */
+void soundobj_lod_remove(soundobj_lod* pLod, ma_sound* pSound)
+{
+	soundobj_lod_voice* pVoice;
+	soundobj_lod_lock(pLod);
+	pVoice = soundobj_lod_find(pLod, pSound);
+	if (pVoice != NULL) {
+		soundobj_lod_set_tier(pLod, pVoice, SOUNDOBJ_LOD_FULL);
+		ma_atomic_fetch_sub_32(&pLod->tierCounts[SOUNDOBJ_LOD_FULL], 1);
+		*pVoice = pLod->pVoices[--pLod->count];
+	}
+	soundobj_lod_unlock(pLod);
+}
+
+void soundobj_lod_set_priority(soundobj_lod* pLod, ma_sound* pSound, float priority)
+{
+	soundobj_lod_voice* pVoice;
+	soundobj_lod_lock(pLod);
+	pVoice = soundobj_lod_find(pLod, pSound);
+	if (pVoice != NULL) {
+		pVoice->priority = priority;
+	}
+	soundobj_lod_unlock(pLod);
+}
+
+/* Returns the tier of a sound, or -1 if it isn't under LOD control. */
+ma_int32 soundobj_lod_get_tier(soundobj_lod* pLod, ma_sound* pSound)
+{
+	soundobj_lod_voice* pVoice;
+	ma_int32 tier = -1;
+	soundobj_lod_lock(pLod);
+	pVoice = soundobj_lod_find(pLod, pSound);
+	if (pVoice != NULL) {
+		tier = (ma_int32)pVoice->tier;
+	}
+	soundobj_lod_unlock(pLod);
+	return tier;
+}
+
+void soundobj_lod_get_counts(soundobj_lod* pLod, soundobj_lod_counts* pCounts)
+{
+	pCounts->full = ma_atomic_load_32(&pLod->tierCounts[SOUNDOBJ_LOD_FULL]);
+	pCounts->reduced = ma_atomic_load_32(&pLod->tierCounts[SOUNDOBJ_LOD_REDUCED]);
+	pCounts->minimal = ma_atomic_load_32(&pLod->tierCounts[SOUNDOBJ_LOD_MINIMAL]);
+}
@@ -0,0 +1,370 @@
+/*
+* SoundObj meters
+*
+* Peak, RMS and an optional band spectrum of a signal, measured on the audio thread and published to other threads without locks.
+* A meter either sits in the node graph as a passthrough node between a sound (or group) and whatever that was attached to, or is fed the
+* engine's final output from the device callback. Levels accumulate over a fixed window. At the end of each window the results are written
+* to the snapshot buffer readers are not looking at and the sequence number is bumped; readers copy the current snapshot and retry if the
+* sequence moved underneath them, so the audio thread never waits. Per frame a meter costs a compare and a multiply-add per channel; the
+* spectrum, when enabled, adds one fixed-size FFT per window regardless of the period size.
+*/
+
+#define SOUNDOBJ_METER_FFT_SIZE 1024
+#define SOUNDOBJ_METER_MIN_FREQUENCY 20.0
+
+typedef struct soundobj_meter
+{
+	ma_node_base baseNode;	/* Must be first. Only initialized while the meter taps a node. */
+	ma_node* pSource;	/* Node whose output passes through the meter, or NULL. */
+	ma_uint32 channels;
+	ma_uint32 windowFrames;
+	ma_uint32 bandCount;
+	ma_uint32 snapshotSize;	/* Floats per snapshot: peak per channel, RMS per channel, then one per band. */
+	/* Audio thread only. */
+	ma_uint32 windowCursor;
+	float* pPeak;
+	double* pSumSquares;
+	float* pHistory;	/* The last FFT_SIZE frames mixed to mono, as a ring. NULL without a spectrum. */
+	ma_uint32 historyCursor;
+	float* pReal;
+	float* pImag;
+	float* pHann;
+	float* pCos;	/* Twiddles, FFT_SIZE / 2 of each. */
+	float* pSin;
+	ma_uint32* pBitReverse;
+	ma_uint32* pBandEdges;	/* bandCount + 1 FFT bins. Band i covers [pBandEdges[i], pBandEdges[i + 1]). */
+	float spectrumScale;	/* Makes a full scale sine read 1 in its band. */
+	/* Shared. */
+	float* pSnapshots[2];
+	MA_ATOMIC(4, ma_uint32) sequence;	/* Windows published so far. pSnapshots[sequence & 1] is the current one. */
+	ma_uint32* pPeakHold;	/* Bits of the highest peak per channel since the last read. Accessed atomically. */
+} soundobj_meter;
+
+void soundobj_meter_destroy(soundobj_meter* pMeter);
+
+static void soundobj_meter_init_spectrum(soundobj_meter* pMeter, ma_uint32 sampleRate)
+{
+	const ma_uint32 size = SOUNDOBJ_METER_FFT_SIZE;
+	double nyquist = sampleRate / 2.0;
+	double windowSum = 0;
+	ma_uint32 i, bits = 0;
+	while ((1u << bits) < size) {
+		bits += 1;
+	}
+	for (i = 0; i < size; i += 1) {
+		ma_uint32 b, reversed = 0;
+		for (b = 0; b < bits; b += 1) {
+			reversed |= ((i >> b) & 1) << (bits - 1 - b);
+		}
+		pMeter->pBitReverse[i] = reversed;
+		pMeter->pHann[i] = (float)(0.5 - 0.5 * ma_cosd(2 * MA_PI_D * i / size));
+		windowSum += pMeter->pHann[i];
+	}
+	for (i = 0; i < size / 2; i += 1) {
+		pMeter->pCos[i] = (float)ma_cosd(2 * MA_PI_D * i / size);
+		pMeter->pSin[i] = (float)ma_sind(2 * MA_PI_D * i / size);
+	}
+	pMeter->spectrumScale = (float)(2 / windowSum);
+	/* Log-spaced from 20 Hz to Nyquist, widened where needed so that every band holds at least one bin. */
+	for (i = 0; i <= pMeter->bandCount; i += 1) {
+		double frequency = SOUNDOBJ_METER_MIN_FREQUENCY * ma_powd(nyquist / SOUNDOBJ_METER_MIN_FREQUENCY, (double)i / pMeter->bandCount);
+		ma_uint32 bin = (ma_uint32)(frequency * size / sampleRate + 0.5);
+		if (i > 0 && bin <= pMeter->pBandEdges[i - 1]) {
+			bin = pMeter->pBandEdges[i - 1] + 1;
+		}
+		pMeter->pBandEdges[i] = ma_max(bin, 1);
+	}
+	for (i = pMeter->bandCount + 1; i-- > 0;) {
+		pMeter->pBandEdges[i] = ma_min(pMeter->pBandEdges[i], size / 2 + 1 - (pMeter->bandCount - i));
+	}
+}
+
+/*
+Creates a meter for a signal with the given channel count. windowFrames is how many frames each snapshot covers. With bandCount above 0 a
+spectrum of that many log-spaced bands is computed at the end of every window; at most FFT_SIZE / 4 bands are supported.
+*/
+soundobj_meter* soundobj_meter_create(ma_uint32 channels, ma_uint32 sampleRate, ma_uint32 windowFrames, ma_uint32 bandCount)
+{
+	soundobj_meter* pMeter;
+	if (channels == 0 || sampleRate == 0 || windowFrames == 0 || bandCount > SOUNDOBJ_METER_FFT_SIZE / 4) {
+		return NULL;
+	}
+	pMeter = (soundobj_meter*)ma_calloc(sizeof(*pMeter), NULL);
+	if (pMeter == NULL) {
+		return NULL;
+	}
+	pMeter->channels = channels;
+	pMeter->windowFrames = windowFrames;
+	pMeter->bandCount = bandCount;
+	pMeter->snapshotSize = channels * 2 + bandCount;
+	pMeter->pPeak = (float*)ma_calloc(sizeof(float) * channels, NULL);
+	pMeter->pSumSquares = (double*)ma_calloc(sizeof(double) * channels, NULL);
+	pMeter->pPeakHold = (ma_uint32*)ma_calloc(sizeof(ma_uint32) * channels, NULL);
+	pMeter->pSnapshots[0] = (float*)ma_calloc(sizeof(float) * pMeter->snapshotSize, NULL);
+	pMeter->pSnapshots[1] = (float*)ma_calloc(sizeof(float) * pMeter->snapshotSize, NULL);
+	if (pMeter->pPeak == NULL || pMeter->pSumSquares == NULL || pMeter->pPeakHold == NULL || pMeter->pSnapshots[0] == NULL || pMeter->pSnapshots[1] == NULL) {
+		soundobj_meter_destroy(pMeter);
+		return NULL;
+	}
+	if (bandCount > 0) {
+		pMeter->pHistory = (float*)ma_calloc(sizeof(float) * SOUNDOBJ_METER_FFT_SIZE, NULL);
+		pMeter->pReal = (float*)ma_calloc(sizeof(float) * SOUNDOBJ_METER_FFT_SIZE, NULL);
+		pMeter->pImag = (float*)ma_calloc(sizeof(float) * SOUNDOBJ_METER_FFT_SIZE, NULL);
+		pMeter->pHann = (float*)ma_calloc(sizeof(float) * SOUNDOBJ_METER_FFT_SIZE, NULL);
+		pMeter->pCos = (float*)ma_calloc(sizeof(float) * SOUNDOBJ_METER_FFT_SIZE / 2, NULL);
+		pMeter->pSin = (float*)ma_calloc(sizeof(float) * SOUNDOBJ_METER_FFT_SIZE / 2, NULL);
+		pMeter->pBitReverse = (ma_uint32*)ma_calloc(sizeof(ma_uint32) * SOUNDOBJ_METER_FFT_SIZE, NULL);
+		pMeter->pBandEdges = (ma_uint32*)ma_calloc(sizeof(ma_uint32) * (bandCount + 1), NULL);
+		if (pMeter->pHistory == NULL || pMeter->pReal == NULL || pMeter->pImag == NULL || pMeter->pHann == NULL || pMeter->pCos == NULL || pMeter->pSin == NULL || pMeter->pBitReverse == NULL || pMeter->pBandEdges == NULL) {
+			soundobj_meter_destroy(pMeter);
+			return NULL;
+		}
+		soundobj_meter_init_spectrum(pMeter, sampleRate);
+	}
+	return pMeter;
+}
+
+static void soundobj_meter_spectrum(soundobj_meter* pMeter, float* pBands)
+{
+	const ma_uint32 size = SOUNDOBJ_METER_FFT_SIZE;
+	float* pReal = pMeter->pReal;
+	float* pImag = pMeter->pImag;
+	ma_uint32 i, k, span, band;
+	/* Oldest sample first, windowed and stored in bit-reversed order for the iterative radix-2 transform below. */
+	for (i = 0; i < size; i += 1) {
+		ma_uint32 j = pMeter->pBitReverse[i];
+		pReal[j] = pMeter->pHistory[(pMeter->historyCursor + i) & (size - 1)] * pMeter->pHann[i];
+		pImag[j] = 0;
+	}
+	for (span = 2; span <= size; span <<= 1) {
+		ma_uint32 half = span >> 1;
+		ma_uint32 stride = size / span;
+		for (i = 0; i < size; i += span) {
+			for (k = 0; k < half; k += 1) {
+				float wr = pMeter->pCos[k * stride];
+				float wi = -pMeter->pSin[k * stride];
+				ma_uint32 a = i + k;
+				ma_uint32 b = a + half;
+				float tr = pReal[b] * wr - pImag[b] * wi;
+				float ti = pReal[b] * wi + pImag[b] * wr;
+				pReal[b] = pReal[a] - tr;
+				pImag[b] = pImag[a] - ti;
+				pReal[a] += tr;
+				pImag[a] += ti;
+			}
+		}
+	}
+	for (band = 0; band < pMeter->bandCount; band += 1) {
+		float loudest = 0;
+		for (k = pMeter->pBandEdges[band]; k < pMeter->pBandEdges[band + 1]; k += 1) {
+			float power = pReal[k] * pReal[k] + pImag[k] * pImag[k];
+			if (power > loudest) {
+				loudest = power;
+			}
+		}
+		pBands[band] = (float)ma_sqrtd(loudest) * pMeter->spectrumScale;
+	}
+}
+
+static void soundobj_meter_raise_hold(ma_uint32* pHold, float value)
+{
+	ma_uint32 bits = ma_atomic_load_32(pHold);
+	for (;;) {
+		float held;
+		ma_uint32 raised, seen;
+		MA_COPY_MEMORY(&held, &bits, sizeof(held));
+		if (value <= held) {
+			return;
+		}
+		MA_COPY_MEMORY(&raised, &value, sizeof(raised));
+		seen = ma_atomic_compare_and_swap_32(pHold, bits, raised);
+		if (seen == bits) {
+			return;
+		}
+		bits = seen;
+	}
+}
+
+static void soundobj_meter_publish(soundobj_meter* pMeter)
+{
+	ma_uint32 sequence = ma_atomic_load_32(&pMeter->sequence);
+	float* pSnapshot = pMeter->pSnapshots[(sequence + 1) & 1];
+	ma_uint32 c;
+	for (c = 0; c < pMeter->channels; c += 1) {
+		pSnapshot[c] = pMeter->pPeak[c];
+		pSnapshot[pMeter->channels + c] = (float)ma_sqrtd(pMeter->pSumSquares[c] / pMeter->windowFrames);
+		soundobj_meter_raise_hold(&pMeter->pPeakHold[c], pMeter->pPeak[c]);
+		pMeter->pPeak[c] = 0;
+		pMeter->pSumSquares[c] = 0;
+	}
+	if (pMeter->bandCount > 0) {
+		soundobj_meter_spectrum(pMeter, pSnapshot + pMeter->channels * 2);
+	}
+	ma_atomic_store_32(&pMeter->sequence, sequence + 1);
+	pMeter->windowCursor = 0;
+}
+
+/* Audio thread only. pFrames is interleaved f32 with the meter's channel count. */
+static void soundobj_meter_process(soundobj_meter* pMeter, const float* pFrames, ma_uint32 frameCount)
+{
+	ma_uint32 channels = pMeter->channels;
+	while (frameCount > 0) {
+		ma_uint32 frames = ma_min(frameCount, pMeter->windowFrames - pMeter->windowCursor);
+		ma_uint32 i, c;
+		for (i = 0; i < frames; i += 1) {
+			float mono = 0;
+			for (c = 0; c < channels; c += 1) {
+				float sample = pFrames[c];
+				float magnitude = ma_abs(sample);
+				if (magnitude > pMeter->pPeak[c]) {
+					pMeter->pPeak[c] = magnitude;
+				}
+				pMeter->pSumSquares[c] += sample * sample;
+				mono += sample;
+			}
+			if (pMeter->pHistory != NULL) {
+				pMeter->pHistory[pMeter->historyCursor] = mono / channels;
+				pMeter->historyCursor = (pMeter->historyCursor + 1) & (SOUNDOBJ_METER_FFT_SIZE - 1);
+			}
+			pFrames += channels;
+		}
+		frameCount -= frames;
+		pMeter->windowCursor += frames;
+		if (pMeter->windowCursor == pMeter->windowFrames) {
+			soundobj_meter_publish(pMeter);
+		}
+	}
+}
+
+static void soundobj_meter_node_process_pcm_frames(ma_node* pNode, const float** ppFramesIn, ma_uint32* pFrameCountIn, float** ppFramesOut, ma_uint32* pFrameCountOut)
+{
+	/* A passthrough: the graph has already read the input straight into the output buffer. */
+	(void)ppFramesIn;
+	(void)pFrameCountIn;
+	soundobj_meter_process((soundobj_meter*)pNode, ppFramesOut[0], *pFrameCountOut);
+}
+
+static ma_node_vtable g_soundobj_meter_node_vtable =
+{
+	soundobj_meter_node_process_pcm_frames,
+	NULL,	/* onGetRequiredInputFrameCount */
+	1,
+	1,
+	MA_NODE_FLAG_PASSTHROUGH
+};
+
+/*
+Splices the meter in after pSource's first output bus, attaching the meter to whatever pSource was attached to. The meter's channel count
+must match that bus. A meter can only tap one node, once.
+*/
+ma_result soundobj_meter_attach(soundobj_meter* pMeter, ma_node_graph* pNodeGraph, ma_node* pSource)
+{
+	ma_result result;
+	ma_node_config config;
+	ma_node_base* pSourceBase = (ma_node_base*)pSource;
+	ma_node* pTarget;
+	ma_uint32 targetBusIndex;
+	if (pMeter->pSource != NULL || ma_node_get_output_bus_count(pSource) == 0 || ma_node_get_output_channels(pSource, 0) != pMeter->channels) {
+		return MA_INVALID_ARGS;
+	}
+	config = ma_node_config_init();
+	config.vtable = &g_soundobj_meter_node_vtable;
+	config.pInputChannels = &pMeter->channels;
+	config.pOutputChannels = &pMeter->channels;
+	result = ma_node_init(pNodeGraph, &config, NULL, &pMeter->baseNode);
+	if (result != MA_SUCCESS) {
+		return result;
+	}
+	pTarget = (ma_node*)ma_atomic_load_ptr(&pSourceBase->pOutputBuses[0].pInputNode);
+	targetBusIndex = pSourceBase->pOutputBuses[0].inputNodeInputBusIndex;
+	if (pTarget != NULL) {
+		ma_node_attach_output_bus(&pMeter->baseNode, 0, pTarget, targetBusIndex);
+	}
+	ma_node_attach_output_bus(pSource, 0, &pMeter->baseNode, 0);
+	pMeter->pSource = pSource;
+	return MA_SUCCESS;
+}
+
+/*
+Takes pNode out of a chain that was spliced in after pSource, reattaching whatever feeds it to wherever it was attached. Other nodes may
+have been spliced in between since, so the chain is followed from pSource rather than assuming pSource feeds pNode directly.
+*/
+static void soundobj_node_unsplice(ma_node* pSource, ma_node_base* pNode)
+{
+	ma_node* pTarget = (ma_node*)ma_atomic_load_ptr(&pNode->pOutputBuses[0].pInputNode);
+	ma_node* pFeeder = pSource;
+	ma_uint32 hops;
+	for (hops = 0; pFeeder != NULL && hops < 64; hops += 1) {
+		ma_node* pNext = (ma_node*)ma_atomic_load_ptr(&((ma_node_base*)pFeeder)->pOutputBuses[0].pInputNode);
+		if (pNext == (ma_node*)pNode) {
+			if (pTarget != NULL) {
+				ma_node_attach_output_bus(pFeeder, 0, pTarget, pNode->pOutputBuses[0].inputNodeInputBusIndex);
+			} else {
+				ma_node_detach_output_bus(pFeeder, 0);
+			}
+			break;
+		}
+		pFeeder = pNext;
+	}
+}
+
+/* Reattaches the source to wherever the meter was attached and takes the meter out of the graph. Must run before the source is uninitialized. */
+void soundobj_meter_detach(soundobj_meter* pMeter)
+{
+	if (pMeter->pSource == NULL) {
+		return;
+	}
+	soundobj_node_unsplice(pMeter->pSource, &pMeter->baseNode);
+	ma_node_uninit(&pMeter->baseNode, NULL);
+	pMeter->pSource = NULL;
+}
+
+void soundobj_meter_destroy(soundobj_meter* pMeter)
+{
+	if (pMeter == NULL) {
+		return;
+	}
+	soundobj_meter_detach(pMeter);
+	ma_free(pMeter->pPeak, NULL);
+	ma_free(pMeter->pSumSquares, NULL);
+	ma_free(pMeter->pPeakHold, NULL);
+	ma_free(pMeter->pSnapshots[0], NULL);
+	ma_free(pMeter->pSnapshots[1], NULL);
+	ma_free(pMeter->pHistory, NULL);
+	ma_free(pMeter->pReal, NULL);
+	ma_free(pMeter->pImag, NULL);
+	ma_free(pMeter->pHann, NULL);
+	ma_free(pMeter->pCos, NULL);
+	ma_free(pMeter->pSin, NULL);
+	ma_free(pMeter->pBitReverse, NULL);
+	ma_free(pMeter->pBandEdges, NULL);
+	ma_free(pMeter, NULL);
+}
+
+ma_uint32 soundobj_meter_get_snapshot_size(soundobj_meter* pMeter)
+{
+	return pMeter->snapshotSize;
+}
+
+/*
+Copies the latest snapshot into pOut (peak per channel, RMS per channel, then the bands) followed by the peak hold per channel, so pOut
+needs snapshotSize + channels floats. With resetHold the hold starts over. Returns the number of windows published so far; 0 means
+nothing has been measured yet.
+*/
+ma_uint32 soundobj_meter_read(soundobj_meter* pMeter, float* pOut, ma_bool32 resetHold)
+{
+	ma_uint32 sequence, c;
+	for (;;) {
+		sequence = ma_atomic_load_32(&pMeter->sequence);
+		MA_COPY_MEMORY(pOut, pMeter->pSnapshots[sequence & 1], sizeof(float) * pMeter->snapshotSize);
+		ma_atomic_thread_fence(ma_atomic_memory_order_acquire);
+		if (ma_atomic_load_32(&pMeter->sequence) == sequence) {
+			break;
+		}
+	}
+	for (c = 0; c < pMeter->channels; c += 1) {
+		ma_uint32 bits = resetHold ? ma_atomic_exchange_32(&pMeter->pPeakHold[c], 0) : ma_atomic_load_32(&pMeter->pPeakHold[c]);
+		MA_COPY_MEMORY(&pOut[pMeter->snapshotSize + c], &bits, sizeof(float));
+	}
+	return sequence;
+}
@@ -0,0 +1,747 @@
+/*
+* SoundObj geometry occlusion
+*
+* Scene geometry made of triangle meshes, each with a transmission factor (the fraction of sound that gets through one of its surfaces),
+* and a bounding volume hierarchy over all of their triangles. Registered sounds get a small node spliced in after them that applies a gain
+* and a two-pole low-pass; an update casts a segment from each voice's listener to the voice and multiplies the transmission of every
+* surface it crosses, which sets the gain directly and the cutoff on a log scale between minCutoff (nothing gets through) and no filtering
+* at all (nothing in the way).
+*
+* Updates run on whichever thread calls soundobj_occlusion_update() and cast rays for all voices that need them in one batch. A voice only
+* needs one when it is new, when it or its listener has moved further than the threshold since its last ray, or when the geometry has
+* changed. The BVH is rebuilt lazily, on the first update or query after meshes were added or removed. The audio thread only reads each
+* voice's target gain and filter coefficient atomically and glides towards them over the period, so results never land as a step.
+*/
+
+#define SOUNDOBJ_OCCLUSION_LEAF_SIZE 4
+#define SOUNDOBJ_OCCLUSION_MAX_DEPTH 64
+#define SOUNDOBJ_OCCLUSION_EPSILON 1e-4f
+#define SOUNDOBJ_OCCLUSION_MAX_HITS 64
+
+typedef struct
+{
+	float v0[3];
+	float e1[3];	/* v1 - v0 */
+	float e2[3];	/* v2 - v0 */
+	float transmission;
+} soundobj_occlusion_triangle;
+
+typedef struct
+{
+	float min[3];
+	float max[3];
+	ma_uint32 first;	/* Leaves: first triangle. Inner nodes: index of the right child; the left child always follows its parent. */
+	ma_uint32 count;	/* Triangles in a leaf, 0 for inner nodes. */
+} soundobj_occlusion_bvh_node;
+
+typedef struct
+{
+	ma_uint32 id;
+	float transmission;
+	ma_uint32 triangleCount;
+	float* pVertices;	/* Nine floats per triangle. */
+} soundobj_occlusion_mesh;
+
+typedef struct
+{
+	ma_node_base baseNode;	/* Must be first. */
+	ma_sound* pSound;
+	ma_uint32 channels;
+	ma_uint32 sampleRate;
+	/* Update thread, under the lock. */
+	ma_bool32 hasResult;
+	ma_uint32 geometryVersion;
+	float listener[3];	/* Where the listener and the sound were for the last ray. */
+	float emitter[3];
+	float transmission;
+	/* Shared. */
+	ma_atomic_float targetGain;
+	ma_atomic_float targetCoefficient;
+	/* Audio thread only. */
+	float gain;
+	float coefficient;	/* Of each one-pole stage, 1 for no filtering. */
+	float* pState;	/* Two per channel. */
+} soundobj_occlusion_voice;
+
+typedef struct soundobj_occlusion
+{
+	ma_engine* pEngine;
+	ma_mutex lock;
+	float minCutoff;
+	float moveThresholdSquared;
+	soundobj_occlusion_mesh* pMeshes;
+	ma_uint32 meshCount;
+	ma_uint32 meshCapacity;
+	ma_uint32 nextMeshId;
+	soundobj_occlusion_triangle* pTriangles;
+	ma_uint32 triangleCount;
+	soundobj_occlusion_bvh_node* pNodes;
+	ma_uint32 nodeCount;
+	ma_bool32 isDirty;
+	ma_uint32 version;	/* Bumped whenever the geometry changes, so every voice gets a new ray. */
+	soundobj_occlusion_voice** ppVoices;
+	ma_uint32 voiceCount;
+	ma_uint32 voiceCapacity;
+	/* Batch buffers for update(), grown as needed. */
+	float* pOrigins;
+	float* pTargets;
+	float* pResults;
+	ma_uint32* pPending;
+	ma_uint32 batchCapacity;
+} soundobj_occlusion;
+
+static void soundobj_occlusion_node_process_pcm_frames(ma_node* pNode, const float** ppFramesIn, ma_uint32* pFrameCountIn, float** ppFramesOut, ma_uint32* pFrameCountOut)
+{
+	soundobj_occlusion_voice* pVoice = (soundobj_occlusion_voice*)pNode;
+	const float* pIn = ppFramesIn[0];
+	float* pOut = ppFramesOut[0];
+	const ma_uint32 frameCount = *pFrameCountOut;
+	const ma_uint32 channels = pVoice->channels;
+	const float targetGain = ma_atomic_float_get(&pVoice->targetGain);
+	const float targetCoefficient = ma_atomic_float_get(&pVoice->targetCoefficient);
+	float gain = pVoice->gain;
+	float coefficient = pVoice->coefficient;
+	float gainStep, coefficientStep;
+	ma_uint32 i, c;
+	(void)pFrameCountIn;
+	if (frameCount == 0) {
+		return;
+	}
+	if (gain == targetGain && coefficient == targetCoefficient && coefficient == 1) {
+		/* Nothing in the way: a plain copy, with the filter state following the signal so a wall appearing later starts cleanly. */
+		for (i = 0; i < frameCount * channels; i += 1) {
+			pOut[i] = pIn[i] * gain;
+		}
+		for (c = 0; c < channels; c += 1) {
+			pVoice->pState[c * 2] = pVoice->pState[c * 2 + 1] = pIn[(frameCount - 1) * channels + c];
+		}
+		return;
+	}
+	gainStep = (targetGain - gain) / frameCount;
+	coefficientStep = (targetCoefficient - coefficient) / frameCount;
+	for (i = 0; i < frameCount; i += 1) {
+		gain += gainStep;
+		coefficient += coefficientStep;
+		for (c = 0; c < channels; c += 1) {
+			float* pState = &pVoice->pState[c * 2];
+			pState[0] += coefficient * (pIn[i * channels + c] - pState[0]);
+			pState[1] += coefficient * (pState[0] - pState[1]);
+			pOut[i * channels + c] = pState[1] * gain;
+		}
+	}
+	pVoice->gain = targetGain;
+	pVoice->coefficient = targetCoefficient;
+}
+
+static ma_node_vtable g_soundobj_occlusion_node_vtable =
+{
+	soundobj_occlusion_node_process_pcm_frames,
+	NULL,	/* onGetRequiredInputFrameCount */
+	1,
+	1,
+	0
+};
+
+/* Frees the voice's node and state. The voice must already be out of the graph. */
+static void soundobj_occlusion_voice_free(soundobj_occlusion_voice* pVoice)
+{
+	ma_free(pVoice->pState, NULL);
+	ma_free(pVoice, NULL);
+}
+
+/*
+Creates an empty scene for pEngine. minCutoff is the low-pass cutoff in Hz when nothing gets through, and voices are only re-tested once
+they or their listener have moved further than moveThreshold.
+*/
+soundobj_occlusion* soundobj_occlusion_create(ma_engine* pEngine, float minCutoff, float moveThreshold)
+{
+	soundobj_occlusion* pOcclusion;
+	if (pEngine == NULL || minCutoff <= 0) {
+		return NULL;
+	}
+	pOcclusion = (soundobj_occlusion*)ma_calloc(sizeof(*pOcclusion), NULL);
+	if (pOcclusion == NULL) {
+		return NULL;
+	}
+	if (ma_mutex_init(&pOcclusion->lock) != MA_SUCCESS) {
+		ma_free(pOcclusion, NULL);
+		return NULL;
+	}
+	pOcclusion->pEngine = pEngine;
+	pOcclusion->minCutoff = minCutoff;
+	pOcclusion->moveThresholdSquared = moveThreshold * moveThreshold;
+	pOcclusion->nextMeshId = 1;
+	return pOcclusion;
+}
+
+/* Takes every voice out of the graph, reconnecting the sounds, and frees the scene. Must run before any registered sound is uninitialized. */
+void soundobj_occlusion_destroy(soundobj_occlusion* pOcclusion)
+{
+	ma_uint32 i;
+	if (pOcclusion == NULL) {
+		return;
+	}
+	for (i = 0; i < pOcclusion->voiceCount; i += 1) {
+		soundobj_occlusion_voice* pVoice = pOcclusion->ppVoices[i];
+		soundobj_node_unsplice((ma_node*)pVoice->pSound, &pVoice->baseNode);
+		ma_node_uninit(&pVoice->baseNode, NULL);
+		soundobj_occlusion_voice_free(pVoice);
+	}
+	for (i = 0; i < pOcclusion->meshCount; i += 1) {
+		ma_free(pOcclusion->pMeshes[i].pVertices, NULL);
+	}
+	ma_free(pOcclusion->ppVoices, NULL);
+	ma_free(pOcclusion->pMeshes, NULL);
+	ma_free(pOcclusion->pTriangles, NULL);
+	ma_free(pOcclusion->pNodes, NULL);
+	ma_free(pOcclusion->pOrigins, NULL);
+	ma_free(pOcclusion->pTargets, NULL);
+	ma_free(pOcclusion->pResults, NULL);
+	ma_free(pOcclusion->pPending, NULL);
+	ma_mutex_uninit(&pOcclusion->lock);
+	ma_free(pOcclusion, NULL);
+}
+
+/*
+Adds a mesh of triangleCount triangles. pVertices holds xyz triples; pIndices holds three vertex indices per triangle, or is NULL when
+pVertices already lists every triangle's corners in order. transmission is the fraction of sound one surface lets through, 0 to 1.
+Writes the mesh's id to pId.
+*/
+ma_result soundobj_occlusion_add_mesh(soundobj_occlusion* pOcclusion, const float* pVertices, ma_uint32 vertexCount, const ma_uint32* pIndices, ma_uint32 triangleCount, float transmission, ma_uint32* pId)
+{
+	soundobj_occlusion_mesh mesh;
+	ma_uint32 i, k;
+	if (pVertices == NULL || triangleCount == 0 || (pIndices == NULL && vertexCount < triangleCount * 3)) {
+		return MA_INVALID_ARGS;
+	}
+	if (pIndices != NULL) {
+		for (i = 0; i < triangleCount * 3; i += 1) {
+			if (pIndices[i] >= vertexCount) {
+				return MA_INVALID_ARGS;
+			}
+		}
+	}
+	mesh.pVertices = (float*)ma_malloc(sizeof(float) * 9 * triangleCount, NULL);
+	if (mesh.pVertices == NULL) {
+		return MA_OUT_OF_MEMORY;
+	}
+	for (i = 0; i < triangleCount * 3; i += 1) {
+		ma_uint32 vertex = pIndices != NULL ? pIndices[i] : i;
+		for (k = 0; k < 3; k += 1) {
+			mesh.pVertices[i * 3 + k] = pVertices[vertex * 3 + k];
+		}
+	}
+	mesh.triangleCount = triangleCount;
+	mesh.transmission = ma_clamp(transmission, 0.0f, 1.0f);
+	ma_mutex_lock(&pOcclusion->lock);
+	if (pOcclusion->meshCount == pOcclusion->meshCapacity) {
+		ma_uint32 capacity = ma_max(pOcclusion->meshCapacity * 2, 8);
+		soundobj_occlusion_mesh* pMeshes = (soundobj_occlusion_mesh*)ma_realloc(pOcclusion->pMeshes, sizeof(*pMeshes) * capacity, NULL);
+		if (pMeshes == NULL) {
+			ma_mutex_unlock(&pOcclusion->lock);
+			ma_free(mesh.pVertices, NULL);
+			return MA_OUT_OF_MEMORY;
+		}
+		pOcclusion->pMeshes = pMeshes;
+		pOcclusion->meshCapacity = capacity;
+	}
+	mesh.id = pOcclusion->nextMeshId++;
+	pOcclusion->pMeshes[pOcclusion->meshCount++] = mesh;
+	pOcclusion->isDirty = MA_TRUE;
+	ma_mutex_unlock(&pOcclusion->lock);
+	*pId = mesh.id;
+	return MA_SUCCESS;
+}
+
+ma_result soundobj_occlusion_remove_mesh(soundobj_occlusion* pOcclusion, ma_uint32 id)
+{
+	ma_result result = MA_DOES_NOT_EXIST;
+	ma_uint32 i;
+	ma_mutex_lock(&pOcclusion->lock);
+	for (i = 0; i < pOcclusion->meshCount; i += 1) {
+		if (pOcclusion->pMeshes[i].id == id) {
+			ma_free(pOcclusion->pMeshes[i].pVertices, NULL);
+			pOcclusion->pMeshes[i] = pOcclusion->pMeshes[--pOcclusion->meshCount];
+			pOcclusion->isDirty = MA_TRUE;
+			result = MA_SUCCESS;
+			break;
+		}
+	}
+	ma_mutex_unlock(&pOcclusion->lock);
+	return result;
+}
+
+static void soundobj_occlusion_centroid(const soundobj_occlusion_triangle* pTriangle, float* pCentroid)
+{
+	ma_uint32 k;
+	for (k = 0; k < 3; k += 1) {
+		pCentroid[k] = pTriangle->v0[k] + (pTriangle->e1[k] + pTriangle->e2[k]) / 3;
+	}
+}
+
+/*
+Builds the subtree over triangles [first, first + count) depth first, splitting at the middle of the centroids' longest axis. pNodes is sized
+for the whole tree up front, so node pointers stay valid across the recursion. Past the traversal stack's depth the rest becomes one leaf.
+*/
+static void soundobj_occlusion_build_node(soundobj_occlusion* pOcclusion, ma_uint32 first, ma_uint32 count, ma_uint32 depth)
+{
+	ma_uint32 index = pOcclusion->nodeCount++;
+	soundobj_occlusion_bvh_node* pNode = &pOcclusion->pNodes[index];
+	float centroidMin[3] = {MA_FLT_MAX, MA_FLT_MAX, MA_FLT_MAX};
+	float centroidMax[3] = {-MA_FLT_MAX, -MA_FLT_MAX, -MA_FLT_MAX};
+	ma_uint32 i, k, axis, split;
+	float middle;
+	for (k = 0; k < 3; k += 1) {
+		pNode->min[k] = MA_FLT_MAX;
+		pNode->max[k] = -MA_FLT_MAX;
+	}
+	for (i = first; i < first + count; i += 1) {
+		const soundobj_occlusion_triangle* pTriangle = &pOcclusion->pTriangles[i];
+		float centroid[3];
+		for (k = 0; k < 3; k += 1) {
+			float a = pTriangle->v0[k];
+			float b = a + pTriangle->e1[k];
+			float c = a + pTriangle->e2[k];
+			pNode->min[k] = ma_min(pNode->min[k], ma_min(a, ma_min(b, c)));
+			pNode->max[k] = ma_max(pNode->max[k], ma_max(a, ma_max(b, c)));
+		}
+		soundobj_occlusion_centroid(pTriangle, centroid);
+		for (k = 0; k < 3; k += 1) {
+			centroidMin[k] = ma_min(centroidMin[k], centroid[k]);
+			centroidMax[k] = ma_max(centroidMax[k], centroid[k]);
+		}
+	}
+	if (count <= SOUNDOBJ_OCCLUSION_LEAF_SIZE || depth + 1 >= SOUNDOBJ_OCCLUSION_MAX_DEPTH) {
+		pNode->first = first;
+		pNode->count = count;
+		return;
+	}
+	axis = 0;
+	for (k = 1; k < 3; k += 1) {
+		if (centroidMax[k] - centroidMin[k] > centroidMax[axis] - centroidMin[axis]) {
+			axis = k;
+		}
+	}
+	middle = (centroidMin[axis] + centroidMax[axis]) / 2;
+	split = first;
+	for (i = first; i < first + count; i += 1) {
+		float centroid[3];
+		soundobj_occlusion_centroid(&pOcclusion->pTriangles[i], centroid);
+		if (centroid[axis] < middle) {
+			soundobj_occlusion_triangle swap = pOcclusion->pTriangles[i];
+			pOcclusion->pTriangles[i] = pOcclusion->pTriangles[split];
+			pOcclusion->pTriangles[split] = swap;
+			split += 1;
+		}
+	}
+	/* All centroids on one side (coincident triangles): split the range in half so the depth stays logarithmic. */
+	if (split == first || split == first + count) {
+		split = first + count / 2;
+	}
+	pNode->count = 0;
+	soundobj_occlusion_build_node(pOcclusion, first, split - first, depth + 1);
+	pNode->first = pOcclusion->nodeCount;
+	soundobj_occlusion_build_node(pOcclusion, split, first + count - split, depth + 1);
+}
+
+/* Flattens every mesh into one triangle array and builds the BVH over it. Called with the lock held. */
+static ma_result soundobj_occlusion_rebuild(soundobj_occlusion* pOcclusion)
+{
+	ma_uint32 total = 0, m, t, k;
+	soundobj_occlusion_triangle* pTriangles = NULL;
+	soundobj_occlusion_bvh_node* pNodes = NULL;
+	for (m = 0; m < pOcclusion->meshCount; m += 1) {
+		total += pOcclusion->pMeshes[m].triangleCount;
+	}
+	if (total > 0) {
+		pTriangles = (soundobj_occlusion_triangle*)ma_malloc(sizeof(*pTriangles) * total, NULL);
+		/* A binary tree with leaves of at least one triangle never needs more than 2n - 1 nodes. */
+		pNodes = (soundobj_occlusion_bvh_node*)ma_malloc(sizeof(*pNodes) * (total * 2 - 1), NULL);
+		if (pTriangles == NULL || pNodes == NULL) {
+			ma_free(pTriangles, NULL);
+			ma_free(pNodes, NULL);
+			return MA_OUT_OF_MEMORY;
+		}
+	}
+	ma_free(pOcclusion->pTriangles, NULL);
+	ma_free(pOcclusion->pNodes, NULL);
+	pOcclusion->pTriangles = pTriangles;
+	pOcclusion->pNodes = pNodes;
+	pOcclusion->triangleCount = total;
+	pOcclusion->nodeCount = 0;
+	total = 0;
+	for (m = 0; m < pOcclusion->meshCount; m += 1) {
+		const soundobj_occlusion_mesh* pMesh = &pOcclusion->pMeshes[m];
+		for (t = 0; t < pMesh->triangleCount; t += 1) {
+			soundobj_occlusion_triangle* pTriangle = &pTriangles[total++];
+			const float* pCorners = &pMesh->pVertices[t * 9];
+			for (k = 0; k < 3; k += 1) {
+				pTriangle->v0[k] = pCorners[k];
+				pTriangle->e1[k] = pCorners[3 + k] - pCorners[k];
+				pTriangle->e2[k] = pCorners[6 + k] - pCorners[k];
+			}
+			pTriangle->transmission = pMesh->transmission;
+		}
+	}
+	if (total > 0) {
+		soundobj_occlusion_build_node(pOcclusion, 0, total, 0);
+	}
+	pOcclusion->isDirty = MA_FALSE;
+	pOcclusion->version += 1;
+	return MA_SUCCESS;
+}
+
+static ma_bool32 soundobj_occlusion_hits_box(const soundobj_occlusion_bvh_node* pNode, const float* pOrigin, const float* pInverse)
+{
+	float near = 0, far = 1;
+	ma_uint32 k;
+	for (k = 0; k < 3; k += 1) {
+		float t0 = (pNode->min[k] - pOrigin[k]) * pInverse[k];
+		float t1 = (pNode->max[k] - pOrigin[k]) * pInverse[k];
+		if (t0 > t1) {
+			float swap = t0;
+			t0 = t1;
+			t1 = swap;
+		}
+		/* NaN from 0 * inf (a flat direction exactly on a slab plane) fails neither comparison, which keeps the box. */
+		if (t0 > near) {
+			near = t0;
+		}
+		if (t1 < far) {
+			far = t1;
+		}
+		if (near > far) {
+			return MA_FALSE;
+		}
+	}
+	return MA_TRUE;
+}
+
+/* Moller-Trumbore, restricted to the open segment so surfaces a listener or sound sits on don't count. Writes where along it the hit is to pT. */
+static ma_bool32 soundobj_occlusion_hits_triangle(const soundobj_occlusion_triangle* pTriangle, const float* pOrigin, const float* pDirection, float* pT)
+{
+	float p[3], q[3], s[3];
+	float determinant, inverse, u, v, t;
+	p[0] = pDirection[1] * pTriangle->e2[2] - pDirection[2] * pTriangle->e2[1];
+	p[1] = pDirection[2] * pTriangle->e2[0] - pDirection[0] * pTriangle->e2[2];
+	p[2] = pDirection[0] * pTriangle->e2[1] - pDirection[1] * pTriangle->e2[0];
+	determinant = pTriangle->e1[0] * p[0] + pTriangle->e1[1] * p[1] + pTriangle->e1[2] * p[2];
+	if (determinant > -1e-12f && determinant < 1e-12f) {
+		return MA_FALSE;
+	}
+	inverse = 1 / determinant;
+	s[0] = pOrigin[0] - pTriangle->v0[0];
+	s[1] = pOrigin[1] - pTriangle->v0[1];
+	s[2] = pOrigin[2] - pTriangle->v0[2];
+	u = (s[0] * p[0] + s[1] * p[1] + s[2] * p[2]) * inverse;
+	if (u < 0 || u > 1) {
+		return MA_FALSE;
+	}
+	q[0] = s[1] * pTriangle->e1[2] - s[2] * pTriangle->e1[1];
+	q[1] = s[2] * pTriangle->e1[0] - s[0] * pTriangle->e1[2];
+	q[2] = s[0] * pTriangle->e1[1] - s[1] * pTriangle->e1[0];
+	v = (pDirection[0] * q[0] + pDirection[1] * q[1] + pDirection[2] * q[2]) * inverse;
+	if (v < 0 || u + v > 1) {
+		return MA_FALSE;
+	}
+	t = (pTriangle->e2[0] * q[0] + pTriangle->e2[1] * q[1] + pTriangle->e2[2] * q[2]) * inverse;
+	*pT = t;
+	return t > SOUNDOBJ_OCCLUSION_EPSILON && t < 1 - SOUNDOBJ_OCCLUSION_EPSILON;
+}
+
+/*
+Product of the transmission of every surface between pOrigin and pTarget. A segment through an edge or corner shared by several triangles
+hits each of them at the same point, so hits are sorted along the segment and those at the same spot as the previous one are dropped.
+Called with the lock held and the BVH up to date.
+*/
+static float soundobj_occlusion_cast(soundobj_occlusion* pOcclusion, const float* pOrigin, const float* pTarget)
+{
+	ma_uint32 stack[SOUNDOBJ_OCCLUSION_MAX_DEPTH];
+	float hitT[SOUNDOBJ_OCCLUSION_MAX_HITS];
+	float hitTransmission[SOUNDOBJ_OCCLUSION_MAX_HITS];
+	ma_uint32 depth = 0, hitCount = 0, i, k;
+	float direction[3], inverse[3];
+	float transmission = 1;
+	if (pOcclusion->nodeCount == 0) {
+		return 1;
+	}
+	for (k = 0; k < 3; k += 1) {
+		direction[k] = pTarget[k] - pOrigin[k];
+		inverse[k] = 1 / direction[k];
+	}
+	stack[depth++] = 0;
+	while (depth > 0) {
+		const soundobj_occlusion_bvh_node* pNode = &pOcclusion->pNodes[stack[--depth]];
+		if (!soundobj_occlusion_hits_box(pNode, pOrigin, inverse)) {
+			continue;
+		}
+		if (pNode->count == 0) {
+			stack[depth++] = pNode->first;
+			stack[depth++] = (ma_uint32)(pNode - pOcclusion->pNodes) + 1;
+			continue;
+		}
+		for (i = pNode->first; i < pNode->first + pNode->count; i += 1) {
+			const soundobj_occlusion_triangle* pTriangle = &pOcclusion->pTriangles[i];
+			float t;
+			if (!soundobj_occlusion_hits_triangle(pTriangle, pOrigin, direction, &t)) {
+				continue;
+			}
+			if (pTriangle->transmission == 0) {
+				return 0;
+			}
+			if (hitCount < SOUNDOBJ_OCCLUSION_MAX_HITS) {
+				/* Insertion sort; segments rarely cross more than a handful of surfaces. */
+				ma_uint32 j = hitCount++;
+				while (j > 0 && hitT[j - 1] > t) {
+					hitT[j] = hitT[j - 1];
+					hitTransmission[j] = hitTransmission[j - 1];
+					j -= 1;
+				}
+				hitT[j] = t;
+				hitTransmission[j] = pTriangle->transmission;
+			} else {
+				transmission *= pTriangle->transmission;
+			}
+		}
+	}
+	for (i = 0; i < hitCount; i += 1) {
+		if (i == 0 || hitT[i] - hitT[i - 1] > SOUNDOBJ_OCCLUSION_EPSILON) {
+			transmission *= hitTransmission[i];
+		}
+	}
+	/* Anything quieter than this is silence. */
+	return transmission < 1e-4f ? 0 : transmission;
+}
+
+/* Casts count segments from pOrigins to pTargets (xyz triples) and writes the transmission along each to pTransmission. */
+void soundobj_occlusion_query(soundobj_occlusion* pOcclusion, const float* pOrigins, const float* pTargets, ma_uint32 count, float* pTransmission)
+{
+	ma_uint32 i;
+	ma_mutex_lock(&pOcclusion->lock);
+	if (pOcclusion->isDirty) {
+		soundobj_occlusion_rebuild(pOcclusion);
+	}
+	for (i = 0; i < count; i += 1) {
+		pTransmission[i] = soundobj_occlusion_cast(pOcclusion, &pOrigins[i * 3], &pTargets[i * 3]);
+	}
+	ma_mutex_unlock(&pOcclusion->lock);
+}
+
+static void soundobj_occlusion_apply(soundobj_occlusion* pOcclusion, soundobj_occlusion_voice* pVoice, float transmission)
+{
+	float coefficient = 1;
+	pVoice->transmission = transmission;
+	if (transmission < 1) {
+		/* Log scale from minCutoff at no transmission up to Nyquist just short of none, where the filter switches off. */
+		float nyquist = pVoice->sampleRate / 2.0f;
+		float minCutoff = ma_min(pOcclusion->minCutoff, nyquist);
+		float cutoff = minCutoff * (float)ma_powd(nyquist / minCutoff, transmission);
+		coefficient = 1 - (float)ma_expd(-2 * MA_PI_D * cutoff / pVoice->sampleRate);
+	}
+	ma_atomic_float_set(&pVoice->targetGain, transmission);
+	ma_atomic_float_set(&pVoice->targetCoefficient, coefficient);
+}
+
+/* Splices an occlusion node in after pSound. The sound's gain and filter start open until the next update. */
+ma_result soundobj_occlusion_add(soundobj_occlusion* pOcclusion, ma_sound* pSound)
+{
+	ma_result result;
+	ma_node_config config;
+	ma_node_base* pSourceBase = (ma_node_base*)pSound;
+	soundobj_occlusion_voice* pVoice;
+	ma_node* pTarget;
+	ma_uint32 i;
+	ma_mutex_lock(&pOcclusion->lock);
+	for (i = 0; i < pOcclusion->voiceCount; i += 1) {
+		if (pOcclusion->ppVoices[i]->pSound == pSound) {
+			ma_mutex_unlock(&pOcclusion->lock);
+			return MA_ALREADY_EXISTS;
+		}
+	}
+	if (pOcclusion->voiceCount == pOcclusion->voiceCapacity) {
+		ma_uint32 capacity = ma_max(pOcclusion->voiceCapacity * 2, 16);
+		soundobj_occlusion_voice** ppVoices = (soundobj_occlusion_voice**)ma_realloc(pOcclusion->ppVoices, sizeof(*ppVoices) * capacity, NULL);
+		if (ppVoices == NULL) {
+			ma_mutex_unlock(&pOcclusion->lock);
+			return MA_OUT_OF_MEMORY;
+		}
+		pOcclusion->ppVoices = ppVoices;
+		pOcclusion->voiceCapacity = capacity;
+	}
+	pVoice = (soundobj_occlusion_voice*)ma_calloc(sizeof(*pVoice), NULL);
+	if (pVoice == NULL) {
+		ma_mutex_unlock(&pOcclusion->lock);
+		return MA_OUT_OF_MEMORY;
+	}
+	pVoice->pSound = pSound;
+	pVoice->channels = ma_node_get_output_channels(pSound, 0);
+	pVoice->sampleRate = ma_engine_get_sample_rate(pOcclusion->pEngine);
+	pVoice->gain = 1;
+	pVoice->coefficient = 1;
+	ma_atomic_float_set(&pVoice->targetGain, 1);
+	ma_atomic_float_set(&pVoice->targetCoefficient, 1);
+	pVoice->transmission = 1;
+	pVoice->pState = (float*)ma_calloc(sizeof(float) * 2 * pVoice->channels, NULL);
+	if (pVoice->pState == NULL) {
+		ma_free(pVoice, NULL);
+		ma_mutex_unlock(&pOcclusion->lock);
+		return MA_OUT_OF_MEMORY;
+	}
+	config = ma_node_config_init();
+	config.vtable = &g_soundobj_occlusion_node_vtable;
+	config.pInputChannels = &pVoice->channels;
+	config.pOutputChannels = &pVoice->channels;
+	result = ma_node_init(ma_engine_get_node_graph(pOcclusion->pEngine), &config, NULL, &pVoice->baseNode);
+	if (result != MA_SUCCESS) {
+		soundobj_occlusion_voice_free(pVoice);
+		ma_mutex_unlock(&pOcclusion->lock);
+		return result;
+	}
+	pTarget = (ma_node*)ma_atomic_load_ptr(&pSourceBase->pOutputBuses[0].pInputNode);
+	if (pTarget != NULL) {
+		ma_node_attach_output_bus(&pVoice->baseNode, 0, pTarget, pSourceBase->pOutputBuses[0].inputNodeInputBusIndex);
+	}
+	ma_node_attach_output_bus(pSound, 0, &pVoice->baseNode, 0);
+	pOcclusion->ppVoices[pOcclusion->voiceCount++] = pVoice;
+	ma_mutex_unlock(&pOcclusion->lock);
+	return MA_SUCCESS;
+}
+
+/* Takes pSound's occlusion node out of the graph. Must run before the sound is uninitialized. */
+void soundobj_occlusion_remove(soundobj_occlusion* pOcclusion, ma_sound* pSound)
+{
+	ma_uint32 i;
+	ma_mutex_lock(&pOcclusion->lock);
+	for (i = 0; i < pOcclusion->voiceCount; i += 1) {
+		soundobj_occlusion_voice* pVoice = pOcclusion->ppVoices[i];
+		if (pVoice->pSound == pSound) {
+			soundobj_node_unsplice((ma_node*)pSound, &pVoice->baseNode);
+			ma_node_uninit(&pVoice->baseNode, NULL);
+			soundobj_occlusion_voice_free(pVoice);
+			pOcclusion->ppVoices[i] = pOcclusion->ppVoices[--pOcclusion->voiceCount];
+			break;
+		}
+	}
+	ma_mutex_unlock(&pOcclusion->lock);
+}
+
+static ma_bool32 soundobj_occlusion_moved(const float* pLast, ma_vec3f position, float thresholdSquared)
+{
+	float dx = position.x - pLast[0];
+	float dy = position.y - pLast[1];
+	float dz = position.z - pLast[2];
+	return dx * dx + dy * dy + dz * dz > thresholdSquared;
+}
+
+static ma_result soundobj_occlusion_reserve_batch(soundobj_occlusion* pOcclusion, ma_uint32 count)
+{
+	float* pOrigins;
+	float* pTargets;
+	float* pResults;
+	ma_uint32* pPending;
+	if (count <= pOcclusion->batchCapacity) {
+		return MA_SUCCESS;
+	}
+	count = ma_max(count, pOcclusion->batchCapacity * 2);
+	pOrigins = (float*)ma_malloc(sizeof(float) * 3 * count, NULL);
+	pTargets = (float*)ma_malloc(sizeof(float) * 3 * count, NULL);
+	pResults = (float*)ma_malloc(sizeof(float) * count, NULL);
+	pPending = (ma_uint32*)ma_malloc(sizeof(ma_uint32) * count, NULL);
+	if (pOrigins == NULL || pTargets == NULL || pResults == NULL || pPending == NULL) {
+		ma_free(pOrigins, NULL);
+		ma_free(pTargets, NULL);
+		ma_free(pResults, NULL);
+		ma_free(pPending, NULL);
+		return MA_OUT_OF_MEMORY;
+	}
+	ma_free(pOcclusion->pOrigins, NULL);
+	ma_free(pOcclusion->pTargets, NULL);
+	ma_free(pOcclusion->pResults, NULL);
+	ma_free(pOcclusion->pPending, NULL);
+	pOcclusion->pOrigins = pOrigins;
+	pOcclusion->pTargets = pTargets;
+	pOcclusion->pResults = pResults;
+	pOcclusion->pPending = pPending;
+	pOcclusion->batchCapacity = count;
+	return MA_SUCCESS;
+}
+
+/*
+Re-tests every voice that is new, has moved, whose listener has moved, or that predates a geometry change, in one batch. Sounds positioned
+relative to their listener are never occluded. Returns the number of rays cast.
+*/
+ma_uint32 soundobj_occlusion_update(soundobj_occlusion* pOcclusion)
+{
+	ma_uint32 i, pendingCount = 0;
+	ma_mutex_lock(&pOcclusion->lock);
+	if (pOcclusion->isDirty) {
+		soundobj_occlusion_rebuild(pOcclusion);
+	}
+	if (soundobj_occlusion_reserve_batch(pOcclusion, pOcclusion->voiceCount) != MA_SUCCESS) {
+		ma_mutex_unlock(&pOcclusion->lock);
+		return 0;
+	}
+	for (i = 0; i < pOcclusion->voiceCount; i += 1) {
+		soundobj_occlusion_voice* pVoice = pOcclusion->ppVoices[i];
+		ma_vec3f listener, emitter;
+		if (ma_sound_get_positioning(pVoice->pSound) == ma_positioning_relative) {
+			if (pVoice->transmission != 1) {
+				soundobj_occlusion_apply(pOcclusion, pVoice, 1);
+			}
+			pVoice->hasResult = MA_FALSE;
+			continue;
+		}
+		listener = ma_engine_listener_get_position(pOcclusion->pEngine, ma_sound_get_listener_index(pVoice->pSound));
+		emitter = ma_sound_get_position(pVoice->pSound);
+		if (pVoice->hasResult && pVoice->geometryVersion == pOcclusion->version && !soundobj_occlusion_moved(pVoice->listener, listener, pOcclusion->moveThresholdSquared) && !soundobj_occlusion_moved(pVoice->emitter, emitter, pOcclusion->moveThresholdSquared)) {
+			continue;
+		}
+		pVoice->listener[0] = listener.x;
+		pVoice->listener[1] = listener.y;
+		pVoice->listener[2] = listener.z;
+		pVoice->emitter[0] = emitter.x;
+		pVoice->emitter[1] = emitter.y;
+		pVoice->emitter[2] = emitter.z;
+		MA_COPY_MEMORY(&pOcclusion->pOrigins[pendingCount * 3], pVoice->listener, sizeof(pVoice->listener));
+		MA_COPY_MEMORY(&pOcclusion->pTargets[pendingCount * 3], pVoice->emitter, sizeof(pVoice->emitter));
+		pOcclusion->pPending[pendingCount++] = i;
+	}
+	for (i = 0; i < pendingCount; i += 1) {
+		pOcclusion->pResults[i] = soundobj_occlusion_cast(pOcclusion, &pOcclusion->pOrigins[i * 3], &pOcclusion->pTargets[i * 3]);
+	}
+	for (i = 0; i < pendingCount; i += 1) {
+		soundobj_occlusion_voice* pVoice = pOcclusion->ppVoices[pOcclusion->pPending[i]];
+		soundobj_occlusion_apply(pOcclusion, pVoice, pOcclusion->pResults[i]);
+		pVoice->hasResult = MA_TRUE;
+		pVoice->geometryVersion = pOcclusion->version;
+	}
+	ma_mutex_unlock(&pOcclusion->lock);
+	return pendingCount;
+}
+
+/* The transmission last computed for pSound (1 until its first update), or -1 if the sound isn't registered. */
+float soundobj_occlusion_get_transmission(soundobj_occlusion* pOcclusion, ma_sound* pSound)
+{
+	float transmission = -1;
+	ma_uint32 i;
+	ma_mutex_lock(&pOcclusion->lock);
+	for (i = 0; i < pOcclusion->voiceCount; i += 1) {
+		if (pOcclusion->ppVoices[i]->pSound == pSound) {
+			transmission = pOcclusion->ppVoices[i]->transmission;
+			break;
+		}
+	}
+	ma_mutex_unlock(&pOcclusion->lock);
+	return transmission;
+}
+
+ma_uint32 soundobj_occlusion_get_triangle_count(soundobj_occlusion* pOcclusion)
+{
+	ma_uint32 count = 0, i;
+	ma_mutex_lock(&pOcclusion->lock);
+	for (i = 0; i < pOcclusion->meshCount; i += 1) {
+		count += pOcclusion->pMeshes[i].triangleCount;
+	}
+	ma_mutex_unlock(&pOcclusion->lock);
+	return count;
+}
@@ -0,0 +1,521 @@
+/*
+* SoundObj playlist
+*
+* A data source that plays a queue of files back to back without gaps, optionally crossfading between them.
+* Two slots hold resource manager streams: the one playing and the one after it. Opening a file, and freeing one that has finished, is done by a
+* custom job on the resource manager's job threads, so neither the audio thread nor the thread appending files ever touches the disk or the decoder.
+* When a stream's decoder is ready its first pages are already decoded, so the switch to it happens inside a single read, sample-accurately.
+*
+* Each slot moves through EMPTY -> LOADING -> READY -> PLAYING -> DONE -> FREEING -> EMPTY. The update job owns EMPTY -> LOADING and DONE -> FREEING,
+* the stream's init notification owns LOADING -> READY (or FAILED), the stream's free notification owns FREEING -> EMPTY, and the audio thread owns
+* READY -> PLAYING -> DONE. Slots are filled and consumed in the same alternating order, so the queue order is kept.
+*
+* Streams are freed asynchronously. ma_resource_manager_data_source_uninit() waits for a free job to run, which would deadlock a job thread
+* waiting on its own queue, so the update job posts that free job itself and moves on.
+*/
+
+#define SOUNDOBJ_PLAYLIST_SLOT_EMPTY	0
+#define SOUNDOBJ_PLAYLIST_SLOT_LOADING	1
+#define SOUNDOBJ_PLAYLIST_SLOT_READY	2
+#define SOUNDOBJ_PLAYLIST_SLOT_PLAYING	3
+#define SOUNDOBJ_PLAYLIST_SLOT_DONE	4
+#define SOUNDOBJ_PLAYLIST_SLOT_FAILED	5
+#define SOUNDOBJ_PLAYLIST_SLOT_FREEING	6
+
+typedef struct soundobj_playlist soundobj_playlist;
+typedef struct soundobj_playlist_slot soundobj_playlist_slot;
+
+typedef struct
+{
+	ma_async_notification_callbacks cb;	/* Must be first so this can be passed to the resource manager as an ma_async_notification. */
+	soundobj_playlist_slot* pSlot;
+} soundobj_playlist_notification;
+
+struct soundobj_playlist_slot
+{
+	soundobj_playlist* pPlaylist;
+	soundobj_playlist_notification initNotification;
+	soundobj_playlist_notification freeNotification;
+	ma_resource_manager_data_source ds;
+	ma_bool32 isDataSourceInitialized;
+	ma_data_converter converter;
+	ma_bool32 isConverterInitialized;
+	ma_format formatIn;
+	ma_uint32 channelsIn;
+	ma_uint64 lengthInFrames;	/* In output frames, 0 if unknown. */
+	ma_uint64 cursor;	/* In output frames. */
+	MA_ATOMIC(4, ma_uint32) state;
+};
+
+struct soundobj_playlist
+{
+	ma_data_source_base ds;
+	ma_resource_manager* pResourceManager;
+	ma_uint32 channels;
+	ma_uint32 sampleRate;
+	soundobj_playlist_slot slots[2];
+	ma_uint32 readSlot;	/* Audio thread only. */
+	ma_uint32 writeSlot;	/* Guarded by lock. */
+	ma_mutex lock;
+	char** ppPaths;	/* Queued paths not yet opened, guarded by lock. */
+	size_t pathHead;
+	size_t pathCount;
+	size_t pathCapacity;
+	ma_uint64 cursor;
+	MA_ATOMIC(4, ma_uint32) pendingCount;	/* Paths queued but not yet opened. */
+	MA_ATOMIC(4, ma_uint32) entryIndex;	/* How many entries have finished. */
+	MA_ATOMIC(4, ma_uint32) crossfadeFrames;
+	MA_ATOMIC(4, ma_uint32) skipRequested;
+	MA_ATOMIC(4, ma_uint32) isJobScheduled;
+	MA_ATOMIC(4, ma_uint32) jobsInFlight;
+};
+
+static void soundobj_playlist_slot_on_init(ma_async_notification* pNotification)
+{
+	/* Called on a job thread once the stream's decoder is initialized (or failed to be), with the first pages already decoded. */
+	soundobj_playlist_slot* pSlot = ((soundobj_playlist_notification*)pNotification)->pSlot;
+	soundobj_playlist* pPlaylist = pSlot->pPlaylist;
+	ma_uint32 sampleRateIn;
+	ma_uint64 length;
+	if (ma_resource_manager_data_source_result(&pSlot->ds) != MA_SUCCESS || ma_resource_manager_data_source_get_data_format(&pSlot->ds, &pSlot->formatIn, &pSlot->channelsIn, &sampleRateIn, NULL, 0) != MA_SUCCESS) {
+		ma_atomic_store_32(&pSlot->state, SOUNDOBJ_PLAYLIST_SLOT_FAILED);
+		return;
+	}
+	if (pSlot->formatIn != ma_format_f32 || pSlot->channelsIn != pPlaylist->channels || sampleRateIn != pPlaylist->sampleRate) {
+		ma_data_converter_config config = ma_data_converter_config_init(pSlot->formatIn, ma_format_f32, pSlot->channelsIn, pPlaylist->channels, sampleRateIn, pPlaylist->sampleRate);
+		if (ma_data_converter_init(&config, NULL, &pSlot->converter) != MA_SUCCESS) {
+			ma_atomic_store_32(&pSlot->state, SOUNDOBJ_PLAYLIST_SLOT_FAILED);
+			return;
+		}
+		pSlot->isConverterInitialized = MA_TRUE;
+	}
+	pSlot->lengthInFrames = 0;
+	if (ma_resource_manager_data_source_get_length_in_pcm_frames(&pSlot->ds, &length) == MA_SUCCESS && sampleRateIn > 0) {
+		pSlot->lengthInFrames = length * pPlaylist->sampleRate / sampleRateIn;
+	}
+	pSlot->cursor = 0;
+	ma_atomic_store_32(&pSlot->state, SOUNDOBJ_PLAYLIST_SLOT_READY);
+}
+
+static void soundobj_playlist_schedule_update(soundobj_playlist* pPlaylist);
+
+static void soundobj_playlist_slot_on_free(ma_async_notification* pNotification)
+{
+	soundobj_playlist_slot* pSlot = ((soundobj_playlist_notification*)pNotification)->pSlot;
+	ma_atomic_store_32(&pSlot->state, SOUNDOBJ_PLAYLIST_SLOT_EMPTY);
+	soundobj_playlist_schedule_update(pSlot->pPlaylist);
+	ma_atomic_fetch_sub_32(&pSlot->pPlaylist->jobsInFlight, 1);
+}
+
+/*
+Releases a finished slot. With wait set the stream is uninitialized normally, which blocks until its free job has run; that is only safe off the job threads.
+Otherwise the free job is posted here and the slot becomes EMPTY from its notification.
+*/
+static void soundobj_playlist_slot_release(soundobj_playlist_slot* pSlot, ma_bool32 wait)
+{
+	if (pSlot->isConverterInitialized) {
+		ma_data_converter_uninit(&pSlot->converter, NULL);
+		pSlot->isConverterInitialized = MA_FALSE;
+	}
+	if (!pSlot->isDataSourceInitialized) {
+		ma_atomic_store_32(&pSlot->state, SOUNDOBJ_PLAYLIST_SLOT_EMPTY);
+		return;
+	}
+	pSlot->isDataSourceInitialized = MA_FALSE;
+	if (wait) {
+		ma_resource_manager_data_source_uninit(&pSlot->ds);
+		ma_atomic_store_32(&pSlot->state, SOUNDOBJ_PLAYLIST_SLOT_EMPTY);
+	} else {
+		/* Mirrors ma_resource_manager_data_stream_uninit() minus the wait. */
+		ma_resource_manager_data_stream* pDataStream = &pSlot->ds.backend.stream;
+		ma_job job;
+		ma_atomic_store_32(&pSlot->state, SOUNDOBJ_PLAYLIST_SLOT_FREEING);
+		ma_atomic_fetch_add_32(&pSlot->pPlaylist->jobsInFlight, 1);
+		ma_atomic_exchange_i32(&pDataStream->result, MA_UNAVAILABLE);
+		job = ma_job_init(MA_JOB_TYPE_RESOURCE_MANAGER_FREE_DATA_STREAM);
+		job.order = ma_resource_manager_data_stream_next_execution_order(pDataStream);
+		job.data.resourceManager.freeDataStream.pDataStream = pDataStream;
+		job.data.resourceManager.freeDataStream.pDoneNotification = &pSlot->freeNotification;
+		job.data.resourceManager.freeDataStream.pDoneFence = NULL;
+		if (ma_resource_manager_post_job(pDataStream->pResourceManager, &job) != MA_SUCCESS) {
+			/* Leaks the stream's decoder rather than blocking the job thread. */
+			ma_atomic_store_32(&pSlot->state, SOUNDOBJ_PLAYLIST_SLOT_EMPTY);
+			ma_atomic_fetch_sub_32(&pSlot->pPlaylist->jobsInFlight, 1);
+		}
+	}
+}
+
+/* Frees finished slots and opens queued paths into empty ones. Runs on a resource manager job thread. */
+static void soundobj_playlist_update(soundobj_playlist* pPlaylist)
+{
+	ma_uint32 i;
+	ma_mutex_lock(&pPlaylist->lock);
+	for (i = 0; i < 2; i += 1) {
+		ma_uint32 state = ma_atomic_load_32(&pPlaylist->slots[i].state);
+		if (state == SOUNDOBJ_PLAYLIST_SLOT_DONE) {
+			soundobj_playlist_slot_release(&pPlaylist->slots[i], MA_FALSE);
+		}
+	}
+	while (pPlaylist->pathCount > 0 && ma_atomic_load_32(&pPlaylist->slots[pPlaylist->writeSlot].state) == SOUNDOBJ_PLAYLIST_SLOT_EMPTY) {
+		soundobj_playlist_slot* pSlot = &pPlaylist->slots[pPlaylist->writeSlot];
+		char* pPath = pPlaylist->ppPaths[pPlaylist->pathHead];
+		ma_resource_manager_pipeline_notifications notifications = ma_resource_manager_pipeline_notifications_init();
+		ma_resource_manager_data_source_config config = ma_resource_manager_data_source_config_init();
+		/* LOADING before the pending count drops, or the audio thread could briefly see nothing left and end the playlist. */
+		ma_atomic_store_32(&pSlot->state, SOUNDOBJ_PLAYLIST_SLOT_LOADING);
+		pPlaylist->pathHead += 1;
+		pPlaylist->pathCount -= 1;
+		ma_atomic_fetch_sub_32(&pPlaylist->pendingCount, 1);
+		notifications.init.pNotification = &pSlot->initNotification;
+		config.pFilePath = pPath;
+		config.pNotifications = &notifications;
+		config.flags = MA_RESOURCE_MANAGER_DATA_SOURCE_FLAG_STREAM | MA_RESOURCE_MANAGER_DATA_SOURCE_FLAG_ASYNC;
+		if (ma_resource_manager_data_source_init_ex(pPlaylist->pResourceManager, &config, &pSlot->ds) == MA_SUCCESS) {
+			pSlot->isDataSourceInitialized = MA_TRUE;
+		} else {
+			ma_atomic_store_32(&pSlot->state, SOUNDOBJ_PLAYLIST_SLOT_FAILED);
+		}
+		ma_free(pPath, NULL);
+		pPlaylist->writeSlot ^= 1;
+	}
+	if (pPlaylist->pathCount == 0) {
+		pPlaylist->pathHead = 0;
+	}
+	ma_mutex_unlock(&pPlaylist->lock);
+}
+
+static ma_result soundobj_playlist_job(ma_job* pJob)
+{
+	soundobj_playlist* pPlaylist = (soundobj_playlist*)pJob->data.custom.data0;
+	ma_atomic_store_32(&pPlaylist->isJobScheduled, 0);
+	soundobj_playlist_update(pPlaylist);
+	ma_atomic_fetch_sub_32(&pPlaylist->jobsInFlight, 1);
+	return MA_SUCCESS;
+}
+
+/* Safe to call from the audio thread: posting a job is lock-free, and at most one update is queued at a time. */
+static void soundobj_playlist_schedule_update(soundobj_playlist* pPlaylist)
+{
+	ma_job job;
+	if (ma_atomic_exchange_32(&pPlaylist->isJobScheduled, 1) != 0) {
+		return;
+	}
+	ma_atomic_fetch_add_32(&pPlaylist->jobsInFlight, 1);
+	job = ma_job_init(MA_JOB_TYPE_CUSTOM);
+	job.data.custom.proc = soundobj_playlist_job;
+	job.data.custom.data0 = (ma_uintptr)pPlaylist;
+	if (ma_resource_manager_post_job(pPlaylist->pResourceManager, &job) != MA_SUCCESS) {
+		ma_atomic_store_32(&pPlaylist->isJobScheduled, 0);
+		ma_atomic_fetch_sub_32(&pPlaylist->jobsInFlight, 1);
+	}
+}
+
+/*
+Reads output frames from a playing slot and returns whether the entry has ended. The stream is read directly rather than through
+ma_data_source_read_pcm_frames() because only the stream tells a short read at the end (MA_AT_END) apart from one that is waiting on a page (MA_BUSY).
+Frames the stream doesn't have decoded yet are filled with silence rather than ending the entry.
+*/
+static ma_bool32 soundobj_playlist_slot_read(soundobj_playlist* pPlaylist, soundobj_playlist_slot* pSlot, float* pFramesOut, ma_uint64 frameCount, ma_uint64* pFramesRead)
+{
+	ma_result result = MA_SUCCESS;
+	ma_uint64 totalFramesRead = 0;
+	if (!pSlot->isConverterInitialized) {
+		result = ma_resource_manager_data_source_read_pcm_frames(&pSlot->ds, pFramesOut, frameCount, &totalFramesRead);
+	} else {
+		ma_uint8 temp[MA_DATA_CONVERTER_STACK_BUFFER_SIZE];
+		ma_uint32 tempCapInFrames = sizeof(temp) / ma_get_bytes_per_frame(pSlot->formatIn, pSlot->channelsIn);
+		while (totalFramesRead < frameCount && result == MA_SUCCESS) {
+			ma_uint64 framesToRead;
+			ma_uint64 framesReadIn = 0;
+			ma_uint64 framesProcessedIn;
+			ma_uint64 framesProcessedOut = frameCount - totalFramesRead;
+			if (ma_data_converter_get_required_input_frame_count(&pSlot->converter, framesProcessedOut, &framesToRead) != MA_SUCCESS) {
+				framesToRead = framesProcessedOut;
+			}
+			framesToRead = ma_clamp(framesToRead, 1, tempCapInFrames);
+			result = ma_resource_manager_data_source_read_pcm_frames(&pSlot->ds, temp, framesToRead, &framesReadIn);
+			framesProcessedIn = framesReadIn;
+			ma_data_converter_process_pcm_frames(&pSlot->converter, temp, &framesProcessedIn, ma_offset_pcm_frames_ptr_f32(pFramesOut, totalFramesRead, pPlaylist->channels), &framesProcessedOut);
+			totalFramesRead += framesProcessedOut;
+			if (framesReadIn < framesToRead || framesProcessedOut == 0) {
+				break;
+			}
+		}
+	}
+	pSlot->cursor += totalFramesRead;
+	if (result != MA_SUCCESS && result != MA_BUSY) {
+		*pFramesRead = totalFramesRead;
+		return MA_TRUE;
+	}
+	/* MA_BUSY means the job threads haven't decoded the next page yet. Pad with silence so the mixer keeps pulling. */
+	ma_silence_pcm_frames(ma_offset_pcm_frames_ptr_f32(pFramesOut, totalFramesRead, pPlaylist->channels), frameCount - totalFramesRead, ma_format_f32, pPlaylist->channels);
+	*pFramesRead = frameCount;
+	return MA_FALSE;
+}
+
+static void soundobj_playlist_finish_slot(soundobj_playlist* pPlaylist)
+{
+	ma_atomic_store_32(&pPlaylist->slots[pPlaylist->readSlot].state, SOUNDOBJ_PLAYLIST_SLOT_DONE);
+	pPlaylist->readSlot ^= 1;
+	ma_atomic_fetch_add_32(&pPlaylist->entryIndex, 1);
+	soundobj_playlist_schedule_update(pPlaylist);
+}
+
+static ma_result soundobj_playlist_on_read(ma_data_source* pDataSource, void* pFramesOut, ma_uint64 frameCount, ma_uint64* pFramesRead)
+{
+	soundobj_playlist* pPlaylist = (soundobj_playlist*)pDataSource;
+	ma_uint32 channels = pPlaylist->channels;
+	ma_uint64 totalFramesRead = 0;
+	while (totalFramesRead < frameCount) {
+		soundobj_playlist_slot* pSlot = &pPlaylist->slots[pPlaylist->readSlot];
+		soundobj_playlist_slot* pNext = &pPlaylist->slots[pPlaylist->readSlot ^ 1];
+		float* pRunningFramesOut = ma_offset_pcm_frames_ptr_f32((float*)pFramesOut, totalFramesRead, channels);
+		ma_uint32 state = ma_atomic_load_32(&pSlot->state);
+		ma_uint32 nextState;
+		ma_uint64 framesToRead = frameCount - totalFramesRead;
+		ma_uint64 framesRead;
+		ma_uint64 remaining = 0;
+		ma_uint32 crossfadeFrames;
+		ma_bool32 isFading = MA_FALSE;
+		ma_bool32 atEnd;
+		if (state == SOUNDOBJ_PLAYLIST_SLOT_READY) {
+			ma_atomic_store_32(&pSlot->state, SOUNDOBJ_PLAYLIST_SLOT_PLAYING);
+			continue;
+		}
+		if (state == SOUNDOBJ_PLAYLIST_SLOT_FAILED) {
+			soundobj_playlist_finish_slot(pPlaylist);
+			continue;
+		}
+		if (state != SOUNDOBJ_PLAYLIST_SLOT_PLAYING) {
+			/* Nothing playable yet. Wait in silence if more is on the way, otherwise the playlist has ended. */
+			if (state == SOUNDOBJ_PLAYLIST_SLOT_LOADING || ma_atomic_load_32(&pPlaylist->pendingCount) > 0) {
+				ma_silence_pcm_frames(pRunningFramesOut, frameCount - totalFramesRead, ma_format_f32, channels);
+				totalFramesRead = frameCount;
+			}
+			break;
+		}
+		if (ma_atomic_exchange_32(&pPlaylist->skipRequested, 0)) {
+			soundobj_playlist_finish_slot(pPlaylist);
+			continue;
+		}
+		crossfadeFrames = ma_atomic_load_32(&pPlaylist->crossfadeFrames);
+		nextState = ma_atomic_load_32(&pNext->state);
+		if (crossfadeFrames > 0 && pSlot->lengthInFrames > 0) {
+			remaining = (pSlot->lengthInFrames > pSlot->cursor) ? pSlot->lengthInFrames - pSlot->cursor : 0;
+			if (remaining == 0 && nextState == SOUNDOBJ_PLAYLIST_SLOT_PLAYING) {
+				/* The fade is complete but the reported length was short. Drop the tail rather than play it over the next entry. */
+				soundobj_playlist_finish_slot(pPlaylist);
+				continue;
+			}
+			if (remaining > crossfadeFrames) {
+				framesToRead = ma_min(framesToRead, remaining - crossfadeFrames);
+			} else if (remaining > 0 && (nextState == SOUNDOBJ_PLAYLIST_SLOT_READY || nextState == SOUNDOBJ_PLAYLIST_SLOT_PLAYING)) {
+				isFading = MA_TRUE;
+				framesToRead = ma_min(framesToRead, ma_min(remaining, MA_DATA_CONVERTER_STACK_BUFFER_SIZE / sizeof(float) / channels));
+			}
+		}
+		atEnd = soundobj_playlist_slot_read(pPlaylist, pSlot, pRunningFramesOut, framesToRead, &framesRead);
+		if (isFading && framesRead > 0) {
+			float temp[MA_DATA_CONVERTER_STACK_BUFFER_SIZE / sizeof(float)];
+			ma_uint64 nextFramesRead;
+			ma_uint64 iFrame;
+			ma_uint32 iChannel;
+			if (nextState == SOUNDOBJ_PLAYLIST_SLOT_READY) {
+				ma_atomic_store_32(&pNext->state, SOUNDOBJ_PLAYLIST_SLOT_PLAYING);
+			}
+			if (soundobj_playlist_slot_read(pPlaylist, pNext, temp, framesRead, &nextFramesRead)) {
+				ma_silence_pcm_frames(ma_offset_pcm_frames_ptr_f32(temp, nextFramesRead, channels), framesRead - nextFramesRead, ma_format_f32, channels);
+			}
+			for (iFrame = 0; iFrame < framesRead; iFrame += 1) {
+				float t = (float)(crossfadeFrames - (remaining - iFrame)) / crossfadeFrames;
+				for (iChannel = 0; iChannel < channels; iChannel += 1) {
+					float* pSample = &pRunningFramesOut[iFrame * channels + iChannel];
+					*pSample = *pSample * (1 - t) + temp[iFrame * channels + iChannel] * t;
+				}
+			}
+		}
+		totalFramesRead += framesRead;
+		if (atEnd) {
+			/* When crossfading, the next entry is already playing and carries on from its own cursor. */
+			soundobj_playlist_finish_slot(pPlaylist);
+		}
+	}
+	pPlaylist->cursor += totalFramesRead;
+	*pFramesRead = totalFramesRead;
+	return (totalFramesRead == 0 && frameCount > 0) ? MA_AT_END : MA_SUCCESS;
+}
+
+static ma_result soundobj_playlist_on_seek(ma_data_source* pDataSource, ma_uint64 frameIndex)
+{
+	(void)pDataSource;
+	(void)frameIndex;
+	return MA_NOT_IMPLEMENTED;
+}
+
+static ma_result soundobj_playlist_on_get_data_format(ma_data_source* pDataSource, ma_format* pFormat, ma_uint32* pChannels, ma_uint32* pSampleRate, ma_channel* pChannelMap, size_t channelMapCap)
+{
+	soundobj_playlist* pPlaylist = (soundobj_playlist*)pDataSource;
+	if (pFormat != NULL) {
+		*pFormat = ma_format_f32;
+	}
+	if (pChannels != NULL) {
+		*pChannels = pPlaylist->channels;
+	}
+	if (pSampleRate != NULL) {
+		*pSampleRate = pPlaylist->sampleRate;
+	}
+	if (pChannelMap != NULL) {
+		ma_channel_map_init_standard(ma_standard_channel_map_default, pChannelMap, channelMapCap, pPlaylist->channels);
+	}
+	return MA_SUCCESS;
+}
+
+static ma_result soundobj_playlist_on_get_cursor(ma_data_source* pDataSource, ma_uint64* pCursor)
+{
+	*pCursor = ((soundobj_playlist*)pDataSource)->cursor;
+	return MA_SUCCESS;
+}
+
+static ma_data_source_vtable g_soundobj_playlist_vtable =
+{
+	soundobj_playlist_on_read,
+	soundobj_playlist_on_seek,
+	soundobj_playlist_on_get_data_format,
+	soundobj_playlist_on_get_cursor,
+	NULL,	/* onGetLength. The queue can grow while playing. */
+	NULL,	/* onSetLooping */
+	0
+};
+
+soundobj_playlist* soundobj_playlist_create(ma_resource_manager* pResourceManager, ma_uint32 channels, ma_uint32 sampleRate)
+{
+	ma_data_source_config config;
+	ma_uint32 i;
+	soundobj_playlist* pPlaylist;
+	if (pResourceManager == NULL || channels == 0 || sampleRate == 0) {
+		return NULL;
+	}
+	pPlaylist = (soundobj_playlist*)ma_calloc(sizeof(*pPlaylist), NULL);
+	if (pPlaylist == NULL) {
+		return NULL;
+	}
+	config = ma_data_source_config_init();
+	config.vtable = &g_soundobj_playlist_vtable;
+	if (ma_data_source_init(&config, &pPlaylist->ds) != MA_SUCCESS) {
+		ma_free(pPlaylist, NULL);
+		return NULL;
+	}
+	if (ma_mutex_init(&pPlaylist->lock) != MA_SUCCESS) {
+		ma_data_source_uninit(&pPlaylist->ds);
+		ma_free(pPlaylist, NULL);
+		return NULL;
+	}
+	pPlaylist->pResourceManager = pResourceManager;
+	pPlaylist->channels = channels;
+	pPlaylist->sampleRate = sampleRate;
+	for (i = 0; i < 2; i += 1) {
+		soundobj_playlist_slot* pSlot = &pPlaylist->slots[i];
+		pSlot->pPlaylist = pPlaylist;
+		pSlot->initNotification.cb.onSignal = soundobj_playlist_slot_on_init;
+		pSlot->initNotification.pSlot = pSlot;
+		pSlot->freeNotification.cb.onSignal = soundobj_playlist_slot_on_free;
+		pSlot->freeNotification.pSlot = pSlot;
+	}
+	return pPlaylist;
+}
+
+/* The sound reading from the playlist must be uninitialized first. */
+void soundobj_playlist_destroy(soundobj_playlist* pPlaylist)
+{
+	size_t i;
+	if (pPlaylist == NULL) {
+		return;
+	}
+	while (ma_atomic_load_32(&pPlaylist->jobsInFlight) > 0) {
+		ma_sleep(1);
+	}
+	soundobj_playlist_slot_release(&pPlaylist->slots[0], MA_TRUE);
+	soundobj_playlist_slot_release(&pPlaylist->slots[1], MA_TRUE);
+	for (i = 0; i < pPlaylist->pathCount; i += 1) {
+		ma_free(pPlaylist->ppPaths[pPlaylist->pathHead + i], NULL);
+	}
+	ma_free(pPlaylist->ppPaths, NULL);
+	ma_mutex_uninit(&pPlaylist->lock);
+	ma_data_source_uninit(&pPlaylist->ds);
+	ma_free(pPlaylist, NULL);
+}
+
+ma_result soundobj_playlist_append(soundobj_playlist* pPlaylist, const char* pFilePath)
+{
+	size_t length;
+	char* pPath;
+	if (pPlaylist == NULL || pFilePath == NULL) {
+		return MA_INVALID_ARGS;
+	}
+	length = strlen(pFilePath);
+	pPath = (char*)ma_malloc(length + 1, NULL);
+	if (pPath == NULL) {
+		return MA_OUT_OF_MEMORY;
+	}
+	MA_COPY_MEMORY(pPath, pFilePath, length + 1);
+	ma_mutex_lock(&pPlaylist->lock);
+	if (pPlaylist->pathHead + pPlaylist->pathCount == pPlaylist->pathCapacity) {
+		if (pPlaylist->pathHead > 0) {
+			MA_MOVE_MEMORY(pPlaylist->ppPaths, pPlaylist->ppPaths + pPlaylist->pathHead, pPlaylist->pathCount * sizeof(char*));
+			pPlaylist->pathHead = 0;
+		} else {
+			size_t newCapacity = (pPlaylist->pathCapacity == 0) ? 16 : pPlaylist->pathCapacity * 2;
+			char** ppNewPaths = (char**)ma_realloc(pPlaylist->ppPaths, newCapacity * sizeof(char*), NULL);
+			if (ppNewPaths == NULL) {
+				ma_mutex_unlock(&pPlaylist->lock);
+				ma_free(pPath, NULL);
+				return MA_OUT_OF_MEMORY;
+			}
+			pPlaylist->ppPaths = ppNewPaths;
+			pPlaylist->pathCapacity = newCapacity;
+		}
+	}
+	pPlaylist->ppPaths[pPlaylist->pathHead + pPlaylist->pathCount] = pPath;
+	pPlaylist->pathCount += 1;
+	ma_atomic_fetch_add_32(&pPlaylist->pendingCount, 1);
+	ma_mutex_unlock(&pPlaylist->lock);
+	soundobj_playlist_schedule_update(pPlaylist);
+	return MA_SUCCESS;
+}
+
+/* Drops queued paths that haven't been opened yet and returns how many. Entries already prefetched still play. */
+ma_uint32 soundobj_playlist_clear(soundobj_playlist* pPlaylist)
+{
+	size_t i;
+	ma_uint32 count;
+	ma_mutex_lock(&pPlaylist->lock);
+	count = (ma_uint32)pPlaylist->pathCount;
+	for (i = 0; i < pPlaylist->pathCount; i += 1) {
+		ma_free(pPlaylist->ppPaths[pPlaylist->pathHead + i], NULL);
+	}
+	pPlaylist->pathHead = 0;
+	pPlaylist->pathCount = 0;
+	ma_atomic_store_32(&pPlaylist->pendingCount, 0);
+	ma_mutex_unlock(&pPlaylist->lock);
+	return count;
+}
+
+void soundobj_playlist_skip(soundobj_playlist* pPlaylist)
+{
+	ma_atomic_store_32(&pPlaylist->skipRequested, 1);
+}
+
+void soundobj_playlist_set_crossfade(soundobj_playlist* pPlaylist, ma_uint32 frames)
+{
+	ma_atomic_store_32(&pPlaylist->crossfadeFrames, frames);
+}
+
+ma_uint32 soundobj_playlist_get_index(soundobj_playlist* pPlaylist)
+{
+	return ma_atomic_load_32(&pPlaylist->entryIndex);
+}
+
+ma_uint32 soundobj_playlist_get_pending_count(soundobj_playlist* pPlaylist)
+{
+	return ma_atomic_load_32(&pPlaylist->pendingCount);
+}
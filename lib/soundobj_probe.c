@@ -0,0 +1,192 @@
+/*
+* SoundObj metadata probing
+*
+* Reports a file's codec, native format, channels, sample rate and length without decoding its audio. Opening the decoder only reads
+* headers for every format (WAV and FLAC store their length there, Vorbis and Opus find it by bisecting for the last page), except that
+* miniaudio's MP3 decoder can only learn a file's length by walking every frame. MP3 lengths are therefore read from the Xing/Info or
+* VBRI header written by nearly every encoder, and estimated from the bitrate of the first frame when there is none, which is exact for
+* constant bitrate files. Setting scan falls back to walking the frames instead of estimating.
+*/
+
+#define SOUNDOBJ_PROBE_HEADER_BYTES 4096
+
+typedef enum
+{
+	SOUNDOBJ_CODEC_UNKNOWN,
+	SOUNDOBJ_CODEC_WAV,
+	SOUNDOBJ_CODEC_FLAC,
+	SOUNDOBJ_CODEC_MP3,
+	SOUNDOBJ_CODEC_VORBIS,
+	SOUNDOBJ_CODEC_OPUS
+} soundobj_codec;
+
+typedef struct
+{
+	soundobj_codec codec;
+	ma_format format;	/* What the decoder produces when no conversion is asked for. */
+	ma_uint32 channels;
+	ma_uint32 sampleRate;
+	ma_uint64 frameCount;
+	ma_bool32 exact;	/* MA_FALSE when frameCount is estimated from the bitrate, or 0 because the file doesn't say. */
+} soundobj_probe_info;
+
+static ma_uint32 soundobj_probe_be32(const ma_uint8* p)
+{
+	return ((ma_uint32)p[0] << 24) | ((ma_uint32)p[1] << 16) | ((ma_uint32)p[2] << 8) | (ma_uint32)p[3];
+}
+
+/* Decodes an MPEG audio frame header. Returns the frame's length in bytes, or 0 if the bytes aren't one. */
+static ma_uint32 soundobj_probe_mpeg_header(const ma_uint8* p, ma_uint32* pVersion, ma_uint32* pLayer, ma_uint32* pBitrate, ma_uint32* pSampleRate, ma_uint32* pFrameSamples, ma_bool32* pMono)
+{
+	static const ma_uint16 bitrates[2][3][15] = {
+		{	/* MPEG 1: layers I, II, III in kbps */
+			{ 0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448 },
+			{ 0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384 },
+			{ 0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320 }
+		},
+		{	/* MPEG 2 and 2.5 */
+			{ 0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256 },
+			{ 0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160 },
+			{ 0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160 }
+		}
+	};
+	static const ma_uint32 sampleRates[3] = { 44100, 48000, 32000 };
+	ma_uint32 version, layer, bitrateIndex, rateIndex, padding;
+	if (p[0] != 0xFF || (p[1] & 0xE0) != 0xE0) {
+		return 0;
+	}
+	version = (p[1] >> 3) & 3;	/* 0 = 2.5, 2 = 2, 3 = 1 */
+	layer = 4 - ((p[1] >> 1) & 3);	/* 1 = I, 2 = II, 3 = III */
+	bitrateIndex = p[2] >> 4;
+	rateIndex = (p[2] >> 2) & 3;
+	padding = (p[2] >> 1) & 1;
+	if (version == 1 || layer == 4 || bitrateIndex == 0 || bitrateIndex == 15 || rateIndex == 3) {
+		return 0;
+	}
+	*pVersion = version;
+	*pLayer = layer;
+	*pBitrate = bitrates[version == 3 ? 0 : 1][layer - 1][bitrateIndex] * 1000;
+	*pSampleRate = sampleRates[rateIndex] >> (version == 3 ? 0 : version == 2 ? 1 : 2);
+	*pFrameSamples = layer == 1 ? 384 : (layer == 3 && version != 3) ? 576 : 1152;
+	*pMono = (p[3] >> 6) == 3;
+	if (layer == 1) {
+		return (12 * *pBitrate / *pSampleRate + padding) * 4;
+	}
+	return *pFrameSamples / 8 * *pBitrate / *pSampleRate + padding;
+}
+
+/* Finds an MP3 file's length from its headers. Returns MA_FALSE if the first frame can't be found. */
+static ma_bool32 soundobj_probe_mp3_length(const char* pFilePath, ma_uint64* pFrameCount, ma_bool32* pExact)
+{
+	ma_vfs_file file;
+	ma_file_info fileInfo;
+	ma_uint8 header[SOUNDOBJ_PROBE_HEADER_BYTES];
+	ma_uint8 tag[3];
+	size_t bytesRead = 0;
+	ma_uint64 start = 0, end;
+	size_t offset;
+	ma_bool32 found = MA_FALSE;
+	if (ma_vfs_or_default_open(NULL, pFilePath, MA_OPEN_MODE_READ, &file) != MA_SUCCESS) {
+		return MA_FALSE;
+	}
+	if (ma_vfs_or_default_info(NULL, file, &fileInfo) != MA_SUCCESS) {
+		ma_vfs_or_default_close(NULL, file);
+		return MA_FALSE;
+	}
+	end = fileInfo.sizeInBytes;
+	/* Skip ID3v2 tags, which can hold megabytes of cover art ahead of the first frame. */
+	for (;;) {
+		if (ma_vfs_or_default_seek(NULL, file, (ma_int64)start, ma_seek_origin_start) != MA_SUCCESS
+			|| ma_vfs_or_default_read(NULL, file, header, 10, &bytesRead) != MA_SUCCESS || bytesRead < 10
+			|| header[0] != 'I' || header[1] != 'D' || header[2] != '3') {
+			break;
+		}
+		start += 10 + (((ma_uint64)header[6] & 0x7F) << 21 | ((ma_uint64)header[7] & 0x7F) << 14 | ((ma_uint64)header[8] & 0x7F) << 7 | ((ma_uint64)header[9] & 0x7F));
+		if (header[5] & 0x10) {
+			start += 10;	/* Footer */
+		}
+	}
+	/* An ID3v1 tag is the last 128 bytes. */
+	if (end >= start + 128 && ma_vfs_or_default_seek(NULL, file, (ma_int64)(end - 128), ma_seek_origin_start) == MA_SUCCESS
+		&& ma_vfs_or_default_read(NULL, file, tag, 3, &bytesRead) == MA_SUCCESS && bytesRead == 3 && tag[0] == 'T' && tag[1] == 'A' && tag[2] == 'G') {
+		end -= 128;
+	}
+	bytesRead = 0;
+	if (ma_vfs_or_default_seek(NULL, file, (ma_int64)start, ma_seek_origin_start) == MA_SUCCESS) {
+		ma_vfs_or_default_read(NULL, file, header, sizeof(header), &bytesRead);
+	}
+	ma_vfs_or_default_close(NULL, file);
+	for (offset = 0; offset + 4 <= bytesRead && !found; offset += 1) {
+		ma_uint32 version, layer, bitrate, sampleRate, frameSamples, frameBytes, next;
+		ma_uint32 nextVersion, nextLayer, nextBitrate, nextSampleRate, nextFrameSamples;
+		ma_bool32 mono, nextMono;
+		const ma_uint8* pFrame = header + offset;
+		size_t available = bytesRead - offset;
+		frameBytes = soundobj_probe_mpeg_header(pFrame, &version, &layer, &bitrate, &sampleRate, &frameSamples, &mono);
+		if (frameBytes == 0) {
+			continue;
+		}
+		/* A sync pattern inside other data is rejected unless a matching frame follows it, when that is still within what was read. */
+		next = (ma_uint32)offset + frameBytes;
+		if (next + 4 <= bytesRead && (soundobj_probe_mpeg_header(header + next, &nextVersion, &nextLayer, &nextBitrate, &nextSampleRate, &nextFrameSamples, &nextMono) == 0
+			|| nextVersion != version || nextLayer != layer || nextSampleRate != sampleRate)) {
+			continue;
+		}
+		found = MA_TRUE;
+		if (layer == 3) {
+			/* Xing and Info headers sit after the side information, whose size depends on the version and channel mode. */
+			size_t xing = 4 + (version == 3 ? (mono ? 17 : 32) : (mono ? 9 : 17));
+			if (available >= xing + 12 && (memcmp(pFrame + xing, "Xing", 4) == 0 || memcmp(pFrame + xing, "Info", 4) == 0) && (soundobj_probe_be32(pFrame + xing + 4) & 1)) {
+				/* The decoder also outputs the (silent) header frame itself, which the count leaves out. */
+				*pFrameCount = ((ma_uint64)soundobj_probe_be32(pFrame + xing + 8) + 1) * frameSamples;
+				*pExact = MA_TRUE;
+				break;
+			}
+			if (available >= 36 + 18 && memcmp(pFrame + 36, "VBRI", 4) == 0) {
+				*pFrameCount = ((ma_uint64)soundobj_probe_be32(pFrame + 36 + 14) + 1) * frameSamples;
+				*pExact = MA_TRUE;
+				break;
+			}
+		}
+		*pFrameCount = (end - ma_min(end, start + offset)) * 8 * sampleRate / bitrate;
+		*pExact = MA_FALSE;
+	}
+	return found;
+}
+
+ma_result soundobj_probe_file(const char* pFilePath, ma_bool32 scan, soundobj_probe_info* pInfo)
+{
+	ma_result result;
+	ma_decoder decoder;
+	ma_decoder_config config;
+	if (pFilePath == NULL || pInfo == NULL) {
+		return MA_INVALID_ARGS;
+	}
+	MA_ZERO_OBJECT(pInfo);
+	config = soundobj_decoder_config_init(ma_format_unknown, 0, 0);
+	result = ma_decoder_init_file(pFilePath, &config, &decoder);
+	if (result != MA_SUCCESS) {
+		return result;
+	}
+	result = ma_decoder_get_data_format(&decoder, &pInfo->format, &pInfo->channels, &pInfo->sampleRate, NULL, 0);
+	if (result != MA_SUCCESS) {
+		ma_decoder_uninit(&decoder);
+		return result;
+	}
+	if (decoder.pBackendVTable == &g_ma_decoding_backend_vtable_wav) {
+		pInfo->codec = SOUNDOBJ_CODEC_WAV;
+	} else if (decoder.pBackendVTable == &g_ma_decoding_backend_vtable_flac) {
+		pInfo->codec = SOUNDOBJ_CODEC_FLAC;
+	} else if (decoder.pBackendVTable == &g_ma_decoding_backend_vtable_mp3) {
+		pInfo->codec = SOUNDOBJ_CODEC_MP3;
+	} else if (ma_decoding_backend_libvorbis != NULL && decoder.pBackendVTable == ma_decoding_backend_libvorbis) {
+		pInfo->codec = SOUNDOBJ_CODEC_VORBIS;
+	} else if (ma_decoding_backend_libopus != NULL && decoder.pBackendVTable == ma_decoding_backend_libopus) {
+		pInfo->codec = SOUNDOBJ_CODEC_OPUS;
+	}
+	if (pInfo->codec != SOUNDOBJ_CODEC_MP3 || scan || !soundobj_probe_mp3_length(pFilePath, &pInfo->frameCount, &pInfo->exact)) {
+		pInfo->exact = ma_decoder_get_length_in_pcm_frames(&decoder, &pInfo->frameCount) == MA_SUCCESS && pInfo->frameCount > 0;
+	}
+	ma_decoder_uninit(&decoder);
+	return MA_SUCCESS;
+}
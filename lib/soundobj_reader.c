@@ -0,0 +1,195 @@
+/*
+* SoundObj file object reader
+*
+* An ma_vfs over a single Python file-like object, so archive members, encrypted containers and other readers can be decoded without
+* extracting them to disk first. The VFS ignores the path it is asked to open and always opens the one object it was created for.
+*
+* Bytes come from Python through soundobj_reader_fill(), which reads a whole chunk at a given offset. Reads and seeks are served from the
+* current chunk where they can be, so the decoder's many small reads and the backends' probing seeks back to the start cross into Python
+* only once per chunk. Reads at least a chunk long bypass the chunk and are filled directly. The reader is used by one thread at a time:
+* whoever is decoding, which for streams is a job thread, never the audio thread.
+*/
+
+/* Implemented in Python. Returns the number of bytes read into pBuffer from offset, 0 at the end, or -1 on error. */
+static ma_int64 soundobj_reader_fill(void* pHandle, ma_uint64 offset, void* pBuffer, ma_uint64 bytes);
+
+typedef struct soundobj_reader
+{
+	ma_vfs_callbacks cb;	/* Must come first so the reader can be used as an ma_vfs. */
+	void* pHandle;
+	ma_int64 size;	/* -1 when unknown. */
+	ma_uint8* pChunk;
+	size_t chunkSize;
+	ma_uint64 chunkOffset;	/* Offset of the first byte in pChunk. */
+	size_t chunkLength;	/* Valid bytes in pChunk. */
+	ma_uint64 cursor;
+} soundobj_reader;
+
+static ma_result soundobj_reader_on_open(ma_vfs* pVFS, const char* pFilePath, ma_uint32 openMode, ma_vfs_file* pFile)
+{
+	soundobj_reader* pReader = (soundobj_reader*)pVFS;
+	(void)pFilePath;
+	if ((openMode & MA_OPEN_MODE_WRITE) != 0) {
+		return MA_ACCESS_DENIED;
+	}
+	pReader->cursor = 0;
+	*pFile = (ma_vfs_file)pReader;
+	return MA_SUCCESS;
+}
+
+static ma_result soundobj_reader_on_open_w(ma_vfs* pVFS, const wchar_t* pFilePath, ma_uint32 openMode, ma_vfs_file* pFile)
+{
+	(void)pFilePath;
+	return soundobj_reader_on_open(pVFS, NULL, openMode, pFile);
+}
+
+static ma_result soundobj_reader_on_close(ma_vfs* pVFS, ma_vfs_file file)
+{
+	(void)pVFS;
+	(void)file;
+	return MA_SUCCESS;
+}
+
+static ma_result soundobj_reader_on_read(ma_vfs* pVFS, ma_vfs_file file, void* pDst, size_t sizeInBytes, size_t* pBytesRead)
+{
+	soundobj_reader* pReader = (soundobj_reader*)pVFS;
+	size_t total = 0;
+	(void)file;
+	while (total < sizeInBytes) {
+		size_t remaining = sizeInBytes - total;
+		ma_int64 n;
+		if (pReader->cursor >= pReader->chunkOffset && pReader->cursor < pReader->chunkOffset + pReader->chunkLength) {
+			size_t offset = (size_t)(pReader->cursor - pReader->chunkOffset);
+			size_t count = ma_min(remaining, pReader->chunkLength - offset);
+			MA_COPY_MEMORY(ma_offset_ptr(pDst, total), pReader->pChunk + offset, count);
+			pReader->cursor += count;
+			total += count;
+			continue;
+		}
+		if (pReader->size >= 0 && pReader->cursor >= (ma_uint64)pReader->size) {
+			break;
+		}
+		if (remaining >= pReader->chunkSize) {
+			n = soundobj_reader_fill(pReader->pHandle, pReader->cursor, ma_offset_ptr(pDst, total), (ma_uint64)remaining);
+			if (n > 0) {
+				pReader->cursor += (ma_uint64)n;
+				total += (size_t)n;
+			}
+		} else {
+			n = soundobj_reader_fill(pReader->pHandle, pReader->cursor, pReader->pChunk, (ma_uint64)pReader->chunkSize);
+			pReader->chunkOffset = pReader->cursor;
+			pReader->chunkLength = n > 0 ? (size_t)n : 0;
+		}
+		if (n < 0) {
+			*pBytesRead = total;
+			return MA_IO_ERROR;
+		}
+		if (n == 0) {
+			break;
+		}
+	}
+	*pBytesRead = total;
+	return (total == 0 && sizeInBytes > 0) ? MA_AT_END : MA_SUCCESS;
+}
+
+static ma_result soundobj_reader_on_write(ma_vfs* pVFS, ma_vfs_file file, const void* pSrc, size_t sizeInBytes, size_t* pBytesWritten)
+{
+	(void)pVFS;
+	(void)file;
+	(void)pSrc;
+	(void)sizeInBytes;
+	*pBytesWritten = 0;
+	return MA_ACCESS_DENIED;
+}
+
+/* Only moves the cursor. Nothing is read until the next read, and nothing at all if it lands inside the chunk. */
+static ma_result soundobj_reader_on_seek(ma_vfs* pVFS, ma_vfs_file file, ma_int64 offset, ma_seek_origin origin)
+{
+	soundobj_reader* pReader = (soundobj_reader*)pVFS;
+	ma_int64 cursor;
+	(void)file;
+	if (origin == ma_seek_origin_start) {
+		cursor = offset;
+	} else if (origin == ma_seek_origin_current) {
+		cursor = (ma_int64)pReader->cursor + offset;
+	} else {
+		if (pReader->size < 0) {
+			return MA_NOT_IMPLEMENTED;
+		}
+		cursor = pReader->size + offset;
+	}
+	if (cursor < 0) {
+		return MA_BAD_SEEK;
+	}
+	pReader->cursor = (ma_uint64)cursor;
+	return MA_SUCCESS;
+}
+
+static ma_result soundobj_reader_on_tell(ma_vfs* pVFS, ma_vfs_file file, ma_int64* pCursor)
+{
+	(void)file;
+	*pCursor = (ma_int64)((soundobj_reader*)pVFS)->cursor;
+	return MA_SUCCESS;
+}
+
+static ma_result soundobj_reader_on_info(ma_vfs* pVFS, ma_vfs_file file, ma_file_info* pInfo)
+{
+	soundobj_reader* pReader = (soundobj_reader*)pVFS;
+	(void)file;
+	if (pReader->size < 0) {
+		return MA_NOT_IMPLEMENTED;
+	}
+	pInfo->sizeInBytes = (ma_uint64)pReader->size;
+	return MA_SUCCESS;
+}
+
+/*
+Creates a reader for the Python object behind pHandle, which must outlive it. size is the object's length in bytes, or -1 if it can't be
+told; without it the decoder can't seek relative to the end, which some formats need.
+*/
+ma_result soundobj_reader_create(void* pHandle, ma_int64 size, size_t chunkSize, soundobj_reader** ppReader)
+{
+	soundobj_reader* pReader;
+	*ppReader = NULL;
+	if (pHandle == NULL || chunkSize == 0) {
+		return MA_INVALID_ARGS;
+	}
+	pReader = (soundobj_reader*)ma_calloc(sizeof(*pReader), NULL);
+	if (pReader == NULL) {
+		return MA_OUT_OF_MEMORY;
+	}
+	pReader->pChunk = (ma_uint8*)ma_malloc(chunkSize, NULL);
+	if (pReader->pChunk == NULL) {
+		ma_free(pReader, NULL);
+		return MA_OUT_OF_MEMORY;
+	}
+	pReader->cb.onOpen = soundobj_reader_on_open;
+	pReader->cb.onOpenW = soundobj_reader_on_open_w;
+	pReader->cb.onClose = soundobj_reader_on_close;
+	pReader->cb.onRead = soundobj_reader_on_read;
+	pReader->cb.onWrite = soundobj_reader_on_write;
+	pReader->cb.onSeek = soundobj_reader_on_seek;
+	pReader->cb.onTell = soundobj_reader_on_tell;
+	pReader->cb.onInfo = soundobj_reader_on_info;
+	pReader->pHandle = pHandle;
+	pReader->size = size;
+	pReader->chunkSize = chunkSize;
+	*ppReader = pReader;
+	return MA_SUCCESS;
+}
+
+/* Every decoder reading through the reader must be uninitialized first. */
+void soundobj_reader_destroy(soundobj_reader* pReader)
+{
+	if (pReader == NULL) {
+		return;
+	}
+	ma_free(pReader->pChunk, NULL);
+	ma_free(pReader, NULL);
+}
+
+ma_vfs* soundobj_reader_get_vfs(soundobj_reader* pReader)
+{
+	return (ma_vfs*)pReader;
+}
+
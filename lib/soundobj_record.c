@@ -0,0 +1,644 @@
+/*
+* SoundObj output recording
+*
+* Taps the engine's final mix into a lock-free single producer, single consumer ring buffer. The audio thread only ever copies into
+* whatever space is free and counts what didn't fit as dropped, so a slow disk costs frames in the recording rather than glitches in
+* the output. A writer thread drains the buffer with soundobj_recorder_flush(), converting to the file's sample format and encoding WAV
+* or FLAC through a large stdio buffer so the disk sees big sequential writes.
+*
+* miniaudio only encodes WAV, so FLAC is encoded here. Each block of SOUNDOBJ_FLAC_BLOCK_SIZE frames is coded with whichever of the
+* fixed predictors (orders 0 to 4) leaves the smallest residual, Rice coded over the best partitioning, with constant and verbatim
+* subframes as fallbacks. Stereo blocks pick the cheapest of left/right, left/side, side/right and mid/side. This is the subset of the
+* format most encoders use at their fastest settings; it has no LPC, so files are somewhat larger than the reference encoder's default.
+* FLAC stores integers, so float output is written as 24-bit.
+*/
+
+#define SOUNDOBJ_RECORDER_FILE_BUFFER_SIZE	(1024 * 1024)
+#define SOUNDOBJ_RECORDER_SCRATCH_FRAMES	4096
+#define SOUNDOBJ_FLAC_BLOCK_SIZE	4096
+#define SOUNDOBJ_FLAC_MAX_ORDER	4
+#define SOUNDOBJ_FLAC_MAX_PARTITION_ORDER	8
+#define SOUNDOBJ_FLAC_MAX_RICE_PARAMETER	14
+#define SOUNDOBJ_FLAC_MAX_CHANNELS	8
+
+typedef struct
+{
+	ma_uint8* pData;
+	size_t length;
+	size_t capacity;
+	ma_uint64 accumulator;
+	ma_uint32 bits;	/* Bits in the accumulator not yet written to pData, always fewer than 8 between calls. */
+} soundobj_flac_writer;
+
+static void soundobj_flac_write(soundobj_flac_writer* pWriter, ma_uint32 value, ma_uint32 bits)
+{
+	if (bits == 0) {
+		return;
+	}
+	pWriter->accumulator = (pWriter->accumulator << bits) | (value & (bits == 32 ? 0xFFFFFFFF : ((1u << bits) - 1)));
+	pWriter->bits += bits;
+	while (pWriter->bits >= 8) {
+		pWriter->bits -= 8;
+		if (pWriter->length < pWriter->capacity) {
+			pWriter->pData[pWriter->length++] = (ma_uint8)(pWriter->accumulator >> pWriter->bits);
+		}
+	}
+}
+
+static void soundobj_flac_write_zeros(soundobj_flac_writer* pWriter, ma_uint32 count)
+{
+	while (count > 0) {
+		ma_uint32 bits = ma_min(count, 32);
+		soundobj_flac_write(pWriter, 0, bits);
+		count -= bits;
+	}
+}
+
+static void soundobj_flac_align(soundobj_flac_writer* pWriter)
+{
+	if (pWriter->bits > 0) {
+		soundobj_flac_write(pWriter, 0, 8 - pWriter->bits);
+	}
+}
+
+static ma_uint8 soundobj_flac_crc8(const ma_uint8* pData, size_t length)
+{
+	ma_uint32 crc = 0;
+	size_t i;
+	int bit;
+	for (i = 0; i < length; i += 1) {
+		crc ^= pData[i];
+		for (bit = 0; bit < 8; bit += 1) {
+			crc = (crc & 0x80) ? ((crc << 1) ^ 0x07) : (crc << 1);
+		}
+	}
+	return (ma_uint8)crc;
+}
+
+static ma_uint16 soundobj_flac_crc16(const ma_uint8* pData, size_t length)
+{
+	ma_uint32 crc = 0;
+	size_t i;
+	int bit;
+	for (i = 0; i < length; i += 1) {
+		crc ^= (ma_uint32)pData[i] << 8;
+		for (bit = 0; bit < 8; bit += 1) {
+			crc = (crc & 0x8000) ? ((crc << 1) ^ 0x8005) : (crc << 1);
+		}
+	}
+	return (ma_uint16)crc;
+}
+
+typedef struct
+{
+	ma_uint32 type;	/* 0 constant, 1 verbatim, 2 fixed. */
+	ma_uint32 order;
+	ma_uint32 partitionOrder;
+	ma_uint32 parameters[1 << SOUNDOBJ_FLAC_MAX_PARTITION_ORDER];
+	ma_uint64 bits;
+} soundobj_flac_subframe;
+
+typedef struct
+{
+	ma_uint32 channels;
+	ma_uint32 bitsPerSample;
+	ma_uint32 sampleRate;
+	ma_uint32 blockFrames;	/* Frames waiting in pBlock. */
+	ma_uint64 frameNumber;
+	ma_uint64 totalFrames;
+	ma_int32* pBlock;	/* SOUNDOBJ_FLAC_BLOCK_SIZE frames per channel, one channel after another. */
+	ma_int32* pSide;	/* Mid and side for stereo blocks. */
+	ma_int32* pMid;
+	ma_int32* pResidual;	/* (SOUNDOBJ_FLAC_MAX_ORDER + 1) * SOUNDOBJ_FLAC_BLOCK_SIZE per candidate channel, one run per predictor order. */
+	soundobj_flac_writer writer;
+} soundobj_flac_encoder;
+
+/* Residual of a fixed predictor. Samples are at most 25 bits (24-bit side channels), so order 4 stays well within 32. */
+static void soundobj_flac_fixed_residual(const ma_int32* pSamples, ma_uint32 count, ma_uint32 order, ma_int32* pResidual)
+{
+	ma_uint32 i;
+	for (i = order; i < count; i += 1) {
+		const ma_int32* x = pSamples + i;
+		switch (order) {
+			case 0: pResidual[i] = x[0]; break;
+			case 1: pResidual[i] = x[0] - x[-1]; break;
+			case 2: pResidual[i] = x[0] - 2 * x[-1] + x[-2]; break;
+			case 3: pResidual[i] = x[0] - 3 * x[-1] + 3 * x[-2] - x[-3]; break;
+			default: pResidual[i] = x[0] - 4 * x[-1] + 6 * x[-2] - 4 * x[-3] + x[-4]; break;
+		}
+	}
+}
+
+static MA_INLINE ma_uint32 soundobj_flac_zigzag(ma_int32 value)
+{
+	return ((ma_uint32)value << 1) ^ (ma_uint32)(value >> 31);
+}
+
+/*
+Estimates the Rice coded size of a residual with the best partition order, filling in the partitioning and parameters. The
+estimate is an upper bound on what soundobj_flac_write_subframe() writes, since floor(sum / 2^k) is at least the sum of each floor.
+*/
+static ma_uint64 soundobj_flac_plan_residual(const ma_int32* pResidual, ma_uint32 count, ma_uint32 order, soundobj_flac_subframe* pSubframe)
+{
+	ma_uint64 sums[1 << SOUNDOBJ_FLAC_MAX_PARTITION_ORDER];
+	ma_uint32 maxOrder = 0, partitionOrder, partition, i;
+	ma_uint64 best = ~(ma_uint64)0;
+	while (maxOrder < SOUNDOBJ_FLAC_MAX_PARTITION_ORDER && (count & ((2u << maxOrder) - 1)) == 0 && (count >> (maxOrder + 1)) > order) {
+		maxOrder += 1;
+	}
+	for (partition = 0; partition < (1u << maxOrder); partition += 1) {
+		ma_uint32 start = partition == 0 ? order : partition * (count >> maxOrder);
+		ma_uint32 end = (partition + 1) * (count >> maxOrder);
+		sums[partition] = 0;
+		for (i = start; i < end; i += 1) {
+			sums[partition] += soundobj_flac_zigzag(pResidual[i]);
+		}
+	}
+	/* From the finest partitioning up, merging neighbours at each step. */
+	for (partitionOrder = maxOrder + 1; partitionOrder-- > 0;) {
+		ma_uint32 partitions = 1u << partitionOrder;
+		ma_uint32 parameters[1 << SOUNDOBJ_FLAC_MAX_PARTITION_ORDER];
+		ma_uint64 bits = 6;
+		if (partitionOrder < maxOrder) {
+			for (partition = 0; partition < partitions; partition += 1) {
+				sums[partition] = sums[partition * 2] + sums[partition * 2 + 1];
+			}
+		}
+		for (partition = 0; partition < partitions; partition += 1) {
+			ma_uint64 samples = (count >> partitionOrder) - (partition == 0 ? order : 0);
+			ma_uint32 k = 0;
+			while (k < SOUNDOBJ_FLAC_MAX_RICE_PARAMETER && (samples << (k + 1)) < sums[partition]) {
+				k += 1;
+			}
+			parameters[partition] = k;
+			bits += 4 + samples * (k + 1) + (sums[partition] >> k);
+		}
+		if (bits < best) {
+			best = bits;
+			pSubframe->partitionOrder = partitionOrder;
+			MA_COPY_MEMORY(pSubframe->parameters, parameters, partitions * sizeof(parameters[0]));
+		}
+	}
+	return best;
+}
+
+/* Picks the cheapest way to code one channel of a block. pResidual is scratch for every predictor order's residual. */
+static void soundobj_flac_plan_subframe(const ma_int32* pSamples, ma_uint32 count, ma_uint32 bitsPerSample, ma_int32* pResidual, soundobj_flac_subframe* pSubframe)
+{
+	soundobj_flac_subframe candidate;
+	ma_uint32 order, i;
+	for (i = 1; i < count && pSamples[i] == pSamples[0]; i += 1) {
+	}
+	if (i == count) {
+		pSubframe->type = 0;
+		pSubframe->bits = 8 + bitsPerSample;
+		return;
+	}
+	pSubframe->type = 1;
+	pSubframe->bits = 8 + (ma_uint64)count * bitsPerSample;
+	for (order = 0; order <= SOUNDOBJ_FLAC_MAX_ORDER && order < count; order += 1) {
+		ma_int32* pOrderResidual = pResidual + order * SOUNDOBJ_FLAC_BLOCK_SIZE;
+		soundobj_flac_fixed_residual(pSamples, count, order, pOrderResidual);
+		candidate.type = 2;
+		candidate.order = order;
+		candidate.bits = 8 + (ma_uint64)order * bitsPerSample + soundobj_flac_plan_residual(pOrderResidual, count, order, &candidate);
+		if (candidate.bits < pSubframe->bits) {
+			*pSubframe = candidate;
+		}
+	}
+}
+
+static void soundobj_flac_write_subframe(soundobj_flac_writer* pWriter, const ma_int32* pSamples, ma_uint32 count, ma_uint32 bitsPerSample, const ma_int32* pResidual, const soundobj_flac_subframe* pSubframe)
+{
+	ma_uint32 i, partition;
+	if (pSubframe->type == 0) {
+		soundobj_flac_write(pWriter, 0x00, 8);
+		soundobj_flac_write(pWriter, (ma_uint32)pSamples[0], bitsPerSample);
+		return;
+	}
+	if (pSubframe->type == 1) {
+		soundobj_flac_write(pWriter, 0x02, 8);
+		for (i = 0; i < count; i += 1) {
+			soundobj_flac_write(pWriter, (ma_uint32)pSamples[i], bitsPerSample);
+		}
+		return;
+	}
+	/* Fixed: zero pad bit, type 001xxx with the order, no wasted bits; then the warm-up samples and the Rice coded residual. */
+	soundobj_flac_write(pWriter, (0x08 | pSubframe->order) << 1, 8);
+	for (i = 0; i < pSubframe->order; i += 1) {
+		soundobj_flac_write(pWriter, (ma_uint32)pSamples[i], bitsPerSample);
+	}
+	pResidual += pSubframe->order * SOUNDOBJ_FLAC_BLOCK_SIZE;
+	soundobj_flac_write(pWriter, 0, 2);
+	soundobj_flac_write(pWriter, pSubframe->partitionOrder, 4);
+	for (partition = 0; partition < (1u << pSubframe->partitionOrder); partition += 1) {
+		ma_uint32 k = pSubframe->parameters[partition];
+		ma_uint32 start = partition == 0 ? pSubframe->order : partition * (count >> pSubframe->partitionOrder);
+		ma_uint32 end = (partition + 1) * (count >> pSubframe->partitionOrder);
+		soundobj_flac_write(pWriter, k, 4);
+		for (i = start; i < end; i += 1) {
+			ma_uint32 value = soundobj_flac_zigzag(pResidual[i]);
+			soundobj_flac_write_zeros(pWriter, value >> k);
+			soundobj_flac_write(pWriter, 1, 1);
+			soundobj_flac_write(pWriter, value, k);
+		}
+	}
+}
+
+/* Writes a frame number in FLAC's UTF-8 style variable length coding. */
+static void soundobj_flac_write_frame_number(soundobj_flac_writer* pWriter, ma_uint64 value)
+{
+	ma_uint32 bytes, i;
+	if (value < 0x80) {
+		soundobj_flac_write(pWriter, (ma_uint32)value, 8);
+		return;
+	}
+	/* n bytes hold 7 - n bits in the first and 6 in each of the rest. */
+	for (bytes = 2; bytes < 7 && value >= ((ma_uint64)1 << ((7 - bytes) + 6 * (bytes - 1))); bytes += 1) {
+	}
+	soundobj_flac_write(pWriter, ((0xFF00u >> bytes) & 0xFF) | (ma_uint32)(value >> (6 * (bytes - 1))), 8);
+	for (i = bytes - 1; i > 0; i -= 1) {
+		soundobj_flac_write(pWriter, 0x80 | (ma_uint32)((value >> (6 * (i - 1))) & 0x3F), 8);
+	}
+}
+
+static ma_result soundobj_flac_write_file(FILE* pFile, const ma_uint8* pData, size_t length)
+{
+	return fwrite(pData, 1, length, pFile) == length ? MA_SUCCESS : MA_IO_ERROR;
+}
+
+/* Writes the stream header. The total frame count is left 0 (unknown) until soundobj_flac_encoder_finish(). */
+static ma_result soundobj_flac_write_header(soundobj_flac_encoder* pEncoder, FILE* pFile)
+{
+	ma_uint8 header[42];
+	ma_uint32 i;
+	soundobj_flac_writer writer = { header, 0, sizeof(header), 0, 0 };
+	MA_COPY_MEMORY(header, "fLaC", 4);
+	writer.length = 4;
+	soundobj_flac_write(&writer, 0x80, 8);	/* Last metadata block, STREAMINFO */
+	soundobj_flac_write(&writer, 34, 24);
+	soundobj_flac_write(&writer, SOUNDOBJ_FLAC_BLOCK_SIZE, 16);
+	soundobj_flac_write(&writer, SOUNDOBJ_FLAC_BLOCK_SIZE, 16);
+	soundobj_flac_write(&writer, 0, 24);	/* Frame sizes unknown */
+	soundobj_flac_write(&writer, 0, 24);
+	soundobj_flac_write(&writer, pEncoder->sampleRate, 20);
+	soundobj_flac_write(&writer, pEncoder->channels - 1, 3);
+	soundobj_flac_write(&writer, pEncoder->bitsPerSample - 1, 5);
+	soundobj_flac_write(&writer, 0, 4);
+	soundobj_flac_write(&writer, 0, 32);
+	for (i = 0; i < 4; i += 1) {
+		soundobj_flac_write(&writer, 0, 32);	/* No MD5 */
+	}
+	return soundobj_flac_write_file(pFile, header, writer.length);
+}
+
+static ma_result soundobj_flac_encoder_init(ma_uint32 channels, ma_uint32 bitsPerSample, ma_uint32 sampleRate, soundobj_flac_encoder* pEncoder)
+{
+	MA_ZERO_OBJECT(pEncoder);
+	if (channels == 0 || channels > SOUNDOBJ_FLAC_MAX_CHANNELS || sampleRate == 0 || sampleRate >= (1 << 20)) {
+		return MA_INVALID_ARGS;
+	}
+	pEncoder->channels = channels;
+	pEncoder->bitsPerSample = bitsPerSample;
+	pEncoder->sampleRate = sampleRate;
+	pEncoder->pBlock = (ma_int32*)ma_malloc(sizeof(ma_int32) * SOUNDOBJ_FLAC_BLOCK_SIZE * (channels + 2), NULL);
+	/* Stereo blocks keep the residuals of all four candidate channels until the pairing is chosen. */
+	pEncoder->pResidual = (ma_int32*)ma_malloc(sizeof(ma_int32) * SOUNDOBJ_FLAC_BLOCK_SIZE * (SOUNDOBJ_FLAC_MAX_ORDER + 1) * 4, NULL);
+	/* Every subframe is at most verbatim, with side channels a bit wider, plus headers. */
+	pEncoder->writer.capacity = channels * (SOUNDOBJ_FLAC_BLOCK_SIZE * (bitsPerSample + 1) / 8 + 64) + 64;
+	pEncoder->writer.pData = (ma_uint8*)ma_malloc(pEncoder->writer.capacity, NULL);
+	if (pEncoder->pBlock == NULL || pEncoder->pResidual == NULL || pEncoder->writer.pData == NULL) {
+		ma_free(pEncoder->pBlock, NULL);
+		ma_free(pEncoder->pResidual, NULL);
+		ma_free(pEncoder->writer.pData, NULL);
+		return MA_OUT_OF_MEMORY;
+	}
+	pEncoder->pSide = pEncoder->pBlock + SOUNDOBJ_FLAC_BLOCK_SIZE * channels;
+	pEncoder->pMid = pEncoder->pSide + SOUNDOBJ_FLAC_BLOCK_SIZE;
+	return MA_SUCCESS;
+}
+
+static void soundobj_flac_encoder_uninit(soundobj_flac_encoder* pEncoder)
+{
+	ma_free(pEncoder->pBlock, NULL);
+	ma_free(pEncoder->pResidual, NULL);
+	ma_free(pEncoder->writer.pData, NULL);
+}
+
+/* Encodes the frames waiting in the block as one FLAC frame. */
+static ma_result soundobj_flac_encode_block(soundobj_flac_encoder* pEncoder, FILE* pFile)
+{
+	soundobj_flac_writer* pWriter = &pEncoder->writer;
+	soundobj_flac_subframe subframes[4];
+	const ma_int32* pChannels[SOUNDOBJ_FLAC_MAX_CHANNELS];
+	ma_uint32 count = pEncoder->blockFrames;
+	ma_uint32 bps = pEncoder->bitsPerSample;
+	ma_uint32 assignment = pEncoder->channels - 1;
+	ma_uint32 residualStride = SOUNDOBJ_FLAC_BLOCK_SIZE * (SOUNDOBJ_FLAC_MAX_ORDER + 1);
+	ma_uint32 c, i;
+	ma_uint16 crc;
+	if (count == 0) {
+		return MA_SUCCESS;
+	}
+	pWriter->length = 0;
+	pWriter->bits = 0;
+	for (c = 0; c < pEncoder->channels; c += 1) {
+		pChannels[c] = pEncoder->pBlock + c * SOUNDOBJ_FLAC_BLOCK_SIZE;
+	}
+	soundobj_flac_write(pWriter, 0xFFF8, 16);	/* Sync, fixed block size */
+	if (pEncoder->channels == 2) {
+		/* Left, right, side and mid; of the four pairings FLAC allows, keep the cheapest. */
+		static const ma_uint32 pairs[4][3] = { { 0, 1, 1 }, { 0, 2, 8 }, { 2, 1, 9 }, { 3, 2, 10 } };
+		const ma_int32* pSources[4];
+		ma_uint64 best = ~(ma_uint64)0;
+		ma_uint32 bestPair = 0, p;
+		for (i = 0; i < count; i += 1) {
+			ma_int64 left = pChannels[0][i], right = pChannels[1][i];
+			pEncoder->pSide[i] = (ma_int32)(left - right);
+			pEncoder->pMid[i] = (ma_int32)((left + right) >> 1);
+		}
+		pSources[0] = pChannels[0];
+		pSources[1] = pChannels[1];
+		pSources[2] = pEncoder->pSide;
+		pSources[3] = pEncoder->pMid;
+		for (c = 0; c < 4; c += 1) {
+			soundobj_flac_plan_subframe(pSources[c], count, bps + (c == 2), pEncoder->pResidual + c * residualStride, &subframes[c]);
+		}
+		for (p = 0; p < 4; p += 1) {
+			ma_uint64 cost = subframes[pairs[p][0]].bits + subframes[pairs[p][1]].bits;
+			if (cost < best) {
+				best = cost;
+				bestPair = p;
+			}
+		}
+		assignment = pairs[bestPair][2];
+		soundobj_flac_write(pWriter, 0x70, 8);	/* 16-bit block size at the end of the header, rate from STREAMINFO */
+		soundobj_flac_write(pWriter, assignment << 4, 8);	/* Sample size from STREAMINFO */
+		soundobj_flac_write_frame_number(pWriter, pEncoder->frameNumber);
+		soundobj_flac_write(pWriter, count - 1, 16);
+		soundobj_flac_write(pWriter, soundobj_flac_crc8(pWriter->pData, pWriter->length), 8);
+		for (i = 0; i < 2; i += 1) {
+			c = pairs[bestPair][i];
+			soundobj_flac_write_subframe(pWriter, pSources[c], count, bps + (c == 2), pEncoder->pResidual + c * residualStride, &subframes[c]);
+		}
+	} else {
+		soundobj_flac_write(pWriter, 0x70, 8);
+		soundobj_flac_write(pWriter, assignment << 4, 8);
+		soundobj_flac_write_frame_number(pWriter, pEncoder->frameNumber);
+		soundobj_flac_write(pWriter, count - 1, 16);
+		soundobj_flac_write(pWriter, soundobj_flac_crc8(pWriter->pData, pWriter->length), 8);
+		for (c = 0; c < pEncoder->channels; c += 1) {
+			soundobj_flac_plan_subframe(pChannels[c], count, bps, pEncoder->pResidual, &subframes[0]);
+			soundobj_flac_write_subframe(pWriter, pChannels[c], count, bps, pEncoder->pResidual, &subframes[0]);
+		}
+	}
+	soundobj_flac_align(pWriter);
+	crc = soundobj_flac_crc16(pWriter->pData, pWriter->length);
+	soundobj_flac_write(pWriter, crc, 16);
+	if (pWriter->length >= pWriter->capacity) {
+		return MA_ERROR;	/* Can't happen: the size estimates are upper bounds and the buffer fits verbatim coding. */
+	}
+	pEncoder->frameNumber += 1;
+	pEncoder->totalFrames += count;
+	pEncoder->blockFrames = 0;
+	return soundobj_flac_write_file(pFile, pWriter->pData, pWriter->length);
+}
+
+/* Adds interleaved frames in format (u8, s16, or s32 holding 24-bit audio in its top bits), encoding each block as it fills. */
+static ma_result soundobj_flac_encoder_write(soundobj_flac_encoder* pEncoder, FILE* pFile, const void* pFrames, ma_format format, ma_uint32 frameCount)
+{
+	ma_uint32 channels = pEncoder->channels;
+	ma_uint32 done = 0, i, c;
+	while (done < frameCount) {
+		ma_uint32 frames = ma_min(frameCount - done, SOUNDOBJ_FLAC_BLOCK_SIZE - pEncoder->blockFrames);
+		for (c = 0; c < channels; c += 1) {
+			ma_int32* pOut = pEncoder->pBlock + c * SOUNDOBJ_FLAC_BLOCK_SIZE + pEncoder->blockFrames;
+			for (i = 0; i < frames; i += 1) {
+				size_t index = (size_t)(done + i) * channels + c;
+				if (format == ma_format_u8) {
+					pOut[i] = (ma_int32)((const ma_uint8*)pFrames)[index] - 128;
+				} else if (format == ma_format_s16) {
+					pOut[i] = ((const ma_int16*)pFrames)[index];
+				} else {
+					pOut[i] = ((const ma_int32*)pFrames)[index] >> 8;
+				}
+			}
+		}
+		pEncoder->blockFrames += frames;
+		done += frames;
+		if (pEncoder->blockFrames == SOUNDOBJ_FLAC_BLOCK_SIZE) {
+			ma_result result = soundobj_flac_encode_block(pEncoder, pFile);
+			if (result != MA_SUCCESS) {
+				return result;
+			}
+		}
+	}
+	return MA_SUCCESS;
+}
+
+/* Encodes the last, short block and fills in the stream's length. */
+static ma_result soundobj_flac_encoder_finish(soundobj_flac_encoder* pEncoder, FILE* pFile)
+{
+	ma_uint8 info[8];
+	soundobj_flac_writer writer = { info, 0, sizeof(info), 0, 0 };
+	ma_result result = soundobj_flac_encode_block(pEncoder, pFile);
+	if (result != MA_SUCCESS) {
+		return result;
+	}
+	soundobj_flac_write(&writer, pEncoder->sampleRate, 20);
+	soundobj_flac_write(&writer, pEncoder->channels - 1, 3);
+	soundobj_flac_write(&writer, pEncoder->bitsPerSample - 1, 5);
+	soundobj_flac_write(&writer, (ma_uint32)(pEncoder->totalFrames >> 32) & 0x0F, 4);
+	soundobj_flac_write(&writer, (ma_uint32)pEncoder->totalFrames, 32);
+	/* Sample rate, channels, bits per sample and length share 8 bytes starting 18 bytes in. */
+	if (fseek(pFile, 18, SEEK_SET) != 0) {
+		return MA_IO_ERROR;
+	}
+	return soundobj_flac_write_file(pFile, info, sizeof(info));
+}
+
+typedef struct soundobj_recorder
+{
+	ma_pcm_rb buffer;	/* Always f32 at the engine's channel count. */
+	ma_encoder encoder;	/* WAV */
+	soundobj_flac_encoder* pFlac;	/* Instead of the encoder for FLAC. */
+	FILE* pFile;
+	char* pFileBuffer;
+	ma_format format;	/* Of pScratch. For FLAC, s32 stands in for 24-bit. */
+	ma_uint32 channels;
+	void* pScratch;	/* SOUNDOBJ_RECORDER_SCRATCH_FRAMES frames in the file's format, when it isn't f32. */
+	MA_ATOMIC(8, ma_uint64) droppedFrames;
+	MA_ATOMIC(8, ma_uint64) framesWritten;
+} soundobj_recorder;
+
+static ma_result soundobj_recorder_on_write(ma_encoder* pEncoder, const void* pBufferIn, size_t bytesToWrite, size_t* pBytesWritten)
+{
+	soundobj_recorder* pRecorder = (soundobj_recorder*)pEncoder->pUserData;
+	*pBytesWritten = fwrite(pBufferIn, 1, bytesToWrite, pRecorder->pFile);
+	return *pBytesWritten == bytesToWrite ? MA_SUCCESS : MA_IO_ERROR;
+}
+
+static ma_result soundobj_recorder_on_seek(ma_encoder* pEncoder, ma_int64 offset, ma_seek_origin origin)
+{
+	soundobj_recorder* pRecorder = (soundobj_recorder*)pEncoder->pUserData;
+	int whence = origin == ma_seek_origin_start ? SEEK_SET : (origin == ma_seek_origin_end ? SEEK_END : SEEK_CUR);
+	return fseek(pRecorder->pFile, (long)offset, whence) == 0 ? MA_SUCCESS : MA_IO_ERROR;
+}
+
+/*
+Opens pFilePath for writing and creates a recorder for it, writing FLAC if flac is set and WAV otherwise. FLAC holds integers, so f32 and
+s32 are written to it as 24-bit. bufferFrames is how much audio the ring buffer holds between flushes, and is all the memory the recording
+uses beyond the file buffer and, for FLAC, the encoder's block.
+*/
+ma_result soundobj_recorder_create(const char* pFilePath, ma_format format, ma_uint32 channels, ma_uint32 sampleRate, ma_uint32 bufferFrames, ma_bool32 flac, soundobj_recorder** ppRecorder)
+{
+	ma_result result;
+	ma_encoder_config config;
+	soundobj_recorder* pRecorder;
+	*ppRecorder = NULL;
+	if (flac && (channels > SOUNDOBJ_FLAC_MAX_CHANNELS || sampleRate >= (1 << 20))) {
+		return MA_INVALID_ARGS;
+	}
+	pRecorder = (soundobj_recorder*)ma_calloc(sizeof(*pRecorder), NULL);
+	if (pRecorder == NULL) {
+		return MA_OUT_OF_MEMORY;
+	}
+	if (flac && (format == ma_format_f32 || format == ma_format_s24)) {
+		format = ma_format_s32;
+	}
+	pRecorder->format = format;
+	pRecorder->channels = channels;
+	result = ma_pcm_rb_init(ma_format_f32, channels, bufferFrames, NULL, NULL, &pRecorder->buffer);
+	if (result != MA_SUCCESS) {
+		ma_free(pRecorder, NULL);
+		return result;
+	}
+	pRecorder->pFileBuffer = (char*)ma_malloc(SOUNDOBJ_RECORDER_FILE_BUFFER_SIZE, NULL);
+	if (format != ma_format_f32) {
+		pRecorder->pScratch = ma_malloc(SOUNDOBJ_RECORDER_SCRATCH_FRAMES * ma_get_bytes_per_frame(format, channels), NULL);
+	}
+	if (pRecorder->pFileBuffer == NULL || (format != ma_format_f32 && pRecorder->pScratch == NULL)) {
+		result = MA_OUT_OF_MEMORY;
+		goto fail;
+	}
+	result = ma_fopen(&pRecorder->pFile, pFilePath, "wb");
+	if (result != MA_SUCCESS) {
+		goto fail;
+	}
+	setvbuf(pRecorder->pFile, pRecorder->pFileBuffer, _IOFBF, SOUNDOBJ_RECORDER_FILE_BUFFER_SIZE);
+	if (flac) {
+		pRecorder->pFlac = (soundobj_flac_encoder*)ma_malloc(sizeof(*pRecorder->pFlac), NULL);
+		result = pRecorder->pFlac == NULL ? MA_OUT_OF_MEMORY : soundobj_flac_encoder_init(channels, format == ma_format_u8 ? 8 : format == ma_format_s16 ? 16 : 24, sampleRate, pRecorder->pFlac);
+		if (result == MA_SUCCESS) {
+			result = soundobj_flac_write_header(pRecorder->pFlac, pRecorder->pFile);
+			if (result != MA_SUCCESS) {
+				soundobj_flac_encoder_uninit(pRecorder->pFlac);
+			}
+		}
+	} else {
+		config = ma_encoder_config_init(ma_encoding_format_wav, format, channels, sampleRate);
+		result = ma_encoder_init(soundobj_recorder_on_write, soundobj_recorder_on_seek, pRecorder, &config, &pRecorder->encoder);
+	}
+	if (result != MA_SUCCESS) {
+		fclose(pRecorder->pFile);
+		goto fail;
+	}
+	*ppRecorder = pRecorder;
+	return MA_SUCCESS;
+fail:
+	ma_free(pRecorder->pFlac, NULL);
+	ma_pcm_rb_uninit(&pRecorder->buffer);
+	ma_free(pRecorder->pScratch, NULL);
+	ma_free(pRecorder->pFileBuffer, NULL);
+	ma_free(pRecorder, NULL);
+	return result;
+}
+
+/* Audio thread. Copies as much of the period as fits and counts the rest as dropped. */
+static void soundobj_recorder_push(soundobj_recorder* pRecorder, const float* pFrames, ma_uint32 frameCount)
+{
+	while (frameCount > 0) {
+		void* pBuffer;
+		ma_uint32 frames = frameCount;
+		if (ma_pcm_rb_acquire_write(&pRecorder->buffer, &frames, &pBuffer) != MA_SUCCESS || frames == 0) {
+			break;
+		}
+		MA_COPY_MEMORY(pBuffer, pFrames, frames * pRecorder->channels * sizeof(float));
+		ma_pcm_rb_commit_write(&pRecorder->buffer, frames);
+		pFrames += frames * pRecorder->channels;
+		frameCount -= frames;
+	}
+	if (frameCount > 0) {
+		ma_atomic_fetch_add_64(&pRecorder->droppedFrames, frameCount);
+	}
+}
+
+/* Writer thread. Encodes everything the audio thread has pushed so far. */
+ma_result soundobj_recorder_flush(soundobj_recorder* pRecorder)
+{
+	ma_result result = MA_SUCCESS;
+	while (result == MA_SUCCESS) {
+		void* pBuffer;
+		ma_uint32 frames = ma_pcm_rb_available_read(&pRecorder->buffer);
+		if (frames == 0) {
+			break;
+		}
+		if (pRecorder->pScratch != NULL) {
+			frames = ma_min(frames, SOUNDOBJ_RECORDER_SCRATCH_FRAMES);
+		}
+		if (ma_pcm_rb_acquire_read(&pRecorder->buffer, &frames, &pBuffer) != MA_SUCCESS || frames == 0) {
+			break;
+		}
+		if (pRecorder->pScratch != NULL) {
+			ma_pcm_convert(pRecorder->pScratch, pRecorder->format, pBuffer, ma_format_f32, (ma_uint64)frames * pRecorder->channels, ma_dither_mode_triangle);
+			pBuffer = pRecorder->pScratch;
+		}
+		if (pRecorder->pFlac != NULL) {
+			result = soundobj_flac_encoder_write(pRecorder->pFlac, pRecorder->pFile, pBuffer, pRecorder->format, frames);
+		} else {
+			result = ma_encoder_write_pcm_frames(&pRecorder->encoder, pBuffer, frames, NULL);
+		}
+		ma_pcm_rb_commit_read(&pRecorder->buffer, frames);
+		if (result == MA_SUCCESS) {
+			ma_atomic_fetch_add_64(&pRecorder->framesWritten, frames);
+		}
+	}
+	return result;
+}
+
+/* Flushes what is left, finalizes the file's header and closes it. The recorder must no longer be attached to an engine. */
+ma_result soundobj_recorder_destroy(soundobj_recorder* pRecorder)
+{
+	ma_result result;
+	if (pRecorder == NULL) {
+		return MA_INVALID_ARGS;
+	}
+	result = soundobj_recorder_flush(pRecorder);
+	if (pRecorder->pFlac != NULL) {
+		if (result == MA_SUCCESS) {
+			result = soundobj_flac_encoder_finish(pRecorder->pFlac, pRecorder->pFile);
+		}
+		soundobj_flac_encoder_uninit(pRecorder->pFlac);
+		ma_free(pRecorder->pFlac, NULL);
+	} else {
+		ma_encoder_uninit(&pRecorder->encoder);
+	}
+	if (fclose(pRecorder->pFile) != 0 && result == MA_SUCCESS) {
+		result = MA_IO_ERROR;
+	}
+	ma_pcm_rb_uninit(&pRecorder->buffer);
+	ma_free(pRecorder->pScratch, NULL);
+	ma_free(pRecorder->pFileBuffer, NULL);
+	ma_free(pRecorder, NULL);
+	return result;
+}
+
+ma_uint64 soundobj_recorder_get_frames_written(soundobj_recorder* pRecorder)
+{
+	return ma_atomic_load_64(&pRecorder->framesWritten);
+}
+
+ma_uint64 soundobj_recorder_get_dropped_frames(soundobj_recorder* pRecorder)
+{
+	return ma_atomic_load_64(&pRecorder->droppedFrames);
+}
@@ -0,0 +1,507 @@
+/*
+* SoundObj tunable streams
+*
+* A streaming data source like the resource manager's own, but with the page size, the number of pages decoded ahead (read-ahead depth)
+* and an I/O priority chosen per stream, plus counters for starvation. Long music tracks can then use a few large pages for big sequential
+* reads while hundreds of ambience loops get by on small ones.
+*
+* Pages form a ring shared by the audio thread, which consumes them in order, and a decoding job on the resource manager's job threads,
+* which refills them. Each page is handed over with its isValid flag. When the audio thread frees a page it raises the stream's
+* isFillRequested and posts a job to its scheduler. Each job then refills one page of whichever requesting stream has the highest priority,
+* so under load the important streams are decoded first and a slow disk starves the low priority ones.
+*
+* Seeks come from the audio thread. It bumps seekCounter and then leaves the pages alone until the job has repositioned the decoder,
+* reset the ring and published seekDone. Looping is handled in the job too, so a looping stream never has to seek at its end.
+*/
+
+typedef struct soundobj_stream soundobj_stream;
+typedef struct soundobj_stream_scheduler soundobj_stream_scheduler;
+
+typedef struct
+{
+	ma_uint32 starvations;
+	ma_uint64 starvedFrames;
+	ma_uint32 pagesDecoded;
+	ma_uint64 bufferedFrames;
+	ma_uint32 streamCount;
+} soundobj_stream_stats;
+
+typedef struct
+{
+	MA_ATOMIC(4, ma_uint32) isValid;
+	ma_uint32 frameCount;
+	ma_uint64 startFrame;	/* Decoder frame of the first frame in the page. */
+	ma_bool32 isLast;	/* The file ends after this page. */
+	ma_bool32 endsLoop;	/* The job looped back to the start after this page. */
+} soundobj_stream_page;
+
+struct soundobj_stream
+{
+	ma_data_source_base ds;
+	soundobj_stream_scheduler* pScheduler;
+	ma_decoder decoder;	/* Job threads only after creation. */
+	ma_format format;
+	ma_uint32 channels;
+	ma_uint32 sampleRate;
+	ma_uint64 lengthInFrames;
+	ma_uint32 pageFrames;
+	ma_uint32 pageCount;
+	void* pPageData;
+	soundobj_stream_page* pPages;
+	ma_uint32 readPage;	/* Audio thread, or the job while seeking. */
+	ma_uint32 readOffset;	/* Audio thread, or the job while seeking. */
+	ma_bool32 isAtEnd;	/* Audio thread, or the job while seeking. */
+	ma_uint32 writePage;	/* Job only. */
+	ma_bool32 isDecoderAtEnd;	/* Job only. */
+	MA_ATOMIC(8, ma_uint64) cursor;
+	MA_ATOMIC(4, ma_uint32) priority;	/* An ma_int32. */
+	MA_ATOMIC(4, ma_uint32) seekCounter;
+	MA_ATOMIC(4, ma_uint32) seekDone;
+	MA_ATOMIC(8, ma_uint64) seekTarget;
+	MA_ATOMIC(4, ma_uint32) isFillRequested;
+	MA_ATOMIC(4, ma_uint32) isServicing;
+	MA_ATOMIC(4, ma_uint32) starvations;
+	MA_ATOMIC(8, ma_uint64) starvedFrames;
+	MA_ATOMIC(4, ma_uint32) pagesDecoded;
+};
+
+struct soundobj_stream_scheduler
+{
+	ma_resource_manager* pResourceManager;
+	ma_mutex lock;	/* Guards the stream list. Never taken by the audio thread. */
+	soundobj_stream** ppStreams;
+	ma_uint32 streamCount;
+	ma_uint32 streamCapacity;
+	MA_ATOMIC(4, ma_uint32) jobsInFlight;
+	ma_uint32 starvations;	/* Totals of streams already destroyed, guarded by lock. */
+	ma_uint64 starvedFrames;
+	ma_uint32 pagesDecoded;
+};
+
+static ma_result soundobj_stream_scheduler_job(ma_job* pJob);
+
+/* Safe to call from the audio thread: posting a job is lock-free. */
+static void soundobj_stream_scheduler_post(soundobj_stream_scheduler* pScheduler)
+{
+	ma_job job;
+	ma_atomic_fetch_add_32(&pScheduler->jobsInFlight, 1);
+	job = ma_job_init(MA_JOB_TYPE_CUSTOM);
+	job.data.custom.proc = soundobj_stream_scheduler_job;
+	job.data.custom.data0 = (ma_uintptr)pScheduler;
+	if (ma_resource_manager_post_job(pScheduler->pResourceManager, &job) != MA_SUCCESS) {
+		ma_atomic_fetch_sub_32(&pScheduler->jobsInFlight, 1);
+	}
+}
+
+static void soundobj_stream_request_fill(soundobj_stream* pStream)
+{
+	if (ma_atomic_exchange_32(&pStream->isFillRequested, 1) == 0) {
+		soundobj_stream_scheduler_post(pStream->pScheduler);
+	}
+}
+
+/* Decodes into the next free page. Returns false if there was nothing to do. */
+static ma_bool32 soundobj_stream_fill_page(soundobj_stream* pStream)
+{
+	soundobj_stream_page* pPage = &pStream->pPages[pStream->writePage];
+	ma_uint32 bpf = ma_get_bytes_per_frame(pStream->format, pStream->channels);
+	ma_uint8* pData = (ma_uint8*)pStream->pPageData + (size_t)pStream->writePage * pStream->pageFrames * bpf;
+	ma_uint64 frameCount = 0;
+	ma_bool32 wrapped = MA_FALSE;
+	double traceStart;
+	if (pStream->isDecoderAtEnd || ma_atomic_load_32(&pPage->isValid)) {
+		return MA_FALSE;
+	}
+	traceStart = soundobj_trace_begin();
+	pPage->isLast = MA_FALSE;
+	pPage->endsLoop = MA_FALSE;
+	ma_decoder_get_cursor_in_pcm_frames(&pStream->decoder, &pPage->startFrame);
+	while (frameCount < pStream->pageFrames) {
+		ma_uint64 framesRead = 0;
+		ma_result result = ma_decoder_read_pcm_frames(&pStream->decoder, pData + frameCount * bpf, pStream->pageFrames - frameCount, &framesRead);
+		frameCount += framesRead;
+		if (result == MA_SUCCESS && framesRead > 0) {
+			continue;
+		}
+		if (!ma_data_source_is_looping(pStream) || wrapped || ma_decoder_seek_to_pcm_frame(&pStream->decoder, 0) != MA_SUCCESS) {
+			/* Not looping, or looping over a file with nothing in it. */
+			pStream->isDecoderAtEnd = MA_TRUE;
+			pPage->isLast = MA_TRUE;
+			break;
+		}
+		if (frameCount > 0) {
+			/* End the page at the loop point so every page covers one contiguous range of the file. */
+			pPage->endsLoop = MA_TRUE;
+			break;
+		}
+		wrapped = MA_TRUE;
+		pPage->startFrame = 0;
+	}
+	pPage->frameCount = (ma_uint32)frameCount;
+	soundobj_trace_end(SOUNDOBJ_TRACE_STREAM_PAGE, traceStart, frameCount);
+	ma_atomic_store_32(&pPage->isValid, 1);
+	ma_atomic_fetch_add_32(&pStream->pagesDecoded, 1);
+	pStream->writePage = (pStream->writePage + 1) % pStream->pageCount;
+	return MA_TRUE;
+}
+
+/* Job thread. Carries out a pending seek, then refills one page. Returns whether more pages are waiting to be filled. */
+static ma_bool32 soundobj_stream_service(soundobj_stream* pStream)
+{
+	ma_uint32 seekCounter = ma_atomic_load_32(&pStream->seekCounter);
+	ma_uint32 i;
+	if (seekCounter != ma_atomic_load_32(&pStream->seekDone)) {
+		ma_uint64 target = ma_atomic_load_64(&pStream->seekTarget);
+		for (i = 0; i < pStream->pageCount; i += 1) {
+			ma_atomic_store_32(&pStream->pPages[i].isValid, 0);
+		}
+		pStream->readPage = 0;
+		pStream->readOffset = 0;
+		pStream->writePage = 0;
+		pStream->isAtEnd = MA_FALSE;
+		pStream->isDecoderAtEnd = ma_decoder_seek_to_pcm_frame(&pStream->decoder, target) != MA_SUCCESS;
+		if (pStream->isDecoderAtEnd) {
+			/* Seeking past the end leaves a single empty last page. */
+			pStream->pPages[0].frameCount = 0;
+			pStream->pPages[0].startFrame = target;
+			pStream->pPages[0].isLast = MA_TRUE;
+			pStream->pPages[0].endsLoop = MA_FALSE;
+			ma_atomic_store_32(&pStream->pPages[0].isValid, 1);
+		} else {
+			soundobj_stream_fill_page(pStream);
+		}
+		ma_atomic_store_64(&pStream->cursor, target);
+		ma_atomic_store_32(&pStream->seekDone, seekCounter);
+	} else {
+		soundobj_stream_fill_page(pStream);
+	}
+	return !pStream->isDecoderAtEnd && !ma_atomic_load_32(&pStream->pPages[pStream->writePage].isValid);
+}
+
+static ma_result soundobj_stream_scheduler_job(ma_job* pJob)
+{
+	soundobj_stream_scheduler* pScheduler = (soundobj_stream_scheduler*)pJob->data.custom.data0;
+	soundobj_stream* pBest = NULL;
+	ma_uint32 i;
+	ma_mutex_lock(&pScheduler->lock);
+	for (i = 0; i < pScheduler->streamCount; i += 1) {
+		soundobj_stream* pStream = pScheduler->ppStreams[i];
+		if (ma_atomic_load_32(&pStream->isFillRequested) && !ma_atomic_load_32(&pStream->isServicing)) {
+			if (pBest == NULL || (ma_int32)ma_atomic_load_32(&pStream->priority) > (ma_int32)ma_atomic_load_32(&pBest->priority)) {
+				pBest = pStream;
+			}
+		}
+	}
+	if (pBest != NULL) {
+		ma_atomic_store_32(&pBest->isServicing, 1);
+		ma_atomic_store_32(&pBest->isFillRequested, 0);
+	}
+	ma_mutex_unlock(&pScheduler->lock);
+	if (pBest != NULL) {
+		if (soundobj_stream_service(pBest)) {
+			ma_atomic_store_32(&pBest->isFillRequested, 1);
+		}
+		ma_atomic_store_32(&pBest->isServicing, 0);
+		/* Also covers a request that arrived while this job was servicing the stream, which other jobs had to skip. */
+		if (ma_atomic_load_32(&pBest->isFillRequested)) {
+			soundobj_stream_scheduler_post(pScheduler);
+		}
+	}
+	ma_atomic_fetch_sub_32(&pScheduler->jobsInFlight, 1);
+	return MA_SUCCESS;
+}
+
+static ma_result soundobj_stream_on_read(ma_data_source* pDataSource, void* pFramesOut, ma_uint64 frameCount, ma_uint64* pFramesRead)
+{
+	soundobj_stream* pStream = (soundobj_stream*)pDataSource;
+	ma_uint32 bpf = ma_get_bytes_per_frame(pStream->format, pStream->channels);
+	ma_uint64 totalFramesRead = 0;
+	*pFramesRead = 0;
+	if (ma_atomic_load_32(&pStream->seekCounter) != ma_atomic_load_32(&pStream->seekDone)) {
+		return MA_BUSY;
+	}
+	if (pStream->isAtEnd) {
+		return MA_AT_END;
+	}
+	while (totalFramesRead < frameCount) {
+		soundobj_stream_page* pPage = &pStream->pPages[pStream->readPage];
+		ma_uint64 framesToCopy;
+		ma_bool32 isEnd;
+		if (!ma_atomic_load_32(&pPage->isValid)) {
+			/* The decoder hasn't kept up. */
+			ma_atomic_fetch_add_32(&pStream->starvations, 1);
+			ma_atomic_fetch_add_64(&pStream->starvedFrames, frameCount - totalFramesRead);
+			soundobj_trace_instant(SOUNDOBJ_TRACE_STREAM_STARVATION, frameCount - totalFramesRead);
+			*pFramesRead = totalFramesRead;
+			return MA_BUSY;
+		}
+		framesToCopy = ma_min(pPage->frameCount - pStream->readOffset, frameCount - totalFramesRead);
+		MA_COPY_MEMORY((ma_uint8*)pFramesOut + totalFramesRead * bpf, (ma_uint8*)pStream->pPageData + ((size_t)pStream->readPage * pStream->pageFrames + pStream->readOffset) * bpf, (size_t)framesToCopy * bpf);
+		totalFramesRead += framesToCopy;
+		pStream->readOffset += (ma_uint32)framesToCopy;
+		ma_atomic_store_64(&pStream->cursor, pPage->startFrame + pStream->readOffset);
+		if (pStream->readOffset < pPage->frameCount) {
+			continue;
+		}
+		/* A loop the job already decoded past ends here if looping was switched off since. */
+		isEnd = pPage->isLast || (pPage->endsLoop && !ma_data_source_is_looping(pStream));
+		ma_atomic_store_32(&pPage->isValid, 0);
+		pStream->readPage = (pStream->readPage + 1) % pStream->pageCount;
+		pStream->readOffset = 0;
+		if (isEnd) {
+			pStream->isAtEnd = MA_TRUE;
+			*pFramesRead = totalFramesRead;
+			return MA_AT_END;
+		}
+		soundobj_stream_request_fill(pStream);
+	}
+	*pFramesRead = totalFramesRead;
+	return MA_SUCCESS;
+}
+
+static ma_result soundobj_stream_on_seek(ma_data_source* pDataSource, ma_uint64 frameIndex)
+{
+	soundobj_stream* pStream = (soundobj_stream*)pDataSource;
+	ma_atomic_store_64(&pStream->seekTarget, frameIndex);
+	ma_atomic_fetch_add_32(&pStream->seekCounter, 1);
+	ma_atomic_store_64(&pStream->cursor, frameIndex);
+	soundobj_stream_request_fill(pStream);
+	return MA_SUCCESS;
+}
+
+static ma_result soundobj_stream_on_get_data_format(ma_data_source* pDataSource, ma_format* pFormat, ma_uint32* pChannels, ma_uint32* pSampleRate, ma_channel* pChannelMap, size_t channelMapCap)
+{
+	soundobj_stream* pStream = (soundobj_stream*)pDataSource;
+	if (pFormat != NULL) {
+		*pFormat = pStream->format;
+	}
+	if (pChannels != NULL) {
+		*pChannels = pStream->channels;
+	}
+	if (pSampleRate != NULL) {
+		*pSampleRate = pStream->sampleRate;
+	}
+	if (pChannelMap != NULL) {
+		ma_channel_map_init_standard(ma_standard_channel_map_default, pChannelMap, channelMapCap, pStream->channels);
+	}
+	return MA_SUCCESS;
+}
+
+static ma_result soundobj_stream_on_get_cursor(ma_data_source* pDataSource, ma_uint64* pCursor)
+{
+	*pCursor = ma_atomic_load_64(&((soundobj_stream*)pDataSource)->cursor);
+	return MA_SUCCESS;
+}
+
+static ma_result soundobj_stream_on_get_length(ma_data_source* pDataSource, ma_uint64* pLength)
+{
+	*pLength = ((soundobj_stream*)pDataSource)->lengthInFrames;
+	return *pLength > 0 ? MA_SUCCESS : MA_NOT_IMPLEMENTED;
+}
+
+static ma_data_source_vtable g_soundobj_stream_vtable =
+{
+	soundobj_stream_on_read,
+	soundobj_stream_on_seek,
+	soundobj_stream_on_get_data_format,
+	soundobj_stream_on_get_cursor,
+	soundobj_stream_on_get_length,
+	NULL,	/* onSetLooping. Read by the job whenever it reaches the end. */
+	MA_DATA_SOURCE_SELF_MANAGED_RANGE_AND_LOOP_POINT
+};
+
+soundobj_stream_scheduler* soundobj_stream_scheduler_create(ma_resource_manager* pResourceManager)
+{
+	soundobj_stream_scheduler* pScheduler;
+	if (pResourceManager == NULL) {
+		return NULL;
+	}
+	pScheduler = (soundobj_stream_scheduler*)ma_calloc(sizeof(*pScheduler), NULL);
+	if (pScheduler == NULL) {
+		return NULL;
+	}
+	if (ma_mutex_init(&pScheduler->lock) != MA_SUCCESS) {
+		ma_free(pScheduler, NULL);
+		return NULL;
+	}
+	pScheduler->pResourceManager = pResourceManager;
+	return pScheduler;
+}
+
+/* Every stream must be destroyed first. The resource manager's job threads must still be running. */
+void soundobj_stream_scheduler_destroy(soundobj_stream_scheduler* pScheduler)
+{
+	if (pScheduler == NULL) {
+		return;
+	}
+	while (ma_atomic_load_32(&pScheduler->jobsInFlight) > 0) {
+		ma_sleep(1);
+	}
+	ma_free(pScheduler->ppStreams, NULL);
+	ma_mutex_uninit(&pScheduler->lock);
+	ma_free(pScheduler, NULL);
+}
+
+/*
+Opens a file for streaming through pVFS, in the format the scheduler's resource manager decodes to, with pageCount pages of pageFrames
+frames each. The first page is decoded before returning so the stream can start straight away; the rest are decoded in the background.
+pVFS must outlive the stream.
+*/
+ma_result soundobj_stream_create_vfs(soundobj_stream_scheduler* pScheduler, ma_vfs* pVFS, const char* pFilePath, ma_uint32 pageFrames, ma_uint32 pageCount, ma_int32 priority, soundobj_stream** ppStream)
+{
+	ma_result result;
+	ma_data_source_config dsConfig;
+	ma_decoder_config decoderConfig;
+	ma_resource_manager_config* pConfig = &pScheduler->pResourceManager->config;
+	soundobj_stream* pStream;
+	*ppStream = NULL;
+	if (pageFrames == 0 || pageCount < 2) {
+		return MA_INVALID_ARGS;
+	}
+	pStream = (soundobj_stream*)ma_calloc(sizeof(*pStream), NULL);
+	if (pStream == NULL) {
+		return MA_OUT_OF_MEMORY;
+	}
+	dsConfig = ma_data_source_config_init();
+	dsConfig.vtable = &g_soundobj_stream_vtable;
+	result = ma_data_source_init(&dsConfig, &pStream->ds);
+	if (result != MA_SUCCESS) {
+		ma_free(pStream, NULL);
+		return result;
+	}
+	decoderConfig = soundobj_decoder_config_init(pConfig->decodedFormat, pConfig->decodedChannels, pConfig->decodedSampleRate);
+	result = ma_decoder_init_vfs(pVFS, pFilePath, &decoderConfig, &pStream->decoder);
+	if (result != MA_SUCCESS) {
+		ma_data_source_uninit(&pStream->ds);
+		ma_free(pStream, NULL);
+		return result;
+	}
+	ma_decoder_get_data_format(&pStream->decoder, &pStream->format, &pStream->channels, &pStream->sampleRate, NULL, 0);
+	if (ma_decoder_get_length_in_pcm_frames(&pStream->decoder, &pStream->lengthInFrames) != MA_SUCCESS) {
+		pStream->lengthInFrames = 0;
+	}
+	pStream->pScheduler = pScheduler;
+	pStream->pageFrames = pageFrames;
+	pStream->pageCount = pageCount;
+	pStream->priority = (ma_uint32)priority;
+	pStream->pPages = (soundobj_stream_page*)ma_calloc(sizeof(*pStream->pPages) * pageCount, NULL);
+	pStream->pPageData = ma_malloc((size_t)pageFrames * pageCount * ma_get_bytes_per_frame(pStream->format, pStream->channels), NULL);
+	if (pStream->pPages == NULL || pStream->pPageData == NULL) {
+		result = MA_OUT_OF_MEMORY;
+		goto fail;
+	}
+	soundobj_stream_fill_page(pStream);
+	ma_mutex_lock(&pScheduler->lock);
+	if (pScheduler->streamCount == pScheduler->streamCapacity) {
+		ma_uint32 capacity = ma_max(pScheduler->streamCapacity * 2, 16);
+		soundobj_stream** ppNew = (soundobj_stream**)ma_realloc(pScheduler->ppStreams, sizeof(*ppNew) * capacity, NULL);
+		if (ppNew == NULL) {
+			ma_mutex_unlock(&pScheduler->lock);
+			result = MA_OUT_OF_MEMORY;
+			goto fail;
+		}
+		pScheduler->ppStreams = ppNew;
+		pScheduler->streamCapacity = capacity;
+	}
+	pScheduler->ppStreams[pScheduler->streamCount++] = pStream;
+	ma_mutex_unlock(&pScheduler->lock);
+	soundobj_stream_request_fill(pStream);
+	*ppStream = pStream;
+	return MA_SUCCESS;
+fail:
+	ma_free(pStream->pPages, NULL);
+	ma_free(pStream->pPageData, NULL);
+	ma_decoder_uninit(&pStream->decoder);
+	ma_data_source_uninit(&pStream->ds);
+	ma_free(pStream, NULL);
+	return result;
+}
+
+/* Opens a file for streaming through the scheduler's resource manager's VFS. */
+ma_result soundobj_stream_create(soundobj_stream_scheduler* pScheduler, const char* pFilePath, ma_uint32 pageFrames, ma_uint32 pageCount, ma_int32 priority, soundobj_stream** ppStream)
+{
+	return soundobj_stream_create_vfs(pScheduler, pScheduler->pResourceManager->config.pVFS, pFilePath, pageFrames, pageCount, priority, ppStream);
+}
+
+/* The sound reading from the stream must be uninitialized first. */
+void soundobj_stream_destroy(soundobj_stream* pStream)
+{
+	soundobj_stream_scheduler* pScheduler;
+	ma_uint32 i;
+	if (pStream == NULL) {
+		return;
+	}
+	pScheduler = pStream->pScheduler;
+	ma_mutex_lock(&pScheduler->lock);
+	for (i = 0; i < pScheduler->streamCount; i += 1) {
+		if (pScheduler->ppStreams[i] == pStream) {
+			pScheduler->ppStreams[i] = pScheduler->ppStreams[--pScheduler->streamCount];
+			break;
+		}
+	}
+	pScheduler->starvations += ma_atomic_load_32(&pStream->starvations);
+	pScheduler->starvedFrames += ma_atomic_load_64(&pStream->starvedFrames);
+	pScheduler->pagesDecoded += ma_atomic_load_32(&pStream->pagesDecoded);
+	ma_mutex_unlock(&pScheduler->lock);
+	/* No job can pick the stream up any more, but one may still be decoding into it. */
+	while (ma_atomic_load_32(&pStream->isServicing)) {
+		ma_sleep(1);
+	}
+	ma_free(pStream->pPages, NULL);
+	ma_free(pStream->pPageData, NULL);
+	ma_decoder_uninit(&pStream->decoder);
+	ma_data_source_uninit(&pStream->ds);
+	ma_free(pStream, NULL);
+}
+
+void soundobj_stream_set_priority(soundobj_stream* pStream, ma_int32 priority)
+{
+	ma_atomic_store_32(&pStream->priority, (ma_uint32)priority);
+}
+
+ma_int32 soundobj_stream_get_priority(soundobj_stream* pStream)
+{
+	return (ma_int32)ma_atomic_load_32(&pStream->priority);
+}
+
+static ma_uint64 soundobj_stream_get_buffered_frames(soundobj_stream* pStream)
+{
+	ma_uint64 frames = 0;
+	ma_uint32 i;
+	for (i = 0; i < pStream->pageCount; i += 1) {
+		if (ma_atomic_load_32(&pStream->pPages[i].isValid)) {
+			frames += pStream->pPages[i].frameCount;
+		}
+	}
+	return frames;
+}
+
+/* Counters since the stream was created. bufferedFrames is a snapshot of what is decoded and waiting, to within a page. */
+void soundobj_stream_get_stats(soundobj_stream* pStream, soundobj_stream_stats* pStats)
+{
+	pStats->starvations = ma_atomic_load_32(&pStream->starvations);
+	pStats->starvedFrames = ma_atomic_load_64(&pStream->starvedFrames);
+	pStats->pagesDecoded = ma_atomic_load_32(&pStream->pagesDecoded);
+	pStats->bufferedFrames = soundobj_stream_get_buffered_frames(pStream);
+	pStats->streamCount = 1;
+}
+
+/* Totals over every stream the scheduler has run, including destroyed ones. bufferedFrames and streamCount cover open streams only. */
+void soundobj_stream_scheduler_get_stats(soundobj_stream_scheduler* pScheduler, soundobj_stream_stats* pStats)
+{
+	ma_uint32 i;
+	ma_mutex_lock(&pScheduler->lock);
+	pStats->starvations = pScheduler->starvations;
+	pStats->starvedFrames = pScheduler->starvedFrames;
+	pStats->pagesDecoded = pScheduler->pagesDecoded;
+	pStats->bufferedFrames = 0;
+	pStats->streamCount = pScheduler->streamCount;
+	for (i = 0; i < pScheduler->streamCount; i += 1) {
+		soundobj_stream* pStream = pScheduler->ppStreams[i];
+		pStats->starvations += ma_atomic_load_32(&pStream->starvations);
+		pStats->starvedFrames += ma_atomic_load_64(&pStream->starvedFrames);
+		pStats->pagesDecoded += ma_atomic_load_32(&pStream->pagesDecoded);
+		pStats->bufferedFrames += soundobj_stream_get_buffered_frames(pStream);
+	}
+	ma_mutex_unlock(&pScheduler->lock);
+}
@@ -0,0 +1,270 @@
+/*
+* SoundObj event tracing
+*
+* A process-wide flight recorder for finding where a hitch came from. While a tracer is installed, audio callbacks, the mix, deadline
+* misses, resource manager jobs, stream page decodes and stream starvation are written to its ring buffer, along with whatever the caller
+* traces itself (the Python API calls), each stamped with the time and the thread it happened on. The ring is preallocated and keeps the
+* most recent events, overwriting the oldest. Writers from any thread claim a slot with a single atomic increment and never wait, so the
+* audio thread can trace too.
+*
+* With no tracer installed every trace point is one atomic pointer load. Installing and removing a tracer counts the writers in flight, so
+* a tracer can be destroyed as soon as it has been removed.
+*
+* The resource manager's job threads are internal to miniaudio, so engines are given soundobj_job_threads instead: the same loop as
+* miniaudio's, with each job traced.
+*/
+
+typedef enum
+{
+	SOUNDOBJ_TRACE_AUDIO_CALLBACK,
+	SOUNDOBJ_TRACE_MIX,
+	SOUNDOBJ_TRACE_DEADLINE_MISS,
+	SOUNDOBJ_TRACE_JOB,
+	SOUNDOBJ_TRACE_STREAM_PAGE,
+	SOUNDOBJ_TRACE_STREAM_STARVATION,
+	SOUNDOBJ_TRACE_NAME_COUNT	/* Names from here on are the caller's own. */
+} soundobj_trace_name;
+
+typedef struct
+{
+	double timestamp;	/* Seconds on the trace clock. */
+	double duration;	/* Seconds, or negative for an instant event. */
+	ma_uint64 threadId;	/* The same value as Python's threading.get_ident() on that thread. */
+	ma_uint64 arg;	/* Frames for audio and stream events, the job type for jobs. */
+	ma_uint32 name;
+} soundobj_trace_event;
+
+typedef struct
+{
+	MA_ATOMIC(8, ma_uint64) sequence;	/* Index of the event in the slot plus one, or 0 while it is being written. */
+	soundobj_trace_event event;
+} soundobj_trace_slot;
+
+typedef struct soundobj_tracer
+{
+	soundobj_trace_slot* pSlots;
+	ma_uint32 capacity;	/* A power of two. */
+	MA_ATOMIC(8, ma_uint64) writeIndex;
+} soundobj_tracer;
+
+static MA_ATOMIC(MA_SIZEOF_PTR, soundobj_tracer*) g_soundobj_tracer = NULL;
+static MA_ATOMIC(4, ma_uint32) g_soundobj_trace_writers = 0;
+static ma_timer g_soundobj_trace_clock;
+static ma_bool32 g_soundobj_trace_clock_started = MA_FALSE;
+
+static ma_uint64 soundobj_trace_thread_id(void)
+{
+#if defined(MA_WIN32)
+	return (ma_uint64)GetCurrentThreadId();
+#else
+	return (ma_uint64)(ma_uintptr)pthread_self();
+#endif
+}
+
+/* Seconds on the trace clock, which starts when the first tracer is created and is shared by every tracer after it. */
+double soundobj_trace_now(void)
+{
+	return ma_timer_get_time_in_seconds(&g_soundobj_trace_clock);
+}
+
+soundobj_tracer* soundobj_tracer_create(ma_uint32 capacity)
+{
+	soundobj_tracer* pTracer;
+	ma_uint32 rounded = 1;
+	if (capacity == 0 || capacity > 0x80000000) {
+		return NULL;
+	}
+	while (rounded < capacity) {
+		rounded <<= 1;
+	}
+	pTracer = (soundobj_tracer*)ma_calloc(sizeof(*pTracer), NULL);
+	if (pTracer == NULL) {
+		return NULL;
+	}
+	pTracer->pSlots = (soundobj_trace_slot*)ma_calloc(sizeof(*pTracer->pSlots) * rounded, NULL);
+	if (pTracer->pSlots == NULL) {
+		ma_free(pTracer, NULL);
+		return NULL;
+	}
+	pTracer->capacity = rounded;
+	if (!g_soundobj_trace_clock_started) {
+		ma_timer_init(&g_soundobj_trace_clock);
+		g_soundobj_trace_clock_started = MA_TRUE;
+	}
+	return pTracer;
+}
+
+/* The tracer must not be installed. */
+void soundobj_tracer_destroy(soundobj_tracer* pTracer)
+{
+	if (pTracer == NULL) {
+		return;
+	}
+	ma_free(pTracer->pSlots, NULL);
+	ma_free(pTracer, NULL);
+}
+
+/* Makes pTracer, or nothing with NULL, the one every trace point writes to. On return the previous tracer is no longer being written to. */
+void soundobj_tracer_install(soundobj_tracer* pTracer)
+{
+	ma_atomic_exchange_ptr(&g_soundobj_tracer, pTracer);
+	while (ma_atomic_load_32(&g_soundobj_trace_writers) != 0) {
+		ma_yield();
+	}
+}
+
+static void soundobj_trace_write(ma_uint32 name, double timestamp, double duration, ma_uint64 arg)
+{
+	soundobj_tracer* pTracer;
+	if (ma_atomic_load_ptr(&g_soundobj_tracer) == NULL) {
+		return;
+	}
+	ma_atomic_fetch_add_32(&g_soundobj_trace_writers, 1);
+	/* Loaded again now that this writer is counted, in case the tracer was removed in between. */
+	pTracer = (soundobj_tracer*)ma_atomic_load_ptr(&g_soundobj_tracer);
+	if (pTracer != NULL) {
+		ma_uint64 index = ma_atomic_fetch_add_64(&pTracer->writeIndex, 1);
+		soundobj_trace_slot* pSlot = &pTracer->pSlots[index & (pTracer->capacity - 1)];
+		ma_atomic_store_64(&pSlot->sequence, 0);
+		pSlot->event.timestamp = timestamp;
+		pSlot->event.duration = duration;
+		pSlot->event.threadId = soundobj_trace_thread_id();
+		pSlot->event.arg = arg;
+		pSlot->event.name = name;
+		ma_atomic_store_64(&pSlot->sequence, index + 1);
+	}
+	ma_atomic_fetch_sub_32(&g_soundobj_trace_writers, 1);
+}
+
+/* Start of a span to pass to soundobj_trace_end(), or -1 when nothing is tracing. */
+double soundobj_trace_begin(void)
+{
+	if (ma_atomic_load_ptr(&g_soundobj_tracer) == NULL) {
+		return -1;
+	}
+	return soundobj_trace_now();
+}
+
+/* Records a span that started at start, from soundobj_trace_begin(), and ends now. */
+void soundobj_trace_end(ma_uint32 name, double start, ma_uint64 arg)
+{
+	if (start < 0) {
+		return;
+	}
+	soundobj_trace_write(name, start, soundobj_trace_now() - start, arg);
+}
+
+void soundobj_trace_instant(ma_uint32 name, ma_uint64 arg)
+{
+	if (ma_atomic_load_ptr(&g_soundobj_tracer) == NULL) {
+		return;
+	}
+	soundobj_trace_write(name, soundobj_trace_now(), -1, arg);
+}
+
+/*
+Copies up to maxEvents of the most recent events, oldest first, and returns how many were copied. Events overwritten before they could be
+read, or still being written, are counted in pDropped. Safe while the tracer is installed.
+*/
+ma_uint32 soundobj_tracer_read(soundobj_tracer* pTracer, soundobj_trace_event* pEvents, ma_uint32 maxEvents, ma_uint64* pDropped)
+{
+	ma_uint64 end = ma_atomic_load_64(&pTracer->writeIndex);
+	ma_uint64 begin = end > pTracer->capacity ? end - pTracer->capacity : 0;
+	ma_uint64 index;
+	ma_uint32 count = 0;
+	if (end - begin > maxEvents) {
+		begin = end - maxEvents;
+	}
+	*pDropped = begin;
+	for (index = begin; index < end; index += 1) {
+		soundobj_trace_slot* pSlot = &pTracer->pSlots[index & (pTracer->capacity - 1)];
+		if (ma_atomic_load_64(&pSlot->sequence) != index + 1) {
+			*pDropped += 1;
+			continue;
+		}
+		pEvents[count] = pSlot->event;
+		/* A writer that lapped the ring may have overwritten the slot mid-copy. */
+		if (ma_atomic_load_64(&pSlot->sequence) != index + 1) {
+			*pDropped += 1;
+			continue;
+		}
+		count += 1;
+	}
+	return count;
+}
+
+
+typedef struct soundobj_job_threads
+{
+	ma_resource_manager* pResourceManager;
+	ma_uint32 count;
+	ma_thread threads[64];	/* As many as the resource manager allows. */
+} soundobj_job_threads;
+
+/*
+A resource manager job that has to wait on another, such as a sound's load waiting on its file's, puts itself straight back on the queue
+unchanged, and can do so thousands of times a second. Custom jobs are always different work, but a resource manager job identical to the
+one the thread just ran is one of these re-posts, and isn't traced.
+*/
+static ma_bool32 soundobj_job_is_repost(const ma_job* pJob, const ma_job* pPrevious)
+{
+	return pJob->toc.breakup.code > MA_JOB_TYPE_CUSTOM && pJob->toc.breakup.code == pPrevious->toc.breakup.code && pJob->order == pPrevious->order && memcmp(&pJob->data, &pPrevious->data, sizeof(pJob->data)) == 0;
+}
+
+static ma_thread_result MA_THREADCALL soundobj_job_thread(void* pUserData)
+{
+	ma_resource_manager* pResourceManager = (ma_resource_manager*)pUserData;
+	ma_job previous;
+	MA_ZERO_OBJECT(&previous);
+	for (;;) {
+		ma_job job;
+		double start;
+		if (ma_resource_manager_next_job(pResourceManager, &job) != MA_SUCCESS || job.toc.breakup.code == MA_JOB_TYPE_QUIT) {
+			break;
+		}
+		start = soundobj_job_is_repost(&job, &previous) ? -1 : soundobj_trace_begin();
+		previous = job;
+		ma_job_process(&job);
+		soundobj_trace_end(SOUNDOBJ_TRACE_JOB, start, job.toc.breakup.code);
+	}
+	return (ma_thread_result)0;
+}
+
+/* Runs the jobs of a resource manager initialized with jobThreadCount 0 on count threads of our own. */
+soundobj_job_threads* soundobj_job_threads_start(ma_resource_manager* pResourceManager, ma_uint32 count)
+{
+	soundobj_job_threads* pThreads;
+	if (count == 0 || count > ma_countof(pThreads->threads)) {
+		return NULL;
+	}
+	pThreads = (soundobj_job_threads*)ma_calloc(sizeof(*pThreads), NULL);
+	if (pThreads == NULL) {
+		return NULL;
+	}
+	pThreads->pResourceManager = pResourceManager;
+	for (pThreads->count = 0; pThreads->count < count; pThreads->count += 1) {
+		if (ma_thread_create(&pThreads->threads[pThreads->count], ma_thread_priority_normal, 0, soundobj_job_thread, pResourceManager, NULL) != MA_SUCCESS) {
+			break;
+		}
+	}
+	if (pThreads->count == 0) {
+		ma_free(pThreads, NULL);
+		return NULL;
+	}
+	return pThreads;
+}
+
+/* Lets the jobs already queued finish, then joins the threads. Must happen before the resource manager is uninitialized. */
+void soundobj_job_threads_stop(soundobj_job_threads* pThreads)
+{
+	ma_uint32 i;
+	if (pThreads == NULL) {
+		return;
+	}
+	/* The quit job is never taken off the queue, so one is enough for every thread. */
+	ma_resource_manager_post_job_quit(pThreads->pResourceManager);
+	for (i = 0; i < pThreads->count; i += 1) {
+		ma_thread_wait(&pThreads->threads[i]);
+	}
+	ma_free(pThreads, NULL);
+}
@@ -1,6 +1,17 @@
+import atexit
+import contextlib
+import functools
+import hashlib
+import json
+import math
+import os
+import sqlite3
 import sys
 import threading
-from typing import Optional, Union
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Optional, Union
 from dataclasses import dataclass
 from enum import Enum
 from _c_miniaudio import ffi, lib
@@ -40,6 +51,52 @@ class PositioningMode(Enum):
 	RELATIVE = 'relative'
 
 
+class SampleFormat(Enum):
+	"""PCM sample formats for decoded audio."""
+	U8 = 'u8'
+	S16 = 's16'
+	S32 = 's32'
+	F32 = 'f32'
+
+
+class LodTier(Enum):
+	"""Processing tiers for spatial level of detail, from most to least expensive."""
+	FULL = 'full'
+	REDUCED = 'reduced'
+	MINIMAL = 'minimal'
+
+
+class ChannelMixMode(Enum):
+	"""Strategies for mixing between channel counts."""
+	RECTANGULAR = 'rectangular'
+	SIMPLE = 'simple'
+
+
+class AutomationParameter(Enum):
+	"""Sound parameters that can follow an automation curve."""
+	VOLUME = 'volume'
+	PITCH = 'pitch'
+	PAN = 'pan'
+	POSITION = 'position'
+
+
+class CurveShape(Enum):
+	"""Shapes of the segment between two automation breakpoints."""
+	LINEAR = 'linear'
+	EXPONENTIAL = 'exponential'
+	BEZIER = 'bezier'
+
+
+class Codec(Enum):
+	"""Audio codecs that probe() can identify."""
+	UNKNOWN = 'unknown'
+	WAV = 'wav'
+	FLAC = 'flac'
+	MP3 = 'mp3'
+	VORBIS = 'vorbis'
+	OPUS = 'opus'
+
+
 # Global mapping dictionaries
 ATTENUATION_MODEL_MAP = {
 	AttenuationModel.NONE: lib.ma_attenuation_model_none,
@@ -57,6 +114,151 @@ POSITIONING_MODE_MAP = {
 
 POSITIONING_MODE_REVERSE_MAP = {v:k for k, v in POSITIONING_MODE_MAP.items()}
 
+SAMPLE_FORMAT_MAP = {
+	SampleFormat.U8: lib.ma_format_u8,
+	SampleFormat.S16: lib.ma_format_s16,
+	SampleFormat.S32: lib.ma_format_s32,
+	SampleFormat.F32: lib.ma_format_f32
+}
+
+SAMPLE_FORMAT_REVERSE_MAP = {v:k for k, v in SAMPLE_FORMAT_MAP.items()}
+
+# memoryview.cast() type codes for each sample format
+SAMPLE_FORMAT_TYPECODES = {
+	SampleFormat.U8: 'B',
+	SampleFormat.S16: 'h',
+	SampleFormat.S32: 'i',
+	SampleFormat.F32: 'f'
+}
+
+SAMPLE_FORMAT_SIZES = {
+	SampleFormat.U8: 1,
+	SampleFormat.S16: 2,
+	SampleFormat.S32: 4,
+	SampleFormat.F32: 4
+}
+
+CHANNEL_MIX_MODE_MAP = {
+	ChannelMixMode.RECTANGULAR: lib.ma_channel_mix_mode_rectangular,
+	ChannelMixMode.SIMPLE: lib.ma_channel_mix_mode_simple
+}
+
+AUTOMATION_PARAMETER_MAP = {
+	AutomationParameter.VOLUME: lib.SOUNDOBJ_AUTOMATION_VOLUME,
+	AutomationParameter.PITCH: lib.SOUNDOBJ_AUTOMATION_PITCH,
+	AutomationParameter.PAN: lib.SOUNDOBJ_AUTOMATION_PAN,
+	AutomationParameter.POSITION: lib.SOUNDOBJ_AUTOMATION_POSITION
+}
+
+CURVE_SHAPE_MAP = {
+	CurveShape.LINEAR: lib.SOUNDOBJ_CURVE_LINEAR,
+	CurveShape.EXPONENTIAL: lib.SOUNDOBJ_CURVE_EXPONENTIAL,
+	CurveShape.BEZIER: lib.SOUNDOBJ_CURVE_BEZIER
+}
+
+CODEC_MAP = {
+	Codec.UNKNOWN: lib.SOUNDOBJ_CODEC_UNKNOWN,
+	Codec.WAV: lib.SOUNDOBJ_CODEC_WAV,
+	Codec.FLAC: lib.SOUNDOBJ_CODEC_FLAC,
+	Codec.MP3: lib.SOUNDOBJ_CODEC_MP3,
+	Codec.VORBIS: lib.SOUNDOBJ_CODEC_VORBIS,
+	Codec.OPUS: lib.SOUNDOBJ_CODEC_OPUS
+}
+
+CODEC_REVERSE_MAP = {v:k for k, v in CODEC_MAP.items()}
+
+# Bits per sample of each format a decoder can produce natively, including 24-bit, which SampleFormat doesn't cover
+FORMAT_BITS = {
+	lib.ma_format_u8: 8,
+	lib.ma_format_s16: 16,
+	lib.ma_format_s24: 24,
+	lib.ma_format_s32: 32,
+	lib.ma_format_f32: 32
+}
+
+# Position of each tier in soundobj_lod_tier
+LOD_TIERS = [LodTier.FULL, LodTier.REDUCED, LodTier.MINIMAL]
+
+# Default low-pass filter order used by miniaudio's linear resampler
+DEFAULT_RESAMPLE_QUALITY = 4
+
+# Adaptive period tuning: how often to re-evaluate, the bounds it searches within, the peak
+# load below which a smaller period is tried, and how many evaluations are kept in history
+ADAPTIVE_PERIOD_INTERVAL = 2.0
+MIN_PERIOD_SIZE_IN_FRAMES = 64
+MAX_PERIOD_SIZE_IN_FRAMES = 8192
+ADAPTIVE_PERIOD_HEADROOM = 0.5
+PERIOD_HISTORY_LENGTH = 64
+
+# Commands the buffer holds before a producer has to apply it itself
+COMMAND_BUFFER_CAPACITY = 4096
+
+# Streams: default page length and number of pages decoded ahead, matching the resource manager's own streams
+STREAM_PAGE_SIZE_IN_MILLISECONDS = 1000
+STREAM_PAGE_COUNT = 2
+
+# File objects: bytes read from Python at a time while decoding, so the decoder's small reads rarely cross into the interpreter
+READER_CHUNK_SIZE = 256 * 1024
+
+# Spatial LOD: default distances at which voices drop to the reduced and minimal tiers, and
+# seconds between re-evaluations on the audio thread
+LOD_REDUCED_DISTANCE = 20.0
+LOD_MINIMAL_DISTANCE = 50.0
+LOD_UPDATE_INTERVAL = 0.05
+
+# Meters: seconds of audio each reading covers, and the most spectrum bands one can compute
+METER_WINDOW = 0.05
+METER_MAX_BANDS = 256
+
+# Convolution: default frames per impulse response partition, which is also the wet signal's latency,
+# and the range of partition sizes allowed
+CONVOLUTION_PARTITION_SIZE = 512
+MIN_CONVOLUTION_PARTITION_SIZE = 32
+MAX_CONVOLUTION_PARTITION_SIZE = 16384
+
+# Occlusion: low-pass cutoff in Hz when no sound gets through, how far a sound or listener has to move
+# before it is re-tested, and seconds between automatic updates
+OCCLUSION_MIN_CUTOFF = 500.0
+OCCLUSION_MOVE_THRESHOLD = 0.05
+OCCLUSION_UPDATE_INTERVAL = 0.05
+
+# Ambisonics: highest order a bus can encode at, and the least any speaker gets of a sound as a
+# fraction of what the speaker facing it gets (the same floor the per-sound spatializer uses)
+AMBISONIC_MAX_ORDER = 3
+AMBISONIC_MIN_CHANNEL_GAIN = 0.2
+
+# Recording: seconds of output the ring buffer holds before frames are dropped, and how often the
+# writer thread drains it to disk
+RECORDING_BUFFER_SECONDS = 2.0
+RECORDING_FLUSH_INTERVAL = 0.1
+
+# Analysis: frames covered by each min/max pair at the finest level of the peak pyramid, and
+# how much of a file is read at a time while hashing it
+ANALYSIS_PEAK_BLOCK = 256
+ANALYSIS_HASH_CHUNK_SIZE = 1 << 20
+
+# Tracing: events a Tracer keeps by default before the oldest are overwritten
+TRACE_CAPACITY = 1 << 16
+
+# Output buffers are always fully written by C, so skip cffi's zero fill
+_new_uninitialized = ffi.new_allocator(should_clear_after_alloc=False)
+
+
+class _Scratch(threading.local):
+	"""Out-parameters for getters, allocated once per thread instead of on every call.
+	Not shared between threads because cffi releases the GIL during calls, so another thread could
+	overwrite a shared buffer between a call returning and its result being read.
+	"""
+	def __init__(self):
+		self.floats = ffi.new("float[3]")
+		self.float_ptrs = (self.floats, self.floats + 1, self.floats + 2)
+		self.format = ffi.new("ma_format*")
+		self.uint32s = ffi.new("ma_uint32[2]")
+		self.uint32_ptrs = (self.uint32s, self.uint32s + 1)
+
+
+_scratch = _Scratch()
+
 
 def is_uri(x):
 	"""Determines whether `x` is a URL.
@@ -85,6 +287,224 @@ class MiniAudioError(Exception):
 	pass
 
 
+class _FileObjectSource:
+	"""What a soundobj_reader reads from: a file object, where it is positioned, and the first error reading it.
+	Offsets from the reader count from base, the object's position when it was handed over.
+	"""
+	def __init__(self, fileobj: BinaryIO, base: int):
+		self.file = fileobj
+		self.base = base
+		self.position = base
+		self.readinto = getattr(fileobj, 'readinto', None)
+		self.error = None
+
+
+@ffi.def_extern()
+def soundobj_reader_fill(handle, offset, buffer, size):
+	"""Fill a soundobj_reader's buffer from its file object. Runs on whichever thread is decoding, never the audio thread."""
+	source = ffi.from_handle(handle)
+	try:
+		position = source.base + offset
+		if position != source.position:
+			source.file.seek(position)
+			source.position = position
+		if source.readinto is not None:
+			count = source.readinto(ffi.buffer(buffer, size)) or 0
+		else:
+			data = source.file.read(size)
+			count = len(data)
+			ffi.memmove(buffer, data, count)
+		source.position += count
+		return count
+	except Exception as e:
+		if source.error is None:
+			source.error = e
+		return -1
+
+
+# Trace names for soundobj_trace_name, then ma_job_type, in their C order
+_TRACE_EVENT_NAMES = ['audio callback', 'mix', 'deadline miss', 'job', 'stream page', 'stream starvation']
+_TRACE_JOB_NAMES = [
+	'quit', 'custom', 'load data buffer node', 'free data buffer node', 'page data buffer node', 'load data buffer', 'free data buffer',
+	'load data stream', 'free data stream', 'page data stream', 'seek data stream', 'aaudio reroute'
+]
+
+# The running Tracer, if any, and the names of traced calls, which follow the built in ones
+_tracer = None
+_tracer_lock = threading.Lock()
+_traced_names = []
+
+# Held while changing Python-side state that several threads could otherwise check and set at once:
+# claiming a Sound for loading, splicing nodes into or out of a sound's chain, and replacing an
+# engine's meter or recording. Reentrant, since closing one node can remove another.
+_state_lock = threading.RLock()
+
+# Every initialized engine, so the ones still alive at exit can be stopped before finalization
+_engines = weakref.WeakSet()
+
+
+def _traced(func):
+	"""Decorator recording each call of func as a span while a Tracer is running. Costs one global lookup otherwise."""
+	name = lib.SOUNDOBJ_TRACE_NAME_COUNT + len(_traced_names)
+	_traced_names.append(func.__qualname__)
+	@functools.wraps(func)
+	def wrapper(*args, **kwargs):
+		if _tracer is None:
+			return func(*args, **kwargs)
+		start = lib.soundobj_trace_begin()
+		try:
+			return func(*args, **kwargs)
+		finally:
+			lib.soundobj_trace_end(name, start, 0)
+	return wrapper
+
+
+class ResourceManager:
+	"""Loads, decodes and caches audio data on behalf of one or more engines.
+	Every Engine needs a resource manager. By default each one creates its own with matchEngine set, but a single
+	ResourceManager can be passed to several engines through EngineConfig (one per output
+	device, for example) so that decoded data, job threads and the custom decoders are shared
+	instead of duplicated. Each engine keeps a reference to its resource manager and counts itself
+	as attached to it, so the resource manager is only torn down once close() has been called, or
+	it has been garbage collected, and the last engine using it has been uninitialized. That holds
+	whatever order the garbage collector finalizes a cycle of engines and resource managers in.
+	Args:
+		decodedFormat: Sample format assets are decoded to (None = each file's native format).
+		decodedChannels: Channel count assets are decoded to (0 = each file's native channel count).
+		decodedSampleRate: Sample rate assets are decoded to (0 = each file's native sample rate).
+		jobThreadCount: Number of background job threads (0 = use default).
+		matchEngine: If True, a decodedFormat and decodedSampleRate left unset are filled in with the
+			mixing format (f32) and sample rate of the first engine to use this resource manager, so
+			that sounds are converted once when decoded instead of by every voice on the audio thread.
+			Initialization then waits for that engine. Always set on the one an engine creates for itself.
+	Raises:
+		MiniAudioError: If the resource manager cannot be initialized.
+	"""
+	def __init__(self, decodedFormat: Optional[Union[SampleFormat, str]] = None, decodedChannels: int = 0, decodedSampleRate: int = 0, jobThreadCount: int = 0, matchEngine: bool = False):
+		self._closed = False
+		self._engine_count = 0
+		self._resource_manager = ffi.new("ma_resource_manager*")
+		self._initialized = False
+		self._job_threads = None
+		self.matchEngine = matchEngine
+		# Held by the first engine while it initializes a matched resource manager.
+		self._init_lock = threading.Lock()
+		rm_config = lib.ma_resource_manager_config_init()
+		if isinstance(decodedFormat, str):
+			decodedFormat = SampleFormat(decodedFormat)
+		if decodedFormat is not None:
+			rm_config.decodedFormat = SAMPLE_FORMAT_MAP[decodedFormat]
+		if decodedChannels > 0:
+			rm_config.decodedChannels = decodedChannels
+		if decodedSampleRate > 0:
+			rm_config.decodedSampleRate = decodedSampleRate
+		if jobThreadCount <= 0:
+			jobThreadCount = rm_config.jobThreadCount
+		# Jobs run on threads of our own instead of miniaudio's, the same loop but traced while a Tracer is running.
+		rm_config.jobThreadCount = 0
+		rm_config.ppCustomDecodingBackendVTables = lib.soundobj_get_custom_decoders(ffi.addressof(rm_config, "customDecodingBackendCount"))
+		self._rm_config = rm_config
+		self._job_thread_count = jobThreadCount
+		if matchEngine:
+			return
+		result = lib.ma_resource_manager_init(ffi.addressof(rm_config), self._resource_manager)
+		if result != lib.MA_SUCCESS:
+			raise MiniAudioError(f"Failed to initialize resource manager: {result}")
+		self._start_job_threads()
+	def _start_job_threads(self) -> None:
+		"""Mark the resource manager initialized and start its job threads.
+		Raises:
+			MiniAudioError: If the threads cannot be started.
+		"""
+		self._initialized = True
+		self._job_threads = lib.soundobj_job_threads_start(self._resource_manager, self._job_thread_count)
+		if self._job_threads == ffi.NULL:
+			self._job_threads = None
+			raise MiniAudioError("Failed to start resource manager job threads")
+	def __del__(self):
+		"""Close the resource manager when the object is destroyed."""
+		# Module globals can be None during interpreter shutdown, underscored ones first; skip cleanup since the process is about to exit anyway.
+		if lib is not None and _state_lock is not None:
+			self.close()
+	def close(self):
+		"""Release the resource manager. It is uninitialized right away if no engine is using it, and
+		otherwise as soon as the last engine using it has been uninitialized. Engines can't be created
+		with it afterwards.
+		"""
+		with _state_lock:
+			if getattr(self, '_closed', True):
+				return
+			self._closed = True
+			release = self._engine_count == 0
+		if release:
+			self._uninit()
+	@property
+	def closed(self) -> bool:
+		"""Check whether the resource manager has been closed.
+		Returns:
+			True after close(), even while engines are still using it.
+		"""
+		return self._closed
+	def _attach(self) -> None:
+		"""Count an engine that has been initialized with the resource manager."""
+		with _state_lock:
+			self._engine_count += 1
+	def _detach(self) -> None:
+		"""Stop counting an engine once it has been uninitialized, finishing a pending close() if it was the last."""
+		with _state_lock:
+			self._engine_count -= 1
+			release = self._closed and self._engine_count == 0
+		if release:
+			self._uninit()
+	def _uninit(self) -> None:
+		"""Stop the job threads and uninitialize. Called outside _state_lock, since joining the job threads waits on their jobs."""
+		if not self._initialized:
+			return
+		self._initialized = False
+		self._stop_job_threads()
+		lib.ma_resource_manager_uninit(self._resource_manager)
+	def _stop_job_threads(self) -> None:
+		"""Let the jobs already queued finish, then join the job threads. Jobs posted afterwards are never run."""
+		if self._job_threads is not None:
+			lib.soundobj_job_threads_stop(self._job_threads)
+			self._job_threads = None
+
+
+@dataclass
+class StreamConfig:
+	"""Buffering for sounds streamed from disk.
+	A stream holds pageCount pages of audio and decodes each page on a resource manager job thread
+	as soon as playback has finished with it. Larger pages mean fewer, larger sequential reads;
+	more pages mean more audio decoded ahead to ride out slow disks. Memory per stream is
+	pageCount * pageSizeInMilliseconds of decoded audio.
+	Attributes:
+		pageSizeInMilliseconds: Length of audio decoded per page.
+		pageCount: Pages decoded ahead, at least 2.
+		priority: I/O priority. When several streams are waiting on the job threads, the highest
+			priority is decoded first, so under load lower priorities are the ones that starve.
+	"""
+	pageSizeInMilliseconds: int = STREAM_PAGE_SIZE_IN_MILLISECONDS
+	pageCount: int = STREAM_PAGE_COUNT
+	priority: int = 0
+
+
+@dataclass
+class StreamStats:
+	"""Streaming health of a sound, or totals over an engine's streams.
+	Attributes:
+		starvations: Audio periods in which a stream ran out of decoded audio. Each is an audible gap.
+		starved_frames: Frames of silence played in place of audio that wasn't decoded in time.
+		pages_decoded: Pages decoded so far.
+		buffered_frames: Frames decoded and waiting to be played right now.
+		stream_count: Number of open streams (1 for a single sound).
+	"""
+	starvations: int
+	starved_frames: int
+	pages_decoded: int
+	buffered_frames: int
+	stream_count: int
+
+
 @dataclass
 class EngineConfig:
 	"""Configuration options for the audio engine.
@@ -102,6 +522,21 @@ class EngineConfig:
 		preMixStackSizeInBytes: Pre-mix stack size in bytes (0 = use default).
 		noAutoStart: If True, don't automatically start the engine after initialization.
 		noDevice: If True, initialize without an audio device (for offline processing).
+		resourceManager: ResourceManager to share with other engines (None = the engine creates its own).
+		adaptivePeriod: If True, periodically measure deadline misses and reinitialize the device with
+			the smallest period size that runs without them. periodSizeInFrames/periodSizeInMilliseconds
+			are then only the starting point.
+		commandBuffer: If True, Sound property sets and play/stop calls from any thread are queued in a
+			lock-free buffer and applied in batches, in the order they were made, instead of immediately.
+		applyCommandsOnTick: If True, queued commands are only applied by Engine.apply_commands() (once
+			per game tick, say) rather than at the start of every audio period.
+		streamConfig: Buffering for every streamed Sound on this engine (None = the resource manager's
+			fixed page sizing). Individual sounds can override it when loaded.
+		lod: If True, spatialized sounds are moved to cheaper processing as they get further from their
+			listener and back as they approach. See Sound.lod_priority.
+		lodReducedDistance: Distance beyond which a voice drops Doppler.
+		lodMinimalDistance: Distance beyond which a voice bypasses the spatializer, keeping only
+			distance attenuation and panning, both updated a few times a second.
 	"""
 	listenerCount: int = 0
 	channels: int = 0
@@ -114,6 +549,80 @@ class EngineConfig:
 	preMixStackSizeInBytes: int = 0
 	noAutoStart: bool = False
 	noDevice: bool = False
+	resourceManager: Optional[ResourceManager] = None
+	adaptivePeriod: bool = False
+	commandBuffer: bool = False
+	applyCommandsOnTick: bool = False
+	streamConfig: Optional[StreamConfig] = None
+	lod: bool = False
+	lodReducedDistance: float = LOD_REDUCED_DISTANCE
+	lodMinimalDistance: float = LOD_MINIMAL_DISTANCE
+
+
+@dataclass
+class PeriodStats:
+	"""Audio callback timing measured over a window of device periods.
+	Attributes:
+		callbacks: Number of audio callbacks in the window.
+		deadline_misses: Callbacks that took longer to mix than the audio they produced, or
+			that started more than two periods after the previous one. Each is an audible glitch.
+		peak_load: Highest fraction of a period spent mixing (1.0 = the whole period).
+		period_size_in_frames: Period size of the most recent callback.
+	"""
+	callbacks: int
+	deadline_misses: int
+	peak_load: float
+	period_size_in_frames: int
+
+
+@dataclass
+class LodCounts:
+	"""Number of voices at each spatial LOD tier.
+	Attributes:
+		full: Voices with full 3D processing.
+		reduced: Voices with Doppler off.
+		minimal: Voices with the spatializer bypassed.
+	"""
+	full: int
+	reduced: int
+	minimal: int
+
+
+@dataclass
+class Breakpoint:
+	"""A point on an automation curve.
+	Attributes:
+		time: Seconds from the start of the curve.
+		value: Parameter value at this point; an (x, y, z) tuple for position.
+		shape: Shape of the segment from this point to the next. Exponential segments fall back to
+			linear when the two values don't share a sign.
+		control: For bezier segments, the two control values as fractions of the segment's rise.
+			(1/3, 2/3) is a straight line; (0.0, 1.0) eases in and out.
+	"""
+	time: float
+	value: float | tuple[float, float, float]
+	shape: CurveShape = CurveShape.LINEAR
+	control: tuple[float, float] = (1 / 3, 2 / 3)
+
+
+def _adaptive_period_loop(engine_ref, stop: threading.Event):
+	"""Body of the adaptive period thread. Holds only a weak reference so the engine can still be collected."""
+	while not stop.wait(ADAPTIVE_PERIOD_INTERVAL):
+		engine = engine_ref()
+		if engine is None:
+			return
+		engine.adapt_period()
+		del engine
+
+
+def _geometry_update_loop(geometry_ref, stop: threading.Event, interval: float):
+	"""Body of a geometry's update thread. Holds only a weak reference so the geometry can still be collected."""
+	while not stop.wait(interval):
+		geometry = geometry_ref()
+		if geometry is None:
+			return
+		geometry.update()
+		del geometry
 
 
 class Engine:
@@ -127,14 +636,57 @@ class Engine:
 	Attributes:
 		_engine: FFI pointer to the underlying miniaudio engine.
 		_config: Configuration used to initialize the engine.
+		_resource_manager: ResourceManager the engine loads sounds through.
 		_initialized: Whether the engine has been successfully initialized.
+		period_history: Recent PeriodStats windows evaluated by adapt_period, oldest first.
+		recommended_period_size: Period size in frames suggested by the last adapt_period call (0 = not yet evaluated).
 	"""
+	@_traced
 	def __init__(self, config: Optional[EngineConfig] = None):
 		_ensure_sta()
 		self._engine = ffi.new("ma_engine*")
-		self._resource_manager = ffi.new("ma_resource_manager*")
 		self._config = config
 		self._initialized = False
+		self._device_lock = threading.Lock()
+		# Guards the stats out-parameters and adapt_period's history.
+		self._stats_lock = threading.RLock()
+		# Read by the audio thread, so it is freed by _uninit() once the device has stopped rather than left to the garbage collector.
+		self._state = lib.soundobj_engine_state_create()
+		if self._state == ffi.NULL:
+			self._state = None
+			raise MiniAudioError("Failed to allocate engine state")
+		self._period_stats = ffi.new("soundobj_period_stats*")
+		self._unstable_period_size = 0
+		self._adaptive_stop = None
+		self.period_history = deque(maxlen=PERIOD_HISTORY_LENGTH)
+		self.recommended_period_size = 0
+		self._command_buffer = None
+		self._meter = None
+		self._recording = None
+		self._lod = None
+		self._stream_scheduler = None
+		# Always present: with no curves scheduled the audio thread skips it after a single check. Freed by _uninit(), like the state.
+		self._automation = lib.soundobj_automation_create()
+		if self._automation == ffi.NULL:
+			self._automation = None
+			raise MiniAudioError("Failed to allocate automation")
+		lib.soundobj_engine_state_set_automation(self._state, self._automation)
+		self._stream_stats = ffi.new("soundobj_stream_stats*")
+		if config and config.commandBuffer:
+			# Drained by the audio thread unless applyCommandsOnTick is set, so _uninit() frees it once the device has stopped.
+			self._command_buffer = lib.soundobj_command_buffer_create(COMMAND_BUFFER_CAPACITY)
+			if self._command_buffer == ffi.NULL:
+				self._command_buffer = None
+				raise MiniAudioError("Failed to allocate command buffer")
+			if not config.applyCommandsOnTick:
+				lib.soundobj_engine_state_set_command_buffer(self._state, self._command_buffer)
+		if config and config.lod:
+			# Updated by the audio thread, so _uninit() frees it once the device has stopped.
+			self._lod = lib.soundobj_lod_create(config.lodReducedDistance, config.lodMinimalDistance, LOD_UPDATE_INTERVAL)
+			if self._lod == ffi.NULL:
+				self._lod = None
+				raise MiniAudioError("Failed to allocate LOD controller")
+			lib.soundobj_engine_state_set_lod(self._state, self._lod)
 		ma_config = lib.ma_engine_config_init()
 		if config:
 			if config.channels > 0:
@@ -151,14 +703,19 @@ class Engine:
 				ma_config.noAutoStart = 1
 			if config.noDevice:
 				ma_config.noDevice = 1
-		rm_config = lib.ma_resource_manager_config_init()
-		if rm_config:
-			rm_config.ppCustomDecodingBackendVTables = lib.soundobj_get_custom_decoders(ffi.addressof(rm_config, "customDecodingBackendCount"))
-			result = lib.ma_resource_manager_init(ffi.addressof(rm_config), self._resource_manager)
-			if result == lib.MA_SUCCESS:
-				ma_config.pResourceManager = self._resource_manager
-			else:
-				self._resource_manager = ffi.NULL # if fail it's not game over, just custom formats won't be available. Maybe log somewhere if ma_log doesn't do enough?
+		if config and config.resourceManager:
+			if config.resourceManager.closed:
+				raise MiniAudioError("Resource manager is closed")
+			self._resource_manager = config.resourceManager
+		else:
+			try:
+				# Its own resource manager decodes straight to the mixer's format and rate, as miniaudio's would.
+				self._resource_manager = ResourceManager(matchEngine=True)
+			except MiniAudioError:
+				self._resource_manager = None # if fail it's not game over, just custom formats won't be available. Maybe log somewhere if ma_log doesn't do enough?
+		if self._resource_manager:
+			ma_config.pResourceManager = self._resource_manager._resource_manager
+		lib.soundobj_engine_config_attach(ffi.addressof(ma_config), self._state)
 		# Run ma_engine_init on a worker thread. miniaudio's WASAPI path
 		# (ma_context_get_MMDevice__wasapi) calls CoUninitialize unconditionally
 		# even when its CoInitializeEx returned RPC_E_CHANGED_MODE, which would
@@ -166,27 +723,110 @@ class Engine:
 		# prior COM state, so miniaudio's init/uninit balance there and the main
 		# thread's STA apartment is untouched.
 		init_result = [None]
+		resource_manager = self._resource_manager
 		def _do_init():
-			init_result[0] = lib.ma_engine_init(ffi.addressof(ma_config), self._engine)
-		t = threading.Thread(target=_do_init)
-		t.start()
-		t.join()
-		result = init_result[0]
-		if result != lib.MA_SUCCESS:
-			raise MiniAudioError(f"Failed to initialize engine: {result}")
-		self._initialized = True
+			if matched:
+				# The resource manager is initialized after the engine, decoding to the engine's format and rate.
+				init_result[0] = lib.soundobj_engine_init_matched(ffi.addressof(ma_config), ffi.addressof(resource_manager._rm_config), resource_manager._resource_manager, self._engine)
+			else:
+				init_result[0] = lib.ma_engine_init(ffi.addressof(ma_config), self._engine)
+		with resource_manager._init_lock if resource_manager else contextlib.nullcontext():
+			matched = resource_manager is not None and resource_manager.matchEngine and not resource_manager._initialized
+			t = threading.Thread(target=_do_init)
+			t.start()
+			t.join()
+			result = init_result[0]
+			if result != lib.MA_SUCCESS and matched and not (config and config.resourceManager):
+				# Its own resource manager failed along with the engine. Retry on miniaudio's internal one, as when it fails up front.
+				self._resource_manager = resource_manager = None
+				matched = False
+				ma_config.pResourceManager = ffi.NULL
+				t = threading.Thread(target=_do_init)
+				t.start()
+				t.join()
+				result = init_result[0]
+			if result != lib.MA_SUCCESS:
+				raise MiniAudioError(f"Failed to initialize engine: {result}")
+			self._initialized = True
+			_engines.add(self)
+			if resource_manager is not None:
+				resource_manager._attach()
+			if matched:
+				resource_manager._start_job_threads()
+		self._stream_scheduler = lib.soundobj_stream_scheduler_create(lib.ma_engine_get_resource_manager(self._engine))
+		if self._stream_scheduler == ffi.NULL:
+			self._stream_scheduler = None
+			raise MiniAudioError("Failed to allocate stream scheduler")
+		if config and config.adaptivePeriod and not config.noDevice:
+			self._adaptive_stop = threading.Event()
+			threading.Thread(target=_adaptive_period_loop, args=(weakref.ref(self), self._adaptive_stop), daemon=True).start()
 	def __del__(self):
 		"""Cleanup the engine when the object is destroyed."""
-		if hasattr(self, '_initialized') and self._initialized:
-			# Module globals can be None during interpreter shutdown; skip cleanup since the process is about to exit anyway.
-			if lib is None:
-				return
+		# Module globals can be None during interpreter shutdown, underscored ones first. By then _shutdown() has uninitialized every engine.
+		if lib is not None and _state_lock is not None:
+			self._uninit()
+	def _release_jobs(self):
+		"""Stop the device and release everything that still needs the resource manager's job threads: stream pages being
+		decoded, and sounds started by play_sound() that may still be loading. The job threads can be stopped afterwards.
+		"""
+		if not self._initialized:
+			return
+		with self._device_lock:
+			lib.ma_engine_stop(self._engine)
+			lib.soundobj_engine_release_inlined_sounds(self._engine)
+		if self._stream_scheduler is not None:
+			lib.soundobj_stream_scheduler_destroy(self._stream_scheduler)
+			self._stream_scheduler = None
+	def _uninit(self):
+		"""Stop the device, uninitialize the engine and free what the audio thread reads. Safe to call more than once.
+		Runs from __del__, and at exit for every engine still alive, so the device is stopped before finalization frees anything.
+		"""
+		with _state_lock:
+			initialized = getattr(self, '_initialized', False)
+			self._initialized = False
+		if initialized:
+			if self._adaptive_stop is not None:
+				self._adaptive_stop.set()
 			# Bump STA ref count so miniaudio's CoUninitialize during context uninit leaves the main thread STA. Skip at interpreter shutdown, when the module global may already be None.
 			if _ensure_sta is not None:
 				_ensure_sta()
-			lib.ma_engine_uninit(self._engine)
-			if self._resource_manager:
-				lib.ma_resource_manager_uninit(self._resource_manager)
+			# Finalizes the file's header, which a recording left running would otherwise never get.
+			if self._recording is not None:
+				self._recording.stop()
+			if self._meter is not None:
+				self._meter.close()
+			# Waits for decoding jobs to finish, which needs the resource manager's job threads still running.
+			if self._stream_scheduler is not None:
+				lib.soundobj_stream_scheduler_destroy(self._stream_scheduler)
+				self._stream_scheduler = None
+			with self._device_lock:
+				lib.ma_engine_uninit(self._engine)
+		# The device has stopped, so nothing on the audio thread can still be reading these.
+		with getattr(self, '_stats_lock', contextlib.nullcontext()):
+			if getattr(self, '_state', None) is not None:
+				lib.soundobj_engine_state_destroy(self._state)
+				self._state = None
+		if getattr(self, '_automation', None) is not None:
+			lib.soundobj_automation_destroy(self._automation)
+			self._automation = None
+		if getattr(self, '_command_buffer', None) is not None:
+			lib.soundobj_command_buffer_destroy(self._command_buffer)
+			self._command_buffer = None
+		if getattr(self, '_lod', None) is not None:
+			lib.soundobj_lod_destroy(self._lod)
+			self._lod = None
+		# The engine holds a strong reference to its resource manager, but in a garbage cycle the resource manager's
+		# __del__ may still run first. Its close() then waits for this, the last detach, before uninitializing.
+		if initialized and self._resource_manager is not None:
+			self._resource_manager._detach()
+	@property
+	def resource_manager(self) -> Optional[ResourceManager]:
+		"""Get the resource manager used by this engine.
+		Pass it to another engine through EngineConfig.resourceManager to share decoded data.
+		Returns:
+			ResourceManager, or None if the engine fell back to miniaudio's internal one.
+		"""
+		return self._resource_manager
 	def start(self) -> bool:
 		"""Start the audio engine.
 		Returns:
@@ -194,7 +834,8 @@ class Engine:
 		"""
 		if not self._initialized:
 			return False
-		result = lib.ma_engine_start(self._engine)
+		with self._device_lock:
+			result = lib.ma_engine_start(self._engine)
 		return result == lib.MA_SUCCESS
 	def stop(self) -> bool:
 		"""Stop the audio engine.
@@ -203,7 +844,8 @@ class Engine:
 		"""
 		if not self._initialized:
 			return False
-		result = lib.ma_engine_stop(self._engine)
+		with self._device_lock:
+			result = lib.ma_engine_stop(self._engine)
 		return result == lib.MA_SUCCESS
 	@property
 	def volume(self) -> float:
@@ -250,6 +892,206 @@ class Engine:
 		if not self._initialized:
 			return 0
 		return lib.ma_engine_get_time_in_milliseconds(self._engine)
+	@property
+	def time_in_pcm_frames(self) -> int:
+		"""Get the current time in PCM frames, the clock automation curves are scheduled against.
+		Returns:
+			Time in frames at the engine's sample rate.
+		"""
+		if not self._initialized:
+			return 0
+		return lib.ma_engine_get_time_in_pcm_frames(self._engine)
+	@property
+	def period_size_in_frames(self) -> int:
+		"""Get the device's current period size.
+		Returns:
+			Period size in frames, or 0 if there is no device.
+		"""
+		if not self._initialized:
+			return 0
+		return lib.soundobj_engine_get_period_size(self._engine)
+	@property
+	def latency_in_milliseconds(self) -> float:
+		"""Get the latency added by one device period.
+		Returns:
+			Period duration in milliseconds, or 0.0 if there is no device.
+		"""
+		sample_rate = self.sample_rate
+		if not sample_rate:
+			return 0.0
+		return self.period_size_in_frames * 1000.0 / sample_rate
+	def get_period_stats(self, reset: bool = False) -> PeriodStats:
+		"""Get audio callback timing since the engine started or since the last reset.
+		Args:
+			reset: If True, start a new measurement window after reading.
+		Returns:
+			PeriodStats for the window.
+		"""
+		with self._stats_lock:
+			if self._state is None:
+				return PeriodStats(0, 0, 0.0, 0)
+			lib.soundobj_engine_get_period_stats(self._state, self._period_stats, lib.MA_TRUE if reset else lib.MA_FALSE)
+			stats = self._period_stats
+			return PeriodStats(stats.callbacks, stats.deadlineMisses, stats.peakLoad, stats.periodSizeInFrames)
+	def get_lod_counts(self) -> LodCounts:
+		"""Get how many voices are at each spatial LOD tier.
+		Returns:
+			LodCounts, all zero if LOD is disabled.
+		"""
+		if self._lod is None:
+			return LodCounts(0, 0, 0)
+		counts = ffi.new("soundobj_lod_counts*")
+		lib.soundobj_lod_get_counts(self._lod, counts)
+		return LodCounts(counts.full, counts.reduced, counts.minimal)
+	def get_stream_stats(self) -> StreamStats:
+		"""Get streaming totals over every sound streamed with a StreamConfig, including ones since destroyed.
+		Returns:
+			StreamStats. buffered_frames and stream_count cover open streams only.
+		"""
+		if self._stream_scheduler is None:
+			return StreamStats(0, 0, 0, 0, 0)
+		with self._stats_lock:
+			lib.soundobj_stream_scheduler_get_stats(self._stream_scheduler, self._stream_stats)
+			stats = self._stream_stats
+			return StreamStats(stats.starvations, stats.starvedFrames, stats.pagesDecoded, stats.bufferedFrames, stats.streamCount)
+	@_traced
+	def set_period_size(self, frames: int) -> bool:
+		"""Reinitialize the device with a new period size.
+		Loaded sounds are unaffected; playback resumes as soon as the new device starts.
+		Args:
+			frames: Period size in frames.
+		Returns:
+			True if the device is now running with the requested period size, False otherwise.
+		"""
+		if not self._initialized:
+			return False
+		# Same reasoning as __init__: keep miniaudio's COM init/uninit off the caller's thread.
+		result = [None]
+		def _do_reinit():
+			result[0] = lib.soundobj_engine_set_period_size(self._engine, self._state, frames)
+		with self._device_lock:
+			# _uninit() may have run since the check above.
+			if not self._initialized:
+				return False
+			t = threading.Thread(target=_do_reinit)
+			t.start()
+			t.join()
+		self.get_period_stats(reset=True)
+		return result[0] == lib.MA_SUCCESS
+	def adapt_period(self) -> int:
+		"""Evaluate callback timing since the last call and pick a period size.
+		A window with deadline misses doubles the period and marks the old size as unstable.
+		A clean window with plenty of headroom halves it, as long as that doesn't land on a
+		size already seen to be unstable. The result is stored in recommended_period_size and
+		the window in period_history. When EngineConfig.adaptivePeriod is set this runs
+		automatically on a background thread and applies the recommendation; otherwise call
+		it yourself and pass the result to set_period_size or a future EngineConfig.
+		Returns:
+			Recommended period size in frames, or 0 if there is no device.
+		"""
+		with self._stats_lock:
+			stats = self.get_period_stats(reset=True)
+			current = stats.period_size_in_frames or self.period_size_in_frames
+			if not stats.callbacks or not current:
+				return current
+			self.period_history.append(stats)
+			if stats.deadline_misses:
+				self._unstable_period_size = max(self._unstable_period_size, current)
+				recommended = min(current * 2, MAX_PERIOD_SIZE_IN_FRAMES)
+			elif stats.peak_load < ADAPTIVE_PERIOD_HEADROOM and current // 2 > self._unstable_period_size:
+				recommended = max(current // 2, MIN_PERIOD_SIZE_IN_FRAMES)
+			else:
+				recommended = current
+			self.recommended_period_size = recommended
+		if self._config and self._config.adaptivePeriod and recommended != current:
+			self.set_period_size(recommended)
+		return recommended
+	def read_pcm_frames(self, frame_count: int) -> memoryview:
+		"""Mix the next frames of the engine's output without a device.
+		Intended for engines created with noDevice; on an engine with a running device this
+		steals frames from the audio thread.
+		Args:
+			frame_count: Number of frames to mix.
+		Returns:
+			Interleaved float samples, channels * frames long (shorter if the engine ran out of input).
+		Raises:
+			MiniAudioError: If mixing fails.
+		"""
+		if self._command_buffer is not None and not self._config.applyCommandsOnTick:
+			self.apply_commands()
+		channels = self.channels
+		buf = _new_uninitialized("float[]", frame_count * channels)
+		frames_read = ffi.new("ma_uint64*")
+		result = lib.soundobj_engine_read_pcm_frames(self._engine, buf, frame_count, frames_read)
+		if result != lib.MA_SUCCESS:
+			raise MiniAudioError(f"Failed to read from engine: {result}")
+		return _pcm_output(buf, frames_read[0], SampleFormat.F32, channels)
+	def apply_commands(self) -> int:
+		"""Apply queued Sound commands now, in the order they were made.
+		Only needed with EngineConfig.applyCommandsOnTick, or to make queued changes visible to the
+		getters before the next audio period. Safe to call from any thread.
+		Returns:
+			Number of commands applied (0 if the engine has no command buffer).
+		"""
+		if self._command_buffer is None:
+			return 0
+		return lib.soundobj_command_buffer_apply(self._command_buffer, lib.MA_TRUE)
+	def _post_command(self, command: int, sound, x: float = 0.0, y: float = 0.0, z: float = 0.0):
+		"""Queue a command for a sound. A full buffer is applied on the calling thread so nothing is dropped or reordered."""
+		while lib.soundobj_command_buffer_post(self._command_buffer, command, sound, x, y, z) != lib.MA_SUCCESS:
+			self.apply_commands()
+	@property
+	def meter(self) -> Optional['Meter']:
+		"""Get the meter on the engine's output.
+		Returns:
+			Meter, or None if metering is disabled.
+		"""
+		return self._meter
+	def enable_meter(self, bands: int = 0, window: float = METER_WINDOW) -> 'Meter':
+		"""Start metering the engine's final output, after master volume. Replaces any existing meter.
+		Args:
+			bands: Number of spectrum bands to compute (0 = levels only).
+			window: Seconds of audio each reading covers.
+		Returns:
+			The new Meter.
+		Raises:
+			MiniAudioError: If the meter cannot be created.
+		"""
+		return Meter(self, bands, window)
+	def disable_meter(self):
+		"""Stop metering the engine's output."""
+		if self._meter is not None:
+			self._meter.close()
+	@property
+	def recording(self) -> Optional['Recording']:
+		"""Get the recording of the engine's output in progress.
+		Returns:
+			Recording, or None if not recording.
+		"""
+		return self._recording
+	def start_recording(self, path: str, format: Union[SampleFormat, str] = SampleFormat.F32, buffer_seconds: float = RECORDING_BUFFER_SECONDS) -> 'Recording':
+		"""Start recording the engine's final output, after master volume, to a WAV or FLAC file. Stops any recording in progress.
+		Args:
+			path: Path of the file to write, FLAC if it ends in .flac and WAV otherwise. Overwritten if it exists.
+			format: Sample format of the file, SampleFormat enum or string (default: F32).
+			buffer_seconds: Seconds of output buffered in memory for the writer thread.
+		Returns:
+			The new Recording.
+		Raises:
+			MiniAudioError: If the file cannot be created.
+		"""
+		return Recording(self, path, format, buffer_seconds)
+	def stop_recording(self) -> Optional['Recording']:
+		"""Stop recording and finish writing the file.
+		Returns:
+			The Recording that was stopped, or None if not recording.
+		Raises:
+			MiniAudioError: If writing the file failed.
+		"""
+		recording = self._recording
+		if recording is not None:
+			recording.stop()
+		return recording
 	def play_sound(self, file_path: str, group=None) -> bool:
 		"""Play a sound file directly through the engine.
 		Args:
@@ -383,9 +1225,7 @@ class Engine:
 		"""
 		if not self._initialized:
 			return (0.0, 0.0, 1.0)
-		inner_ptr = ffi.new("float*")
-		outer_ptr = ffi.new("float*")
-		gain_ptr = ffi.new("float*")
+		inner_ptr, outer_ptr, gain_ptr = _scratch.float_ptrs
 		lib.ma_engine_listener_get_cone(self._engine, listener_index, inner_ptr, outer_ptr, gain_ptr)
 		return (inner_ptr[0], outer_ptr[0], gain_ptr[0])
 	def set_listener_world_up(self, listener_index: int, x: float, y: float, z: float) -> bool:
@@ -452,6 +1292,12 @@ class Sound:
 		_sound: FFI pointer to the underlying miniaudio sound object.
 		_loaded: Whether the sound has been successfully loaded.
 	"""
+	# Programs can hold tens of thousands of sounds, so instances carry no __dict__. __weakref__ lets
+	# an AmbisonicBus track its sounds without keeping them alive.
+	__slots__ = (
+		'engine', 'source', '_sound', '_loaded', '_meter', '_convolver', '_geometry', '_ambisonic_bus', '_lod_priority',
+		'_stream', '_reader', '_reader_handle', '_decoded_name', '_decoded_frames', '__weakref__'
+	)
 
 	def __init__(self, engine: Engine = None, source: Optional[bytes|str] = None):
 		if not engine:
@@ -460,25 +1306,94 @@ class Sound:
 		self.source = source
 		self._sound = None
 		self._loaded = False
+		self._meter = None
+		self._convolver = None
+		self._geometry = None
+		self._ambisonic_bus = None
+		self._lod_priority = 1.0
+		self._stream = None
+		self._reader = None
+		self._reader_handle = None
+		self._decoded_name = None
+		self._decoded_frames = None
 		if source is not None:
 			self.load(source)
 
 	def __del__(self):
 		"""Cleanup the sound when the object is destroyed."""
-		if hasattr(self, '_loaded') and self._loaded and self._sound:
+		# __init__ may not have got as far as setting _loaded.
+		if getattr(self, '_loaded', False) and self._sound:
 			# Module globals can be None during interpreter shutdown; skip cleanup since the process is about to exit anyway.
 			if lib is None:
 				return
+			# Its engine was uninitialized at exit, taking the node graph and resource manager with it.
+			if not self.engine._initialized:
+				return
+			# Commands still queued for this sound would otherwise be applied to freed memory. Only its own are dropped; the rest stay queued.
+			if self.engine._command_buffer is not None:
+				lib.soundobj_command_buffer_cancel(self.engine._command_buffer, self._sound)
+			# The meter has to be spliced out while the sound's node still exists.
+			if getattr(self, '_meter', None) is not None:
+				self._meter.close()
+			if getattr(self, '_convolver', None) is not None:
+				self._convolver.close()
+			if getattr(self, '_geometry', None) is not None:
+				self._geometry.remove(self)
+			if getattr(self, '_ambisonic_bus', None) is not None:
+				self._ambisonic_bus.remove(self)
+			if self.engine._lod is not None:
+				lib.soundobj_lod_remove(self.engine._lod, self._sound)
+			lib.soundobj_automation_clear(self.engine._automation, self._sound, lib.SOUNDOBJ_AUTOMATION_PARAMETER_COUNT)
 			lib.ma_sound_uninit(self._sound)
+			if getattr(self, '_stream', None) is not None:
+				lib.soundobj_stream_destroy(self._stream)
+			if getattr(self, '_reader', None) is not None:
+				lib.soundobj_reader_destroy(self._reader)
+			if getattr(self, '_decoded_name', None) is not None:
+				lib.ma_resource_manager_unregister_data(lib.ma_engine_get_resource_manager(self.engine._engine), self._decoded_name)
+				lib.soundobj_free(self._decoded_frames)
+
+	def _defer(self, command: int, x: float = 0.0, y: float = 0.0, z: float = 0.0) -> bool:
+		"""Queue a command if the engine has a command buffer.
+		Returns:
+			True if queued, False if the caller should apply the change directly.
+		"""
+		if self.engine._command_buffer is None:
+			return False
+		self.engine._post_command(command, self._sound, x, y, z)
+		return True
+
+	def _register_lod(self):
+		"""Put the sound under the engine's spatial LOD control if it has one and the sound is spatialized."""
+		if self.engine._lod is None or not self.spatialization_enabled:
+			return
+		if lib.soundobj_lod_add(self.engine._lod, self._sound, self._lod_priority) == lib.MA_OUT_OF_MEMORY:
+			raise MiniAudioError("Failed to register sound for LOD")
+
+	def _claim(self):
+		"""Reserve the sound for loading. Other threads keep seeing it as unloaded until _loaded is set,
+		which only happens once the ma_sound is fully initialized.
+		Raises:
+			MiniAudioError: If the sound is already loaded or another thread is loading it.
+		"""
+		with _state_lock:
+			if self._sound is not None:
+				raise MiniAudioError("Sound is already loaded")
+			self._sound = ffi.new("ma_sound*")
 
-	def load(self, source: Optional[bytes|str] = None, stream: bool = True) -> bool:
+	def load(self, source: Optional[bytes|str|BinaryIO] = None, stream: bool = True, no_pitch: bool = False, no_spatialization: bool = False, no_default_attachment: bool = False, stream_config: Optional[StreamConfig] = None) -> bool:
 		"""Load audio from various sources.
 		Args:
 			source: Audio source to load. Can be:
 				- String: File path or URL
 				- bytes: Raw audio data
+				- File object: Anything with read(), such as an open file or a zip archive member
 				- None: Use the source specified in constructor
 			stream: Whether to stream the audio (True) or load entirely into memory (False).
+			no_pitch: If True, pitch has no effect, which lets files already at the engine's sample rate skip the resampler.
+			no_spatialization: If True, skip 3D processing entirely. position, direction and the rest have no effect.
+			no_default_attachment: If True, leave the sound unconnected instead of attaching it to the engine's endpoint, for routing through a custom node graph.
+			stream_config: Buffering when streamed (None = the engine's streamConfig).
 		Returns:
 			True if successful, False otherwise.
 		"""
@@ -486,19 +1401,26 @@ class Sound:
 			source = self.source
 		if source is None:
 			return False
+		flags = dict(no_pitch=no_pitch, no_spatialization=no_spatialization, no_default_attachment=no_default_attachment, stream_config=stream_config)
 		if isinstance(source, str):  # either file or URL
 			if is_uri(source):
-				return self.load_from_url(source, stream=stream)
+				return self.load_from_url(source, stream=stream, **flags)
 			else:
-				return self.load_from_file(source, stream=stream)
+				return self.load_from_file(source, stream=stream, **flags)
+		elif hasattr(source, 'read'):
+			return self.load_from_file_object(source, stream=stream, **flags)
 		else:
-			return self.load_from_memory(source, stream=stream)
+			return self.load_from_memory(source, stream=stream, **flags)
 
-	def load_from_url(self, url: str, stream: bool = True) -> bool:
+	def load_from_url(self, url: str, stream: bool = True, no_pitch: bool = False, no_spatialization: bool = False, no_default_attachment: bool = False, stream_config: Optional[StreamConfig] = None) -> bool:
 		"""Load audio from a URL.
 		Args:
 			url: URL to load audio from.
 			stream: Whether to stream the audio (True) or load entirely into memory (False).
+			no_pitch: If True, pitch has no effect, which lets files already at the engine's sample rate skip the resampler.
+			no_spatialization: If True, skip 3D processing entirely. position, direction and the rest have no effect.
+			no_default_attachment: If True, leave the sound unconnected instead of attaching it to the engine's endpoint, for routing through a custom node graph.
+			stream_config: Buffering when streamed (None = the engine's streamConfig).
 		Returns:
 			True if successful, False otherwise.
 		Note:
@@ -507,37 +1429,176 @@ class Sound:
 		# TODO: Implement URL loading with proper HTTP/FTP(s) handling
 		raise NotImplementedError("URL loading not yet implemented")
 
-	def load_from_file(self, filename: str, stream: bool = True) -> bool:
+	@_traced
+	def load_from_file(self, filename: str, stream: bool = True, no_pitch: bool = False, no_spatialization: bool = False, no_default_attachment: bool = False, stream_config: Optional[StreamConfig] = None) -> bool:
 		"""Load audio from a file.
 		Args:
 			filename: Path to the audio file to load.
 			stream: Whether to stream the audio (True) or decode entirely into memory (False).
+			no_pitch: If True, pitch has no effect, which lets files already at the engine's sample rate skip the resampler.
+			no_spatialization: If True, skip 3D processing entirely. position, direction and the rest have no effect.
+			no_default_attachment: If True, leave the sound unconnected instead of attaching it to the engine's endpoint, for routing through a custom node graph.
+			stream_config: Buffering when streamed (None = the engine's streamConfig).
 		Returns:
 			True if successful, False otherwise.
+		Raises:
+			MiniAudioError: If the file can't be loaded, or the sound is already loaded.
 		"""
 		if not self.engine._initialized:
 			return False
-		self._sound = ffi.new("ma_sound*")
-		flags = lib.MA_SOUND_FLAG_STREAM if stream else lib.MA_SOUND_FLAG_DECODE
 		filename_bytes = filename.encode('utf-8')
-		result = lib.ma_sound_init_from_file(
-			self.engine._engine,
-			filename_bytes,
-			flags,
-			ffi.NULL,  # No sound group
-			ffi.NULL,  # No fence
-			self._sound
-		)
+		self._claim()
+		flags = lib.MA_SOUND_FLAG_STREAM if stream else lib.MA_SOUND_FLAG_DECODE
+		if no_pitch:
+			flags |= lib.MA_SOUND_FLAG_NO_PITCH
+		if no_spatialization:
+			flags |= lib.MA_SOUND_FLAG_NO_SPATIALIZATION
+		if no_default_attachment:
+			flags |= lib.MA_SOUND_FLAG_NO_DEFAULT_ATTACHMENT
+		if stream and stream_config is None and self.engine._config is not None:
+			stream_config = self.engine._config.streamConfig
+		if stream and stream_config is not None:
+			result = self._init_stream(filename_bytes, flags & ~lib.MA_SOUND_FLAG_STREAM, stream_config)
+		else:
+			result = lib.ma_sound_init_from_file(
+				self.engine._engine,
+				filename_bytes,
+				flags,
+				ffi.NULL,  # No sound group
+				ffi.NULL,  # No fence
+				self._sound
+			)
 		if result != lib.MA_SUCCESS:
+			self._sound = None
 			raise MiniAudioError(f"Failed to load sound from file: {result}")
 		self._loaded = True
+		self._register_lod()
+		return True
+
+	def _init_stream(self, filename_bytes: bytes, flags: int, stream_config: StreamConfig, vfs=ffi.NULL) -> int:
+		"""Initialize the sound from a stream buffered as stream_config describes.
+		Args:
+			vfs: VFS to open the file through (default: the resource manager's).
+		Returns:
+			miniaudio result code.
+		"""
+		stream_ptr = ffi.new("soundobj_stream**")
+		page_frames = max(1, stream_config.pageSizeInMilliseconds * self.engine.sample_rate // 1000)
+		if vfs == ffi.NULL:
+			result = lib.soundobj_stream_create(self.engine._stream_scheduler, filename_bytes, page_frames, max(2, stream_config.pageCount), stream_config.priority, stream_ptr)
+		else:
+			result = lib.soundobj_stream_create_vfs(self.engine._stream_scheduler, vfs, filename_bytes, page_frames, max(2, stream_config.pageCount), stream_config.priority, stream_ptr)
+		if result != lib.MA_SUCCESS:
+			return result
+		result = lib.ma_sound_init_from_data_source(self.engine._engine, stream_ptr[0], flags, ffi.NULL, self._sound)
+		if result != lib.MA_SUCCESS:
+			lib.soundobj_stream_destroy(stream_ptr[0])
+			return result
+		self._stream = stream_ptr[0]
+		return result
+
+	@_traced
+	def load_from_file_object(self, fileobj: BinaryIO, stream: bool = True, no_pitch: bool = False, no_spatialization: bool = False, no_default_attachment: bool = False, stream_config: Optional[StreamConfig] = None, chunk_size: int = READER_CHUNK_SIZE) -> bool:
+		"""Load audio from a file object, such as a member of a zip archive or a decrypting reader.
+		The object is read from its current position, chunk_size bytes at a time. Only readinto() or read(),
+		and seek() if the object is seekable, are called. When streamed, reads happen on a resource manager
+		job thread as the stream decodes ahead, never on the audio thread, and the object must stay open
+		for as long as the sound exists. Otherwise the whole object is decoded before this returns.
+		Objects that can't seek, such as pipes, work as long as the decoder never seeks outside the
+		chunk it last read.
+		Args:
+			fileobj: Binary file object to read from.
+			stream: Whether to stream the audio (True) or decode entirely into memory (False).
+			no_pitch: If True, pitch has no effect, which lets files already at the engine's sample rate skip the resampler.
+			no_spatialization: If True, skip 3D processing entirely. position, direction and the rest have no effect.
+			no_default_attachment: If True, leave the sound unconnected instead of attaching it to the engine's endpoint, for routing through a custom node graph.
+			stream_config: Buffering when streamed (None = the engine's streamConfig, or the defaults).
+			chunk_size: Bytes read from the object at a time.
+		Returns:
+			True if successful, False otherwise.
+		Raises:
+			MiniAudioError: If the audio can't be decoded, reading the object failed, or the sound is already loaded.
+		"""
+		if not self.engine._initialized:
+			return False
+		size = -1
+		base = 0
+		if getattr(fileobj, 'seekable', lambda: False)():
+			base = fileobj.tell()
+			size = fileobj.seek(0, os.SEEK_END) - base
+			fileobj.seek(base)
+		source = _FileObjectSource(fileobj, base)
+		handle = ffi.new_handle(source)
+		reader_ptr = ffi.new("soundobj_reader**")
+		self._claim()
+		result = lib.soundobj_reader_create(handle, size, chunk_size, reader_ptr)
+		if result != lib.MA_SUCCESS:
+			self._sound = None
+			raise MiniAudioError(f"Failed to create reader: {result}")
+		reader = reader_ptr[0]
+		# The extension, if the object has a name, lets the decoder try the right format first.
+		name = getattr(fileobj, 'name', None)
+		name_bytes = name.encode('utf-8') if isinstance(name, str) and name else b'stream'
+		vfs = lib.soundobj_reader_get_vfs(reader)
+		flags = 0
+		if no_pitch:
+			flags |= lib.MA_SOUND_FLAG_NO_PITCH
+		if no_spatialization:
+			flags |= lib.MA_SOUND_FLAG_NO_SPATIALIZATION
+		if no_default_attachment:
+			flags |= lib.MA_SOUND_FLAG_NO_DEFAULT_ATTACHMENT
+		if stream:
+			if self.engine._stream_scheduler is None:
+				lib.soundobj_reader_destroy(reader)
+				self._sound = None
+				raise MiniAudioError("Engine has no stream scheduler")
+			if stream_config is None:
+				stream_config = (self.engine._config.streamConfig if self.engine._config is not None else None) or StreamConfig()
+			result = self._init_stream(name_bytes, flags, stream_config, vfs)
+			if result != lib.MA_SUCCESS:
+				lib.soundobj_reader_destroy(reader)
+				self._sound = None
+				raise MiniAudioError(f"Failed to load sound from file object: {result}") from source.error
+			self._reader = reader
+			self._reader_handle = handle
+		else:
+			frames_ptr = ffi.new("void**")
+			frame_count = ffi.new("ma_uint64*")
+			format_out = ffi.new("ma_format*")
+			channels_out = ffi.new("ma_uint32*")
+			sample_rate_out = ffi.new("ma_uint32*")
+			result = lib.soundobj_decode_vfs(vfs, name_bytes, lib.ma_format_f32, 0, 0, frames_ptr, frame_count, format_out, channels_out, sample_rate_out)
+			lib.soundobj_reader_destroy(reader)
+			if result != lib.MA_SUCCESS:
+				self._sound = None
+				raise MiniAudioError(f"Failed to decode file object: {result}") from source.error
+			# Registered with the resource manager under a name only this sound uses, which it then loads like a file.
+			resource_manager = lib.ma_engine_get_resource_manager(self.engine._engine)
+			decoded_name = f"soundobj-file-object:{id(self):x}".encode('utf-8')
+			result = lib.ma_resource_manager_register_decoded_data(resource_manager, decoded_name, frames_ptr[0], frame_count[0], format_out[0], channels_out[0], sample_rate_out[0])
+			if result == lib.MA_SUCCESS:
+				result = lib.ma_sound_init_from_file(self.engine._engine, decoded_name, flags | lib.MA_SOUND_FLAG_DECODE, ffi.NULL, ffi.NULL, self._sound)
+				if result != lib.MA_SUCCESS:
+					lib.ma_resource_manager_unregister_data(resource_manager, decoded_name)
+			if result != lib.MA_SUCCESS:
+				lib.soundobj_free(frames_ptr[0])
+				self._sound = None
+				raise MiniAudioError(f"Failed to load sound from file object: {result}")
+			self._decoded_name = decoded_name
+			self._decoded_frames = frames_ptr[0]
+		self._loaded = True
+		self._register_lod()
 		return True
 
-	def load_from_memory(self, data: bytes, stream: bool = True) -> bool:
+	def load_from_memory(self, data: bytes, stream: bool = True, no_pitch: bool = False, no_spatialization: bool = False, no_default_attachment: bool = False, stream_config: Optional[StreamConfig] = None) -> bool:
 		"""Load audio from memory buffer.
 		Args:
 			data: Raw audio data as bytes.
 			stream: Whether to stream the audio (True) or decode entirely into memory (False).
+			no_pitch: If True, pitch has no effect, which lets files already at the engine's sample rate skip the resampler.
+			no_spatialization: If True, skip 3D processing entirely. position, direction and the rest have no effect.
+			no_default_attachment: If True, leave the sound unconnected instead of attaching it to the engine's endpoint, for routing through a custom node graph.
+			stream_config: Buffering when streamed (None = the engine's streamConfig).
 		Returns:
 			True if successful, False otherwise.
 		Note:
@@ -546,23 +1607,29 @@ class Sound:
 		# TODO: Implement memory loading via a MA data source
 		raise NotImplementedError("Memory loading not yet implemented")
 
+	@_traced
 	def play(self) -> bool:
 		"""Start playing the loaded sound.
 		Returns:
 			True if successful, False otherwise.
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
 			return False
+		if self._defer(lib.SOUNDOBJ_COMMAND_START):
+			return True
 		result = lib.ma_sound_start(self._sound)
 		return result == lib.MA_SUCCESS
 
+	@_traced
 	def pause(self) -> bool:
 		"""Pause the sound playback.
 		Returns:
 			True if successful, False otherwise.
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
 			return False
+		if self._defer(lib.SOUNDOBJ_COMMAND_STOP):
+			return True
 		result = lib.ma_sound_stop(self._sound)
 		return result == lib.MA_SUCCESS
 
@@ -572,7 +1639,7 @@ class Sound:
 		Returns:
 			Volume level as a float (0.0 to 1.0+).
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
 			return 0.0
 		return lib.ma_sound_get_volume(self._sound)
 
@@ -582,17 +1649,22 @@ class Sound:
 		Args:
 			value: Volume level as a float (0.0 to 1.0+).
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
+			return
+		if self._defer(lib.SOUNDOBJ_COMMAND_SET_VOLUME, value):
 			return
 		lib.ma_sound_set_volume(self._sound, value)
 
+	@_traced
 	def stop(self) -> bool:
 		"""Stop the sound playback completely.
 		Returns:
 			True if successful, False otherwise.
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
 			return False
+		if self._defer(lib.SOUNDOBJ_COMMAND_STOP):
+			return True
 		result = lib.ma_sound_stop(self._sound)
 		return result == lib.MA_SUCCESS
 
@@ -602,7 +1674,7 @@ class Sound:
 		Returns:
 			True if playing, False otherwise.
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
 			return False
 		return lib.ma_sound_is_playing(self._sound) == lib.MA_TRUE
 
@@ -612,7 +1684,7 @@ class Sound:
 		Returns:
 			True if looping, False otherwise.
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
 			return False
 		return lib.ma_sound_is_looping(self._sound) == lib.MA_TRUE
 
@@ -622,7 +1694,9 @@ class Sound:
 		Args:
 			value: True to enable looping, False to disable.
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
+			return
+		if self._defer(lib.SOUNDOBJ_COMMAND_SET_LOOPING, 1.0 if value else 0.0):
 			return
 		lib.ma_sound_set_looping(self._sound, lib.MA_TRUE if value else lib.MA_FALSE)
 
@@ -632,23 +1706,95 @@ class Sound:
 		Returns:
 			Length in seconds, or 0.0 if not loaded or unknown.
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
 			return 0.0
-		length_ptr = ffi.new("float*")
+		length_ptr = _scratch.floats
 		result = lib.ma_sound_get_length_in_seconds(self._sound, length_ptr)
 		if result == lib.MA_SUCCESS:
 			return length_ptr[0]
 		return 0.0
 
+	@property
+	def data_format(self) -> tuple[Optional[SampleFormat], int, int]:
+		"""Get the format of the audio this sound reads from its data source.
+		Returns:
+			Tuple of (format, channels, sample_rate), or (None, 0, 0) if not loaded.
+		"""
+		if not self._loaded:
+			return (None, 0, 0)
+		format_ptr = _scratch.format
+		channels_ptr, sample_rate_ptr = _scratch.uint32_ptrs
+		result = lib.ma_sound_get_data_format(self._sound, format_ptr, channels_ptr, sample_rate_ptr, ffi.NULL, 0)
+		if result != lib.MA_SUCCESS:
+			return (None, 0, 0)
+		return (SAMPLE_FORMAT_REVERSE_MAP.get(format_ptr[0]), channels_ptr[0], sample_rate_ptr[0])
+
+	@property
+	def conversions(self) -> list[str]:
+		"""Get the conversions the mixer applies to this sound on the audio thread, every period.
+		'format' means samples are converted to f32, 'sample_rate' that the data is resampled to the
+		engine's rate and 'channels' that frames are mixed from the sound's channel count to the
+		engine's through an intermediate buffer. An empty list means the sound is decoded straight into
+		the mixer's native format. A ResourceManager with matchEngine set, such as the one an engine
+		creates for itself, removes the first two.
+		Returns:
+			List of conversion names, empty if none or not loaded.
+		"""
+		format, channels, sample_rate = self.data_format
+		if not sample_rate:
+			return []
+		conversions = []
+		if format != SampleFormat.F32:
+			conversions.append('format')
+		if sample_rate != self.engine.sample_rate:
+			conversions.append('sample_rate')
+		if channels != self.engine.channels:
+			conversions.append('channels')
+		return conversions
+
+	@property
+	def stream_stats(self) -> Optional[StreamStats]:
+		"""Get streaming health for a sound loaded with a StreamConfig.
+		Returns:
+			StreamStats since the sound was loaded, or None if it isn't streamed that way.
+		"""
+		if self._stream is None:
+			return None
+		stats = ffi.new("soundobj_stream_stats*")
+		lib.soundobj_stream_get_stats(self._stream, stats)
+		return StreamStats(stats.starvations, stats.starvedFrames, stats.pagesDecoded, stats.bufferedFrames, stats.streamCount)
+
+	@property
+	def stream_priority(self) -> int:
+		"""Get the I/O priority of a sound loaded with a StreamConfig.
+		Returns:
+			Priority, or 0 if the sound isn't streamed that way.
+		"""
+		if self._stream is None:
+			return 0
+		return lib.soundobj_stream_get_priority(self._stream)
+
+	@stream_priority.setter
+	def stream_priority(self, value: int):
+		"""Set the I/O priority of a sound loaded with a StreamConfig. Takes effect from its next page.
+		Args:
+			value: Priority. Higher is decoded first.
+		Raises:
+			MiniAudioError: If the sound isn't streamed with a StreamConfig.
+		"""
+		if self._stream is None:
+			raise MiniAudioError("Sound is not streamed with a StreamConfig")
+		lib.soundobj_stream_set_priority(self._stream, value)
+
 	@property
 	def position_in_seconds(self) -> float:
 		"""Get the current playback position in seconds.
 		Returns:
 			Current position in seconds, or 0.0 if not loaded.
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
 			return 0.0
-		cursor_ptr = ffi.new("float*")
+		cursor_ptr = _scratch.floats
 		result = lib.ma_sound_get_cursor_in_seconds(self._sound, cursor_ptr)
 		if result == lib.MA_SUCCESS:
 			return cursor_ptr[0]
@@ -660,7 +1806,9 @@ class Sound:
 		Args:
 			value: Position in seconds to seek to.
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
+			return
+		if self._defer(lib.SOUNDOBJ_COMMAND_SEEK, value):
 			return
 		lib.ma_sound_seek_to_second(self._sound, value)
 
@@ -671,7 +1819,7 @@ class Sound:
 		Returns:
 			Pitch multiplier (1.0 = normal).
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
 			return 1.0
 		return lib.ma_sound_get_pitch(self._sound)
 
@@ -681,7 +1829,9 @@ class Sound:
 		Args:
 			value: Pitch multiplier (1.0 = normal, 2.0 = double speed/pitch, 0.5 = half speed/pitch).
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
+			return
+		if self._defer(lib.SOUNDOBJ_COMMAND_SET_PITCH, value):
 			return
 		lib.ma_sound_set_pitch(self._sound, value)
 
@@ -691,7 +1841,7 @@ class Sound:
 		Returns:
 			Pan value (-1.0 = full left, 0.0 = center, 1.0 = full right).
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
 			return 0.0
 		return lib.ma_sound_get_pan(self._sound)
 
@@ -701,7 +1851,9 @@ class Sound:
 		Args:
 			value: Pan value (-1.0 = full left, 0.0 = center, 1.0 = full right).
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
+			return
+		if self._defer(lib.SOUNDOBJ_COMMAND_SET_PAN, value):
 			return
 		lib.ma_sound_set_pan(self._sound, value)
 
@@ -711,7 +1863,7 @@ class Sound:
 		Returns:
 			Tuple of (x, y, z) coordinates.
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
 			return (0.0, 0.0, 0.0)
 		pos = lib.ma_sound_get_position(self._sound)
 		return (pos.x, pos.y, pos.z)
@@ -722,9 +1874,11 @@ class Sound:
 		Args:
 			value: Tuple of (x, y, z) coordinates.
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
 			return
 		x, y, z = value
+		if self._defer(lib.SOUNDOBJ_COMMAND_SET_POSITION, x, y, z):
+			return
 		lib.ma_sound_set_position(self._sound, x, y, z)
 
 	def fade_in(self, duration_ms: int, start_volume: float = 0.0, end_volume: float = 1.0) -> bool:
@@ -736,8 +1890,10 @@ class Sound:
 		Returns:
 			True if successful, False otherwise.
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
 			return False
+		if self._defer(lib.SOUNDOBJ_COMMAND_SET_FADE, start_volume, end_volume, duration_ms):
+			return True
 		lib.ma_sound_set_fade_in_milliseconds(self._sound, start_volume, end_volume, duration_ms)
 		return True
 
@@ -749,22 +1905,83 @@ class Sound:
 		Returns:
 			True if successful, False otherwise.
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
 			return False
+		# -1 starts from whatever the volume is when the fade is applied, which is what a queued fade needs.
+		if self._defer(lib.SOUNDOBJ_COMMAND_SET_FADE, -1.0, end_volume, duration_ms):
+			return True
 		current_volume = self.volume
 		lib.ma_sound_set_fade_in_milliseconds(self._sound, current_volume, end_volume, duration_ms)
 		return True
 
-	# Spatialization methods
-	@property
-	def spatialization_enabled(self) -> bool:
-		"""Check if 3D spatialization is enabled for this sound.
-		Returns:
-			True if spatialization is enabled, False otherwise.
+	def automate(self, parameter: AutomationParameter, points: list[Breakpoint], start: Optional[int] = None):
+		"""Schedule an automation curve for one of the sound's parameters, evaluated on the audio thread.
+		Replaces any curve already on the parameter. The parameter is left alone until the first breakpoint
+		and holds the last breakpoint's value afterwards. Volume is interpolated per sample through the
+		sound's fader, so it overrides fade_in/fade_out while the curve runs; pitch, pan and position are
+		updated once per period.
+		Args:
+			parameter: Parameter to automate.
+			points: Breakpoints in time order.
+			start: Engine time in PCM frames that breakpoint times count from (default: now).
+		Raises:
+			MiniAudioError: If the sound isn't loaded, its engine has been uninitialized, points is empty or out of order, or a value has the wrong shape.
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
-			return False
-		return lib.ma_sound_is_spatialization_enabled(self._sound) == lib.MA_TRUE
+		if not self._loaded:
+			raise MiniAudioError("Sound not loaded")
+		if self.engine._automation is None:
+			raise MiniAudioError("Engine is not initialized")
+		if not points:
+			raise MiniAudioError("An automation curve needs at least one breakpoint")
+		if start is None:
+			start = self.engine.time_in_pcm_frames
+		sample_rate = self.engine.sample_rate
+		positional = parameter == AutomationParameter.POSITION
+		c_points = ffi.new("soundobj_automation_point[]", len(points))
+		for c_point, point in zip(c_points, points):
+			if point.time < 0:
+				raise MiniAudioError("Breakpoint times can't be negative")
+			if positional != isinstance(point.value, (tuple, list)):
+				raise MiniAudioError(f"{parameter.value} breakpoints need {'an (x, y, z) tuple' if positional else 'a number'}")
+			c_point.frame = start + round(point.time * sample_rate)
+			c_point.value = tuple(point.value) if positional else (point.value, 0.0, 0.0)
+			c_point.shape = CURVE_SHAPE_MAP[point.shape]
+			c_point.control = point.control
+		result = lib.soundobj_automation_set(self.engine._automation, self._sound, AUTOMATION_PARAMETER_MAP[parameter], c_points, len(points))
+		if result != lib.MA_SUCCESS:
+			raise MiniAudioError(f"Failed to schedule automation: {result}")
+
+	def clear_automation(self, parameter: Optional[AutomationParameter] = None):
+		"""Remove an automation curve, leaving the parameter at its current value.
+		Args:
+			parameter: Parameter whose curve to remove (default: all of the sound's curves).
+		"""
+		if not self._loaded or self.engine._automation is None:
+			return
+		c_parameter = lib.SOUNDOBJ_AUTOMATION_PARAMETER_COUNT if parameter is None else AUTOMATION_PARAMETER_MAP[parameter]
+		lib.soundobj_automation_clear(self.engine._automation, self._sound, c_parameter)
+
+	def is_automating(self, parameter: AutomationParameter) -> bool:
+		"""Check whether a parameter has an automation curve that hasn't reached its last breakpoint.
+		Args:
+			parameter: Parameter to check.
+		Returns:
+			True if a curve is still running or waiting to start, False otherwise.
+		"""
+		if not self._loaded or self.engine._automation is None:
+			return False
+		return lib.soundobj_automation_is_active(self.engine._automation, self._sound, AUTOMATION_PARAMETER_MAP[parameter]) == lib.MA_TRUE
+
+	# Spatialization methods
+	@property
+	def spatialization_enabled(self) -> bool:
+		"""Check if 3D spatialization is enabled for this sound.
+		Returns:
+			True if spatialization is enabled, False otherwise.
+		"""
+		if not self._loaded:
+			return False
+		return lib.ma_sound_is_spatialization_enabled(self._sound) == lib.MA_TRUE
 
 	@spatialization_enabled.setter
 	def spatialization_enabled(self, value: bool):
@@ -772,7 +1989,7 @@ class Sound:
 		Args:
 			value: True to enable spatialization, False to disable.
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
 			return
 		lib.ma_sound_set_spatialization_enabled(self._sound, lib.MA_TRUE if value else lib.MA_FALSE)
 
@@ -782,7 +1999,7 @@ class Sound:
 		Returns:
 			Tuple of (x, y, z) direction components.
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
 			return (0.0, 0.0, 0.0)
 		dir_vec = lib.ma_sound_get_direction(self._sound)
 		return (dir_vec.x, dir_vec.y, dir_vec.z)
@@ -793,9 +2010,11 @@ class Sound:
 		Args:
 			value: Tuple of (x, y, z) direction components.
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
 			return
 		x, y, z = value
+		if self._defer(lib.SOUNDOBJ_COMMAND_SET_DIRECTION, x, y, z):
+			return
 		lib.ma_sound_set_direction(self._sound, x, y, z)
 
 	@property
@@ -804,7 +2023,7 @@ class Sound:
 		Returns:
 			Tuple of (x, y, z) velocity components.
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
 			return (0.0, 0.0, 0.0)
 		vel_vec = lib.ma_sound_get_velocity(self._sound)
 		return (vel_vec.x, vel_vec.y, vel_vec.z)
@@ -815,9 +2034,11 @@ class Sound:
 		Args:
 			value: Tuple of (x, y, z) velocity components.
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
 			return
 		x, y, z = value
+		if self._defer(lib.SOUNDOBJ_COMMAND_SET_VELOCITY, x, y, z):
+			return
 		lib.ma_sound_set_velocity(self._sound, x, y, z)
 
 	@property
@@ -826,7 +2047,7 @@ class Sound:
 		Returns:
 			AttenuationModel enum representing the attenuation model.
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
 			return AttenuationModel.NONE
 		model = lib.ma_sound_get_attenuation_model(self._sound)
 		return ATTENUATION_MODEL_REVERSE_MAP.get(model, AttenuationModel.NONE)
@@ -841,7 +2062,7 @@ class Sound:
 				- AttenuationModel.LINEAR or 'linear': Linear distance attenuation
 				- AttenuationModel.EXPONENTIAL or 'exponential': Exponential distance attenuation
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
 			return
 		if isinstance(value, str):
 			value = AttenuationModel(value)
@@ -854,7 +2075,7 @@ class Sound:
 		Returns:
 			PositioningMode enum representing the positioning mode.
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
 			return PositioningMode.ABSOLUTE
 		positioning = lib.ma_sound_get_positioning(self._sound)
 		return POSITIONING_MODE_REVERSE_MAP.get(positioning, PositioningMode.ABSOLUTE)
@@ -867,7 +2088,7 @@ class Sound:
 				- PositioningMode.ABSOLUTE or 'absolute': Absolute positioning in world space
 				- PositioningMode.RELATIVE or 'relative': Relative positioning to listener
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
 			return
 		if isinstance(value, str):
 			value = PositioningMode(value)
@@ -880,7 +2101,7 @@ class Sound:
 		Returns:
 			Rolloff factor.
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
 			return 1.0
 		return lib.ma_sound_get_rolloff(self._sound)
 
@@ -890,7 +2111,7 @@ class Sound:
 		Args:
 			value: Rolloff factor. Higher values mean more aggressive attenuation.
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
 			return
 		lib.ma_sound_set_rolloff(self._sound, value)
 
@@ -900,7 +2121,7 @@ class Sound:
 		Returns:
 			Minimum distance.
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
 			return 1.0
 		return lib.ma_sound_get_min_distance(self._sound)
 
@@ -910,7 +2131,7 @@ class Sound:
 		Args:
 			value: Minimum distance below which attenuation doesn't increase.
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
 			return
 		lib.ma_sound_set_min_distance(self._sound, value)
 
@@ -920,7 +2141,7 @@ class Sound:
 		Returns:
 			Maximum distance.
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
 			return 1000.0
 		return lib.ma_sound_get_max_distance(self._sound)
 
@@ -930,7 +2151,7 @@ class Sound:
 		Args:
 			value: Maximum distance beyond which attenuation doesn't increase further.
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
 			return
 		lib.ma_sound_set_max_distance(self._sound, value)
 
@@ -940,7 +2161,7 @@ class Sound:
 		Returns:
 			Minimum gain value.
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
 			return 0.0
 		return lib.ma_sound_get_min_gain(self._sound)
 
@@ -950,7 +2171,7 @@ class Sound:
 		Args:
 			value: Minimum gain value (0.0 to 1.0).
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
 			return
 		lib.ma_sound_set_min_gain(self._sound, value)
 
@@ -960,7 +2181,7 @@ class Sound:
 		Returns:
 			Maximum gain value.
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
 			return 1.0
 		return lib.ma_sound_get_max_gain(self._sound)
 
@@ -970,7 +2191,7 @@ class Sound:
 		Args:
 			value: Maximum gain value (0.0 to 1.0+).
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
 			return
 		lib.ma_sound_set_max_gain(self._sound, value)
 
@@ -980,11 +2201,9 @@ class Sound:
 		Returns:
 			Tuple of (inner_angle, outer_angle, outer_gain).
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
 			return (0.0, 0.0, 1.0)
-		inner_ptr = ffi.new("float*")
-		outer_ptr = ffi.new("float*")
-		gain_ptr = ffi.new("float*")
+		inner_ptr, outer_ptr, gain_ptr = _scratch.float_ptrs
 		lib.ma_sound_get_cone(self._sound, inner_ptr, outer_ptr, gain_ptr)
 		return (inner_ptr[0], outer_ptr[0], gain_ptr[0])
 
@@ -997,7 +2216,7 @@ class Sound:
 				- outer_angle: Outer cone angle in radians where sound starts to attenuate.
 				- outer_gain: Gain multiplier outside the outer cone (0.0 to 1.0).
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
 			return
 		inner_angle, outer_angle, outer_gain = value
 		lib.ma_sound_set_cone(self._sound, inner_angle, outer_angle, outer_gain)
@@ -1008,7 +2227,7 @@ class Sound:
 		Returns:
 			Doppler factor.
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
 			return 1.0
 		return lib.ma_sound_get_doppler_factor(self._sound)
 
@@ -1018,7 +2237,7 @@ class Sound:
 		Args:
 			value: Doppler factor (1.0 = normal, 0.0 = no Doppler effect).
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
 			return
 		lib.ma_sound_set_doppler_factor(self._sound, value)
 
@@ -1028,7 +2247,7 @@ class Sound:
 		Returns:
 			Directional attenuation factor.
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
 			return 1.0
 		return lib.ma_sound_get_directional_attenuation_factor(self._sound)
 
@@ -1038,7 +2257,7 @@ class Sound:
 		Args:
 			value: Directional attenuation factor (0.0 to 1.0).
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
 			return
 		lib.ma_sound_set_directional_attenuation_factor(self._sound, value)
 
@@ -1048,7 +2267,7 @@ class Sound:
 		Returns:
 			Tuple of (x, y, z) direction components pointing towards the listener.
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
 			return (0.0, 0.0, 0.0)
 		dir_vec = lib.ma_sound_get_direction_to_listener(self._sound)
 		return (dir_vec.x, dir_vec.y, dir_vec.z)
@@ -1059,7 +2278,7 @@ class Sound:
 		Returns:
 			Listener index, or -1 if not pinned.
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
 			return -1
 		return lib.ma_sound_get_pinned_listener_index(self._sound)
 
@@ -1069,7 +2288,7 @@ class Sound:
 		Args:
 			value: Index of the listener to pin to.
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
 			return
 		lib.ma_sound_set_pinned_listener_index(self._sound, value)
 
@@ -1079,12 +2298,1864 @@ class Sound:
 		Returns:
 			Listener index.
 		"""
-		if not hasattr(self, '_loaded') or not self._loaded:
+		if not self._loaded:
 			return 0
 		return lib.ma_sound_get_listener_index(self._sound)
 
+	@property
+	def lod_priority(self) -> float:
+		"""Get this sound's spatial LOD priority.
+		Returns:
+			Priority (1.0 = default).
+		"""
+		return self._lod_priority
+
+	@lod_priority.setter
+	def lod_priority(self, value: float):
+		"""Set this sound's spatial LOD priority. Its distance from the listener is divided by the priority
+		before being compared with the engine's LOD distances, so 2.0 keeps it at full detail twice as far
+		out and 0.0 keeps it at the minimal tier regardless of distance.
+		Args:
+			value: Priority, 0.0 or more.
+		"""
+		self._lod_priority = max(0.0, value)
+		if self.engine._lod is not None and self._loaded:
+			lib.soundobj_lod_set_priority(self.engine._lod, self._sound, self._lod_priority)
+
+	@property
+	def lod_tier(self) -> Optional[LodTier]:
+		"""Get the spatial LOD tier this sound is currently processed at.
+		While below LodTier.FULL, the engine owns this sound's Doppler factor (and, at LodTier.MINIMAL,
+		its pan and spatialization), restoring them on the way back up, so changes to those made in the
+		meantime are overridden.
+		Returns:
+			LodTier, or None if the sound isn't under LOD control.
+		"""
+		if self.engine._lod is None or not self._loaded:
+			return None
+		tier = lib.soundobj_lod_get_tier(self.engine._lod, self._sound)
+		return LOD_TIERS[tier] if tier >= 0 else None
+
+	@property
+	def meter(self) -> Optional['Meter']:
+		"""Get the meter on this sound's output.
+		Returns:
+			Meter, or None if metering is disabled.
+		"""
+		return self._meter
+
+	def enable_meter(self, bands: int = 0, window: float = METER_WINDOW) -> 'Meter':
+		"""Start metering this sound's output, after volume, pan and spatialization. Replaces any existing meter.
+		Args:
+			bands: Number of spectrum bands to compute (0 = levels only).
+			window: Seconds of audio each reading covers.
+		Returns:
+			The new Meter.
+		Raises:
+			MiniAudioError: If the sound isn't loaded or the meter cannot be created.
+		"""
+		if not self._loaded:
+			raise MiniAudioError("Sound is not loaded")
+		with _state_lock:
+			self.disable_meter()
+			self._meter = Meter(self, bands, window)
+			return self._meter
+
+	def disable_meter(self):
+		"""Stop metering this sound and take the meter out of the signal path."""
+		with _state_lock:
+			if self._meter is not None:
+				self._meter.close()
+				self._meter = None
+
+	@property
+	def convolver(self) -> Optional['Convolver']:
+		"""Get the convolver on this sound's output.
+		Returns:
+			Convolver, or None if convolution is disabled.
+		"""
+		return self._convolver
+
+	def enable_convolution(self, impulse: Union[str, 'DecodedAudio'], partition_size: int = CONVOLUTION_PARTITION_SIZE, wet: float = 1.0, dry: float = 1.0, normalize: bool = True) -> 'Convolver':
+		"""Convolve this sound's output with an impulse response, after volume, pan and spatialization. Replaces any existing convolver.
+		Args:
+			impulse: Path of the impulse response, or DecodedAudio holding it.
+			partition_size: Frames per partition, a power of two. Also the latency of the wet signal.
+			wet: Gain of the convolved signal.
+			dry: Gain of the unprocessed signal.
+			normalize: If True, scale the impulse response so its loudest channel has unit energy.
+		Returns:
+			The new Convolver.
+		Raises:
+			MiniAudioError: If the sound isn't loaded or the convolver cannot be created.
+		"""
+		if not self._loaded:
+			raise MiniAudioError("Sound is not loaded")
+		with _state_lock:
+			self.disable_convolution()
+			self._convolver = Convolver(impulse, self, partition_size, wet, dry, normalize)
+			return self._convolver
+
+	def disable_convolution(self):
+		"""Take the convolver out of this sound's signal path."""
+		with _state_lock:
+			if self._convolver is not None:
+				self._convolver.close()
+				self._convolver = None
+
+	@property
+	def occlusion(self) -> Optional[float]:
+		"""Get how much of this sound gets past scene geometry.
+		Returns:
+			Fraction of the sound transmitted (1.0 = nothing in the way), or None if the sound isn't part of a Geometry.
+		"""
+		if self._geometry is None:
+			return None
+		return self._geometry.transmission(self)
+
+
+class Playlist(Sound):
+	"""A queue of audio files played back to back without gaps.
+	Entries are streamed through the engine's resource manager. The next entry is opened and its
+	first pages decoded on a resource manager job thread while the current one is still playing,
+	and the switch between them happens inside the audio callback on the exact sample the current
+	entry ends, optionally crossfading. Appending never touches the disk on the calling thread.
+	Volume, pan, spatialization and the rest of Sound's controls apply to the playlist as a whole.
+	Args:
+		engine: Audio engine instance. If None, uses the global engine.
+		paths: Files to queue immediately.
+		crossfade: Crossfade between entries in seconds (0 = cut straight to the next entry).
+	Raises:
+		MiniAudioError: If the playlist cannot be created.
+	"""
+	__slots__ = ('_playlist', '_paths', '_crossfade')
+
+	def __init__(self, engine: Engine = None, paths=(), crossfade: float = 0.0):
+		if not engine:
+			engine = _global_engine
+		self.engine = engine
+		self.source = None
+		self._sound = None
+		self._loaded = False
+		self._meter = None
+		self._convolver = None
+		self._geometry = None
+		self._ambisonic_bus = None
+		self._lod_priority = 1.0
+		self._stream = None
+		self._playlist = None
+		self._paths = []
+		self._crossfade = 0.0
+		if not engine._initialized:
+			raise MiniAudioError("Engine is not initialized")
+		self._playlist = lib.soundobj_playlist_create(lib.ma_engine_get_resource_manager(engine._engine), engine.channels, engine.sample_rate)
+		if self._playlist == ffi.NULL:
+			self._playlist = None
+			raise MiniAudioError("Failed to create playlist")
+		self._sound = ffi.new("ma_sound*")
+		result = lib.ma_sound_init_from_data_source(engine._engine, self._playlist, 0, ffi.NULL, self._sound)
+		if result != lib.MA_SUCCESS:
+			lib.soundobj_playlist_destroy(self._playlist)
+			self._playlist = None
+			raise MiniAudioError(f"Failed to initialize playlist sound: {result}")
+		self._loaded = True
+		self._register_lod()
+		self.crossfade = crossfade
+		self.extend(paths)
+
+	def __del__(self):
+		"""Cleanup the playlist when the object is destroyed."""
+		# The sound must stop reading from the playlist before the playlist goes away.
+		super().__del__()
+		if getattr(self, '_playlist', None) is not None and lib is not None and self.engine._initialized:
+			lib.soundobj_playlist_destroy(self._playlist)
+
+	def load_from_file(self, filename: str, stream: bool = True, **flags) -> bool:
+		"""Queue a file. Playlist entries are always streamed.
+		Args:
+			filename: Path to the audio file to queue.
+			stream: Ignored.
+			**flags: Ignored. Voice flags apply to the playlist as a whole and are fixed when it is created.
+		Returns:
+			True if successful, False otherwise.
+		"""
+		return self.append(filename)
+
+	def append(self, path: str) -> bool:
+		"""Queue a file after the last entry.
+		Args:
+			path: Path to the audio file.
+		Returns:
+			True if successful, False otherwise.
+		"""
+		result = lib.soundobj_playlist_append(self._playlist, path.encode('utf-8'))
+		if result != lib.MA_SUCCESS:
+			return False
+		self._paths.append(path)
+		return True
+
+	def extend(self, paths) -> bool:
+		"""Queue several files in order.
+		Args:
+			paths: Iterable of paths to audio files.
+		Returns:
+			True if every file was queued, False otherwise.
+		"""
+		return all([self.append(path) for path in paths])
+
+	def clear(self):
+		"""Drop queued entries that haven't been opened yet.
+		The current entry and the one already prefetched after it still play.
+		"""
+		dropped = lib.soundobj_playlist_clear(self._playlist)
+		if dropped:
+			del self._paths[-dropped:]
+
+	def skip(self):
+		"""Cut to the next entry at the start of the next audio period."""
+		lib.soundobj_playlist_skip(self._playlist)
+
+	@property
+	def crossfade(self) -> float:
+		"""Get the crossfade between entries.
+		Returns:
+			Crossfade in seconds.
+		"""
+		return self._crossfade
+
+	@crossfade.setter
+	def crossfade(self, seconds: float):
+		"""Set the crossfade between entries. Only entries whose length is known are crossfaded.
+		Args:
+			seconds: Crossfade in seconds (0 = cut straight to the next entry).
+		"""
+		self._crossfade = max(0.0, seconds)
+		lib.soundobj_playlist_set_crossfade(self._playlist, int(self._crossfade * self.engine.sample_rate))
+
+	@property
+	def index(self) -> int:
+		"""Get the position of the current entry in the queue.
+		Returns:
+			Number of entries finished or skipped so far, including ones that failed to open.
+		"""
+		return lib.soundobj_playlist_get_index(self._playlist)
+
+	@property
+	def current(self) -> Optional[str]:
+		"""Get the entry playing, or about to play.
+		Returns:
+			Path of the current entry, or None once the queue is exhausted.
+		"""
+		index = self.index
+		return self._paths[index] if index < len(self._paths) else None
+
+	@property
+	def pending(self) -> int:
+		"""Get the number of queued entries not opened yet.
+		Returns:
+			Number of entries, excluding the current one and the one prefetched after it.
+		"""
+		return lib.soundobj_playlist_get_pending_count(self._playlist)
+
+
+@dataclass
+class MeterReading:
+	"""Levels from a Meter's most recent window. All values are linear, where 1.0 is full scale.
+	Attributes:
+		peak: Highest absolute sample per channel.
+		rms: RMS level per channel.
+		peak_hold: Highest peak per channel since the hold was last reset, so short transients
+			between readings are not missed.
+		bands: Loudest component in each log-spaced band from 20 Hz to Nyquist, measured on the
+			channels mixed to mono. Empty when the meter has no spectrum.
+		windows: Number of windows measured so far (0 = no audio has passed through yet).
+	"""
+	peak: tuple[float, ...]
+	rms: tuple[float, ...]
+	peak_hold: tuple[float, ...]
+	bands: tuple[float, ...]
+	windows: int
+
+
+class Meter:
+	"""Measures peak, RMS and optionally a band spectrum of a sound, group or the engine output.
+	All measurement happens in C on the audio thread. Each window's results are published to a
+	double-buffered snapshot that read() copies in one call without ever blocking the audio thread.
+	Levels cost a compare and a multiply-add per sample; the spectrum adds one 1024-point FFT per
+	window, independent of how often the device calls back. Usually created through
+	Sound.enable_meter() or Engine.enable_meter().
+	Args:
+		source: Sound to tap, Engine to meter the final output of, or a raw ma_sound_group pointer.
+			A meter created directly on a sound or group must be closed before its source is
+			destroyed; Sound.enable_meter() takes care of that.
+		bands: Number of spectrum bands to compute (0 = levels only, at most METER_MAX_BANDS).
+		window: Seconds of audio each reading covers.
+		engine: Engine a raw group pointer belongs to. If None, uses the global engine.
+	Raises:
+		MiniAudioError: If the meter cannot be created or attached.
+	"""
+
+	def __init__(self, source, bands: int = 0, window: float = METER_WINDOW, engine: Optional[Engine] = None):
+		if isinstance(source, Engine):
+			engine = source
+		elif isinstance(source, Sound):
+			engine = source.engine
+		elif engine is None:
+			engine = _global_engine
+		self._engine = None
+		self._state = None
+		self._closed = True
+		if not engine._initialized:
+			raise MiniAudioError("Engine is not initialized")
+		if not 0 <= bands <= METER_MAX_BANDS:
+			raise MiniAudioError(f"Meter bands must be between 0 and {METER_MAX_BANDS}")
+		node = source._sound if isinstance(source, Sound) else source
+		channels = engine.channels if isinstance(source, Engine) else lib.ma_node_get_output_channels(node, 0)
+		window_frames = max(1, int(window * engine.sample_rate))
+		self._meter = ffi.gc(lib.soundobj_meter_create(channels, engine.sample_rate, window_frames, bands), lib.soundobj_meter_destroy)
+		if self._meter == ffi.NULL:
+			raise MiniAudioError("Failed to create meter")
+		self._channels = channels
+		self._bands = bands
+		self._snapshot_size = lib.soundobj_meter_get_snapshot_size(self._meter)
+		self._out = ffi.new("float[]", self._snapshot_size + channels)
+		# Guards _out, which every read() fills.
+		self._lock = threading.Lock()
+		with _state_lock:
+			if isinstance(source, Engine):
+				# Only the engine state is kept, so the engine doesn't end up in a reference cycle with its own meter.
+				if engine._meter is not None:
+					engine._meter.close()
+				self._state = engine._state
+				lib.soundobj_engine_state_set_meter(self._state, self._meter)
+				engine._meter = self
+				self._owner = weakref.ref(engine)
+			else:
+				result = lib.soundobj_meter_attach(self._meter, lib.ma_engine_get_node_graph(engine._engine), node)
+				if result != lib.MA_SUCCESS:
+					raise MiniAudioError(f"Failed to attach meter: {result}")
+				# Keeps the node graph alive for as long as the meter is part of it.
+				self._engine = engine
+			self._closed = False
+
+	def __del__(self):
+		"""Take the meter out of the signal path when the object is destroyed."""
+		if lib is not None:
+			self.close()
+
+	def close(self):
+		"""Stop measuring. The source plays on unaffected, and the last reading stays available."""
+		with _state_lock:
+			if getattr(self, '_closed', True):
+				return
+			self._closed = True
+			if self._state is not None:
+				lib.soundobj_engine_state_set_meter(self._state, ffi.NULL)
+				engine = self._owner()
+				if engine is not None and engine._meter is self:
+					engine._meter = None
+			else:
+				# Past the engine being uninitialized at exit there is no graph left to detach from.
+				if self._engine._initialized:
+					lib.soundobj_meter_detach(self._meter)
+				self._engine = None
+
+	@property
+	def closed(self) -> bool:
+		"""Check whether the meter has stopped measuring.
+		Returns:
+			True after close(), or once a newer meter replaced it.
+		"""
+		return self._closed
+
+	@property
+	def channels(self) -> int:
+		"""Get the number of channels measured.
+		Returns:
+			Number of channels.
+		"""
+		return self._channels
+
+	@property
+	def bands(self) -> int:
+		"""Get the number of spectrum bands.
+		Returns:
+			Number of bands (0 = no spectrum).
+		"""
+		return self._bands
+
+	def read(self, reset_hold: bool = True) -> MeterReading:
+		"""Get the latest levels.
+		Args:
+			reset_hold: If True, start a new peak hold after reading.
+		Returns:
+			MeterReading for the most recent complete window.
+		"""
+		with self._lock:
+			windows = lib.soundobj_meter_read(self._meter, self._out, lib.MA_TRUE if reset_hold else lib.MA_FALSE)
+			values = ffi.unpack(self._out, self._snapshot_size + self._channels)
+		channels = self._channels
+		return MeterReading(
+			tuple(values[:channels]),
+			tuple(values[channels:channels * 2]),
+			tuple(values[self._snapshot_size:]),
+			tuple(values[channels * 2:self._snapshot_size]),
+			windows
+		)
+
+
+class Convolver:
+	"""Convolves a signal with an impulse response, for reverb from measured or rendered rooms.
+	Runs in C on the audio thread as a node in the engine's graph, using uniformly partitioned FFT
+	convolution: the impulse response is split into partitions of partition_size frames that are
+	transformed once, and each block of input costs two FFTs per channel plus one complex
+	multiply-add per bin and partition. Smaller partitions lower the latency of the wet signal and
+	raise the CPU cost. Once the input has been silent for longer than the impulse response, blocks
+	are skipped entirely, so idle convolvers are nearly free.
+	With a source, the convolver is spliced into its output like an insert effect. Without one, it is
+	a bus attached to the engine's endpoint that sounds and groups are routed into with add_input(),
+	so one convolver can serve as a shared room for many voices.
+	Args:
+		impulse: Path of the impulse response, decoded with the engine's decoders and converted to
+			the convolver's channel count and the engine's sample rate, or F32 DecodedAudio holding it.
+			A mono response is applied to every channel.
+		source: Sound or raw ma_sound_group pointer to splice into, or None for a standalone bus.
+			A convolver spliced into a sound or group must be closed before its source is destroyed;
+			Sound.enable_convolution() takes care of that.
+		partition_size: Frames per partition, a power of two between MIN_CONVOLUTION_PARTITION_SIZE
+			and MAX_CONVOLUTION_PARTITION_SIZE.
+		wet: Gain of the convolved signal.
+		dry: Gain of the unprocessed signal (default: 1.0 when spliced into a source, 0.0 for a bus).
+		normalize: If True, scale the impulse response so its loudest channel has unit energy.
+		engine: Engine for a bus or raw group pointer. If None, uses the global engine.
+	Raises:
+		MiniAudioError: If the impulse response cannot be loaded or the convolver cannot be created.
+	"""
+
+	def __init__(self, impulse: Union[str, 'DecodedAudio'], source=None, partition_size: int = CONVOLUTION_PARTITION_SIZE, wet: float = 1.0, dry: Optional[float] = None, normalize: bool = True, engine: Optional[Engine] = None):
+		if isinstance(source, Sound):
+			engine = source.engine
+		elif engine is None:
+			engine = _global_engine
+		self._convolver = None
+		self._engine = None
+		if not engine._initialized:
+			raise MiniAudioError("Engine is not initialized")
+		if partition_size & (partition_size - 1) or not MIN_CONVOLUTION_PARTITION_SIZE <= partition_size <= MAX_CONVOLUTION_PARTITION_SIZE:
+			raise MiniAudioError(f"Partition size must be a power of two between {MIN_CONVOLUTION_PARTITION_SIZE} and {MAX_CONVOLUTION_PARTITION_SIZE}")
+		node = source._sound if isinstance(source, Sound) else source
+		channels = engine.channels if node is None else lib.ma_node_get_output_channels(node, 0)
+		if isinstance(impulse, str):
+			impulse = decode(impulse, SampleFormat.F32, channels, engine.sample_rate)
+		elif impulse.format != SampleFormat.F32:
+			raise MiniAudioError("Impulse response must be F32")
+		data = impulse.data
+		if impulse.channels != channels:
+			data = convert_channels(data, impulse.channels, channels)
+		if impulse.sample_rate != engine.sample_rate:
+			data = resample(data, impulse.sample_rate, engine.sample_rate, channels)
+		buf, frame_count = _pcm_input(data, SampleFormat.F32, channels)
+		if frame_count == 0:
+			raise MiniAudioError("Impulse response is empty")
+		convolver_ptr = ffi.new("soundobj_convolver**")
+		result = lib.soundobj_convolver_create(
+			lib.ma_engine_get_node_graph(engine._engine),
+			ffi.cast("float*", buf),
+			frame_count,
+			channels,
+			partition_size,
+			lib.MA_TRUE if normalize else lib.MA_FALSE,
+			convolver_ptr
+		)
+		if result != lib.MA_SUCCESS:
+			raise MiniAudioError(f"Failed to create convolver: {result}")
+		self._convolver = convolver_ptr[0]
+		# Keeps the node graph alive for as long as the convolver is part of it.
+		self._engine = engine
+		self._channels = channels
+		self._partition_size = partition_size
+		if dry is None:
+			dry = 0.0 if node is None else 1.0
+		self._wet = wet
+		self._dry = dry
+		lib.soundobj_convolver_set_mix(self._convolver, wet, dry)
+		with _state_lock:
+			if node is None:
+				lib.ma_node_attach_output_bus(self._convolver, 0, lib.ma_engine_get_endpoint(engine._engine), 0)
+			else:
+				result = lib.soundobj_convolver_insert(self._convolver, node)
+				if result != lib.MA_SUCCESS:
+					self.close()
+					raise MiniAudioError(f"Failed to attach convolver: {result}")
+
+	def __del__(self):
+		"""Take the convolver out of the graph when the object is destroyed."""
+		if lib is not None:
+			self.close()
+
+	def close(self):
+		"""Remove the convolver from the graph. A source it was spliced into plays on dry; anything routed
+		into a bus with add_input() is left unattached and goes silent until routed elsewhere.
+		"""
+		with _state_lock:
+			if getattr(self, '_convolver', None) is None:
+				return
+			if self._engine._initialized:
+				lib.soundobj_convolver_destroy(self._convolver)
+			self._convolver = None
+			self._engine = None
+
+	@property
+	def closed(self) -> bool:
+		"""Check whether the convolver has been removed from the graph.
+		Returns:
+			True after close().
+		"""
+		return self._convolver is None
+
+	@property
+	def node(self):
+		"""Get the convolver's node, for wiring it into a custom node graph.
+		Returns:
+			ma_node pointer with one input and one output bus.
+		"""
+		return ffi.cast("ma_node*", self._convolver)
+
+	def add_input(self, source):
+		"""Route a sound or group into this convolver, replacing wherever its output was attached.
+		Args:
+			source: Sound or raw ma_sound_group pointer with the same channel count as the convolver.
+		Raises:
+			MiniAudioError: If the convolver is closed or the source cannot be attached.
+		"""
+		node = source._sound if isinstance(source, Sound) else source
+		if lib.ma_node_get_output_channels(node, 0) != self._channels:
+			raise MiniAudioError("Source channel count does not match the convolver")
+		with _state_lock:
+			if self._convolver is None:
+				raise MiniAudioError("Convolver is closed")
+			result = lib.ma_node_attach_output_bus(node, 0, self._convolver, 0)
+		if result != lib.MA_SUCCESS:
+			raise MiniAudioError(f"Failed to route into convolver: {result}")
+
+	@property
+	def channels(self) -> int:
+		"""Get the number of channels convolved.
+		Returns:
+			Number of channels.
+		"""
+		return self._channels
+
+	@property
+	def partition_size(self) -> int:
+		"""Get the number of frames per partition.
+		Returns:
+			Frames per partition.
+		"""
+		return self._partition_size
+
+	@property
+	def partition_count(self) -> int:
+		"""Get the number of partitions the impulse response was split into.
+		Returns:
+			Number of partitions.
+		"""
+		return lib.soundobj_convolver_get_partition_count(self._convolver) if self._convolver is not None else 0
+
+	@property
+	def latency(self) -> float:
+		"""Get the delay of the wet signal relative to the dry one.
+		Returns:
+			Latency in seconds.
+		"""
+		return self._partition_size / self._engine.sample_rate if self._engine is not None else 0.0
+
+	@property
+	def wet(self) -> float:
+		"""Get the gain of the convolved signal.
+		Returns:
+			Linear gain.
+		"""
+		return self._wet
+
+	@wet.setter
+	def wet(self, value: float):
+		"""Set the gain of the convolved signal.
+		Args:
+			value: Linear gain.
+		"""
+		self._wet = value
+		if self._convolver is not None:
+			lib.soundobj_convolver_set_mix(self._convolver, self._wet, self._dry)
+
+	@property
+	def dry(self) -> float:
+		"""Get the gain of the unprocessed signal.
+		Returns:
+			Linear gain.
+		"""
+		return self._dry
+
+	@dry.setter
+	def dry(self, value: float):
+		"""Set the gain of the unprocessed signal.
+		Args:
+			value: Linear gain.
+		"""
+		self._dry = value
+		if self._convolver is not None:
+			lib.soundobj_convolver_set_mix(self._convolver, self._wet, self._dry)
+
+
+def _flatten(items) -> list:
+	"""Flatten a sequence of tuples (or pass a flat sequence through) into a list of numbers."""
+	items = list(items)
+	if items and isinstance(items[0], (tuple, list)):
+		return [value for item in items for value in item]
+	return items
+
+
+class Geometry:
+	"""Scene geometry that occludes sounds behind walls.
+	Triangle meshes are gathered into a bounding volume hierarchy in C. Registered sounds get a gain
+	and a two-pole low-pass spliced into their output; each update casts a segment from every
+	sound's listener to the sound in one native batch and multiplies the transmission of each
+	surface crossed. The result sets the gain directly and the cutoff on a log scale from
+	min_cutoff (nothing gets through) up to no filtering (nothing in the way). Only sounds that are
+	new, have moved, whose listener has moved, or that predate a change to the meshes are re-tested,
+	and the audio thread glides to new values over one period. Sounds positioned relative to their
+	listener are never occluded.
+	Args:
+		engine: Engine the sounds play on. If None, uses the global engine.
+		min_cutoff: Low-pass cutoff in Hz when no sound gets through.
+		move_threshold: Distance a sound or listener has to move before it is re-tested.
+		update_interval: Seconds between updates on a background thread, or None to call update() yourself.
+	Raises:
+		MiniAudioError: If the geometry cannot be created.
+	"""
+
+	def __init__(self, engine: Optional[Engine] = None, min_cutoff: float = OCCLUSION_MIN_CUTOFF, move_threshold: float = OCCLUSION_MOVE_THRESHOLD, update_interval: Optional[float] = OCCLUSION_UPDATE_INTERVAL):
+		if engine is None:
+			engine = _global_engine
+		self._occlusion = None
+		self._stop = None
+		if not engine._initialized:
+			raise MiniAudioError("Engine is not initialized")
+		self._occlusion = lib.soundobj_occlusion_create(engine._engine, min_cutoff, move_threshold)
+		if self._occlusion == ffi.NULL:
+			self._occlusion = None
+			raise MiniAudioError("Failed to create geometry")
+		# Keeps the node graph alive for as long as occlusion nodes are part of it.
+		self._engine = engine
+		self._lock = threading.Lock()
+		self._mesh_ids = set()
+		if update_interval is not None:
+			self._stop = threading.Event()
+			threading.Thread(target=_geometry_update_loop, args=(weakref.ref(self), self._stop, update_interval), daemon=True).start()
+
+	def __del__(self):
+		"""Take every sound's occlusion out of the graph when the object is destroyed."""
+		if lib is not None:
+			self.close()
+
+	def close(self):
+		"""Stop occluding. Every registered sound plays on unfiltered."""
+		if getattr(self, '_occlusion', None) is None:
+			return
+		if self._stop is not None:
+			self._stop.set()
+		with _state_lock, self._lock:
+			if self._occlusion is None:
+				return
+			if self._engine._initialized:
+				lib.soundobj_occlusion_destroy(self._occlusion)
+			self._occlusion = None
+		self._engine = None
+
+	@property
+	def closed(self) -> bool:
+		"""Check whether the geometry has been closed.
+		Returns:
+			True after close().
+		"""
+		return self._occlusion is None
+
+	def add_mesh(self, vertices, indices=None, transmission: float = 0.0) -> int:
+		"""Add a triangle mesh. The hierarchy is rebuilt on the next update or query.
+		Args:
+			vertices: (x, y, z) tuples, or a flat sequence of coordinates.
+			indices: Vertex indices, three per triangle, as triples or a flat sequence. If None, every three
+				vertices form a triangle.
+			transmission: Fraction of sound one surface of the mesh lets through (0.0 = blocks everything).
+		Returns:
+			Id of the mesh, for remove_mesh().
+		Raises:
+			MiniAudioError: If the geometry is closed or the mesh is invalid.
+		"""
+		coordinates = _flatten(vertices)
+		vertex_count = len(coordinates) // 3
+		if indices is not None:
+			indices = _flatten(indices)
+			triangle_count = len(indices) // 3
+			indices_buf = ffi.new("ma_uint32[]", indices)
+		else:
+			triangle_count = vertex_count // 3
+			indices_buf = ffi.NULL
+		id_ptr = ffi.new("ma_uint32*")
+		with self._lock:
+			if self._occlusion is None:
+				raise MiniAudioError("Geometry is closed")
+			result = lib.soundobj_occlusion_add_mesh(self._occlusion, ffi.new("float[]", coordinates), vertex_count, indices_buf, triangle_count, transmission, id_ptr)
+		if result != lib.MA_SUCCESS:
+			raise MiniAudioError(f"Failed to add mesh: {result}")
+		self._mesh_ids.add(id_ptr[0])
+		return id_ptr[0]
+
+	def remove_mesh(self, mesh_id: int):
+		"""Remove a mesh added with add_mesh().
+		Args:
+			mesh_id: Id returned by add_mesh().
+		Raises:
+			MiniAudioError: If there is no such mesh.
+		"""
+		with self._lock:
+			if self._occlusion is None or lib.soundobj_occlusion_remove_mesh(self._occlusion, mesh_id) != lib.MA_SUCCESS:
+				raise MiniAudioError(f"No mesh with id {mesh_id}")
+		self._mesh_ids.discard(mesh_id)
+
+	@property
+	def mesh_count(self) -> int:
+		"""Get the number of meshes.
+		Returns:
+			Number of meshes.
+		"""
+		return len(self._mesh_ids)
+
+	@property
+	def triangle_count(self) -> int:
+		"""Get the number of triangles across all meshes.
+		Returns:
+			Number of triangles.
+		"""
+		with self._lock:
+			return lib.soundobj_occlusion_get_triangle_count(self._occlusion) if self._occlusion is not None else 0
+
+	def add(self, sound: Sound):
+		"""Occlude a sound. It moves over from any other Geometry it was part of.
+		Args:
+			sound: Loaded Sound on this geometry's engine.
+		Raises:
+			MiniAudioError: If the geometry is closed, the sound isn't loaded or it cannot be added.
+		"""
+		if not sound._loaded:
+			raise MiniAudioError("Sound is not loaded")
+		with _state_lock:
+			if sound._geometry is self:
+				return
+			if sound._geometry is not None:
+				sound._geometry.remove(sound)
+			with self._lock:
+				if self._occlusion is None:
+					raise MiniAudioError("Geometry is closed")
+				result = lib.soundobj_occlusion_add(self._occlusion, sound._sound)
+			if result != lib.MA_SUCCESS:
+				raise MiniAudioError(f"Failed to add sound to geometry: {result}")
+			sound._geometry = self
+
+	def remove(self, sound: Sound):
+		"""Stop occluding a sound. It plays on unfiltered.
+		Args:
+			sound: Sound added with add().
+		"""
+		with _state_lock:
+			if sound._geometry is not self:
+				return
+			sound._geometry = None
+			with self._lock:
+				if self._occlusion is not None:
+					lib.soundobj_occlusion_remove(self._occlusion, sound._sound)
+
+	def transmission(self, sound: Sound) -> Optional[float]:
+		"""Get the result of a sound's last test.
+		Args:
+			sound: Sound added with add().
+		Returns:
+			Fraction of the sound transmitted (1.0 until its first update), or None if it isn't part of this geometry.
+		"""
+		with self._lock:
+			if self._occlusion is None or sound._geometry is not self:
+				return None
+			value = lib.soundobj_occlusion_get_transmission(self._occlusion, sound._sound)
+		return value if value >= 0 else None
+
+	def update(self) -> int:
+		"""Re-test every sound that needs it. Called automatically when the geometry has an update interval.
+		Returns:
+			Number of rays cast.
+		"""
+		with self._lock:
+			# Sounds left registered when the engine was uninitialized at exit may already be freed.
+			if self._occlusion is None or not self._engine._initialized:
+				return 0
+			return lib.soundobj_occlusion_update(self._occlusion)
+
+	def query(self, origins, targets) -> list[float]:
+		"""Cast segments through the geometry in one batch, for line-of-sight checks of your own.
+		Args:
+			origins: (x, y, z) start points.
+			targets: (x, y, z) end points, one per origin.
+		Returns:
+			Fraction transmitted along each segment (1.0 = nothing in the way).
+		Raises:
+			MiniAudioError: If the geometry is closed or the sequences differ in length.
+		"""
+		origins = _flatten(origins)
+		targets = _flatten(targets)
+		if len(origins) != len(targets):
+			raise MiniAudioError("Origins and targets must have the same length")
+		count = len(origins) // 3
+		out = _new_uninitialized("float[]", count)
+		with self._lock:
+			if self._occlusion is None:
+				raise MiniAudioError("Geometry is closed")
+			lib.soundobj_occlusion_query(self._occlusion, ffi.new("float[]", origins), ffi.new("float[]", targets), count, out)
+		return ffi.unpack(out, count)
+
+
+class AmbisonicBus:
+	"""A shared sound field that sounds can be spatialized through instead of their own spatializers.
+	Each sound added is taken off the engine's mix, downmixed to mono and panned into its listener's
+	field of spherical harmonic components (4 at first order, 9 at second, 16 at third), which is decoded
+	once per period to the engine's channel layout. Distance attenuation follows each sound's own
+	attenuation model, rolloff, distances and gain limits; Doppler, cones and pan are not applied.
+	Meters, occlusion and convolvers on a sound keep working, before the bus.
+	This is a different rendering rather than a faster one: per sound, encoding costs a little more
+	than the spatializer at first order and more again at third, because the spatializer only pans
+	each sound for its closest listener to begin with.
+	Args:
+		engine: Engine the sounds play on. If None, uses the global engine.
+		order: Ambisonic order, 1 to AMBISONIC_MAX_ORDER. Higher orders localize more sharply.
+		min_channel_gain: Least any speaker gets of a sound, as a fraction of what the speaker facing it gets.
+	Raises:
+		MiniAudioError: If the arguments are out of range or the bus cannot be created.
+	"""
+
+	def __init__(self, engine: Optional[Engine] = None, order: int = 1, min_channel_gain: float = AMBISONIC_MIN_CHANNEL_GAIN):
+		if engine is None:
+			engine = _global_engine
+		self._ambisonic = None
+		if not engine._initialized:
+			raise MiniAudioError("Engine is not initialized")
+		if not 1 <= order <= AMBISONIC_MAX_ORDER:
+			raise MiniAudioError(f"Ambisonic order must be between 1 and {AMBISONIC_MAX_ORDER}")
+		if not 0.0 <= min_channel_gain <= 1.0:
+			raise MiniAudioError("Minimum channel gain must be between 0.0 and 1.0")
+		bus_ptr = ffi.new("soundobj_ambisonic**")
+		result = lib.soundobj_ambisonic_create(engine._engine, order, min_channel_gain, bus_ptr)
+		if result != lib.MA_SUCCESS:
+			raise MiniAudioError(f"Failed to create ambisonic bus: {result}")
+		self._ambisonic = bus_ptr[0]
+		# Keeps the node graph alive for as long as the bus is part of it.
+		self._engine = engine
+		self._order = order
+		self._lock = threading.Lock()
+		self._sounds = weakref.WeakSet()
+
+	def __del__(self):
+		"""Hand every sound back to its own spatializer when the object is destroyed."""
+		if lib is not None:
+			self.close()
+
+	def close(self):
+		"""Take the bus out of the graph. Every registered sound goes back to its own spatializer."""
+		if getattr(self, '_ambisonic', None) is None:
+			return
+		with _state_lock:
+			with self._lock:
+				if self._ambisonic is None:
+					return
+				initialized = self._engine._initialized
+				if initialized:
+					lib.soundobj_ambisonic_destroy(self._ambisonic)
+				self._ambisonic = None
+			for sound in list(self._sounds):
+				sound._ambisonic_bus = None
+				if initialized:
+					sound._register_lod()
+			self._sounds.clear()
+			self._engine = None
+
+	@property
+	def closed(self) -> bool:
+		"""Check whether the bus has been closed.
+		Returns:
+			True after close().
+		"""
+		return self._ambisonic is None
+
+	@property
+	def order(self) -> int:
+		"""Get the ambisonic order.
+		Returns:
+			Order, 1 to AMBISONIC_MAX_ORDER.
+		"""
+		return self._order
+
+	@property
+	def components(self) -> int:
+		"""Get the number of spherical harmonic components per listener.
+		Returns:
+			(order + 1) squared.
+		"""
+		return (self._order + 1) ** 2
+
+	@property
+	def sound_count(self) -> int:
+		"""Get the number of sounds spatialized through the bus.
+		Returns:
+			Number of sounds.
+		"""
+		with self._lock:
+			return lib.soundobj_ambisonic_get_emitter_count(self._ambisonic) if self._ambisonic is not None else 0
+
+	def add(self, sound: Sound):
+		"""Spatialize a sound through the bus. Its own spatializer is switched off, and it leaves spatial
+		LOD control, until it is removed. It moves over from any other AmbisonicBus it was part of.
+		Args:
+			sound: Loaded Sound on this bus's engine.
+		Raises:
+			MiniAudioError: If the bus is closed, the sound isn't loaded or it cannot be added.
+		"""
+		if not sound._loaded:
+			raise MiniAudioError("Sound is not loaded")
+		with _state_lock:
+			if sound._ambisonic_bus is self:
+				return
+			if sound._ambisonic_bus is not None:
+				sound._ambisonic_bus.remove(sound)
+			if sound.engine._lod is not None:
+				lib.soundobj_lod_remove(sound.engine._lod, sound._sound)
+			with self._lock:
+				if self._ambisonic is None:
+					result = None
+				else:
+					result = lib.soundobj_ambisonic_add(self._ambisonic, sound._sound)
+			if result != lib.MA_SUCCESS:
+				sound._register_lod()
+				if result is None:
+					raise MiniAudioError("Ambisonic bus is closed")
+				raise MiniAudioError(f"Failed to add sound to ambisonic bus: {result}")
+			sound._ambisonic_bus = self
+			self._sounds.add(sound)
+
+	def remove(self, sound: Sound):
+		"""Hand a sound back to its own spatializer, as it was before add().
+		Args:
+			sound: Sound added with add().
+		"""
+		with _state_lock:
+			if sound._ambisonic_bus is not self:
+				return
+			sound._ambisonic_bus = None
+			self._sounds.discard(sound)
+			with self._lock:
+				if self._ambisonic is not None:
+					lib.soundobj_ambisonic_remove(self._ambisonic, sound._sound)
+			sound._register_lod()
+
+
+class Recording:
+	"""A capture of an engine's final output to a WAV or FLAC file.
+	The audio thread copies each period into a lock-free ring buffer and never waits on anything;
+	output that doesn't fit while the disk falls behind is dropped and counted rather than glitching
+	playback. A background thread drains the buffer every RECORDING_FLUSH_INTERVAL seconds through a
+	1 MiB file buffer, so memory use is bounded and the disk sees large sequential writes. Usually
+	created through Engine.start_recording(). FLAC files hold integers, so F32 and S32 are written
+	to them as 24-bit.
+	Args:
+		engine: Engine to record.
+		path: Path of the file to write, FLAC if it ends in .flac and WAV otherwise. Overwritten if it exists.
+		format: Sample format of the file, SampleFormat enum or string (default: F32).
+		buffer_seconds: Seconds of output buffered in memory for the writer thread.
+	Raises:
+		MiniAudioError: If the file cannot be created.
+	"""
+
+	def __init__(self, engine: Engine, path: str, format: Union[SampleFormat, str] = SampleFormat.F32, buffer_seconds: float = RECORDING_BUFFER_SECONDS):
+		if isinstance(format, str):
+			format = SampleFormat(format)
+		self._recorder = None
+		if not engine._initialized:
+			raise MiniAudioError("Engine is not initialized")
+		recorder_ptr = ffi.new("soundobj_recorder**")
+		buffer_frames = max(1, int(buffer_seconds * engine.sample_rate))
+		flac = lib.MA_TRUE if path.lower().endswith('.flac') else lib.MA_FALSE
+		result = lib.soundobj_recorder_create(path.encode('utf-8'), SAMPLE_FORMAT_MAP[format], engine.channels, engine.sample_rate, buffer_frames, flac, recorder_ptr)
+		if result != lib.MA_SUCCESS:
+			raise MiniAudioError(f"Failed to start recording to {path}: {result}")
+		with _state_lock:
+			if engine._recording is not None:
+				engine._recording.stop()
+			self.path = path
+			self.format = format
+			self.channels = engine.channels
+			self.sample_rate = engine.sample_rate
+			self._recorder = recorder_ptr[0]
+			self._frames_written = 0
+			self._dropped_frames = 0
+			self._error = None
+			# Only the engine state is kept, so the engine doesn't end up in a reference cycle with its own recording.
+			self._state = engine._state
+			self._owner = weakref.ref(engine)
+			self._lock = threading.Lock()
+			self._stop = threading.Event()
+			self._writer = threading.Thread(target=self._write_loop, daemon=True)
+			self._writer.start()
+			lib.soundobj_engine_state_set_recorder(self._state, self._recorder)
+			engine._recording = self
+
+	def __del__(self):
+		"""Finish the file when the object is destroyed."""
+		if lib is not None and getattr(self, '_recorder', None) is not None:
+			try:
+				self.stop()
+			except MiniAudioError:
+				pass
+
+	def _write_loop(self):
+		"""Body of the writer thread. cffi releases the GIL for each flush."""
+		while not self._stop.wait(RECORDING_FLUSH_INTERVAL):
+			result = lib.soundobj_recorder_flush(self._recorder)
+			if result != lib.MA_SUCCESS:
+				self._error = result
+				return
+
+	def stop(self):
+		"""Stop recording, write out everything buffered and finalize the file. Safe to call more than once.
+		Raises:
+			MiniAudioError: If writing the file failed at any point.
+		"""
+		with self._lock:
+			if self._recorder is None:
+				return
+			lib.soundobj_engine_state_set_recorder(self._state, ffi.NULL)
+			self._stop.set()
+			if self._writer is not threading.current_thread():
+				self._writer.join()
+			# Flushed before the counters are read so they include what was still buffered.
+			result = lib.soundobj_recorder_flush(self._recorder)
+			self._frames_written = lib.soundobj_recorder_get_frames_written(self._recorder)
+			self._dropped_frames = lib.soundobj_recorder_get_dropped_frames(self._recorder)
+			destroy_result = lib.soundobj_recorder_destroy(self._recorder)
+			if result == lib.MA_SUCCESS:
+				result = destroy_result
+			self._recorder = None
+			engine = self._owner()
+			if engine is not None and engine._recording is self:
+				engine._recording = None
+		if self._error is None and result != lib.MA_SUCCESS:
+			self._error = result
+		if self._error is not None:
+			raise MiniAudioError(f"Failed to write recording to {self.path}: {self._error}")
+
+	@property
+	def active(self) -> bool:
+		"""Check whether output is still being recorded.
+		Returns:
+			True until stop().
+		"""
+		return self._recorder is not None
+
+	@property
+	def frames_written(self) -> int:
+		"""Get the number of frames written to the file so far.
+		Returns:
+			Frame count. Lags the output by up to RECORDING_FLUSH_INTERVAL while recording.
+		"""
+		with self._lock:
+			if self._recorder is None:
+				return self._frames_written
+			return lib.soundobj_recorder_get_frames_written(self._recorder)
+
+	@property
+	def dropped_frames(self) -> int:
+		"""Get the number of frames of output lost because the buffer was full.
+		Returns:
+			Frame count (0 = the recording is complete).
+		"""
+		with self._lock:
+			if self._recorder is None:
+				return self._dropped_frames
+			return lib.soundobj_recorder_get_dropped_frames(self._recorder)
+
+	@property
+	def length_in_seconds(self) -> float:
+		"""Get the length of audio written to the file so far.
+		Returns:
+			Length in seconds.
+		"""
+		return self.frames_written / self.sample_rate
+
+
+@dataclass
+class TraceEvent:
+	"""One event from a Tracer.
+	Attributes:
+		name: What happened: 'audio callback', 'mix', 'deadline miss', 'job: <type>', 'stream page',
+			'stream starvation', or the qualified name of a traced call such as 'Sound.load_from_file'.
+		timestamp: Seconds on the trace clock when it started.
+		duration: Seconds it took, or None for something that happened at an instant.
+		thread_id: Thread it happened on, comparable with threading.get_ident().
+		arg: Frames for audio and stream events, the ma_job_type for jobs, otherwise 0.
+	"""
+	name: str
+	timestamp: float
+	duration: Optional[float]
+	thread_id: int
+	arg: int
+
+
+class Tracer:
+	"""A flight recorder for finding where a hitch came from.
+	While running, audio callbacks, the mix, deadline misses, resource manager jobs, stream page decodes,
+	stream starvation and the blocking API calls (engine creation, loads, play/pause/stop, period changes)
+	are timestamped into a preallocated ring buffer along with the thread they happened on. The buffer
+	keeps the most recent capacity events and never blocks the audio thread. Only one tracer runs at a
+	time; starting one stops any other. With no tracer running, tracing costs a pointer check per event.
+	Export the result with export() and open it in ui.perfetto.dev or chrome://tracing to see the Python
+	threads, job threads and audio thread on one timeline.
+	Jobs are only traced for resource managers created by this module, since miniaudio's own job threads
+	can't be instrumented; an engine that fell back to miniaudio's internal resource manager traces
+	everything but its jobs.
+	Args:
+		capacity: Events kept, rounded up to a power of two.
+	Raises:
+		MiniAudioError: If the buffer cannot be allocated.
+	"""
+
+	def __init__(self, capacity: int = TRACE_CAPACITY):
+		global _tracer
+		self._tracer = None
+		if capacity <= 0:
+			raise MiniAudioError(f"Invalid trace capacity: {capacity}")
+		tracer = lib.soundobj_tracer_create(capacity)
+		if tracer == ffi.NULL:
+			raise MiniAudioError("Failed to allocate tracer")
+		self._tracer = tracer
+		self._capacity = 1 << (capacity - 1).bit_length()
+		self._events = None
+		self._dropped = 0
+		self._thread_names = {}
+		with _tracer_lock:
+			previous = _tracer
+			lib.soundobj_tracer_install(tracer)
+			_tracer = self
+		if previous is not None:
+			previous.stop()
+
+	def __del__(self):
+		"""Free the buffer when the object is destroyed."""
+		if lib is not None and getattr(self, '_tracer', None) is not None:
+			self.stop()
+			lib.soundobj_tracer_destroy(self._tracer)
+			self._tracer = None
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.stop()
+
+	def stop(self):
+		"""Stop recording, keeping the events recorded so far. Safe to call more than once."""
+		global _tracer
+		with _tracer_lock:
+			if self._events is not None:
+				return
+			if _tracer is self:
+				lib.soundobj_tracer_install(ffi.NULL)
+				_tracer = None
+			self._events, self._dropped = self._read()
+
+	@property
+	def active(self) -> bool:
+		"""Check whether events are still being recorded.
+		Returns:
+			True until stop(), or until another Tracer is started.
+		"""
+		return self._events is None
+
+	@property
+	def events(self) -> list[TraceEvent]:
+		"""Get the recorded events, oldest first.
+		Returns:
+			List of TraceEvent. While running, a snapshot of the events so far.
+		"""
+		if self._events is not None:
+			return self._events
+		return self._read()[0]
+
+	@property
+	def dropped(self) -> int:
+		"""Get the number of events overwritten because the buffer was full.
+		Returns:
+			Event count (0 = nothing was lost).
+		"""
+		if self._events is not None:
+			return self._dropped
+		return self._read()[1]
+
+	def _read(self) -> tuple[list[TraceEvent], int]:
+		"""Copy the events out of the ring buffer and note the names of the Python threads they might be from."""
+		self._thread_names.update((thread.ident, thread.name) for thread in threading.enumerate())
+		buf = _new_uninitialized("soundobj_trace_event[]", self._capacity)
+		dropped = ffi.new("ma_uint64*")
+		count = lib.soundobj_tracer_read(self._tracer, buf, self._capacity, dropped)
+		events = []
+		for i in range(count):
+			event = buf[i]
+			if event.name == lib.SOUNDOBJ_TRACE_JOB:
+				name = 'job: ' + (_TRACE_JOB_NAMES[event.arg] if event.arg < len(_TRACE_JOB_NAMES) else str(event.arg))
+			elif event.name < lib.SOUNDOBJ_TRACE_NAME_COUNT:
+				name = _TRACE_EVENT_NAMES[event.name]
+			else:
+				name = _traced_names[event.name - lib.SOUNDOBJ_TRACE_NAME_COUNT]
+			events.append(TraceEvent(name, event.timestamp, event.duration if event.duration >= 0 else None, event.threadId, event.arg))
+		return events, dropped[0]
+
+	def export(self, path: str):
+		"""Write the events as a Chrome trace, the JSON format read by Perfetto and chrome://tracing.
+		Python threads keep their names. The thread running audio callbacks is named "Audio thread" and
+		the threads running jobs "Job thread 1", "Job thread 2" and so on.
+		Args:
+			path: Path of the JSON file to write. Overwritten if it exists.
+		"""
+		events = self.events
+		pid = os.getpid()
+		tids = {}
+		roles = {}
+		trace = []
+		for event in events:
+			tid = tids.setdefault(event.thread_id, len(tids) + 1)
+			if event.name in ('audio callback', 'deadline miss', 'stream starvation'):
+				category = 'audio'
+				roles.setdefault(event.thread_id, 'audio')
+			elif event.name.startswith('job: ') or event.name == 'stream page':
+				category = 'job'
+				roles.setdefault(event.thread_id, 'job')
+			elif event.name == 'mix':
+				category = 'audio'
+			else:
+				category = 'api'
+			entry = {'name': event.name, 'cat': category, 'pid': pid, 'tid': tid, 'ts': event.timestamp * 1e6}
+			if event.duration is None:
+				entry['ph'] = 'i'
+				entry['s'] = 't'
+			else:
+				entry['ph'] = 'X'
+				entry['dur'] = event.duration * 1e6
+			# A job's arg is its type, already in its name.
+			if event.arg and not event.name.startswith('job: '):
+				entry['args'] = {'frames': event.arg}
+			trace.append(entry)
+		job_threads = 0
+		for thread_id, tid in tids.items():
+			name = self._thread_names.get(thread_id)
+			if name is None:
+				role = roles.get(thread_id)
+				if role == 'audio':
+					name = "Audio thread"
+				elif role == 'job':
+					job_threads += 1
+					name = f"Job thread {job_threads}"
+				else:
+					name = f"Thread {tid}"
+			trace.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}})
+		with open(path, 'w', encoding='utf-8') as f:
+			json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, f)
+
+
+def _pcm_input(data, format: SampleFormat, channels: int):
+	"""Wrap a buffer-protocol object for passing to C.
+	Returns:
+		Tuple of (cdata pointer, frame count).
+	"""
+	buf = ffi.from_buffer(data)
+	return buf, len(buf) // (channels * SAMPLE_FORMAT_SIZES[format])
+
+
+def _pcm_output(buf, frame_count: int, format: SampleFormat, channels: int) -> memoryview:
+	"""View the first `frame_count` frames of a cffi buffer as typed samples."""
+	size = frame_count * channels * SAMPLE_FORMAT_SIZES[format]
+	return memoryview(ffi.buffer(buf, size)).cast(SAMPLE_FORMAT_TYPECODES[format])
+
+
+@dataclass
+class DecodedAudio:
+	"""PCM frames decoded from a file.
+	Attributes:
+		data: Interleaved samples as a memoryview cast to the sample format (e.g. 'f' for F32, 'h' for S16).
+			It can be handed to array.array, numpy.frombuffer and the like without copying.
+		format: Sample format of `data`.
+		channels: Number of interleaved channels.
+		sample_rate: Sample rate in Hz.
+	"""
+	data: memoryview
+	format: SampleFormat
+	channels: int
+	sample_rate: int
+
+	@property
+	def frame_count(self) -> int:
+		"""Number of PCM frames in `data`."""
+		return len(self.data) // self.channels if self.channels else 0
+
+	@property
+	def length_in_seconds(self) -> float:
+		"""Duration of the decoded audio in seconds."""
+		return self.frame_count / self.sample_rate if self.sample_rate else 0.0
+
+
+def decode(path: str, format: Union[SampleFormat, str] = SampleFormat.F32, channels: int = 0, sample_rate: int = 0) -> DecodedAudio:
+	"""Decode an entire file to PCM without creating a Sound.
+	Uses the same decoders as the engine, including the Vorbis and Opus backends, and decodes
+	straight into a single preallocated buffer. The GIL is released for the duration of the decode.
+	Args:
+		path: Path to the audio file.
+		format: Output sample format, SampleFormat enum or string (default: F32).
+		channels: Output channel count (0 = the file's native channel count).
+		sample_rate: Output sample rate in Hz (0 = the file's native sample rate).
+	Returns:
+		DecodedAudio holding the decoded frames.
+	Raises:
+		MiniAudioError: If the file cannot be opened or decoded.
+	"""
+	if isinstance(format, str):
+		format = SampleFormat(format)
+	frames_ptr = ffi.new("void**")
+	frame_count_ptr = ffi.new("ma_uint64*")
+	format_ptr = ffi.new("ma_format*")
+	channels_ptr = ffi.new("ma_uint32*")
+	sample_rate_ptr = ffi.new("ma_uint32*")
+	result = lib.soundobj_decode_file(
+		path.encode('utf-8'),
+		SAMPLE_FORMAT_MAP[format],
+		channels,
+		sample_rate,
+		frames_ptr,
+		frame_count_ptr,
+		format_ptr,
+		channels_ptr,
+		sample_rate_ptr
+	)
+	if result != lib.MA_SUCCESS:
+		raise MiniAudioError(f"Failed to decode {path}: {result}")
+	out_format = SAMPLE_FORMAT_REVERSE_MAP[format_ptr[0]]
+	out_channels = channels_ptr[0]
+	frames = ffi.gc(frames_ptr[0], lib.soundobj_free)
+	return DecodedAudio(_pcm_output(frames, frame_count_ptr[0], out_format, out_channels), out_format, out_channels, sample_rate_ptr[0])
+
+
+def decode_many(paths, format: Union[SampleFormat, str] = SampleFormat.F32, channels: int = 0, sample_rate: int = 0, max_workers: Optional[int] = None) -> list[DecodedAudio]:
+	"""Decode several files in parallel on a thread pool.
+	Each decode runs with the GIL released, so files are decoded concurrently across cores.
+	Args:
+		paths: Iterable of file paths.
+		format: Output sample format, SampleFormat enum or string (default: F32).
+		channels: Output channel count (0 = each file's native channel count).
+		sample_rate: Output sample rate in Hz (0 = each file's native sample rate).
+		max_workers: Maximum number of worker threads (None = ThreadPoolExecutor default).
+	Returns:
+		List of DecodedAudio in the same order as `paths`.
+	Raises:
+		MiniAudioError: If any file cannot be opened or decoded.
+	"""
+	with ThreadPoolExecutor(max_workers=max_workers) as pool:
+		return list(pool.map(lambda path: decode(path, format, channels, sample_rate), paths))
+
+
+def resample(data, src_rate: int, dst_rate: int, channels: int = 1, format: Union[SampleFormat, str] = SampleFormat.F32, quality: int = DEFAULT_RESAMPLE_QUALITY) -> memoryview:
+	"""Resample a whole buffer of interleaved PCM in a single native call.
+	The GIL is released while resampling.
+	Args:
+		data: Any buffer-protocol object (bytes, array.array, numpy array, DecodedAudio.data, ...).
+		src_rate: Sample rate of `data` in Hz.
+		dst_rate: Desired sample rate in Hz.
+		channels: Number of interleaved channels in `data`.
+		format: Sample format of `data`, SampleFormat enum or string. Only S16 and F32 are supported.
+		quality: Low-pass filter order from 0 (fastest) to 8 (best).
+	Returns:
+		Memoryview of the resampled samples, cast to the sample format.
+	Raises:
+		MiniAudioError: If the resampler rejects the parameters.
+	"""
+	if isinstance(format, str):
+		format = SampleFormat(format)
+	frames_in, frame_count_in = _pcm_input(data, format, channels)
+	frame_count_out = (frame_count_in * dst_rate + src_rate - 1) // src_rate
+	frames_out = _new_uninitialized("char[]", max(frame_count_out, 1) * channels * SAMPLE_FORMAT_SIZES[format])
+	frame_count_ptr = ffi.new("ma_uint64*", frame_count_out)
+	result = lib.soundobj_resample(SAMPLE_FORMAT_MAP[format], channels, src_rate, dst_rate, quality, frames_in, frame_count_in, frames_out, frame_count_ptr)
+	if result != lib.MA_SUCCESS:
+		raise MiniAudioError(f"Failed to resample: {result}")
+	return _pcm_output(frames_out, frame_count_ptr[0], format, channels)
+
+
+def convert_channels(data, channels_in: int, channels_out: int, format: Union[SampleFormat, str] = SampleFormat.F32, mix_mode: Union[ChannelMixMode, str] = ChannelMixMode.RECTANGULAR) -> memoryview:
+	"""Convert a whole buffer of interleaved PCM between channel counts in a single native call.
+	The GIL is released while converting. Channel conversion carries no state between
+	calls, so chunked input can simply be converted chunk by chunk.
+	Args:
+		data: Any buffer-protocol object holding interleaved samples.
+		channels_in: Number of interleaved channels in `data`.
+		channels_out: Desired number of channels.
+		format: Sample format of `data`, SampleFormat enum or string. Only S16 and F32 are supported.
+		mix_mode: ChannelMixMode enum or string. Options:
+			- ChannelMixMode.RECTANGULAR or 'rectangular': Mix based on speaker position (default)
+			- ChannelMixMode.SIMPLE or 'simple': Drop excess channels and silence missing ones
+	Returns:
+		Memoryview of the converted samples, cast to the sample format.
+	Raises:
+		MiniAudioError: If the channel converter rejects the parameters.
+	"""
+	if isinstance(format, str):
+		format = SampleFormat(format)
+	if isinstance(mix_mode, str):
+		mix_mode = ChannelMixMode(mix_mode)
+	frames_in, frame_count = _pcm_input(data, format, channels_in)
+	frames_out = _new_uninitialized("char[]", max(frame_count, 1) * channels_out * SAMPLE_FORMAT_SIZES[format])
+	result = lib.soundobj_convert_channels(SAMPLE_FORMAT_MAP[format], channels_in, channels_out, CHANNEL_MIX_MODE_MAP[mix_mode], frames_in, frames_out, frame_count)
+	if result != lib.MA_SUCCESS:
+		raise MiniAudioError(f"Failed to convert channels: {result}")
+	return _pcm_output(frames_out, frame_count, format, channels_out)
+
+
+class Resampler:
+	"""Stateful resampler for chunked input.
+	Unlike `resample`, filter state carries over between calls to `process`, so a stream
+	can be fed in arbitrary chunks without clicks at the boundaries. The GIL is released
+	while each chunk is processed.
+	Args:
+		src_rate: Sample rate of the input in Hz.
+		dst_rate: Desired sample rate in Hz.
+		channels: Number of interleaved channels.
+		format: Sample format, SampleFormat enum or string. Only S16 and F32 are supported.
+		quality: Low-pass filter order from 0 (fastest) to 8 (best).
+	Raises:
+		MiniAudioError: If the resampler cannot be created.
+	"""
+	def __init__(self, src_rate: int, dst_rate: int, channels: int = 1, format: Union[SampleFormat, str] = SampleFormat.F32, quality: int = DEFAULT_RESAMPLE_QUALITY):
+		if isinstance(format, str):
+			format = SampleFormat(format)
+		self.src_rate = src_rate
+		self.dst_rate = dst_rate
+		self.channels = channels
+		self.format = format
+		self._resampler = lib.soundobj_resampler_create(SAMPLE_FORMAT_MAP[format], channels, src_rate, dst_rate, quality)
+		if self._resampler == ffi.NULL:
+			raise MiniAudioError("Failed to create resampler")
+		self._resampler = ffi.gc(self._resampler, lib.soundobj_resampler_destroy)
+		self._frame_count_in = ffi.new("ma_uint64*")
+		self._frame_count_out = ffi.new("ma_uint64*")
+		# Chunks have to go through the filter one at a time and in order.
+		self._lock = threading.Lock()
+
+	def process(self, data) -> memoryview:
+		"""Resample the next chunk of input.
+		Args:
+			data: Any buffer-protocol object holding the next interleaved samples.
+		Returns:
+			Memoryview of the resampled samples produced for this chunk.
+		Raises:
+			MiniAudioError: If resampling fails.
+		"""
+		frames_in, frame_count_in = _pcm_input(data, self.format, self.channels)
+		with self._lock:
+			# +1 covers rounding in the fractional read position between chunks
+			frame_count_out = lib.soundobj_resampler_get_expected_output_frame_count(self._resampler, frame_count_in) + 1
+			frames_out = _new_uninitialized("char[]", frame_count_out * self.channels * SAMPLE_FORMAT_SIZES[self.format])
+			self._frame_count_in[0] = frame_count_in
+			self._frame_count_out[0] = frame_count_out
+			result = lib.soundobj_resampler_process(self._resampler, frames_in, self._frame_count_in, frames_out, self._frame_count_out)
+			frames_written = self._frame_count_out[0]
+		if result != lib.MA_SUCCESS:
+			raise MiniAudioError(f"Failed to resample: {result}")
+		return _pcm_output(frames_out, frames_written, self.format, self.channels)
+
+
+@dataclass
+class Analysis:
+	"""Waveform peaks and loudness of an audio file, as computed by analyze().
+	Attributes:
+		content_hash: BLAKE2b hash of the file's bytes, hex encoded.
+		frame_count: Number of PCM frames in the file.
+		channels: Number of channels in the file.
+		sample_rate: Sample rate of the file in Hz.
+		peak_block: Frames covered by each min/max pair at the finest level of `peaks`.
+		peaks: Min/max pyramid, finest level first. Each level is bytes of signed 8-bit (min, max)
+			pairs taken over all channels, with 127 as full scale. Each pair at level i covers
+			peak_block << i frames; the last level is a single pair covering the whole file.
+		loudness: Integrated loudness in LUFS (ITU-R BS.1770-4), or -inf if the file is silent or
+			shorter than 400 ms.
+		true_peak: True peak in dBTP, measured 4x oversampled, or -inf if the file is silent.
+	"""
+	content_hash: str
+	frame_count: int
+	channels: int
+	sample_rate: int
+	peak_block: int
+	peaks: list[bytes]
+	loudness: float
+	true_peak: float
+
+	@property
+	def length_in_seconds(self) -> float:
+		"""Duration of the file in seconds."""
+		return self.frame_count / self.sample_rate if self.sample_rate else 0.0
+
+	def peaks_for(self, frames_per_point: int) -> memoryview:
+		"""Get the coarsest pyramid level with at least one pair every `frames_per_point` frames.
+		Args:
+			frames_per_point: Frames each point of the rendered waveform covers, e.g. frame_count // width.
+		Returns:
+			Memoryview of the level cast to signed bytes, alternating min and max.
+		"""
+		level = 0
+		while level + 1 < len(self.peaks) and self.peak_block << (level + 1) <= frames_per_point:
+			level += 1
+		return memoryview(self.peaks[level]).cast('b')
+
+
+def _split_peaks(data: bytes, frame_count: int, peak_block: int) -> list[bytes]:
+	"""Cut a pyramid stored back to back into its levels."""
+	levels = []
+	pairs = -(-frame_count // peak_block)
+	offset = 0
+	while pairs:
+		levels.append(data[offset:offset + pairs * 2])
+		offset += pairs * 2
+		pairs = (pairs + 1) // 2 if pairs > 1 else 0
+	return levels
+
+
+def _hash_file(path: str) -> str:
+	"""Hash a file's contents. hashlib releases the GIL for large updates, so this runs in parallel on a thread pool."""
+	digest = hashlib.blake2b(digest_size=16)
+	with open(path, 'rb') as f:
+		while chunk := f.read(ANALYSIS_HASH_CHUNK_SIZE):
+			digest.update(chunk)
+	return digest.hexdigest()
+
+
+class AnalysisIndex:
+	"""Sidecar store for analyze() and probe() results.
+	A single SQLite file. Analyses are stored under the hash of each file's bytes, so renamed and
+	duplicate files share one entry. The hash of every path is remembered alongside its size and
+	modification time, so files that haven't changed aren't even read again on later queries.
+	Probes are cheap enough that hashing would cost more than they do, so they are stored by path
+	and answered only while the file's size and modification time still match.
+	Safe to share between threads.
+	Args:
+		path: Index file to open, created if it doesn't exist.
+	"""
+	def __init__(self, path: str):
+		self.path = path
+		self._lock = threading.Lock()
+		self._db = sqlite3.connect(path, check_same_thread=False)
+		self._db.execute("PRAGMA journal_mode=WAL")
+		self._db.execute("CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, content_hash TEXT)")
+		self._db.execute(
+			"CREATE TABLE IF NOT EXISTS analyses (content_hash TEXT, peak_block INTEGER, frame_count INTEGER, channels INTEGER, "
+			"sample_rate INTEGER, loudness REAL, true_peak REAL, peaks BLOB, PRIMARY KEY (content_hash, peak_block))"
+		)
+		self._db.execute(
+			"CREATE TABLE IF NOT EXISTS probes (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, codec TEXT, format TEXT, "
+			"bits_per_sample INTEGER, channels INTEGER, sample_rate INTEGER, frame_count INTEGER, exact INTEGER)"
+		)
+		self._db.commit()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+	def close(self):
+		"""Write out pending results and close the index file."""
+		with self._lock:
+			if self._db is not None:
+				self._db.commit()
+				self._db.close()
+				self._db = None
+
+	def commit(self):
+		"""Write out results stored since the last commit."""
+		with self._lock:
+			self._db.commit()
+
+	def _cached_hash(self, path: str, stat: os.stat_result) -> Optional[str]:
+		"""Get the remembered hash of a path, if the file's size and modification time still match."""
+		with self._lock:
+			row = self._db.execute("SELECT content_hash FROM files WHERE path = ? AND size = ? AND mtime_ns = ?", (path, stat.st_size, stat.st_mtime_ns)).fetchone()
+		return row[0] if row else None
+
+	def _remember_hash(self, path: str, stat: os.stat_result, content_hash: str):
+		with self._lock:
+			self._db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)", (path, stat.st_size, stat.st_mtime_ns, content_hash))
+
+	def _load(self, content_hash: str, peak_block: int) -> Optional[Analysis]:
+		with self._lock:
+			row = self._db.execute(
+				"SELECT frame_count, channels, sample_rate, loudness, true_peak, peaks FROM analyses WHERE content_hash = ? AND peak_block = ?",
+				(content_hash, peak_block)
+			).fetchone()
+		if row is None:
+			return None
+		frame_count, channels, sample_rate, loudness, true_peak, peaks = row
+		return Analysis(content_hash, frame_count, channels, sample_rate, peak_block, _split_peaks(peaks, frame_count, peak_block), loudness, true_peak)
+
+	def _store(self, analysis: Analysis):
+		with self._lock:
+			self._db.execute(
+				"INSERT OR REPLACE INTO analyses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+				(analysis.content_hash, analysis.peak_block, analysis.frame_count, analysis.channels, analysis.sample_rate, analysis.loudness, analysis.true_peak, b"".join(analysis.peaks))
+			)
+
+	def _load_probe(self, path: str, stat: os.stat_result) -> Optional["AudioInfo"]:
+		"""Get the remembered probe of a path, if the file's size and modification time still match."""
+		with self._lock:
+			row = self._db.execute(
+				"SELECT codec, format, bits_per_sample, channels, sample_rate, frame_count, exact FROM probes WHERE path = ? AND size = ? AND mtime_ns = ?",
+				(path, stat.st_size, stat.st_mtime_ns)
+			).fetchone()
+		if row is None:
+			return None
+		codec, format, bits_per_sample, channels, sample_rate, frame_count, exact = row
+		return AudioInfo(Codec(codec), SampleFormat(format) if format else None, bits_per_sample, channels, sample_rate, frame_count, bool(exact))
+
+	def _store_probe(self, path: str, stat: os.stat_result, info: "AudioInfo"):
+		with self._lock:
+			self._db.execute(
+				"INSERT OR REPLACE INTO probes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+				(path, stat.st_size, stat.st_mtime_ns, info.codec.value, info.format.value if info.format else None, info.bits_per_sample, info.channels, info.sample_rate, info.frame_count, int(info.exact))
+			)
+
+
+def _analyze(path: str, index: Optional[AnalysisIndex], peak_block: int) -> Analysis:
+	"""analyze() without opening or committing the index."""
+	stat = os.stat(path)
+	content_hash = index._cached_hash(path, stat) if index else None
+	if content_hash is None:
+		content_hash = _hash_file(path)
+		if index:
+			index._remember_hash(path, stat, content_hash)
+	if index:
+		cached = index._load(content_hash, peak_block)
+		if cached is not None:
+			return cached
+	result_ptr = ffi.new("soundobj_analysis*")
+	result = lib.soundobj_analyze_file(path.encode('utf-8'), peak_block, result_ptr)
+	if result != lib.MA_SUCCESS:
+		raise MiniAudioError(f"Failed to analyze {path}: {result}")
+	try:
+		data = ffi.buffer(result_ptr.pPeaks, result_ptr.peakSize)[:]
+	finally:
+		lib.soundobj_free(result_ptr.pPeaks)
+	true_peak = 20 * math.log10(result_ptr.truePeak) if result_ptr.truePeak > 0 else -math.inf
+	analysis = Analysis(content_hash, result_ptr.frameCount, result_ptr.channels, result_ptr.sampleRate, peak_block, _split_peaks(data, result_ptr.frameCount, peak_block), result_ptr.loudness, true_peak)
+	if index:
+		index._store(analysis)
+	return analysis
+
+
+def analyze(path: str, index: Optional[Union[AnalysisIndex, str]] = None, peak_block: int = ANALYSIS_PEAK_BLOCK) -> Analysis:
+	"""Compute a file's waveform peak pyramid, integrated loudness and true peak.
+	The file is streamed through the same decoders as the engine in a single pass, with the GIL
+	released, so memory use doesn't grow with the file's length. With an index, a file whose
+	contents were analyzed before is answered from the index without decoding.
+	Args:
+		path: Path to the audio file.
+		index: AnalysisIndex, or the path of one to open, to look results up in and add them to.
+		peak_block: Frames covered by each min/max pair at the finest level of the pyramid.
+	Returns:
+		Analysis of the file.
+	Raises:
+		MiniAudioError: If the file cannot be opened or decoded.
+		OSError: If the file cannot be read.
+	"""
+	owned = isinstance(index, str)
+	if owned:
+		index = AnalysisIndex(index)
+	try:
+		analysis = _analyze(path, index, peak_block)
+		if index:
+			index.commit()
+		return analysis
+	finally:
+		if owned:
+			index.close()
+
+
+def analyze_many(paths, index: Optional[Union[AnalysisIndex, str]] = None, peak_block: int = ANALYSIS_PEAK_BLOCK, max_workers: Optional[int] = None) -> list[Analysis]:
+	"""Analyze several files in parallel on a thread pool.
+	Hashing and decoding both run with the GIL released, so files are analyzed concurrently
+	across cores. Results are committed to the index once at the end, including when a file fails.
+	Args:
+		paths: Iterable of file paths.
+		index: AnalysisIndex, or the path of one to open, to look results up in and add them to.
+		peak_block: Frames covered by each min/max pair at the finest level of the pyramid.
+		max_workers: Maximum number of worker threads (None = ThreadPoolExecutor default).
+	Returns:
+		List of Analysis in the same order as `paths`.
+	Raises:
+		MiniAudioError: If any file cannot be opened or decoded.
+		OSError: If any file cannot be read.
+	"""
+	owned = isinstance(index, str)
+	if owned:
+		index = AnalysisIndex(index)
+	try:
+		with ThreadPoolExecutor(max_workers=max_workers) as pool:
+			return list(pool.map(lambda path: _analyze(path, index, peak_block), paths))
+	finally:
+		if owned:
+			index.close()
+		elif index:
+			index.commit()
+
+
+@dataclass
+class AudioInfo:
+	"""Format and length of an audio file, as read from its headers by probe().
+	Attributes:
+		codec: Codec the file is encoded with.
+		format: Sample format the decoder produces when no conversion is asked for, or None for
+			24-bit PCM, which SampleFormat doesn't cover.
+		bits_per_sample: Bits per sample of that format.
+		channels: Number of channels.
+		sample_rate: Sample rate in Hz.
+		frame_count: Number of PCM frames the decoder produces, or 0 if the file doesn't say.
+		exact: False when frame_count is an estimate: an MP3 without a Xing, Info or VBRI header is
+			assumed to be constant bitrate, and some streams don't record their length at all.
+	"""
+	codec: Codec
+	format: Optional[SampleFormat]
+	bits_per_sample: int
+	channels: int
+	sample_rate: int
+	frame_count: int
+	exact: bool
+
+	@property
+	def length_in_seconds(self) -> float:
+		"""Duration of the file in seconds."""
+		return self.frame_count / self.sample_rate if self.sample_rate else 0.0
+
+
+def _probe(path: str, index: Optional[AnalysisIndex], scan: bool) -> AudioInfo:
+	"""probe() without opening or committing the index."""
+	stat = os.stat(path) if index else None
+	if index:
+		cached = index._load_probe(path, stat)
+		if cached is not None and (cached.exact or not scan):
+			return cached
+	info_ptr = ffi.new("soundobj_probe_info*")
+	result = lib.soundobj_probe_file(path.encode('utf-8'), lib.MA_TRUE if scan else lib.MA_FALSE, info_ptr)
+	if result != lib.MA_SUCCESS:
+		raise MiniAudioError(f"Failed to probe {path}: {result}")
+	info = AudioInfo(
+		CODEC_REVERSE_MAP.get(info_ptr.codec, Codec.UNKNOWN),
+		SAMPLE_FORMAT_REVERSE_MAP.get(info_ptr.format),
+		FORMAT_BITS.get(info_ptr.format, 0),
+		info_ptr.channels,
+		info_ptr.sampleRate,
+		info_ptr.frameCount,
+		bool(info_ptr.exact)
+	)
+	if index:
+		index._store_probe(path, stat, info)
+	return info
+
+
+def probe(path: str, index: Optional[Union[AnalysisIndex, str]] = None, scan: bool = False) -> AudioInfo:
+	"""Read a file's codec, native format, channels, sample rate and length without decoding it.
+	Only headers are read: WAV and FLAC store their length there, Ogg Vorbis and Opus files find it
+	from their last page, and MP3 files from the Xing, Info or VBRI header nearly every encoder
+	writes. An MP3 without one is estimated from its bitrate unless `scan` is set. The GIL is
+	released while the file is read. With an index, a file that hasn't changed since it was last
+	probed is answered without being opened.
+	Args:
+		path: Path to the audio file.
+		index: AnalysisIndex, or the path of one to open, to look results up in and add them to.
+		scan: Count an MP3's frames when its headers don't give its length, instead of estimating it.
+	Returns:
+		AudioInfo for the file.
+	Raises:
+		MiniAudioError: If the file cannot be opened or isn't a supported format.
+		OSError: If an index is used and the file doesn't exist.
+	"""
+	owned = isinstance(index, str)
+	if owned:
+		index = AnalysisIndex(index)
+	try:
+		info = _probe(path, index, scan)
+		if index:
+			index.commit()
+		return info
+	finally:
+		if owned:
+			index.close()
+
+
+def probe_many(paths, index: Optional[Union[AnalysisIndex, str]] = None, scan: bool = False, max_workers: Optional[int] = None) -> list[AudioInfo]:
+	"""Probe several files in parallel on a thread pool.
+	Files are opened and their headers read with the GIL released, so the time spent waiting on the
+	disk overlaps. Results are committed to the index once at the end, including when a file fails.
+	Args:
+		paths: Iterable of file paths.
+		index: AnalysisIndex, or the path of one to open, to look results up in and add them to.
+		scan: Count an MP3's frames when its headers don't give its length, instead of estimating it.
+		max_workers: Maximum number of worker threads (None = ThreadPoolExecutor default).
+	Returns:
+		List of AudioInfo in the same order as `paths`.
+	Raises:
+		MiniAudioError: If any file cannot be opened or isn't a supported format.
+		OSError: If an index is used and any file doesn't exist.
+	"""
+	owned = isinstance(index, str)
+	if owned:
+		index = AnalysisIndex(index)
+	try:
+		with ThreadPoolExecutor(max_workers=max_workers) as pool:
+			return list(pool.map(lambda path: _probe(path, index, scan), paths))
+	finally:
+		if owned:
+			index.close()
+		elif index:
+			index.commit()
+
+
 def play_sound(file_path: str, group=None) -> bool:
 	return _global_engine.play_sound(file_path, group)
 
 
+def _shutdown():
+	"""Stop every engine still alive at exit and its resource manager's job threads, then uninitialize them all.
+	Nothing collects _global_engine, or an engine kept in any other module global, before the interpreter starts finalizing,
+	which frees memory in no particular order while the devices and job threads would otherwise still be running.
+	"""
+	engines = [engine for engine in list(_engines) if engine._initialized]
+	resource_managers = list({id(engine._resource_manager): engine._resource_manager for engine in engines if engine._resource_manager is not None}.values())
+	for engine in engines:
+		engine._release_jobs()
+	# Nothing left needs a job, so the threads stop before anything they could be decoding into is uninitialized.
+	for resource_manager in resource_managers:
+		resource_manager._stop_job_threads()
+	for engine in engines:
+		engine._uninit()
+	for resource_manager in resource_managers:
+		resource_manager.close()
+
+
 _global_engine = Engine()
+atexit.register(_shutdown)